@@ -5,10 +5,19 @@ import os
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from app.cache import ResponseCache
+from app.database import init_engines, RoutingSession
+from app.metrics import Metrics
+from app.response_compression import ResponseCompression
+from app.storage import init_storage
 
 # Initialisation des extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
+cache = ResponseCache()
+tile_cache = ResponseCache(config_prefix='TILE_CACHE')
+metrics = Metrics()
+response_compression = ResponseCompression()
 
 def create_app(config_name=None):
     """
@@ -37,12 +46,32 @@ def create_app(config_name=None):
     # Initialisation des extensions avec l'application
     db.init_app(app)
     migrate.init_app(app, db)
+    init_engines(app, db)
+    cache.init_app(app)
+    tile_cache.init_app(app)
+    metrics.init_app(app, db)
+    response_compression.init_app(app)
+    init_storage(app)
     
     # Enregistrement des blueprints
     from app.routes import mission_routes, api_routes
     app.register_blueprint(mission_routes.bp)
     app.register_blueprint(api_routes.bp, url_prefix='/api')
-    
+
+    # Enregistrement des commandes CLI
+    from app.commands import register_commands
+    register_commands(app)
+
+    # Purge en arrière-plan des missions supprimées
+    if app.config['REAPER_ENABLED']:
+        from app.services.reaper_service import start_reaper
+        start_reaper(app)
+
+    # Contrôle d'intégrité en arrière-plan des fichiers stockés
+    if app.config['SCRUB_ENABLED']:
+        from app.services.scrub_service import start_scrubber
+        start_scrubber(app)
+
     # Route de base pour le tableau de bord
     @app.route('/')
     def index():
@@ -0,0 +1,216 @@
+"""
+Cache des réponses des routes API en lecture
+
+Les réponses JSON sont conservées en mémoire (par processus) avec une durée de
+vie limitée, indexées par route et paramètres de requête. Chaque entrée est
+associée à des étiquettes ('missions', 'mission:<id>') invalidées précisément
+par les écritures des services. Un ETag est calculé sur le contenu pour
+permettre aux clients de revalider avec If-None-Match (réponse 304), en
+comparaison faible : l'ETag d'une réponse compressée est rendu faible (voir
+app.response_compression).
+
+Les processus gunicorn partagent un fichier de synchronisation contenant un
+numéro de génération : toute invalidation l'incrémente (sous verrou de
+fichier), et les autres processus vident leur cache dès qu'ils constatent
+qu'il a changé. Contrairement à une date de modification, deux invalidations
+rapprochées ne peuvent pas se confondre.
+"""
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+from flask import request, current_app, make_response
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Largeur fixe du numéro de génération : une réécriture ne tronque jamais le fichier
+GENERATION_WIDTH = 20
+
+def _parse_generation(data):
+    try:
+        return int(data)
+    except ValueError:
+        return 0
+
+class ResponseCache:
+    """Cache LRU en mémoire des réponses API avec invalidation par étiquettes"""
+
+    def __init__(self, app=None, config_prefix='RESPONSE_CACHE'):
+        self.config_prefix = config_prefix
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._sync_file = None
+        self._sync_seen = None
+        self.ttl = 60
+        self.max_entries = 1024
+        self.enabled = True
+        self.counters = {'hits': 0, 'misses': 0, 'not_modified': 0, 'invalidations': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Configure le cache à partir de la configuration de l'application
+
+        Les réglages sont lus sous le préfixe du cache (RESPONSE_CACHE_TTL,
+        TILE_CACHE_TTL...), ce qui permet plusieurs caches indépendants.
+        """
+        prefix = self.config_prefix
+        self.enabled = app.config.get(f'{prefix}_ENABLED', True)
+        self.ttl = app.config.get(f'{prefix}_TTL', 60)
+        self.max_entries = app.config.get(f'{prefix}_MAX_ENTRIES', 1024)
+        self._sync_file = app.config.get(f'{prefix}_SYNC_FILE') or \
+            os.path.join(app.instance_path, f'{prefix.lower()}.sync')
+        self.clear()
+        app.extensions[prefix.lower()] = self
+
+    def _read_generation(self):
+        """Numéro de génération du fichier de synchronisation, ou None"""
+        try:
+            with open(self._sync_file, 'rb') as f:
+                return _parse_generation(f.read(GENERATION_WIDTH))
+        except (OSError, TypeError):
+            return None
+
+    def _sync(self):
+        """Vide le cache si un autre processus a invalidé des entrées"""
+        generation = self._read_generation()
+        if generation is None:
+            return
+        if self._sync_seen is None:
+            self._sync_seen = generation
+        elif generation != self._sync_seen:
+            self._sync_seen = generation
+            self._entries.clear()
+
+    def _notify(self):
+        """Signale une invalidation aux autres processus"""
+        if not self._sync_file:
+            return
+        try:
+            fd = os.open(self._sync_file, os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            generation = _parse_generation(os.read(fd, GENERATION_WIDTH))
+            # Invalidations des autres processus depuis la dernière lecture :
+            # elles doivent être appliquées avant d'avancer la génération vue
+            if self._sync_seen is not None and generation != self._sync_seen:
+                self._entries.clear()
+            generation += 1
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.write(fd, str(generation).zfill(GENERATION_WIDTH).encode())
+            self._sync_seen = generation
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def get(self, key):
+        """
+        Récupère une entrée valide du cache
+
+        Returns:
+            tuple: (contenu, status, mimetype, etag) ou None
+        """
+        with self._lock:
+            self._sync()
+            entry = self._entries.get(key)
+            if entry is None:
+                self.counters['misses'] += 1
+                return None
+
+            expires_at, tags, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.counters['misses'] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.counters['hits'] += 1
+            return value
+
+    def set(self, key, value, tags):
+        """Enregistre une entrée avec ses étiquettes d'invalidation"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, frozenset(tags), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *tags):
+        """Supprime les entrées portant au moins une des étiquettes"""
+        tags = set(tags)
+        with self._lock:
+            stale = [key for key, (_, entry_tags, _) in self._entries.items() if entry_tags & tags]
+            for key in stale:
+                del self._entries[key]
+            self.counters['invalidations'] += 1
+            self._notify()
+
+    def invalidate_mission(self, mission_id):
+        """Invalide la liste des missions et le détail d'une mission"""
+        self.invalidate('missions', f'mission:{mission_id}')
+
+    def clear(self):
+        """Vide entièrement le cache"""
+        with self._lock:
+            self._entries.clear()
+            self._notify()
+
+    def stats(self):
+        """Retourne les compteurs du cache"""
+        with self._lock:
+            lookups = self.counters['hits'] + self.counters['misses']
+            return dict(
+                self.counters,
+                entries=len(self._entries),
+                hit_ratio=round(self.counters['hits'] / lookups, 4) if lookups else None,
+                ttl=self.ttl
+            )
+
+    def cached(self, *tags):
+        """
+        Décorateur de mise en cache d'une route GET
+
+        Args:
+            *tags (str): Étiquettes d'invalidation, formatées avec les arguments
+                de la route (ex: 'mission:{mission_id}')
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return view(*args, **kwargs)
+
+                key = (request.path, tuple(sorted(request.args.items(multi=True))))
+                value = self.get(key)
+
+                if value is None:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200 or response.direct_passthrough:
+                        return response
+                    body = response.get_data()
+                    etag = hashlib.sha1(body).hexdigest()
+                    value = (body, response.status_code, response.mimetype, etag)
+                    self.set(key, value, [tag.format(**kwargs) for tag in tags])
+
+                body, status, mimetype, etag = value
+                if request.if_none_match.contains_weak(etag):
+                    with self._lock:
+                        self.counters['not_modified'] += 1
+                    response = current_app.response_class(status=304)
+                else:
+                    response = current_app.response_class(body, status=status, mimetype=mimetype)
+                response.set_etag(etag)
+                response.cache_control.no_cache = True
+                return response
+            return wrapper
+        return decorator
@@ -0,0 +1,186 @@
+"""
+Format colonnaire compact des longues listes de l'API
+
+Une liste de dictionnaires répète ses clés à chaque élément. Au format
+colonnaire, la réponse contient l'ordre des champs (fields) et, pour chaque
+champ, un tableau de valeurs parallèle aux autres (columns), encodé selon sa
+nature :
+
+- plain : valeurs telles quelles, {'encoding': 'plain', 'values': [...]} ;
+- dictionary : valeurs distinctes dans dictionary et, par élément, l'indice
+  de sa valeur, {'encoding': 'dictionary', 'dictionary': [...], 'indexes': [...]} ;
+- delta : écart de chaque entier avec le précédent entier non nul (le premier
+  avec 0), {'encoding': 'delta', 'values': [...]} ;
+- timestamp : dates et heures UTC converties en microsecondes depuis
+  l'epoch, puis encodées comme delta, avec 'unit': 'us'.
+
+Une valeur nulle reste null dans values, quel que soit l'encodage, sans
+modifier la base des écarts suivants. decode_columns reconstruit la liste
+de dictionnaires (dates au format ISO 8601, comme les to_dict des modèles).
+
+Les réponses peuvent aussi être sérialisées en MessagePack (paquet msgpack,
+optionnel) plutôt qu'en JSON : les entiers des colonnes y sont codés sur
+quelques octets.
+"""
+from datetime import datetime, timedelta
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+ENCODINGS = ('plain', 'dictionary', 'delta', 'timestamp')
+
+# Sérialisations des réponses et leur type de contenu
+BODY_ENCODINGS = {
+    'json': 'application/json',
+    'msgpack': 'application/x-msgpack'
+}
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def _deltas(values):
+    """Écarts successifs des valeurs non nulles"""
+    previous = 0
+    deltas = []
+    append = deltas.append
+    for value in values:
+        if value is None:
+            append(None)
+        else:
+            append(value - previous)
+            previous = value
+    return deltas
+
+def _cumulate(deltas):
+    """Inverse de _deltas"""
+    previous = 0
+    values = []
+    append = values.append
+    for delta in deltas:
+        if delta is None:
+            append(None)
+        else:
+            previous += delta
+            append(previous)
+    return values
+
+def encode_column(values, encoding):
+    """
+    Encode les valeurs d'un champ
+
+    Args:
+        values (list): Valeurs du champ, dans l'ordre des éléments
+        encoding (str): Encodage (voir ENCODINGS)
+
+    Returns:
+        dict: Colonne encodée
+
+    Raises:
+        ValueError: Si l'encodage est inconnu
+    """
+    if encoding == 'plain':
+        return {'encoding': 'plain', 'values': list(values)}
+    if encoding == 'dictionary':
+        dictionary = {}
+        indexes = [dictionary.setdefault(value, len(dictionary)) for value in values]
+        return {'encoding': 'dictionary', 'dictionary': list(dictionary), 'indexes': indexes}
+    if encoding == 'delta':
+        return {'encoding': 'delta', 'values': _deltas(values)}
+    if encoding == 'timestamp':
+        micros = [(value - EPOCH) // MICROSECOND if value is not None else None for value in values]
+        return {'encoding': 'timestamp', 'unit': 'us', 'values': _deltas(micros)}
+    raise ValueError(f"Encodage de colonne inconnu: {encoding}")
+
+def decode_column(column):
+    """
+    Décode une colonne produite par encode_column
+
+    Args:
+        column (dict): Colonne encodée
+
+    Returns:
+        list: Valeurs du champ (dates au format ISO 8601)
+
+    Raises:
+        ValueError: Si l'encodage est inconnu
+    """
+    encoding = column['encoding']
+    if encoding == 'plain':
+        return column['values']
+    if encoding == 'dictionary':
+        dictionary = column['dictionary']
+        return [dictionary[index] for index in column['indexes']]
+    if encoding == 'delta':
+        return _cumulate(column['values'])
+    if encoding == 'timestamp':
+        return [(EPOCH + value * MICROSECOND).isoformat() if value is not None else None
+                for value in _cumulate(column['values'])]
+    raise ValueError(f"Encodage de colonne inconnu: {encoding}")
+
+def encode_columns(serializer, rows, encodings):
+    """
+    Encode un lot de lignes au format colonnaire
+
+    Args:
+        serializer (RowSerializer): Champs extraits des lignes (app.read_models)
+        rows (list): Lignes renvoyées par un select()
+        encodings (dict): Encodage de chaque champ, plain par défaut
+
+    Returns:
+        dict: {'count', 'fields', 'columns'}
+    """
+    columns = serializer.columns(rows)
+    return {
+        'count': len(rows),
+        'fields': list(serializer.names),
+        'columns': [
+            encode_column(values, encodings.get(name, 'plain'))
+            for name, values in zip(serializer.names, columns)
+        ]
+    }
+
+def decode_columns(payload):
+    """
+    Reconstruit la liste de dictionnaires d'une réponse colonnaire
+
+    Args:
+        payload (dict): Réponse produite par encode_columns
+
+    Returns:
+        list: Un dictionnaire par élément
+    """
+    fields = payload['fields']
+    columns = [decode_column(column) for column in payload['columns']]
+    return [dict(zip(fields, values)) for values in zip(*columns)]
+
+def available_body_encodings():
+    """
+    Sérialisations des réponses utilisables dans l'environnement courant
+
+    Returns:
+        list: Noms des sérialisations
+    """
+    encodings = ['json']
+    if msgpack is not None:
+        encodings.append('msgpack')
+    return encodings
+
+def pack(payload):
+    """
+    Sérialise une réponse en MessagePack
+
+    Args:
+        payload (dict): Réponse (types JSON uniquement)
+
+    Returns:
+        bytes: Contenu MessagePack
+
+    Raises:
+        ValueError: Si le paquet msgpack n'est pas installé
+    """
+    if msgpack is None:
+        raise ValueError("La sérialisation msgpack nécessite le paquet msgpack")
+    return msgpack.packb(payload, use_bin_type=True)
@@ -0,0 +1,283 @@
+"""
+Commandes en ligne de commande (flask missions ...)
+"""
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+missions_cli = AppGroup('missions', help='Commandes de maintenance des missions')
+
+@missions_cli.command('reap')
+@click.option('--once', is_flag=True, help='Effectue un seul passage puis quitte')
+def reap_command(once):
+    """Purge en arrière-plan les fichiers des missions supprimées"""
+    from app.services.reaper_service import run_reaper, get_pending_deletions
+
+    app = current_app._get_current_object()
+    for deletion in get_pending_deletions():
+        click.echo(f"Mission {deletion['id']} ({deletion['name']}): "
+                   f"{deletion['files_purged']}/{deletion['files_total']} fichier(s) purgé(s)")
+
+    run_reaper(app, once=once)
+
+@missions_cli.command('import')
+@click.option('--workers', default=8, show_default=True, help='Nombre de threads de parcours du disque')
+@click.option('--full', is_flag=True,
+              help='Recherche les fichiers nouveaux et manquants dans tous les dossiers, même inchangés '
+                   'depuis le dernier import (les fichiers modifiés sur place sont toujours détectés)')
+@click.option('--dry-run', is_flag=True, help="Affiche les différences sans modifier la base")
+@click.option('--skip-metadata', is_flag=True, help='N\'extrait pas les métadonnées des CSV importés')
+def import_command(workers, full, dry_run, skip_metadata):
+    """Importe les missions et fichiers déjà présents dans UPLOAD_FOLDER"""
+    from app.services.import_service import import_missions
+
+    try:
+        stats = import_missions(
+            workers=workers,
+            full=full,
+            dry_run=dry_run,
+            extract_metadata=not skip_metadata
+        )
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+
+    click.echo(f"{stats['missions_created']} mission(s) créée(s), "
+               f"{stats['files_added']} fichier(s) ajouté(s), "
+               f"{stats['files_updated']} fichier(s) mis à jour")
+    click.echo(f"{stats['dirs_scanned']} dossier(s) parcouru(s), "
+               f"{stats['dirs_unchanged']} inchangé(s)")
+    if stats['files_skipped']:
+        click.echo(f"{stats['files_skipped']} fichier(s) ignoré(s) (format non autorisé)")
+    if stats['files_missing']:
+        click.echo(f"{stats['files_missing']} fichier(s) enregistré(s) absent(s) du disque")
+
+@missions_cli.command('rebuild-stats')
+def rebuild_stats_command():
+    """Recalcule les agrégats du tableau de bord et les séries par date de vol à partir de la base"""
+    from app.services.stats_service import rebuild_stats
+
+    count = rebuild_stats()
+    click.echo(f"{count} agrégat(s) recalculé(s)")
+
+@missions_cli.command('rebuild-map')
+def rebuild_map_command():
+    """Recalcule la position et l'emprise des missions sur la carte"""
+    from app.services.map_service import rebuild_locations
+
+    count = rebuild_locations()
+    click.echo(f"{count} mission(s) localisée(s)")
+
+@missions_cli.command('du')
+@click.option('--mission', 'mission_name', help='Limite la réconciliation à une mission')
+@click.option('--workers', default=8, show_default=True, help='Nombre de threads de parcours du disque')
+@click.option('--drift-only', is_flag=True, help='N\'affiche que les missions incohérentes')
+def du_command(mission_name, workers, drift_only):
+    """Compare l'espace enregistré de chaque mission avec le disque"""
+    from app.models import Mission
+    from app.services.storage_service import reconcile_storage
+
+    mission_id = None
+    if mission_name:
+        mission = Mission.active().filter_by(name=mission_name).first()
+        if mission is None:
+            raise click.ClickException(f"Mission {mission_name} introuvable")
+        mission_id = mission.id
+
+    report = reconcile_storage(mission_id, workers=workers)
+    inconsistent = 0
+    for mission in report:
+        if not mission['consistent']:
+            inconsistent += 1
+        elif drift_only:
+            continue
+        flag = 'ok' if mission['consistent'] else 'ÉCART'
+        click.echo(f"{mission['disk_allocated']:>15}  {mission['disk_bytes']:>15}  "
+                   f"{mission['db_bytes']:>15}  {mission['drift_bytes']:>+13}  {flag:5}  {mission['name']}")
+    click.echo(f"{len(report)} mission(s) parcourue(s), {inconsistent} incohérente(s) "
+               f"(colonnes : alloué, apparent, enregistré, écart)")
+
+@missions_cli.command('drift')
+@click.option('--mission', 'mission_name', help='Limite la détection à une mission')
+@click.option('--after', 'after_id', type=int, help="Reprend après la mission d'ID donné")
+@click.option('--fix-missing', is_flag=True, help='Oublie les fichiers absents du stockage et corrige les tailles')
+@click.option('--orphans', type=click.Choice(['register', 'delete']),
+              help='Enregistre en base ou supprime du stockage les fichiers orphelins')
+@click.option('--verbose', is_flag=True, help='Liste chaque écart')
+def drift_command(mission_name, after_id, fix_missing, orphans, verbose):
+    """Détecte les écarts entre la base et les dossiers des missions"""
+    from app.models import Mission
+    from app.services.drift_service import reconcile_missions, find_unknown_directories, UnsortedStreamError
+
+    mission_id = None
+    if mission_name:
+        mission = Mission.active().filter_by(name=mission_name).first()
+        if mission is None:
+            raise click.ClickException(f"Mission {mission_name} introuvable")
+        mission_id = mission.id
+
+    missions = inconsistent = 0
+    try:
+        for report in reconcile_missions(mission_id, after_id, fix_missing, orphans):
+            missions += 1
+            if report['consistent']:
+                continue
+            inconsistent += 1
+            fixed = report['fixed']
+            click.echo(f"{report['missing_count']:>9}  {report['orphans_count']:>9}  {report['resized_count']:>9}  "
+                       f"{report['mission_id']:>7}  {report['name']}"
+                       + (f"  (corrigés : {fixed['missing']} oublié(s), {fixed['resized']} taille(s), "
+                          f"{fixed['registered']} enregistré(s), {fixed['deleted']} supprimé(s))"
+                          if any(fixed.values()) else ''))
+            if verbose:
+                for category in ('missing', 'orphans', 'resized'):
+                    for item in report[category]:
+                        click.echo(f"    {category:8} {item['file_path']}")
+    except UnsortedStreamError as e:
+        raise click.ClickException(str(e))
+
+    if mission_id is None and after_id is None:
+        for root, name in find_unknown_directories():
+            click.echo(f"Dossier sans mission : {root}/{name}")
+    click.echo(f"{missions} mission(s) parcourue(s), {inconsistent} incohérente(s) "
+               f"(colonnes : manquants, orphelins, tailles différentes, ID)")
+
+@missions_cli.command('rebalance')
+@click.option('--workers', default=4, show_default=True, help='Nombre de threads de copie')
+@click.option('--dry-run', is_flag=True, help='Affiche les déplacements prévus sans les effectuer')
+def rebalance_command(workers, dry_run):
+    """Répartit les fichiers entre les volumes de stockage (STORAGE_VOLUMES)"""
+    from app.services.volume_service import rebalance_volumes, get_volume_usage
+
+    try:
+        stats = rebalance_volumes(workers=workers, dry_run=dry_run)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+
+    action = 'à déplacer' if dry_run else 'déplacé(s)'
+    click.echo(f"{stats['files']} fichier(s) {action} ({stats['bytes']} octets, {stats['missions']} mission(s))")
+    if stats['errors']:
+        click.echo(f"{stats['errors']} fichier(s) non déplacé(s) (voir le journal)")
+    for volume in get_volume_usage():
+        click.echo(f"{volume['bytes']:>15}  {volume['files']:>9}  {volume['disk']['free']:>15}  {volume['name']}")
+
+@missions_cli.command('compress')
+@click.option('--workers', default=4, show_default=True, help='Nombre de threads de compression')
+@click.option('--codec', type=click.Choice(['auto', 'zstd', 'xz', 'gzip']), help='Codec (COMPRESSION_CODEC par défaut)')
+@click.option('--level', type=int, help='Niveau de compression')
+@click.option('--min-age', 'min_age_days', type=int, help='Inactivité minimale des missions en jours')
+@click.option('--limit', type=int, help='Nombre maximal de fichiers examinés')
+@click.option('--dry-run', is_flag=True, help='Compte les fichiers éligibles sans les compresser')
+def compress_command(workers, codec, level, min_age_days, limit, dry_run):
+    """Compresse les fichiers texte des missions inactives"""
+    from app.services.compression_service import compress_cold_files
+
+    try:
+        stats = compress_cold_files(workers=workers, codec=codec, level=level,
+                                    min_age_days=min_age_days, limit=limit, dry_run=dry_run)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    if dry_run:
+        click.echo(f"{stats['files']} fichier(s) éligible(s) ({stats['codec']})")
+        return
+    click.echo(f"{stats['compressed']} fichier(s) compressé(s) ({stats['codec']}) : "
+               f"{stats['bytes']} -> {stats['stored_bytes']} octets")
+    if stats['kept']:
+        click.echo(f"{stats['kept']} fichier(s) conservé(s) tel(s) quel(s) (gain insuffisant)")
+    if stats['errors']:
+        click.echo(f"{stats['errors']} fichier(s) en erreur (voir le journal)")
+    if stats['deleted']:
+        click.echo(f"{stats['deleted']} fichier(s) supprimé(s) pendant la compression")
+
+@missions_cli.command('index-rinex')
+@click.option('--mission', 'mission_name', help="Limite l'indexation à une mission")
+@click.option('--reindex', is_flag=True, help='Réindexe aussi les fichiers déjà indexés')
+def index_rinex_command(mission_name, reindex):
+    """Indexe les époques des fichiers d'observation RINEX (données PPK)"""
+    from app.models import Mission
+    from app.services.rinex_service import index_missing_files
+
+    mission_id = None
+    if mission_name:
+        mission = Mission.active().filter_by(name=mission_name).first()
+        if mission is None:
+            raise click.ClickException(f"Mission {mission_name} introuvable")
+        mission_id = mission.id
+
+    stats = index_missing_files(mission_id, reindex=reindex)
+    click.echo(f"{stats['indexed']} fichier(s) RINEX indexé(s)")
+    if stats['skipped']:
+        click.echo(f"{stats['skipped']} fichier(s) ignoré(s) (pas un fichier d'observation RINEX lisible)")
+
+@missions_cli.command('geotag')
+@click.option('--mission', 'mission_name', help='Limite le géoréférencement à une mission')
+@click.option('--offset', 'time_offset', type=float, help='Décalage en secondes ajouté aux dates EXIF (GEOTAG_TIME_OFFSET par défaut)')
+@click.option('--max-gap', type=float, help='Écart maximal entre deux positions encadrantes en secondes (GEOTAG_MAX_GAP par défaut)')
+def geotag_command(mission_name, time_offset, max_gap):
+    """Place les images des missions sur leur trajectoire (PPK ou géoréférencement)"""
+    from app.models import Mission
+    from app.services.geotag_service import geotag_missions
+
+    mission_id = None
+    if mission_name:
+        mission = Mission.active().filter_by(name=mission_name).first()
+        if mission is None:
+            raise click.ClickException(f"Mission {mission_name} introuvable")
+        mission_id = mission.id
+
+    stats = geotag_missions(mission_id, time_offset, max_gap)
+    click.echo(f"{stats['missions']} mission(s) géoréférencée(s) : "
+               f"{stats['matched']}/{stats['images']} image(s) placée(s)")
+    if stats['without_trajectory']:
+        click.echo(f"{stats['without_trajectory']} mission(s) sans trajectoire")
+
+@missions_cli.command('scrub')
+@click.option('--once', is_flag=True, help='Termine le passage en cours (ou en effectue un) puis quitte')
+@click.option('--restart', is_flag=True, help='Abandonne le passage en cours et en commence un nouveau')
+@click.option('--limit', type=int, help='Nombre maximal de fichiers contrôlés (le passage reprendra ensuite)')
+@click.option('--workers', type=int, help='Nombre de threads de lecture (SCRUB_WORKERS par défaut)')
+@click.option('--bandwidth', type=float, help='Débit de lecture maximal en Mo/s, 0 sans limite (SCRUB_BANDWIDTH par défaut)')
+def scrub_command(once, restart, limit, workers, bandwidth):
+    """Vérifie l'intégrité des fichiers stockés (empreintes, fichiers manquants et orphelins)"""
+    from app.services.scrub_service import scrub, run_scrubber
+
+    if not once and limit is None and not restart and workers is None and bandwidth is None:
+        run_scrubber(current_app._get_current_object())
+        return
+
+    run = scrub(max_files=limit, workers=workers, bandwidth=bandwidth, restart=restart)
+    state = 'terminé' if run.finished_at else f'interrompu après le fichier {run.last_file_id}'
+    click.echo(f"Passage {run.id} {state} : {run.files_checked} fichier(s) contrôlé(s) "
+               f"({run.bytes_checked} octets), {run.baselined} empreinte(s) enregistrée(s)")
+    click.echo(f"{run.missing} manquant(s), {run.corrupted} corrompu(s), {run.unreadable} illisible(s), "
+               f"{run.orphaned} orphelin(s)")
+
+@missions_cli.command('export')
+@click.option('--format', 'file_format', type=click.Choice(['ndjson', 'geojson', 'parquet', 'arrow']),
+              default='ndjson', show_default=True, help="Format de l'export (parquet et arrow nécessitent pyarrow)")
+@click.option('--kind', type=click.Choice(['missions', 'files']), default='missions', show_default=True,
+              help='Une ligne par mission ou par fichier')
+@click.option('--no-files', is_flag=True, help='Ne joint pas la liste des fichiers aux missions (NDJSON)')
+@click.option('--output', type=click.Path(dir_okay=False, allow_dash=True), default='-', show_default=True,
+              help='Fichier de sortie (- pour la sortie standard)')
+def export_command(file_format, kind, no_files, output):
+    """Exporte le catalogue des missions actives (NDJSON, GeoJSON, Parquet ou Arrow)"""
+    from app.services.export_service import export_catalog
+
+    try:
+        chunks = export_catalog(file_format, kind, include_files=not no_files)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    with click.open_file(output, 'wb') as target:
+        for chunk in chunks:
+            target.write(chunk)
+
+def register_commands(app):
+    """
+    Enregistre les commandes CLI de l'application
+
+    Args:
+        app (Flask): Application Flask
+    """
+    app.cli.add_command(missions_cli)
@@ -0,0 +1,114 @@
+"""
+Compression des fichiers de mission stockés
+
+Les fichiers texte (journaux, CSV de géoréférencement, observations RINEX)
+peuvent être compressés sur le stockage sans changer l'API : la taille
+d'origine reste dans File.file_size, la taille stockée dans
+File.stored_size, et le contenu est décompressé à la lecture, par blocs.
+
+Codecs : zstd (paquet zstandard, optionnel) ou, à défaut, xz et gzip de la
+bibliothèque standard. Le fichier compressé porte le suffixe de son codec.
+"""
+import io
+import gzip
+import lzma
+import shutil
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Taille des blocs lus lors de la compression
+CHUNK_SIZE = 1024 * 1024
+
+# Suffixe ajouté au nom du fichier compressé
+SUFFIXES = {
+    'zstd': '.zst',
+    'xz': '.xz',
+    'gzip': '.gz'
+}
+
+# Niveaux par défaut, privilégiant le taux de compression (données froides)
+DEFAULT_LEVELS = {
+    'zstd': 19,
+    'xz': 6,
+    'gzip': 9
+}
+
+def available_codecs():
+    """
+    Codecs utilisables dans l'environnement courant
+
+    Returns:
+        list: Noms des codecs, le plus performant en premier
+    """
+    codecs = ['xz', 'gzip']
+    if zstandard is not None:
+        codecs.insert(0, 'zstd')
+    return codecs
+
+def resolve_codec(codec='auto'):
+    """
+    Choisit le codec à utiliser
+
+    Args:
+        codec (str): Nom du codec, ou 'auto' pour zstd s'il est installé, xz sinon
+
+    Returns:
+        str: Nom du codec
+
+    Raises:
+        ValueError: Si le codec est inconnu ou indisponible
+    """
+    if codec in (None, '', 'auto'):
+        return available_codecs()[0]
+    if codec not in SUFFIXES:
+        raise ValueError(f"Codec de compression inconnu: {codec}")
+    if codec not in available_codecs():
+        raise ValueError(f"Le codec {codec} nécessite le paquet zstandard (pip install zstandard)")
+    return codec
+
+def compress_stream(codec, source, target, level=None):
+    """
+    Compresse un flux binaire dans un autre, par blocs
+
+    Args:
+        codec (str): Nom du codec
+        source: Flux lu
+        target: Flux écrit (laissé ouvert)
+        level (int, optional): Niveau de compression
+    """
+    level = DEFAULT_LEVELS[codec] if level is None else level
+    if codec == 'zstd':
+        compressor = zstandard.ZstdCompressor(level=level)
+        compressor.copy_stream(source, target, read_size=CHUNK_SIZE)
+        return
+
+    if codec == 'xz':
+        writer = lzma.LZMAFile(target, 'wb', preset=level)
+    else:
+        writer = gzip.GzipFile(fileobj=target, mode='wb', compresslevel=level, mtime=0)
+    with writer:
+        shutil.copyfileobj(source, writer, CHUNK_SIZE)
+
+def decompressing_reader(codec, source):
+    """
+    Enveloppe un flux compressé pour le lire décompressé
+
+    Args:
+        codec (str): Nom du codec
+        source: Flux binaire compressé
+
+    Returns:
+        Flux binaire décompressé (read), à fermer après usage
+    """
+    if codec == 'zstd':
+        # Mis en mémoire tampon pour permettre la lecture ligne par ligne
+        reader = zstandard.ZstdDecompressor().stream_reader(source, read_size=CHUNK_SIZE, closefd=False)
+        return io.BufferedReader(reader, CHUNK_SIZE)
+    if codec == 'xz':
+        return lzma.LZMAFile(source, 'rb')
+    if codec == 'gzip':
+        return gzip.GzipFile(fileobj=source, mode='rb')
+    raise ValueError(f"Codec de compression inconnu: {codec}")
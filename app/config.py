@@ -6,6 +6,26 @@ from datetime import timedelta
 
 basedir = os.path.abspath(os.path.dirname(__file__))
 
+def engine_options_from_env():
+    """
+    Options du pool de connexions SQLAlchemy lues depuis l'environnement
+    
+    Chaque worker gunicorn possède son propre pool : le nombre maximal de
+    connexions ouvertes vaut workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW).
+    """
+    return {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),  # en secondes
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),  # en secondes
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true',
+    }
+
+def replica_binds_from_env():
+    """Moteur de lecture optionnel (DATABASE_REPLICA_URL)"""
+    replica_url = os.environ.get('DATABASE_REPLICA_URL')
+    return {'replica': replica_url} if replica_url else {}
+
 class Config:
     """Configuration de base partagée par tous les environnements"""
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-key-please-change-in-production'
@@ -21,13 +41,114 @@ class Config:
         'images': {'jpg', 'jpeg', 'png', 'tif', 'tiff'},
         'logs': {'tlog', 'log', 'txt'},
         'geopos': {'csv', 'txt', 'gpx', 'kml'},
-        'ppk': {'obs', 'nav', 'sp3', 'rinex'},
+        'ppk': {'obs', 'nav', 'sp3', 'rinex', 'pos'},
         'rapport': {'pdf', 'docx', 'xlsx', 'zip'}
     }
     
+    # Stockage des fichiers : 'local' (UPLOAD_FOLDER) ou 's3' (bucket S3 ou compatible, nécessite boto3)
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'local')
+    # Disques supplémentaires en stockage local (« nom=chemin,nom=chemin ») et placement
+    # des fichiers : free-space, round-robin ou affinity (tous les fichiers d'une mission
+    # sur le même volume)
+    STORAGE_VOLUMES = os.environ.get('STORAGE_VOLUMES', '')
+    STORAGE_PLACEMENT = os.environ.get('STORAGE_PLACEMENT', 'free-space')
+    S3_BUCKET = os.environ.get('S3_BUCKET')
+    S3_PREFIX = os.environ.get('S3_PREFIX', '')
+    S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL')  # MinIO, Ceph... (AWS si vide)
+    S3_REGION = os.environ.get('S3_REGION')
+    S3_ACCESS_KEY_ID = os.environ.get('S3_ACCESS_KEY_ID')
+    S3_SECRET_ACCESS_KEY = os.environ.get('S3_SECRET_ACCESS_KEY')
+    # Envoi en plusieurs parties au-delà du seuil, par parties de S3_MULTIPART_CHUNKSIZE octets
+    S3_MULTIPART_THRESHOLD = int(os.environ.get('S3_MULTIPART_THRESHOLD', 8 * 1024 * 1024))
+    S3_MULTIPART_CHUNKSIZE = int(os.environ.get('S3_MULTIPART_CHUNKSIZE', 16 * 1024 * 1024))
+    S3_MAX_CONCURRENCY = int(os.environ.get('S3_MAX_CONCURRENCY', 4))
+    
     # Configuration pour SQLAlchemy
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    
+    # Réplica en lecture seule pour les listes et recherches
+    SQLALCHEMY_BINDS = replica_binds_from_env()
+
+    # Suppression asynchrone des missions
+    # Corbeille (par défaut UPLOAD_FOLDER/.trash, doit être sur le même volume)
+    TRASH_FOLDER = os.environ.get('TRASH_FOLDER')
+    # Nombre de fichiers supprimés par lot et pause entre deux lots (secondes)
+    REAPER_BATCH_SIZE = int(os.environ.get('REAPER_BATCH_SIZE', 500))
+    REAPER_BATCH_INTERVAL = float(os.environ.get('REAPER_BATCH_INTERVAL', 0.2))
+    # Démarrage d'un thread de purge dans le processus web
+    REAPER_ENABLED = os.environ.get('REAPER_ENABLED', 'false').lower() == 'true'
+    REAPER_POLL_INTERVAL = int(os.environ.get('REAPER_POLL_INTERVAL', 30))
+
+    # Compression des données froides (flask missions compress)
+    # Codec : auto (zstd si le paquet zstandard est installé, xz sinon), zstd, xz ou gzip
+    COMPRESSION_CODEC = os.environ.get('COMPRESSION_CODEC', 'auto')
+    # Missions sans téléversement depuis ce nombre de jours
+    COMPRESSION_MIN_AGE_DAYS = int(os.environ.get('COMPRESSION_MIN_AGE_DAYS', 30))
+    COMPRESSION_FILE_TYPES = ('logs', 'geopos', 'ppk')
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 64 * 1024))  # en octets
+
+    # Géoréférencement des images (flask missions geotag)
+    # Décalage en secondes ajouté aux dates EXIF pour les ramener à l'heure de la trajectoire
+    GEOTAG_TIME_OFFSET = float(os.environ.get('GEOTAG_TIME_OFFSET', 0))
+    # Écart maximal entre les deux positions qui encadrent une image (secondes)
+    GEOTAG_MAX_GAP = float(os.environ.get('GEOTAG_MAX_GAP', 5))
+
+    # Contrôle d'intégrité des fichiers (flask missions scrub)
+    # Démarrage d'un thread de contrôle dans le processus web
+    SCRUB_ENABLED = os.environ.get('SCRUB_ENABLED', 'false').lower() == 'true'
+    SCRUB_WORKERS = int(os.environ.get('SCRUB_WORKERS', 4))
+    # Débit de lecture cumulé des threads en Mo/s (0 : pas de limite)
+    SCRUB_BANDWIDTH = float(os.environ.get('SCRUB_BANDWIDTH', 20))
+    # Fichiers contrôlés entre deux enregistrements de la progression
+    SCRUB_BATCH_SIZE = int(os.environ.get('SCRUB_BATCH_SIZE', 200))
+    # Délai entre la fin d'un passage et le début du suivant
+    SCRUB_INTERVAL_HOURS = float(os.environ.get('SCRUB_INTERVAL_HOURS', 168))
+    SCRUB_POLL_INTERVAL = int(os.environ.get('SCRUB_POLL_INTERVAL', 60))
+
+    # Profil de performance SQLite (appliqué à chaque connexion)
+    SQLITE_PERFORMANCE_PROFILE = os.environ.get('SQLITE_PERFORMANCE_PROFILE', 'true').lower() == 'true'
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT = int(os.environ.get('SQLITE_BUSY_TIMEOUT', 30000))  # en millisecondes
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    # Sérialise les écritures des services entre threads et processus
+    SQLITE_SERIALIZE_WRITES = os.environ.get('SQLITE_SERIALIZE_WRITES', 'false').lower() == 'true'
+
+    # Instrumentation des performances (exposée sur /metrics)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    # Seuil de requêtes SQL par requête HTTP au-delà duquel la requête est journalisée
+    METRICS_QUERY_LOG_THRESHOLD = int(os.environ.get('METRICS_QUERY_LOG_THRESHOLD', 50))
+
+    # Budgets de requêtes SQL déclarés avec @query_budget : 'off', 'log' ou 'raise'
+    QUERY_BUDGET_MODE = os.environ.get('QUERY_BUDGET_MODE', 'off')
+
+    # Cache des réponses de l'API en lecture
+    RESPONSE_CACHE_ENABLED = os.environ.get('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 60))  # en secondes
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 1024))
+
+    # Compression gzip (ou brotli s'il est installé) des réponses selon Accept-Encoding
+    RESPONSE_COMPRESSION_ENABLED = os.environ.get('RESPONSE_COMPRESSION_ENABLED', 'true').lower() == 'true'
+    RESPONSE_COMPRESSION_MIN_SIZE = int(os.environ.get('RESPONSE_COMPRESSION_MIN_SIZE', 1024))  # en octets
+    # Nombre de contenus compressés conservés (par ETag et encodage)
+    RESPONSE_COMPRESSION_CACHE_ENTRIES = int(os.environ.get('RESPONSE_COMPRESSION_CACHE_ENTRIES', 64))
+
+    # Tuiles vectorielles de la carte des missions (/api/tiles), invalidées
+    # lorsque la position, l'emprise ou le nom d'une mission change
+    TILE_CACHE_ENABLED = os.environ.get('TILE_CACHE_ENABLED', 'true').lower() == 'true'
+    TILE_CACHE_TTL = int(os.environ.get('TILE_CACHE_TTL', 24 * 3600))  # en secondes
+    TILE_CACHE_MAX_ENTRIES = int(os.environ.get('TILE_CACHE_MAX_ENTRIES', 4096))
+    # Regroupement des missions proches en dessous de ce niveau de zoom
+    TILE_CLUSTER_MAX_ZOOM = int(os.environ.get('TILE_CLUSTER_MAX_ZOOM', 10))
+
+    # Nombre maximal d'opérations d'un lot (POST /api/missions/batch)
+    MISSION_BATCH_MAX_SIZE = int(os.environ.get('MISSION_BATCH_MAX_SIZE', 500))
+
+    # Nombre maximal de fichiers d'une opération groupée (POST /api/files/bulk)
+    FILE_BULK_MAX_FILES = int(os.environ.get('FILE_BULK_MAX_FILES', 10000))
+
+    # Nombre de missions par page du tableau de bord
+    DASHBOARD_PAGE_SIZE = int(os.environ.get('DASHBOARD_PAGE_SIZE', 12))
+
     @staticmethod
     def init_app(app):
         """Initialisation de la configuration de l'application"""
@@ -47,10 +168,12 @@ class TestingConfig(Config):
     SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or \
         'sqlite:///' + os.path.join(os.path.dirname(basedir), 'instance', 'drone_missions_test.sqlite')
     WTF_CSRF_ENABLED = False
+    QUERY_BUDGET_MODE = os.environ.get('QUERY_BUDGET_MODE', 'raise')
 
 class ProductionConfig(Config):
     """Configuration pour la production"""
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options_from_env()
     
     @classmethod
     def init_app(cls, app):
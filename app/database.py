@@ -0,0 +1,166 @@
+"""
+Réglages des moteurs de base de données
+
+Profil de performance SQLite appliqué à chaque nouvelle connexion (mode WAL,
+synchronous=NORMAL, délai d'attente sur verrou, mmap), écrivain sérialisé
+optionnel pour les services qui écrivent beaucoup, et routage des lectures
+vers un réplica.
+"""
+import os
+import threading
+from contextvars import ContextVar
+from functools import wraps
+from flask import current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+# Clé du moteur de lecture dans SQLALCHEMY_BINDS
+REPLICA_BIND_KEY = 'replica'
+
+_use_replica = ContextVar('use_replica', default=False)
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+def is_sqlite(engine):
+    """Vérifie si un moteur SQLAlchemy utilise SQLite"""
+    return engine.dialect.name == 'sqlite'
+
+def configure_sqlite_engine(app, engine):
+    """
+    Applique le profil de performance SQLite à chaque nouvelle connexion
+
+    Args:
+        app (Flask): Application Flask
+        engine (Engine): Moteur SQLAlchemy SQLite
+    """
+    pragmas = [
+        ('journal_mode', app.config['SQLITE_JOURNAL_MODE']),
+        ('synchronous', app.config['SQLITE_SYNCHRONOUS']),
+        ('busy_timeout', app.config['SQLITE_BUSY_TIMEOUT']),
+        ('mmap_size', app.config['SQLITE_MMAP_SIZE']),
+    ]
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                if value is not None:
+                    cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+def init_engines(app, db):
+    """
+    Configure les moteurs de l'application
+
+    Args:
+        app (Flask): Application Flask
+        db (SQLAlchemy): Extension Flask-SQLAlchemy
+    """
+    with app.app_context():
+        engines = list(db.engines.values())
+
+    for engine in engines:
+        if is_sqlite(engine) and app.config['SQLITE_PERFORMANCE_PROFILE']:
+            configure_sqlite_engine(app, engine)
+
+
+class SerializedWriter:
+    """
+    Verrou d'écriture réentrant partagé entre threads et processus
+
+    Avec SQLite, un seul écrivain peut tenir le verrou de la base : faire
+    patienter les écritures dans une file évite les erreurs « database is
+    locked » lorsque plusieurs workers gunicorn écrivent en même temps.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._lock_file = None
+
+    def _open_lock_file(self):
+        if self._lock_file is None:
+            lock_path = current_app.config.get('SQLITE_WRITER_LOCK_FILE') or \
+                os.path.join(current_app.instance_path, 'sqlite_writer.lock')
+            self._lock_file = open(lock_path, 'a')
+        return self._lock_file
+
+    def acquire(self):
+        self._lock.acquire()
+        depth = getattr(self._local, 'depth', 0)
+        if depth == 0 and fcntl is not None:
+            try:
+                fcntl.flock(self._open_lock_file(), fcntl.LOCK_EX)
+            except BaseException:
+                self._lock.release()
+                raise
+        self._local.depth = depth + 1
+
+    def release(self):
+        self._local.depth -= 1
+        if self._local.depth == 0 and fcntl is not None:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+        self._lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+writer = SerializedWriter()
+
+def serialized_write(func):
+    """
+    Décorateur exécutant une fonction de service sous le verrou d'écriture
+
+    Sans effet si SQLITE_SERIALIZE_WRITES est désactivé.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not current_app.config.get('SQLITE_SERIALIZE_WRITES'):
+            return func(*args, **kwargs)
+        with writer:
+            return func(*args, **kwargs)
+    return wrapper
+
+
+class RoutingSession(Session):
+    """
+    Session envoyant les SELECT des fonctions en lecture seule vers le réplica
+
+    Les écritures, les flush et toutes les requêtes exécutées hors d'une
+    fonction décorée par read_only utilisent la base principale. Sans
+    réplica configuré, tout est envoyé à la base principale.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and _use_replica.get() and not self._flushing \
+                and (clause is None or getattr(clause, 'is_select', False)):
+            replica = self._db.engines.get(REPLICA_BIND_KEY)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+def read_only(func):
+    """
+    Décorateur autorisant les lectures d'une fonction à passer par le réplica
+
+    Utilisable sur les fonctions de service comme sur les routes, afin que les
+    chargements différés déclenchés pendant la sérialisation en profitent aussi.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _use_replica.set(True)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _use_replica.reset(token)
+    return wrapper
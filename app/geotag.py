@@ -0,0 +1,390 @@
+"""
+Géoréférencement des images par interpolation sur la trajectoire
+
+Chaque image est datée par son EXIF (DateTimeOriginal), puis placée sur la
+trajectoire du vol par interpolation linéaire entre les deux positions qui
+encadrent sa date de prise de vue :
+
+    read_capture_time : date de prise de vue d'une image (en-tête seul) ;
+    parse_trajectory  : positions datées d'un fichier de trajectoire (CSV de
+                        géoréférencement, trace GPX ou solution PPK .pos de
+                        RTKLIB), triées par date ;
+    match_positions   : jointure par fusion des dates de prise de vue triées
+                        et de la trajectoire triée, vectorisée avec numpy
+                        s'il est installé.
+
+Les dates sont manipulées en secondes depuis le 1er janvier 1970 (UTC).
+"""
+import csv
+import io
+import math
+import struct
+from operator import itemgetter
+from datetime import datetime, timedelta, timezone
+from xml.etree import ElementTree
+from PIL import Image, UnidentifiedImageError
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Extensions des fichiers de trajectoire lus, par type de fichier
+TRAJECTORY_EXTENSIONS = {
+    'ppk': {'pos'},
+    'geopos': {'csv', 'gpx'}
+}
+
+# Écart entre le temps GPS et le temps UTC (secondes intercalaires depuis 2017)
+GPS_UTC_OFFSET = 18
+
+# Position d'une image : ID du fichier, latitude, longitude (doubles) et altitude (simple)
+_POSITION = struct.Struct('<iddf')
+
+_EPOCH = datetime(1970, 1, 1)
+
+# Balises EXIF
+_EXIF_IFD = 0x8769
+_DATETIME = 0x0132
+_DATETIME_ORIGINAL = 0x9003
+_OFFSET_TIME_ORIGINAL = 0x9011
+_SUBSEC_TIME_ORIGINAL = 0x9291
+
+# Formats de date acceptés en plus de l'ISO 8601
+_DATE_FORMATS = (
+    '%Y:%m:%d %H:%M:%S.%f', '%Y:%m:%d %H:%M:%S',
+    '%Y/%m/%d %H:%M:%S.%f', '%Y/%m/%d %H:%M:%S',
+    '%d/%m/%Y %H:%M:%S.%f', '%d/%m/%Y %H:%M:%S'
+)
+
+
+class TrajectoryError(ValueError):
+    """Fichier qui ne contient pas de trajectoire datée lisible"""
+
+
+def to_seconds(value):
+    """Secondes depuis le 1er janvier 1970 d'une date (naïve en UTC, ou avec fuseau)"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - _EPOCH).total_seconds()
+
+def from_seconds(seconds):
+    return _EPOCH + timedelta(seconds=seconds)
+
+def _parse_number(value):
+    seconds = float(value)
+    if not math.isfinite(seconds):
+        raise ValueError(f"Date illisible: {value}")
+    # Les journaux de vol datent souvent en millisecondes
+    return seconds / 1000 if seconds > 1e11 else seconds
+
+def _parse_iso(value):
+    return to_seconds(datetime.fromisoformat(value.replace('Z', '+00:00')))
+
+def parse_timestamp(value):
+    """
+    Lit une date de trajectoire
+
+    Args:
+        value (str): Date ISO 8601, au format EXIF ou jj/mm/aaaa, ou
+            timestamp Unix en secondes (ou en millisecondes)
+
+    Returns:
+        float: Secondes depuis le 1er janvier 1970
+
+    Raises:
+        ValueError: Si la date est illisible
+    """
+    value = value.strip()
+    for parser in (_parse_number, _parse_iso):
+        try:
+            return parser(value)
+        except ValueError:
+            pass
+    for date_format in _DATE_FORMATS:
+        try:
+            return to_seconds(datetime.strptime(value, date_format))
+        except ValueError:
+            continue
+    raise ValueError(f"Date illisible: {value}")
+
+def timestamp_parser(sample):
+    """
+    Choisit, d'après une première valeur, la lecture des dates d'un fichier
+
+    Les dates d'un même fichier partagent le même format : le reconnaître une
+    fois évite d'essayer tous les formats à chaque ligne.
+
+    Args:
+        sample (str): Première date du fichier
+
+    Returns:
+        function: Lecture d'une date en secondes (voir parse_timestamp)
+    """
+    sample = sample.strip()
+    candidates = [_parse_number, _parse_iso] + [
+        lambda value, date_format=date_format: to_seconds(datetime.strptime(value, date_format))
+        for date_format in _DATE_FORMATS
+    ]
+    for candidate in candidates:
+        try:
+            candidate(sample)
+        except ValueError:
+            continue
+
+        def parse(value):
+            try:
+                return candidate(value)
+            except ValueError:
+                return parse_timestamp(value)
+        return parse
+    return parse_timestamp
+
+def read_capture_time(source):
+    """
+    Lit la date de prise de vue d'une image dans son EXIF
+
+    Seul l'en-tête de l'image est lu. La date est convertie en UTC si l'EXIF
+    précise le fuseau de l'appareil (OffsetTimeOriginal), sinon elle est
+    conservée telle quelle (horloge de l'appareil).
+
+    Args:
+        source: Chemin de l'image ou flux binaire positionnable
+
+    Returns:
+        datetime: Date de prise de vue (naïve), ou None si elle est absente
+    """
+    try:
+        with Image.open(source) as image:
+            exif = image.getexif()
+            details = exif.get_ifd(_EXIF_IFD)
+    except (UnidentifiedImageError, OSError, SyntaxError, ValueError):
+        return None
+
+    value = details.get(_DATETIME_ORIGINAL) or exif.get(_DATETIME)
+    if not isinstance(value, str):
+        return None
+    try:
+        captured_at = datetime.strptime(value.strip('\x00 '), '%Y:%m:%d %H:%M:%S')
+    except ValueError:
+        return None
+
+    subsec = str(details.get(_SUBSEC_TIME_ORIGINAL) or '').strip('\x00 ')
+    if subsec.isdigit():
+        captured_at += timedelta(seconds=float(f'0.{subsec}'))
+
+    offset = str(details.get(_OFFSET_TIME_ORIGINAL) or '').strip('\x00 ')
+    if len(offset) == 6 and offset[0] in '+-' and offset[3] == ':':
+        try:
+            delta = timedelta(hours=int(offset[1:3]), minutes=int(offset[4:6]))
+        except ValueError:
+            return captured_at
+        captured_at += -delta if offset[0] == '+' else delta
+    return captured_at
+
+def _find_column(fieldnames, exact, prefixes):
+    """Colonne portant l'un des noms exacts, à défaut la première commençant par un préfixe"""
+    lowered = [(name, name.strip().lower()) for name in fieldnames]
+    for name, lower in lowered:
+        if lower in exact:
+            return name
+    for name, lower in lowered:
+        if lower.startswith(prefixes):
+            return name
+    return None
+
+def _parse_csv(source):
+    reader = csv.reader(io.TextIOWrapper(source, encoding='utf-8', errors='replace', newline=''))
+    fieldnames = next(reader, [])
+    time_column = _find_column(
+        fieldnames,
+        ('timestamp', 'time', 'datetime', 'date_time', 'gps_time', 'utc', 'utc_time'),
+        ('time', 'datetime', 'gps_time', 'utc')
+    )
+    date_column = _find_column(fieldnames, ('date', 'gps_date', 'utc_date'), ())
+    lat_column = _find_column(fieldnames, ('lat', 'latitude'), ('lat',))
+    lon_column = _find_column(fieldnames, ('lon', 'lng', 'long', 'longitude'), ('lon', 'lng'))
+    alt_column = _find_column(fieldnames, ('alt', 'altitude', 'height', 'elevation', 'ele'), ('alt', 'height'))
+    if time_column is None or lat_column is None or lon_column is None:
+        raise TrajectoryError("Colonnes de date, latitude ou longitude absentes")
+
+    # Lecture par position des colonnes, plus rapide qu'un DictReader
+    time_index, lat_index, lon_index = (fieldnames.index(name) for name in (time_column, lat_column, lon_column))
+    date_index = fieldnames.index(date_column) if date_column else None
+    alt_index = fieldnames.index(alt_column) if alt_column else None
+    parse = None
+    for row in reader:
+        try:
+            value = row[time_index]
+            if date_index is not None and ':' in value and not any(c in value for c in ' -/'):
+                # Date et heure dans deux colonnes
+                value = f"{row[date_index]} {value}"
+            if parse is None:
+                parse = timestamp_parser(value)
+            seconds = parse(value)
+            altitude = row[alt_index] if alt_index is not None else None
+            yield (seconds, float(row[lat_index]), float(row[lon_index]),
+                   float(altitude) if altitude else math.nan)
+        except (IndexError, ValueError):
+            continue
+
+def _parse_gpx(source):
+    parse = None
+    for _, element in ElementTree.iterparse(source):
+        if element.tag.rsplit('}', 1)[-1] not in ('trkpt', 'rtept', 'wpt'):
+            continue
+        values = {child.tag.rsplit('}', 1)[-1]: child.text for child in element}
+        try:
+            altitude = values.get('ele')
+            if parse is None:
+                parse = timestamp_parser(values['time'])
+            yield (parse(values['time']), float(element.get('lat')), float(element.get('lon')),
+                   float(altitude) if altitude else math.nan)
+        except (KeyError, TypeError, ValueError):
+            pass
+        element.clear()
+
+def _parse_pos(source):
+    """Solution RTKLIB : en-tête en commentaires (%), puis date, heure, latitude, longitude, hauteur"""
+    offset = 0
+    parse = None
+    for raw in source:
+        line = raw.decode('ascii', errors='replace')
+        if line.startswith('%'):
+            if 'GPST' in line:
+                offset = GPS_UTC_OFFSET
+            continue
+        fields = line.split()
+        try:
+            value = f'{fields[0]} {fields[1]}'
+            if parse is None:
+                parse = timestamp_parser(value)
+            yield (parse(value) - offset,
+                   float(fields[2]), float(fields[3]), float(fields[4]))
+        except (IndexError, ValueError):
+            continue
+
+def parse_trajectory(source, extension):
+    """
+    Lit les positions datées d'un fichier de trajectoire
+
+    Args:
+        source: Flux binaire du fichier
+        extension (str): Extension du fichier (csv, gpx ou pos)
+
+    Returns:
+        tuple: Listes des dates (secondes), latitudes, longitudes et altitudes
+            (NaN si inconnue), triées par date, sans dates en double
+
+    Raises:
+        TrajectoryError: Si le fichier ne contient aucune position datée
+    """
+    try:
+        if extension == 'gpx':
+            samples = list(_parse_gpx(source))
+        elif extension == 'pos':
+            samples = list(_parse_pos(source))
+        else:
+            samples = list(_parse_csv(source))
+    except ElementTree.ParseError as e:
+        raise TrajectoryError(f"Trace GPX illisible: {str(e)}")
+    if not samples:
+        raise TrajectoryError("Aucune position datée")
+    return merge_trajectories([samples])
+
+def merge_trajectories(parts):
+    """
+    Fusionne des listes de positions datées en une trajectoire triée
+
+    Args:
+        parts (list): Listes de tuples (date, latitude, longitude, altitude)
+            ou tuples de listes renvoyés par parse_trajectory
+
+    Returns:
+        tuple: Listes des dates, latitudes, longitudes et altitudes
+    """
+    if len(parts) == 1 and isinstance(parts[0], tuple):
+        return parts[0]
+
+    samples = []
+    for part in parts:
+        samples.extend(zip(*part) if isinstance(part, tuple) else part)
+    if not samples:
+        return [], [], [], []
+    samples.sort(key=itemgetter(0))
+
+    times = [sample[0] for sample in samples]
+    if len(set(times)) < len(times):
+        # Une seule position par date : la première lue
+        samples = [sample for previous, sample in zip([None] + times, samples) if sample[0] != previous]
+    return tuple(list(column) for column in zip(*samples))
+
+def match_positions(capture_times, trajectory, max_gap):
+    """
+    Interpole la position de chaque image sur la trajectoire
+
+    Une image n'est pas placée si sa date sort de la trajectoire, ou si les
+    deux positions qui l'encadrent sont séparées de plus de max_gap secondes.
+
+    Args:
+        capture_times (list): Dates de prise de vue en secondes, triées
+        trajectory (tuple): Dates, latitudes, longitudes et altitudes triées (voir parse_trajectory)
+        max_gap (float): Écart maximal entre deux positions encadrantes, en secondes
+
+    Returns:
+        list: (latitude, longitude, altitude) pour chaque image, ou None si elle n'est pas placée
+    """
+    if not capture_times or len(trajectory[0]) < 2:
+        return [None] * len(capture_times)
+    if numpy is not None:
+        return _match_vectorized(capture_times, trajectory, max_gap)
+    return _match_merge(capture_times, trajectory, max_gap)
+
+def _match_vectorized(capture_times, trajectory, max_gap):
+    times, latitudes, longitudes, altitudes = (numpy.asarray(values, dtype=numpy.float64) for values in trajectory)
+    captures = numpy.asarray(capture_times, dtype=numpy.float64)
+
+    # Première position postérieure ou égale à chaque date, et celle qui la précède
+    upper = numpy.clip(numpy.searchsorted(times, captures, side='left'), 1, len(times) - 1)
+    lower = upper - 1
+    span = times[upper] - times[lower]
+    weight = (captures - times[lower]) / span
+    valid = (captures >= times[0]) & (captures <= times[-1]) & (span <= max_gap)
+
+    columns = [values[lower] + weight * (values[upper] - values[lower])
+               for values in (latitudes, longitudes, altitudes)]
+    return [
+        (latitude, longitude, altitude) if ok else None
+        for ok, latitude, longitude, altitude in zip(valid.tolist(), *(column.tolist() for column in columns))
+    ]
+
+def _match_merge(capture_times, trajectory, max_gap):
+    times, latitudes, longitudes, altitudes = trajectory
+    last = len(times) - 1
+    upper = 1
+    positions = []
+    for capture in capture_times:
+        if capture < times[0] or capture > times[last]:
+            positions.append(None)
+            continue
+        while upper < last and times[upper] < capture:
+            upper += 1
+        lower = upper - 1
+        span = times[upper] - times[lower]
+        if span > max_gap:
+            positions.append(None)
+            continue
+        weight = (capture - times[lower]) / span
+        positions.append(tuple(
+            values[lower] + weight * (values[upper] - values[lower])
+            for values in (latitudes, longitudes, altitudes)
+        ))
+    return positions
+
+def pack_positions(positions):
+    """Sérialise une liste de (ID du fichier, latitude, longitude, altitude) en binaire"""
+    return b''.join(_POSITION.pack(*position) for position in positions)
+
+def unpack_positions(data):
+    """Désérialise des positions produites par pack_positions"""
+    return list(_POSITION.iter_unpack(data or b''))
@@ -0,0 +1,96 @@
+"""
+Empreintes des fichiers et limitation du débit de lecture
+
+L'empreinte SHA-256 du contenu d'origine d'un fichier est calculée à son
+téléversement, à mesure que le flux est écrit dans le stockage (aucune
+relecture). Le contrôle d'intégrité (voir scrub_service) relit ensuite
+chaque fichier, décompressé le cas échéant, et compare son empreinte ; le
+débit de ces relectures est plafonné par un RateLimiter partagé entre les
+threads.
+"""
+import time
+import hashlib
+import threading
+
+CHECKSUM_ALGORITHM = 'sha256'
+
+# Taille des blocs lus lors d'un contrôle
+READ_SIZE = 1024 * 1024
+
+
+def new_checksum():
+    """Retourne un objet de calcul d'empreinte vide"""
+    return hashlib.new(CHECKSUM_ALGORITHM)
+
+
+class HashingReader:
+    """Enveloppe d'un flux calculant l'empreinte des octets lus"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.checksum = new_checksum()
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        self.checksum.update(data)
+        self.bytes_read += len(data)
+        return data
+
+    def hexdigest(self):
+        return self.checksum.hexdigest()
+
+
+class RateLimiter:
+    """
+    Seau à jetons limitant un débit en octets par seconde, partagé entre threads
+
+    Args:
+        bytes_per_second (float): Débit maximal, 0 ou None pour ne pas limiter
+        burst (float, optional): Octets consommables d'un coup (une seconde de débit par défaut)
+    """
+
+    def __init__(self, bytes_per_second, burst=None):
+        self.rate = bytes_per_second or 0
+        self.capacity = burst or self.rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, amount):
+        """Attend que amount octets puissent être lus"""
+        if not self.rate:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Le solde peut devenir négatif : l'attente est réservée sous le verrou
+            self._tokens -= amount
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+def checksum_stream(source, limiter=None, read_size=READ_SIZE):
+    """
+    Calcule l'empreinte d'un flux lu jusqu'au bout
+
+    Args:
+        source: Flux binaire
+        limiter (RateLimiter, optional): Limitation du débit de lecture
+        read_size (int): Taille des blocs lus
+
+    Returns:
+        tuple: (empreinte hexadécimale, nombre d'octets lus)
+    """
+    checksum = new_checksum()
+    size = 0
+    while True:
+        if limiter is not None:
+            limiter.consume(read_size)
+        data = source.read(read_size)
+        if not data:
+            return checksum.hexdigest(), size
+        checksum.update(data)
+        size += len(data)
@@ -0,0 +1,235 @@
+"""
+Instrumentation des performances par requête
+
+Mesure la latence de chaque route, le nombre et la durée des requêtes SQL
+exécutées pendant la requête HTTP (événements before/after_cursor_execute),
+les octets envoyés par les routes de fichiers et de ZIP et le débit des
+téléversements. Les mesures sont exposées au format texte Prometheus sur
+/metrics ; une requête HTTP dépassant un seuil de requêtes SQL est journalisée
+avec les instructions les plus répétées (détection des N+1).
+
+Les compteurs sont propres à chaque processus : avec plusieurs workers
+gunicorn, chaque scrape ne voit que le worker qui a répondu.
+"""
+import time
+import threading
+from collections import Counter as StatementCounter
+from flask import g, request, current_app, has_request_context
+from sqlalchemy import event
+
+# Bornes des histogrammes (format Prometheus, cumulatif)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+THROUGHPUT_BUCKETS = tuple(2 ** n * 1024 * 1024 for n in range(-2, 10))  # de 256 Ko/s à 512 Mo/s
+
+# Routes qui renvoient des fichiers ou reçoivent des téléversements
+STREAMING_ENDPOINTS = {
+    'missions.view_file',
+    'missions.download_files',
+    'missions.download_all_files',
+    'api.download_files',
+    'api.download_all_files',
+}
+UPLOAD_ENDPOINTS = {'missions.upload_files', 'api.upload_files'}
+
+# Nombre maximal d'instructions SQL conservées par requête pour le diagnostic
+MAX_RECORDED_STATEMENTS = 1000
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Compteur Prometheus avec étiquettes"""
+    type_name = 'counter'
+
+    def __init__(self, name, documentation, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield self.name, tuple(zip(self.label_names, key)), value
+
+
+class Histogram:
+    """Histogramme Prometheus à bornes fixes avec étiquettes"""
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, label_names=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets) + (float('inf'),)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.label_names)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        for key, (counts, total) in items:
+            labels = tuple(zip(self.label_names, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield f'{self.name}_bucket', labels + (('le', _format_value(bound)),), cumulative
+            yield f'{self.name}_sum', labels, total
+            yield f'{self.name}_count', labels, cumulative
+
+
+class Metrics:
+    """Registre des mesures de l'application"""
+
+    def __init__(self, app=None, db=None):
+        self.request_duration = Histogram(
+            'dmm_http_request_duration_seconds', 'Durée des requêtes HTTP',
+            ('endpoint', 'method'))
+        self.requests = Counter(
+            'dmm_http_requests_total', 'Nombre de requêtes HTTP',
+            ('endpoint', 'method', 'status'))
+        self.sql_queries = Histogram(
+            'dmm_sql_queries_per_request', 'Nombre de requêtes SQL par requête HTTP',
+            ('endpoint',), QUERY_COUNT_BUCKETS)
+        self.sql_duration = Histogram(
+            'dmm_sql_duration_per_request_seconds', 'Temps passé en SQL par requête HTTP',
+            ('endpoint',))
+        self.sql_heavy_requests = Counter(
+            'dmm_sql_heavy_requests_total', 'Requêtes HTTP au-delà du seuil de requêtes SQL',
+            ('endpoint',))
+        self.bytes_streamed = Counter(
+            'dmm_response_bytes_streamed_total', 'Octets envoyés par les routes de fichiers et de ZIP',
+            ('endpoint',))
+        self.upload_bytes = Counter(
+            'dmm_upload_bytes_total', 'Octets reçus par les routes de téléversement',
+            ('endpoint',))
+        self.upload_throughput = Histogram(
+            'dmm_upload_throughput_bytes_per_second', 'Débit des téléversements',
+            ('endpoint',), THROUGHPUT_BUCKETS)
+        self.registry = [
+            self.request_duration, self.requests, self.sql_queries, self.sql_duration,
+            self.sql_heavy_requests, self.bytes_streamed, self.upload_bytes, self.upload_throughput,
+        ]
+        self.query_threshold = 50
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        """Enregistre les hooks de requête, les événements SQL et la route /metrics"""
+        if not app.config.get('METRICS_ENABLED', True):
+            return
+
+        self.query_threshold = app.config.get('METRICS_QUERY_LOG_THRESHOLD', 50)
+
+        with app.app_context():
+            engines = list(db.engines.values())
+        for engine in engines:
+            event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.add_url_rule('/metrics', 'metrics', self.render_response)
+        app.extensions['metrics'] = self
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+    @staticmethod
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_start_time'].pop()
+        if not has_request_context() or 'sql_count' not in g:
+            return
+        g.sql_count += 1
+        g.sql_time += elapsed
+        if len(g.sql_statements) < MAX_RECORDED_STATEMENTS:
+            g.sql_statements.append(statement)
+
+    @staticmethod
+    def _before_request():
+        g.request_start_time = time.perf_counter()
+        g.sql_count = 0
+        g.sql_time = 0.0
+        g.sql_statements = []
+
+    def _after_request(self, response):
+        if 'request_start_time' not in g:
+            return response
+
+        elapsed = time.perf_counter() - g.request_start_time
+        endpoint = request.endpoint or 'not_found'
+        method = request.method
+
+        self.request_duration.observe(elapsed, endpoint=endpoint, method=method)
+        self.requests.inc(endpoint=endpoint, method=method, status=response.status_code)
+        self.sql_queries.observe(g.sql_count, endpoint=endpoint)
+        self.sql_duration.observe(g.sql_time, endpoint=endpoint)
+
+        if endpoint in STREAMING_ENDPOINTS and response.content_length:
+            self.bytes_streamed.inc(response.content_length, endpoint=endpoint)
+
+        if endpoint in UPLOAD_ENDPOINTS and method == 'POST' and request.content_length:
+            self.upload_bytes.inc(request.content_length, endpoint=endpoint)
+            if elapsed > 0:
+                self.upload_throughput.observe(request.content_length / elapsed, endpoint=endpoint)
+
+        if g.sql_count > self.query_threshold:
+            self.sql_heavy_requests.inc(endpoint=endpoint)
+            repeated = StatementCounter(g.sql_statements).most_common(3)
+            current_app.logger.warning(
+                f"{g.sql_count} requêtes SQL ({g.sql_time * 1000:.1f} ms) pour {method} {request.path}, "
+                f"instructions les plus répétées: " +
+                '; '.join(f"{count}x {' '.join(statement.split())[:200]}" for statement, count in repeated)
+            )
+
+        return response
+
+    def render(self):
+        """
+        Produit les mesures au format texte Prometheus
+
+        Returns:
+            str: Exposition des mesures
+        """
+        lines = []
+        for metric in self.registry:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type_name}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+    def render_response(self):
+        """Vue de la route /metrics"""
+        return current_app.response_class(self.render(), mimetype='text/plain; version=0.0.4')
@@ -15,6 +15,14 @@ class Mission(db.Model):
     flight_date = db.Column(db.Date, nullable=True)
     description = db.Column(db.Text, nullable=True)
     
+    # Suppression asynchrone (tombstone) : la mission est masquée dès que
+    # deleted_at est renseigné, ses fichiers sont ensuite purgés en tâche de fond
+    deleted_at = db.Column(db.DateTime, nullable=True, index=True)
+    purged_files = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Volume de stockage de la mission (placement par affinité), None pour le volume par défaut
+    volume = db.Column(db.String(64), nullable=True)
+    
     # Relations
     files = db.relationship('File', backref='mission', lazy='dynamic', cascade='all, delete-orphan')
     mission_metadata = db.relationship('MissionMetadata', backref='mission', uselist=False, cascade='all, delete-orphan')
@@ -22,43 +30,77 @@ class Mission(db.Model):
     def __repr__(self):
         return f'<Mission {self.name}>'
     
+    @classmethod
+    def active(cls):
+        """Retourne une requête limitée aux missions non supprimées"""
+        return cls.query.filter(cls.deleted_at.is_(None))
+    
+    @property
+    def is_deleted(self):
+        """Vérifie si la mission est en attente de suppression"""
+        return self.deleted_at is not None
+    
     @property
     def mission_path(self):
         """Retourne le chemin du dossier de la mission"""
         from flask import current_app
         return os.path.join(current_app.config['UPLOAD_FOLDER'], self.name)
     
+    @property
+    def file_stats(self):
+        """
+        Retourne le nombre de fichiers par type
+        
+        Les listes de missions préchargent ces statistiques en une seule requête
+        (voir mission_service.attach_file_stats) ; à défaut, elles sont calculées
+        pour cette seule mission.
+        """
+        stats = getattr(self, '_file_stats', None)
+        if stats is None:
+            stats = dict(
+                db.session.query(File.file_type, db.func.count(File.id))
+                .filter(File.mission_id == self.id)
+                .group_by(File.file_type)
+                .all()
+            )
+        return stats
+    
+    @file_stats.setter
+    def file_stats(self, stats):
+        self._file_stats = stats
+    
     @property
     def file_count(self):
         """Retourne le nombre total de fichiers dans la mission"""
-        return self.files.count()
+        return sum(self.file_stats.values())
     
     @property
     def file_types(self):
         """Retourne les types de fichiers disponibles dans cette mission"""
-        return set([file.file_type for file in self.files])
+        return set(self.file_stats)
     
     @property
     def has_images(self):
         """Vérifie si la mission contient des images"""
-        return self.files.filter_by(file_type='images').count() > 0
+        return self.image_count > 0
     
     @property
     def image_count(self):
         """Retourne le nombre d'images dans la mission"""
-        return self.files.filter_by(file_type='images').count()
+        return self.file_stats.get('images', 0)
     
     def to_dict(self):
         """Convertit l'objet Mission en dictionnaire pour l'API"""
+        file_stats = self.file_stats
         return {
             'id': self.id,
             'name': self.name,
             'flight_date': self.flight_date.isoformat() if self.flight_date else None,
             'date_created': self.date_created.isoformat(),
             'description': self.description,
-            'file_count': self.file_count,
-            'image_count': self.image_count,
-            'file_types': list(self.file_types),
+            'file_count': sum(file_stats.values()),
+            'image_count': file_stats.get('images', 0),
+            'file_types': list(file_stats),
             'metadata': self.mission_metadata.to_dict() if self.mission_metadata else None
         }
 
@@ -66,14 +108,33 @@ class Mission(db.Model):
 class File(db.Model):
     """Modèle pour un fichier appartenant à une mission"""
     __tablename__ = 'files'
+    # Listes des fichiers d'une mission et nombre de fichiers par type
+    __table_args__ = (db.Index('ix_files_mission_id_file_type', 'mission_id', 'file_type'),)
     
     id = db.Column(db.Integer, primary_key=True)
     mission_id = db.Column(db.Integer, db.ForeignKey('missions.id'), nullable=False)
     filename = db.Column(db.String(256), nullable=False)
-    file_path = db.Column(db.String(512), nullable=False)
+    file_path = db.Column(db.String(512), nullable=False)  # relatif au dossier de la mission
     file_type = db.Column(db.String(64), nullable=False)  # images, logs, geopos, ppk, rapport
     file_size = db.Column(db.Integer, nullable=False)  # taille en octets
-    uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
+    file_mtime = db.Column(db.Float, nullable=True)  # date de modification sur le disque (timestamp)
+    uploaded_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    volume = db.Column(db.String(64), nullable=True)  # volume de stockage, None pour le volume par défaut
+    
+    # Compression sur le stockage (voir compression_service) : codec, None si le
+    # fichier est stocké tel quel, et taille stockée, None tant que le fichier
+    # n'a pas été examiné par la compression
+    compression = db.Column(db.String(16), nullable=True)
+    stored_size = db.Column(db.Integer, nullable=True)
+    
+    # Date de prise de vue des images (EXIF), None si inconnue ou pas encore lue
+    captured_at = db.Column(db.DateTime, nullable=True)
+    
+    # Intégrité (voir scrub_service) : empreinte SHA-256 du contenu d'origine,
+    # date et résultat du dernier contrôle (ok, missing, corrupted, unreadable)
+    checksum = db.Column(db.String(64), nullable=True)
+    checked_at = db.Column(db.DateTime, nullable=True)
+    integrity = db.Column(db.String(16), nullable=True, index=True)
     
     def __repr__(self):
         return f'<File {self.filename}>'
@@ -85,8 +146,21 @@ class File(db.Model):
     
     @property
     def full_path(self):
-        """Retourne le chemin complet du fichier"""
-        return self.file_path
+        """Retourne le chemin complet du fichier stocké sur son volume, ou None avec un stockage distant"""
+        from app.storage import get_storage
+        return get_storage().local_path(self.storage_key)
+    
+    @property
+    def stored_path(self):
+        """Retourne le chemin du fichier stocké, avec le suffixe de son codec s'il est compressé"""
+        from app.compression import SUFFIXES
+        return self.file_path + SUFFIXES[self.compression] if self.compression else self.file_path
+    
+    @property
+    def storage_key(self):
+        """Retourne la clé du fichier (éventuellement compressé) dans le backend de stockage"""
+        from app.storage import get_storage
+        return get_storage().file_key(self.mission, self.stored_path, self.volume)
     
     def to_dict(self):
         """Convertit l'objet File en dictionnaire pour l'API"""
@@ -97,7 +171,224 @@ class File(db.Model):
             'file_type': self.file_type,
             'file_size': self.file_size,
             'file_extension': self.file_extension,
-            'uploaded_at': self.uploaded_at.isoformat()
+            'uploaded_at': self.uploaded_at.isoformat(),
+            'checksum': self.checksum
+        }
+
+
+class DirectorySnapshot(db.Model):
+    """Empreinte d'un dossier de type lors du dernier import depuis le disque"""
+    __tablename__ = 'directory_snapshots'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    path = db.Column(db.String(512), nullable=False, unique=True)  # relatif à UPLOAD_FOLDER
+    mtime = db.Column(db.Float, nullable=False)
+    file_count = db.Column(db.Integer, nullable=False, default=0)
+    scanned_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<DirectorySnapshot {self.path}>'
+
+
+class FleetStat(db.Model):
+    """Agrégat de la flotte maintenu incrémentalement à chaque écriture"""
+    __tablename__ = 'fleet_stats'
+    __table_args__ = (db.UniqueConstraint('category', 'bucket'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    category = db.Column(db.String(32), nullable=False)  # fleet, type, month, day
+    bucket = db.Column(db.String(64), nullable=False)  # missions/files, type de fichier, AAAA-MM, AAAA-MM-JJ
+    item_count = db.Column(db.BigInteger, nullable=False, default=0)
+    total_bytes = db.Column(db.BigInteger, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<FleetStat {self.category}:{self.bucket}>'
+
+
+class MissionStorage(db.Model):
+    """Octets et nombre de fichiers d'une mission par type, maintenus à chaque écriture"""
+    __tablename__ = 'mission_storage'
+    __table_args__ = (db.UniqueConstraint('mission_id', 'file_type'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    mission_id = db.Column(db.Integer, db.ForeignKey('missions.id'), nullable=False, index=True)
+    file_type = db.Column(db.String(32), nullable=False)
+    file_count = db.Column(db.BigInteger, nullable=False, default=0)
+    total_bytes = db.Column(db.BigInteger, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<MissionStorage {self.mission_id}:{self.file_type}>'
+
+
+class FlightRollup(db.Model):
+    """Agrégat des missions actives par période de vol et modèle de caméra, maintenu à chaque écriture"""
+    __tablename__ = 'flight_rollups'
+    __table_args__ = (db.UniqueConstraint('granularity', 'bucket_start', 'camera_model'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    granularity = db.Column(db.String(8), nullable=False)  # day, week, month
+    bucket_start = db.Column(db.Date, nullable=False)  # premier jour de la période (lundi pour une semaine)
+    camera_model = db.Column(db.String(64), nullable=False, default='')  # '' si inconnu
+    mission_count = db.Column(db.BigInteger, nullable=False, default=0)
+    area_covered = db.Column(db.Float, nullable=False, default=0)  # en m²
+    file_count = db.Column(db.BigInteger, nullable=False, default=0)
+    total_bytes = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<FlightRollup {self.granularity}:{self.bucket_start}:{self.camera_model}>'
+
+
+class RinexIndex(db.Model):
+    """En-tête et index des époques d'un fichier d'observation RINEX (voir app.rinex)"""
+    __tablename__ = 'rinex_indexes'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    file_id = db.Column(db.Integer, db.ForeignKey('files.id'), nullable=False, unique=True)
+    version = db.Column(db.String(8), nullable=False)
+    marker_name = db.Column(db.String(64), nullable=True)
+    receiver = db.Column(db.String(64), nullable=True)
+    antenna = db.Column(db.String(64), nullable=True)
+    interval = db.Column(db.Float, nullable=True)  # en secondes
+    first_epoch = db.Column(db.DateTime, nullable=True, index=True)
+    last_epoch = db.Column(db.DateTime, nullable=True, index=True)
+    epoch_count = db.Column(db.Integer, nullable=False, default=0)
+    systems = db.Column(db.String(32), nullable=True)  # constellations observées, ex. « G,R,E »
+    header_size = db.Column(db.Integer, nullable=False)  # en octets, position de la première époque
+    epoch_index = db.Column(db.LargeBinary, nullable=True)  # (secondes, position) toutes les INDEX_STRIDE époques
+    
+    file = db.relationship('File', backref=db.backref('rinex_index', uselist=False, cascade='all, delete-orphan'))
+    
+    def __repr__(self):
+        return f'<RinexIndex {self.file_id}>'
+    
+    def to_dict(self):
+        """Convertit l'index en dictionnaire pour l'API"""
+        return {
+            'file_id': self.file_id,
+            'version': self.version,
+            'marker_name': self.marker_name,
+            'receiver': self.receiver,
+            'antenna': self.antenna,
+            'interval': self.interval,
+            'first_epoch': self.first_epoch.isoformat() if self.first_epoch else None,
+            'last_epoch': self.last_epoch.isoformat() if self.last_epoch else None,
+            'epoch_count': self.epoch_count,
+            'systems': self.systems.split(',') if self.systems else []
+        }
+
+
+class GeotagSet(db.Model):
+    """Positions interpolées des images d'une mission sur sa trajectoire (voir app.geotag)"""
+    __tablename__ = 'geotag_sets'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    mission_id = db.Column(db.Integer, db.ForeignKey('missions.id'), nullable=False, unique=True)
+    source = db.Column(db.String(16), nullable=False)  # type des fichiers de trajectoire : ppk ou geopos
+    trajectory_files = db.Column(db.Integer, nullable=False, default=0)
+    trajectory_points = db.Column(db.Integer, nullable=False, default=0)
+    time_offset = db.Column(db.Float, nullable=False, default=0)  # en secondes, ajouté aux dates EXIF
+    max_gap = db.Column(db.Float, nullable=False)  # en secondes
+    image_count = db.Column(db.Integer, nullable=False, default=0)
+    matched_count = db.Column(db.Integer, nullable=False, default=0)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    positions = db.Column(db.LargeBinary, nullable=True)  # (ID du fichier, latitude, longitude, altitude) par image placée
+    
+    mission = db.relationship('Mission', backref=db.backref('geotag_set', uselist=False, cascade='all, delete-orphan'))
+    
+    def __repr__(self):
+        return f'<GeotagSet for Mission {self.mission_id}>'
+    
+    def to_dict(self):
+        """Convertit le géoréférencement en dictionnaire pour l'API"""
+        return {
+            'mission_id': self.mission_id,
+            'source': self.source,
+            'trajectory_files': self.trajectory_files,
+            'trajectory_points': self.trajectory_points,
+            'time_offset': self.time_offset,
+            'max_gap': self.max_gap,
+            'image_count': self.image_count,
+            'matched_count': self.matched_count,
+            'computed_at': self.computed_at.isoformat() if self.computed_at else None
+        }
+
+
+class MissionLocation(db.Model):
+    """Position et emprise d'une mission sur la carte, en Web Mercator normalisé (voir app.tiles)"""
+    __tablename__ = 'mission_locations'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    mission_id = db.Column(db.Integer, db.ForeignKey('missions.id'), nullable=False, unique=True)
+    x = db.Column(db.Float, nullable=False, index=True)  # position de la mission
+    y = db.Column(db.Float, nullable=False)
+    min_x = db.Column(db.Float, nullable=False, index=True)  # rectangle englobant de l'emprise
+    min_y = db.Column(db.Float, nullable=False)
+    max_x = db.Column(db.Float, nullable=False)
+    max_y = db.Column(db.Float, nullable=False)
+    footprint = db.Column(db.LargeBinary, nullable=True)  # contour de l'emprise (enveloppe des images géoréférencées)
+    
+    mission = db.relationship('Mission', backref=db.backref('location', uselist=False, cascade='all, delete-orphan'))
+    
+    def __repr__(self):
+        return f'<MissionLocation for Mission {self.mission_id}>'
+
+
+class ScrubRun(db.Model):
+    """Passage du contrôle d'intégrité des fichiers, repris là où il s'est arrêté"""
+    __tablename__ = 'scrub_runs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    last_file_id = db.Column(db.Integer, nullable=False, default=0)  # curseur de reprise
+    files_checked = db.Column(db.Integer, nullable=False, default=0)
+    bytes_checked = db.Column(db.BigInteger, nullable=False, default=0)
+    baselined = db.Column(db.Integer, nullable=False, default=0)  # empreintes enregistrées lors du passage
+    missing = db.Column(db.Integer, nullable=False, default=0)
+    corrupted = db.Column(db.Integer, nullable=False, default=0)
+    unreadable = db.Column(db.Integer, nullable=False, default=0)
+    orphaned = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<ScrubRun {self.id}>'
+    
+    def to_dict(self):
+        """Convertit le passage en dictionnaire pour l'API"""
+        return {
+            'id': self.id,
+            'started_at': self.started_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'last_file_id': self.last_file_id,
+            'files_checked': self.files_checked,
+            'bytes_checked': self.bytes_checked,
+            'baselined': self.baselined,
+            'missing': self.missing,
+            'corrupted': self.corrupted,
+            'unreadable': self.unreadable,
+            'orphaned': self.orphaned
+        }
+
+
+class OrphanFile(db.Model):
+    """Fichier présent dans le dossier d'une mission mais absent de la base"""
+    __tablename__ = 'orphan_files'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    mission_id = db.Column(db.Integer, db.ForeignKey('missions.id'), nullable=False, index=True)
+    file_path = db.Column(db.String(512), nullable=False)  # relatif au dossier de la mission
+    file_size = db.Column(db.BigInteger, nullable=False)
+    found_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<OrphanFile {self.mission_id}:{self.file_path}>'
+    
+    def to_dict(self):
+        """Convertit le fichier orphelin en dictionnaire pour l'API"""
+        return {
+            'mission_id': self.mission_id,
+            'file_path': self.file_path,
+            'file_size': self.file_size,
+            'found_at': self.found_at.isoformat()
         }
 
 
@@ -106,7 +397,7 @@ class MissionMetadata(db.Model):
     __tablename__ = 'mission_metadata'
     
     id = db.Column(db.Integer, primary_key=True)
-    mission_id = db.Column(db.Integer, db.ForeignKey('missions.id'), nullable=False)
+    mission_id = db.Column(db.Integer, db.ForeignKey('missions.id'), nullable=False, index=True)
     
     # Métadonnées extraites des fichiers CSV de géoréférencement
     area_covered = db.Column(db.Float, nullable=True)  # en m²
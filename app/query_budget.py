@@ -0,0 +1,136 @@
+"""
+Budgets de requêtes SQL pour les services et les routes
+
+Permet de déclarer le nombre maximal d'instructions SQL qu'une fonction de
+service ou une route peut exécuter, afin de détecter les régressions N+1
+(requêtes proportionnelles au nombre de missions ou de fichiers).
+
+    @query_budget(3)
+    def search_missions(...):
+        ...
+
+    with count_queries() as counter:
+        client.get('/api/missions')
+    assert counter.count <= 5, counter.report()
+
+Le contrôle dépend de QUERY_BUDGET_MODE : 'off' (aucun surcoût), 'log'
+(avertissement dans les journaux) ou 'raise' (QueryBudgetExceeded, utilisé
+par la configuration de test). Les tests (tests/conftest.py) fournissent la
+fixture query_counter, une fabrique de QueryCounter.
+"""
+import threading
+from functools import wraps
+from flask import current_app
+from sqlalchemy import event
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Levée lorsqu'une fonction dépasse son budget de requêtes SQL"""
+
+
+class QueryCounter:
+    """
+    Compte les instructions SQL exécutées par le thread courant
+
+    Args:
+        max_queries (int, optional): Budget vérifié à la sortie du bloc
+        label (str, optional): Nom utilisé dans les messages d'erreur
+    """
+
+    def __init__(self, max_queries=None, label=None):
+        self.max_queries = max_queries
+        self.label = label or 'bloc'
+        self.statements = []
+        self._engines = []
+        self._thread = None
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == self._thread:
+            self.statements.append(statement)
+
+    def __enter__(self):
+        from app import db
+
+        self._thread = threading.get_ident()
+        self._engines = list(db.engines.values())
+        for engine in self._engines:
+            event.listen(engine, 'after_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for engine in self._engines:
+            event.remove(engine, 'after_cursor_execute', self._record)
+        self._engines = []
+
+        if exc_type is None and self.exceeded:
+            raise QueryBudgetExceeded(self.report())
+
+    @property
+    def exceeded(self):
+        return self.max_queries is not None and self.count > self.max_queries
+
+    def report(self):
+        """
+        Décrit les instructions exécutées
+
+        Returns:
+            str: Nombre d'instructions, budget et liste des instructions
+        """
+        budget = f' (budget: {self.max_queries})' if self.max_queries is not None else ''
+        lines = [f'{self.label}: {self.count} requête(s) SQL{budget}']
+        for index, statement in enumerate(self.statements, 1):
+            lines.append(f"  {index}. {' '.join(statement.split())}")
+        return '\n'.join(lines)
+
+
+def count_queries(max_queries=None, label=None):
+    """
+    Gestionnaire de contexte comptant les requêtes SQL
+
+    Args:
+        max_queries (int, optional): Lève QueryBudgetExceeded si le bloc le dépasse
+        label (str, optional): Nom utilisé dans les messages d'erreur
+
+    Returns:
+        QueryCounter: Compteur utilisable dans un bloc with
+    """
+    return QueryCounter(max_queries, label)
+
+
+def query_budget(max_queries):
+    """
+    Déclare le nombre maximal de requêtes SQL d'une fonction de service ou d'une route
+
+    Le budget est accessible via l'attribut query_budget de la fonction décorée.
+
+    Args:
+        max_queries (int): Nombre maximal d'instructions SQL
+    """
+    def decorator(func):
+        label = f'{func.__module__}.{func.__qualname__}'
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            mode = current_app.config.get('QUERY_BUDGET_MODE', 'off')
+            if mode == 'off':
+                return func(*args, **kwargs)
+
+            counter = QueryCounter(label=label)
+            with counter:
+                result = func(*args, **kwargs)
+
+            counter.max_queries = max_queries
+            if counter.exceeded:
+                if mode == 'raise':
+                    raise QueryBudgetExceeded(counter.report())
+                current_app.logger.warning(counter.report())
+            return result
+
+        wrapper.query_budget = max_queries
+        return wrapper
+    return decorator
+
@@ -0,0 +1,208 @@
+"""
+Modèles de lecture des listes de missions et de fichiers
+
+Les listes (API, exports) n'ont besoin ni de l'identity map ni du suivi des
+modifications de l'ORM : elles sont lues avec des select() de SQLAlchemy
+Core, qui renvoient de simples tuples, puis converties en dictionnaires
+colonne par colonne. Un RowSerializer décrit une fois les champs de sortie
+(colonne source et conversion) ; chaque conversion est appliquée à toute la
+colonne d'un lot de lignes, sans accès attribut par attribut ni appel de
+méthode par objet. Le format produit est celui des to_dict des modèles.
+"""
+import os
+from sqlalchemy import select
+from app import db
+from app.models import Mission, MissionMetadata, File
+
+METADATA_COLUMNS = (
+    'area_covered', 'center_latitude', 'center_longitude', 'min_altitude', 'max_altitude',
+    'drone_model', 'camera_model', 'flight_duration'
+)
+
+
+def isoformat(value):
+    """Date ISO 8601 d'une date ou d'une date et heure, None conservé"""
+    return value.isoformat() if value is not None else None
+
+def file_extension(filename):
+    """Extension d'un nom de fichier, au format de File.file_extension"""
+    return os.path.splitext(filename)[1].lower()[1:]
+
+
+class RowSerializer:
+    """
+    Conversion de lignes (tuples nommés) en dictionnaires, colonne par colonne
+
+    Args:
+        *fields: Champs de sortie, dans l'ordre : nom de colonne, ou tuple
+            (nom du champ, colonne source, conversion appliquée aux valeurs
+            non nulles ou None)
+    """
+    __slots__ = ('names', 'sources', 'converters')
+
+    def __init__(self, *fields):
+        fields = [(field, field, None) if isinstance(field, str) else field for field in fields]
+        self.names = tuple(name for name, _, _ in fields)
+        self.sources = tuple(source for _, source, _ in fields)
+        self.converters = tuple(convert for _, _, convert in fields)
+
+    def columns(self, rows):
+        """
+        Colonnes de sortie d'un lot de lignes
+
+        Returns:
+            list: Une liste de valeurs par champ, dans l'ordre des champs
+        """
+        if not rows:
+            return [[] for _ in self.names]
+        by_name = dict(zip(rows[0]._fields, zip(*rows)))
+        columns = []
+        for source, convert in zip(self.sources, self.converters):
+            values = by_name[source]
+            if convert is not None:
+                values = [convert(value) if value is not None else None for value in values]
+            columns.append(values)
+        return columns
+
+    def serialize(self, rows):
+        """
+        Convertit un lot de lignes en dictionnaires
+
+        Args:
+            rows (list): Lignes renvoyées par un select()
+
+        Returns:
+            list: Un dictionnaire par ligne
+        """
+        names = self.names
+        return [dict(zip(names, values)) for values in zip(*self.columns(rows))]
+
+
+# Format de File.to_dict
+FILE_SERIALIZER = RowSerializer(
+    'id', 'mission_id', 'filename', 'file_type', 'file_size',
+    ('file_extension', 'filename', file_extension),
+    ('uploaded_at', 'uploaded_at', isoformat),
+    'checksum'
+)
+
+# Champs de File.to_dict au format colonnaire (app.columnar) : dates non
+# converties, encodées en écarts de microsecondes
+FILE_COLUMNS = RowSerializer(
+    'id', 'mission_id', 'filename', 'file_type', 'file_size',
+    ('file_extension', 'filename', file_extension),
+    'uploaded_at', 'checksum'
+)
+FILE_COLUMN_ENCODINGS = {
+    'id': 'delta',
+    'mission_id': 'dictionary',
+    'file_type': 'dictionary',
+    'file_extension': 'dictionary',
+    'uploaded_at': 'timestamp'
+}
+
+# Fichiers joints aux missions exportées
+EXPORT_FILE_SERIALIZER = RowSerializer(
+    'id', 'filename', 'file_path', 'file_type', 'file_size',
+    ('uploaded_at', 'uploaded_at', isoformat),
+    ('captured_at', 'captured_at', isoformat)
+)
+
+# Champs simples de Mission.to_dict
+MISSION_SERIALIZER = RowSerializer(
+    'id', 'name',
+    ('flight_date', 'flight_date', isoformat),
+    ('date_created', 'date_created', isoformat),
+    'description'
+)
+
+
+# Position des colonnes de métadonnées (metadata_id puis METADATA_COLUMNS)
+# dans les lignes de missions_select
+METADATA_SLICE = slice(6, 7 + len(METADATA_COLUMNS))
+
+
+def missions_select(*columns):
+    """
+    Missions actives et leurs métadonnées (jointure externe)
+
+    Args:
+        *columns: Colonnes supplémentaires, placées après celles des métadonnées
+
+    Returns:
+        Select: Requête à compléter (filtres, tri)
+    """
+    metadata = [getattr(MissionMetadata, name) for name in METADATA_COLUMNS]
+    return select(
+        Mission.id, Mission.name, Mission.date_created, Mission.flight_date, Mission.description,
+        Mission.volume, MissionMetadata.id.label('metadata_id'), *metadata, *columns
+    ).outerjoin(MissionMetadata, MissionMetadata.mission_id == Mission.id) \
+        .where(Mission.deleted_at.is_(None))
+
+def files_select():
+    """Colonnes de File.to_dict"""
+    return select(File.id, File.mission_id, File.filename, File.file_type, File.file_size,
+                  File.uploaded_at, File.checksum)
+
+def metadata_dict(row):
+    """Métadonnées d'une ligne de missions_select, au format de MissionMetadata.to_dict"""
+    (metadata_id, area_covered, center_latitude, center_longitude, min_altitude, max_altitude,
+     drone_model, camera_model, flight_duration) = row[METADATA_SLICE]
+    if metadata_id is None:
+        return None
+    return {
+        'area_covered': area_covered,
+        'center_coordinates': {
+            'latitude': center_latitude,
+            'longitude': center_longitude
+        } if center_latitude and center_longitude else None,
+        'altitude_range': {
+            'min': min_altitude,
+            'max': max_altitude
+        } if min_altitude and max_altitude else None,
+        'drone_model': drone_model,
+        'camera_model': camera_model,
+        'flight_duration': flight_duration
+    }
+
+def file_stats(mission_ids):
+    """
+    Nombre de fichiers par type de plusieurs missions, en une requête
+
+    Args:
+        mission_ids (list): ID des missions
+
+    Returns:
+        dict: {type: nombre} par ID de mission
+    """
+    stats = {mission_id: {} for mission_id in mission_ids}
+    if not stats:
+        return stats
+    rows = db.session.connection().execute(
+        select(File.mission_id, File.file_type, db.func.count(File.id))
+        .where(File.mission_id.in_(stats.keys()))
+        .group_by(File.mission_id, File.file_type)
+    )
+    for mission_id, file_type, count in rows:
+        stats[mission_id][file_type] = count
+    return stats
+
+def serialize_missions(rows, stats):
+    """
+    Convertit des lignes de missions_select au format de Mission.to_dict
+
+    Args:
+        rows (list): Lignes de missions_select
+        stats (dict): Nombre de fichiers par type de chaque mission (file_stats)
+
+    Returns:
+        list: Un dictionnaire par mission
+    """
+    records = MISSION_SERIALIZER.serialize(rows)
+    for record, row in zip(records, rows):
+        mission_stats = stats[row.id]
+        record['file_count'] = sum(mission_stats.values())
+        record['image_count'] = mission_stats.get('images', 0)
+        record['file_types'] = list(mission_stats)
+        record['metadata'] = metadata_dict(row)
+    return records
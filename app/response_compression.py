@@ -0,0 +1,137 @@
+"""
+Compression des réponses HTTP (gzip, ou brotli s'il est installé)
+
+Les réponses JSON, GeoJSON, MessagePack et les tuiles vectorielles sont
+compressées selon l'en-tête Accept-Encoding du client, au-delà d'une taille
+minimale. Les réponses en flux (exports, fichiers, ZIP) ne sont pas
+concernées : elles sont envoyées à mesure de leur production.
+
+Une réponse compressée garde l'ETag de son contenu, rendu faible (W/"...")
+puisque les octets envoyés diffèrent ; le cache des réponses compare donc
+If-None-Match en comparaison faible. Les derniers contenus compressés sont
+conservés par ETag et encodage, de sorte qu'une réponse servie depuis le
+cache n'est pas recompressée à chaque requête.
+"""
+import gzip
+import threading
+from collections import OrderedDict
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Types de contenu compressés
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/geo+json',
+    'application/x-msgpack',
+    'application/vnd.mapbox-vector-tile',
+    'text/plain',
+    'text/csv',
+    'text/html'
+}
+
+# Niveaux privilégiant la vitesse (compression à chaque réponse) : sur une
+# liste de fichiers JSON, gzip niveau 1 est deux fois plus rapide que le
+# niveau 6 pour un contenu plus gros de 8 % seulement
+GZIP_LEVEL = 1
+BROTLI_QUALITY = 4
+
+
+def available_encodings():
+    """
+    Encodages utilisables dans l'environnement courant
+
+    Returns:
+        list: Noms des encodages, le plus efficace en premier
+    """
+    encodings = ['gzip']
+    if brotli is not None:
+        encodings.insert(0, 'br')
+    return encodings
+
+def compress(body, encoding):
+    """
+    Compresse un contenu
+
+    Args:
+        body (bytes): Contenu
+        encoding (str): gzip ou br
+
+    Returns:
+        bytes: Contenu compressé
+    """
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class ResponseCompression:
+    """Compression des réponses selon Accept-Encoding, avec cache des contenus compressés"""
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.min_size = 1024
+        self.max_entries = 64
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Enregistre la compression des réponses de l'application"""
+        self.enabled = app.config.get('RESPONSE_COMPRESSION_ENABLED', True)
+        self.min_size = app.config.get('RESPONSE_COMPRESSION_MIN_SIZE', 1024)
+        self.max_entries = app.config.get('RESPONSE_COMPRESSION_CACHE_ENTRIES', 64)
+        with self._lock:
+            self._entries.clear()
+        app.extensions['response_compression'] = self
+        if self.enabled:
+            app.after_request(self._after_request)
+
+    def _compressed(self, body, encoding, etag):
+        """Contenu compressé, repris des derniers contenus compressés si l'ETag est connu"""
+        if etag is None:
+            return compress(body, encoding)
+
+        key = (etag, encoding)
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                return data
+
+        data = compress(body, encoding)
+        with self._lock:
+            self._entries[key] = data
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return data
+
+    def _after_request(self, response):
+        if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES
+                or 'Content-Encoding' in response.headers):
+            return response
+
+        body = response.get_data()
+        if len(body) < self.min_size:
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = request.accept_encodings.best_match(available_encodings())
+        if encoding is None:
+            return response
+
+        etag, weak = response.get_etag()
+        data = self._compressed(body, encoding, etag if etag and not weak else None)
+        if len(data) >= len(body):
+            return response
+
+        response.set_data(data)
+        response.headers['Content-Encoding'] = encoding
+        if etag:
+            response.set_etag(etag, weak=True)
+        return response
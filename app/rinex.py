@@ -0,0 +1,329 @@
+"""
+Lecture en flux des fichiers d'observation RINEX 2.x et 3.x
+
+Le fichier est lu ligne par ligne, sans jamais être chargé en mémoire :
+
+    parse_header  : métadonnées de l'en-tête (station, récepteur, antenne,
+                    intervalle, types d'observation) et taille de l'en-tête ;
+    iter_records  : enregistrements d'époque (lignes brutes, date, indicateur) ;
+    build_index   : parcours complet, période couverte, constellations et
+                    index des positions d'époque (une entrée toutes les
+                    INDEX_STRIDE époques) ;
+    iter_window   : enregistrements d'une fenêtre de temps, à partir d'une
+                    position trouvée dans l'index (lecture avec seek).
+
+Les dates sont exprimées dans l'échelle de temps du fichier (GPS en général),
+sans conversion.
+"""
+import math
+import struct
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+# Extensions des fichiers d'observation indexés
+OBS_EXTENSIONS = {'obs', 'rinex'}
+
+# Une entrée d'index toutes les INDEX_STRIDE époques
+INDEX_STRIDE = 100
+
+# Entrée d'index : secondes depuis EPOCH_ORIGIN (double) et position en octets (entier 64 bits)
+_INDEX_ENTRY = struct.Struct('<dq')
+
+EPOCH_ORIGIN = datetime(1980, 1, 6)
+
+# Indicateurs d'époque : 0 et 1 observations, 6 sauts de cycle, 2 à 5 événements
+OBSERVATION_FLAGS = (0, 1)
+EVENT_FLAGS = (2, 3, 4, 5)
+
+
+class RinexError(ValueError):
+    """Fichier qui n'est pas un fichier d'observation RINEX lisible"""
+
+
+def _label(line):
+    return line[60:80].strip()
+
+def _parse_time(fields):
+    """Date d'un en-tête TIME OF FIRST/LAST OBS"""
+    year, month, day, hour, minute = (int(value) for value in fields[:5])
+    return datetime(year, month, day, hour, minute) + timedelta(seconds=float(fields[5]))
+
+def to_seconds(value):
+    """Secondes écoulées depuis EPOCH_ORIGIN"""
+    return (value - EPOCH_ORIGIN).total_seconds()
+
+def from_seconds(seconds):
+    return EPOCH_ORIGIN + timedelta(seconds=seconds)
+
+def parse_header(lines):
+    """
+    Lit l'en-tête d'un fichier d'observation RINEX
+
+    Args:
+        lines: Itérateur de lignes binaires (fichier ouvert en mode binaire)
+
+    Returns:
+        dict: Version, station, récepteur, antenne, position approchée,
+            intervalle, dates de première et dernière observation, types
+            d'observation par constellation et taille de l'en-tête en octets
+
+    Raises:
+        RinexError: Si le fichier n'est pas un fichier d'observation RINEX
+    """
+    header = {
+        'version': None,
+        'marker_name': None,
+        'receiver': None,
+        'antenna': None,
+        'approx_position': None,
+        'interval': None,
+        'time_of_first_obs': None,
+        'time_of_last_obs': None,
+        'obs_types': {},
+        'header_size': 0
+    }
+    size = 0
+    current_system = None
+    for raw in lines:
+        size += len(raw)
+        line = raw.decode('ascii', errors='replace').rstrip('\r\n')
+        label = _label(line)
+
+        if header['version'] is None:
+            if label != 'RINEX VERSION / TYPE':
+                raise RinexError("En-tête RINEX absent")
+            try:
+                header['version'] = float(line[:9])
+            except ValueError:
+                raise RinexError("Version RINEX illisible")
+            if line[20:21] != 'O':
+                raise RinexError("Le fichier n'est pas un fichier d'observation RINEX")
+            if not 2 <= header['version'] < 4:
+                raise RinexError(f"Version RINEX non prise en charge: {header['version']}")
+            # Constellation par défaut des numéros de satellite sans lettre (RINEX 2)
+            header['system'] = line[40:41].strip() or 'G'
+            continue
+
+        try:
+            if label == 'MARKER NAME':
+                header['marker_name'] = line[:60].strip() or None
+            elif label == 'REC # / TYPE / VERS':
+                header['receiver'] = line[20:40].strip() or None
+            elif label == 'ANT # / TYPE':
+                header['antenna'] = line[20:40].strip() or None
+            elif label == 'APPROX POSITION XYZ':
+                header['approx_position'] = [float(line[i:i + 14]) for i in (0, 14, 28)]
+            elif label == 'INTERVAL':
+                header['interval'] = float(line[:10])
+            elif label == 'TIME OF FIRST OBS':
+                header['time_of_first_obs'] = _parse_time(line[:43].split())
+            elif label == 'TIME OF LAST OBS':
+                header['time_of_last_obs'] = _parse_time(line[:43].split())
+            elif label == '# / TYPES OF OBSERV':
+                # RINEX 2 : 9 types par ligne, lignes de continuation sans nombre
+                types = header['obs_types'].setdefault(header['system'], [])
+                types.extend(line[6:60].split())
+            elif label == 'SYS / # / OBS TYPES':
+                # RINEX 3 : 13 types par ligne, lignes de continuation sans constellation
+                if line[0:1].strip():
+                    current_system = line[0]
+                if current_system:
+                    header['obs_types'].setdefault(current_system, []).extend(line[7:60].split())
+            elif label == 'END OF HEADER':
+                header['header_size'] = size
+                return header
+        except (ValueError, IndexError):
+            # Ligne d'en-tête facultative mal formée
+            continue
+
+    raise RinexError("Fin d'en-tête RINEX absente")
+
+def _epoch_time(year, month, day, hour, minute, seconds):
+    return datetime(year, month, day, hour, minute) + timedelta(seconds=seconds)
+
+def _parse_epoch_v3(line):
+    """Ligne d'époque RINEX 3 : > AAAA MM JJ HH MM SS.SSSSSSS  F NNN"""
+    flag = int(line[31:32] or 0)
+    count = int(line[32:35] or 0)
+    epoch = None
+    if line[2:6].strip():
+        epoch = _epoch_time(int(line[2:6]), int(line[7:9]), int(line[10:12]),
+                            int(line[13:15]), int(line[16:18]), float(line[18:29]))
+    return epoch, flag, count
+
+def _parse_epoch_v2(line):
+    """Ligne d'époque RINEX 2 : AA MM JJ HH MM SS.SSSSSSS  F NNN, satellites"""
+    flag = int(line[28:29] or 0)
+    count = int(line[29:32] or 0)
+    epoch = None
+    if line[1:3].strip():
+        year = int(line[1:3])
+        year += 1900 if year >= 80 else 2000
+        epoch = _epoch_time(year, int(line[4:6]), int(line[7:9]),
+                            int(line[10:12]), int(line[13:15]), float(line[15:26]))
+    return epoch, flag, count
+
+def iter_records(lines, header):
+    """
+    Parcourt les enregistrements d'époque qui suivent l'en-tête
+
+    Args:
+        lines: Itérateur de lignes binaires, positionné sur un début d'époque
+        header (dict): En-tête lu par parse_header
+
+    Yields:
+        tuple: (date de l'époque ou None, indicateur, lignes brutes, satellites)
+    """
+    lines = iter(lines)
+    if header['version'] >= 3:
+        yield from _iter_records_v3(lines)
+    else:
+        yield from _iter_records_v2(lines, header)
+
+def _iter_records_v3(lines):
+    record = None
+    for raw in lines:
+        if raw[:1] == b'>':
+            if record is not None:
+                yield record
+            try:
+                epoch, flag, _ = _parse_epoch_v3(raw.decode('ascii', errors='replace'))
+            except ValueError:
+                raise RinexError(f"Ligne d'époque illisible: {raw[:40]!r}")
+            record = (epoch, flag, [raw], [])
+        elif record is not None:
+            record[2].append(raw)
+            if record[1] in OBSERVATION_FLAGS and raw[:1].strip():
+                record[3].append(raw[:3].decode('ascii', errors='replace'))
+    if record is not None:
+        yield record
+
+def _iter_records_v2(lines, header):
+    obs_count = max(len(types) for types in header['obs_types'].values()) if header['obs_types'] else 0
+    lines_per_satellite = max(1, math.ceil(obs_count / 5))
+    default_system = header.get('system', 'G')
+    if default_system == 'M':
+        default_system = 'G'
+
+    for raw in lines:
+        if not raw.strip():
+            continue
+        line = raw.decode('ascii', errors='replace')
+        try:
+            epoch, flag, count = _parse_epoch_v2(line)
+        except ValueError:
+            raise RinexError(f"Ligne d'époque illisible: {raw[:40]!r}")
+
+        record = [raw]
+        satellites = []
+        if flag in EVENT_FLAGS:
+            # count = nombre de lignes d'en-tête spéciales qui suivent
+            for _ in range(count):
+                record.append(next(lines, b''))
+            yield epoch, flag, record, satellites
+            continue
+
+        # 12 satellites par ligne d'époque, puis lignes de continuation
+        satellite_field = line[32:68].rstrip('\r\n')
+        for _ in range(math.ceil(count / 12) - 1):
+            continuation = next(lines, b'')
+            record.append(continuation)
+            satellite_field += continuation.decode('ascii', errors='replace')[32:68].rstrip('\r\n')
+        for i in range(0, count * 3, 3):
+            satellite = satellite_field[i:i + 3]
+            satellites.append((satellite[0].strip() or default_system) + satellite[1:].replace(' ', '0'))
+
+        for _ in range(count * lines_per_satellite):
+            record.append(next(lines, b''))
+        yield epoch, flag, record, satellites
+
+def build_index(lines, stride=INDEX_STRIDE):
+    """
+    Parcourt un fichier d'observation complet et construit son index d'époques
+
+    Args:
+        lines: Itérateur de lignes binaires du fichier, depuis le début
+        stride (int): Nombre d'époques entre deux entrées d'index
+
+    Returns:
+        dict: En-tête (voir parse_header) complété de la première et de la
+            dernière époque, du nombre d'époques, des constellations
+            observées et de l'index sérialisé (voir pack_index)
+
+    Raises:
+        RinexError: Si le fichier n'est pas un fichier d'observation RINEX
+    """
+    lines = iter(lines)
+    header = parse_header(lines)
+    offset = header['header_size']
+
+    entries = []
+    systems = set()
+    epoch_count = 0
+    first_epoch = last_epoch = None
+    for epoch, flag, record, satellites in iter_records(lines, header):
+        if epoch is not None and flag in OBSERVATION_FLAGS:
+            if epoch_count % stride == 0:
+                entries.append((to_seconds(epoch), offset))
+            epoch_count += 1
+            first_epoch = first_epoch or epoch
+            last_epoch = epoch
+            systems.update(satellite[0] for satellite in satellites if satellite)
+        offset += sum(len(line) for line in record)
+
+    header.update({
+        'first_epoch': first_epoch or header['time_of_first_obs'],
+        'last_epoch': last_epoch or header['time_of_last_obs'],
+        'epoch_count': epoch_count,
+        'systems': sorted(systems) or sorted(header['obs_types']),
+        'index': pack_index(entries)
+    })
+    return header
+
+def pack_index(entries):
+    """Sérialise une liste de (secondes, position) en binaire"""
+    return b''.join(_INDEX_ENTRY.pack(seconds, offset) for seconds, offset in entries)
+
+def unpack_index(data):
+    """Désérialise un index produit par pack_index"""
+    return [entry for entry in _INDEX_ENTRY.iter_unpack(data or b'')]
+
+def seek_offset(index, header_size, start):
+    """
+    Position à partir de laquelle lire pour atteindre une date
+
+    Args:
+        index (list): Entrées (secondes, position) triées
+        header_size (int): Taille de l'en-tête, position de la première époque
+        start (datetime): Début de la fenêtre
+
+    Returns:
+        int: Position de la dernière entrée d'index antérieure ou égale à start
+    """
+    position = bisect_right([seconds for seconds, _ in index], to_seconds(start))
+    return index[position - 1][1] if position else header_size
+
+def iter_window(lines, header, start, end):
+    """
+    Enregistrements compris dans une fenêtre de temps
+
+    Les événements (indicateurs 2 à 5) survenant dans la fenêtre sont
+    conservés. La lecture s'arrête à la première époque postérieure à end.
+
+    Args:
+        lines: Itérateur de lignes binaires positionné sur un début d'époque (voir seek_offset)
+        header (dict): En-tête lu par parse_header
+        start (datetime): Début de la fenêtre (inclus)
+        end (datetime): Fin de la fenêtre (incluse)
+
+    Yields:
+        bytes: Lignes brutes des enregistrements retenus
+    """
+    inside = False
+    for epoch, flag, record, _ in iter_records(lines, header):
+        if epoch is not None:
+            if epoch > end and flag in OBSERVATION_FLAGS:
+                return
+            inside = start <= epoch <= end
+        if inside:
+            yield from record
@@ -2,17 +2,27 @@
 Routes API REST pour la gestion des missions drone
 """
 import os
+from datetime import datetime
 from flask import (
-    Blueprint, request, jsonify, current_app, send_file, abort
+    Blueprint, request, jsonify, current_app, send_file, abort, stream_with_context
 )
 from werkzeug.utils import secure_filename
-from app import db
-from app.models import Mission, File
-from app.services import mission_service, file_service
+from app import cache, tile_cache
+from app.database import read_only
+from app.query_budget import query_budget
+from app.models import Mission
+from app.columnar import BODY_ENCODINGS, available_body_encodings, pack
+from app.services import (
+    mission_service, file_service, reaper_service, storage_service, rinex_service, geotag_service,
+    export_service, map_service, bulk_file_service, scrub_service, drift_service, rollup_service
+)
 
 bp = Blueprint('api', __name__)
 
 @bp.route('/missions', methods=['GET'])
+@cache.cached('missions')
+@read_only
+@query_budget(2)
 def get_missions():
     """
     Récupère la liste des missions
@@ -31,7 +41,7 @@ def get_missions():
     end_date = request.args.get('end_date')
     file_type = request.args.get('file_type')
     
-    missions = mission_service.search_missions(
+    missions = mission_service.search_mission_summaries(
         query=query, 
         start_date=start_date, 
         end_date=end_date, 
@@ -41,10 +51,12 @@ def get_missions():
     return jsonify({
         'success': True,
         'count': len(missions),
-        'missions': [mission.to_dict() for mission in missions]
+        'missions': missions
     })
 
 @bp.route('/missions/<int:mission_id>', methods=['GET'])
+@cache.cached('mission:{mission_id}')
+@query_budget(4)
 def get_mission(mission_id):
     """
     Récupère les détails d'une mission
@@ -62,11 +74,11 @@ def get_mission(mission_id):
             'message': f'Mission avec ID {mission_id} non trouvée'
         }), 404
     
-    # Récupérer les fichiers et les organiser par type
-    files_by_type = {}
-    for file_type in current_app.config['ALLOWED_EXTENSIONS'].keys():
-        files = mission_service.get_mission_files_by_type(mission_id, file_type)
-        files_by_type[file_type] = [file.to_dict() for file in files]
+    # Récupérer les fichiers (une requête) et les organiser par type
+    files_by_type = {file_type: [] for file_type in current_app.config['ALLOWED_EXTENSIONS'].keys()}
+    for file in mission_service.get_mission_file_summaries(mission_id):
+        if file['file_type'] in files_by_type:
+            files_by_type[file['file_type']].append(file)
     
     mission_data = mission.to_dict()
     mission_data['files_by_type'] = files_by_type
@@ -124,6 +136,46 @@ def create_mission():
         'mission': mission.to_dict()
     }), 201
 
+@bp.route('/missions/batch', methods=['POST'])
+def apply_mission_batch():
+    """
+    Crée, modifie et supprime plusieurs missions en une seule transaction
+    
+    JSON Body:
+        operations (list): Opérations {op: create|update|delete, id (update,
+            delete), name, flight_date, description, ref (optionnel, renvoyé
+            dans le résultat)}
+        atomic (bool, optional): N'applique aucune opération si l'une d'elles
+            est invalide (true par défaut)
+    
+    Returns:
+        JSON: Un résultat par opération, dans l'ordre du lot (status HTTP
+            équivalent à l'appel unitaire, mission ou message d'erreur)
+    """
+    data = request.json
+    if not data:
+        return jsonify({
+            'success': False,
+            'message': 'Données JSON requises'
+        }), 400
+    
+    atomic = data.get('atomic', True)
+    try:
+        batch = mission_service.apply_mission_batch(data.get('operations'), atomic=atomic is not False)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    
+    failed = sum(1 for result in batch['results'] if not result['success'])
+    return jsonify({
+        'success': failed == 0,
+        'applied': batch['applied'],
+        'message': f"{len(batch['results']) - failed} opération(s) appliquée(s), {failed} en échec",
+        'results': batch['results']
+    }), 200 if batch['applied'] else 422
+
 @bp.route('/missions/<int:mission_id>', methods=['PUT'])
 def update_mission(mission_id):
     """
@@ -202,16 +254,33 @@ def delete_mission(mission_id):
     success = mission_service.delete_mission(mission_id)
     
     if success:
+        # Les fichiers sont purgés en arrière-plan
         return jsonify({
             'success': True,
-            'message': f'Mission supprimée avec succès'
-        })
+            'message': f'Mission supprimée avec succès, purge des fichiers programmée'
+        }), 202
     else:
         return jsonify({
             'success': False,
             'message': f'Erreur lors de la suppression de la mission'
         }), 500
 
+@bp.route('/missions/deletions', methods=['GET'])
+def get_mission_deletions():
+    """
+    Récupère l'avancement de la purge des missions supprimées
+    
+    Returns:
+        JSON: Liste des missions en cours de purge
+    """
+    deletions = reaper_service.get_pending_deletions()
+    
+    return jsonify({
+        'success': True,
+        'count': len(deletions),
+        'deletions': deletions
+    })
+
 @bp.route('/upload', methods=['POST'])
 def upload_files():
     """
@@ -247,7 +316,7 @@ def upload_files():
     
     files = request.files.getlist('files')
     
-    uploaded_files = []
+    saved_files = []
     errors = []
     
     for file in files:
@@ -256,20 +325,13 @@ def upload_files():
         
         if file and file_service.allowed_file(file.filename):
             filename = secure_filename(file.filename)
-            file_path, file_type = file_service.save_file(file, mission.name)
-            
-            # Enregistrer dans la base de données
-            file_record = file_service.register_file_in_db(
-                mission_id=mission_id,
-                filename=filename,
-                file_path=file_path,
-                file_type=file_type
-            )
-            
-            uploaded_files.append({
-                'id': file_record.id,
+            file_path, file_type, volume, checksum = file_service.save_file(file, mission)
+            saved_files.append({
                 'filename': filename,
-                'file_type': file_type
+                'file_path': file_path,
+                'file_type': file_type,
+                'volume': volume,
+                'checksum': checksum
             })
         else:
             errors.append({
@@ -277,6 +339,13 @@ def upload_files():
                 'error': 'Format de fichier non autorisé'
             })
     
+    # Enregistrer dans la base de données, en une écriture pour toute la requête
+    file_ids = file_service.register_files_in_db(mission.id, saved_files)
+    uploaded_files = [
+        {'id': file_id, 'filename': saved['filename'], 'file_type': saved['file_type']}
+        for file_id, saved in zip(file_ids, saved_files)
+    ]
+    
     return jsonify({
         'success': len(errors) == 0,
         'message': f'{len(uploaded_files)} fichier(s) téléversé(s) avec succès, {len(errors)} erreur(s)',
@@ -285,6 +354,9 @@ def upload_files():
     })
 
 @bp.route('/missions/<int:mission_id>/files', methods=['GET'])
+@cache.cached('mission:{mission_id}')
+@read_only
+@query_budget(2)
 def get_mission_files(mission_id):
     """
     Récupère les fichiers d'une mission
@@ -294,10 +366,23 @@ def get_mission_files(mission_id):
     
     Query params:
         type (str, optional): Type de fichier à filtrer
+        format (str, optional): rows (par défaut, un objet par fichier) ou
+            columnar (tableaux parallèles, voir app.columnar)
+        encoding (str, optional): json (par défaut) ou msgpack (nécessite msgpack)
     
     Returns:
         JSON: Liste des fichiers
     """
+    response_format = request.args.get('format', 'rows')
+    body_encoding = request.args.get('encoding', 'json')
+    if response_format not in ('rows', 'columnar') or body_encoding not in available_body_encodings():
+        return jsonify({
+            'success': False,
+            'message': f'Format de réponse non disponible: {response_format}, {body_encoding}',
+            'formats': ['rows', 'columnar'],
+            'encodings': available_body_encodings()
+        }), 400
+    
     mission = mission_service.get_mission_by_id(mission_id)
     if not mission:
         return jsonify({
@@ -307,13 +392,20 @@ def get_mission_files(mission_id):
     
     file_type = request.args.get('type')
     
-    files = mission_service.get_mission_files_by_type(mission_id, file_type)
+    if response_format == 'columnar':
+        payload = dict(mission_service.get_mission_file_columns(mission_id, file_type),
+                       success=True, format='columnar')
+    else:
+        files = mission_service.get_mission_file_summaries(mission_id, file_type)
+        payload = {
+            'success': True,
+            'count': len(files),
+            'files': files
+        }
     
-    return jsonify({
-        'success': True,
-        'count': len(files),
-        'files': [file.to_dict() for file in files]
-    })
+    if body_encoding == 'msgpack':
+        return current_app.response_class(pack(payload), mimetype=BODY_ENCODINGS['msgpack'])
+    return jsonify(payload)
 
 @bp.route('/missions/<int:mission_id>/download', methods=['GET'])
 def download_files(mission_id):
@@ -405,28 +497,665 @@ def delete_file(file_id):
     Returns:
         JSON: Résultat de la suppression
     """
-    file = File.query.get(file_id)
+    file = file_service.get_active_file(file_id)
     if not file:
         return jsonify({
             'success': False,
             'message': f'Fichier avec ID {file_id} non trouvé'
         }), 404
     
-    # Supprimer le fichier physique
-    if os.path.exists(file.file_path):
-        try:
-            os.remove(file.file_path)
-        except OSError as e:
-            return jsonify({
-                'success': False,
-                'message': f'Erreur lors de la suppression du fichier: {str(e)}'
-            }), 500
-    
-    # Supprimer l'entrée de la base de données
-    db.session.delete(file)
-    db.session.commit()
+    # Supprimer le fichier physique et son entrée dans la base de données
+    try:
+        file_service.delete_file(file)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 404
+    except OSError as e:
+        return jsonify({
+            'success': False,
+            'message': f'Erreur lors de la suppression du fichier: {str(e)}'
+        }), 500
     
     return jsonify({
         'success': True,
         'message': 'Fichier supprimé avec succès'
-    })
\ No newline at end of file
+    })
+
+@bp.route('/files/bulk', methods=['POST'])
+def bulk_files():
+    """
+    Supprime ou déplace un ensemble de fichiers
+    
+    JSON Body:
+        action (str): delete ou move
+        ids (list, optional): ID des fichiers
+        filter (dict, optional): mission_id, file_type, pattern (motif glob
+            sur le nom), uploaded_after, uploaded_before (ISO 8601)
+        target (dict, optional): Destination d'un déplacement, file_type
+            et/ou mission_id
+        dry_run (bool, optional): Renvoie la sélection sans rien modifier
+    
+    Returns:
+        JSON: Nombre de fichiers par statut et résultat de chaque fichier
+    """
+    data = request.json
+    if not data:
+        return jsonify({
+            'success': False,
+            'message': 'Données JSON requises'
+        }), 400
+    
+    try:
+        results = bulk_file_service.apply_bulk_action(
+            data.get('action'),
+            ids=data.get('ids'),
+            filters=data.get('filter'),
+            target=data.get('target'),
+            dry_run=bool(data.get('dry_run'))
+        )
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    
+    counts = {}
+    for result in results:
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+    return jsonify({
+        'success': not any(status in counts for status in ('error', 'conflict', 'not_found')),
+        'counts': counts,
+        'files': results
+    })
+
+@bp.route('/files/<int:file_id>/rinex', methods=['GET'])
+@read_only
+@query_budget(2)
+def get_file_rinex(file_id):
+    """
+    Récupère l'en-tête et la période couverte d'un fichier d'observation RINEX
+    
+    Args:
+        file_id (int): ID du fichier
+    
+    Returns:
+        JSON: Station, récepteur, antenne, intervalle, première et dernière époque, constellations
+    """
+    file = file_service.get_active_file(file_id)
+    if not file:
+        return jsonify({
+            'success': False,
+            'message': f'Fichier avec ID {file_id} non trouvé'
+        }), 404
+    
+    index = rinex_service.get_rinex_index(file_id)
+    if index is None:
+        return jsonify({
+            'success': False,
+            'message': f"Le fichier {file.filename} n'est pas un fichier d'observation RINEX indexé"
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'rinex': index.to_dict()
+    })
+
+@bp.route('/files/<int:file_id>/rinex/window', methods=['GET'])
+def get_file_rinex_window(file_id):
+    """
+    Extrait les époques d'un fichier d'observation RINEX couvrant une fenêtre de temps
+    
+    Sans paramètre, la fenêtre couvre la journée du vol de la mission.
+    
+    Args:
+        file_id (int): ID du fichier
+    
+    Query params:
+        start (str, optional): Début de la fenêtre (ISO 8601, échelle de temps du fichier)
+        end (str, optional): Fin de la fenêtre (ISO 8601)
+        duration (int, optional): Durée en secondes si end n'est pas fourni
+            (durée du vol enregistrée par défaut)
+        margin (int, optional): Marge en secondes de part et d'autre de la fenêtre
+    
+    Returns:
+        File: Fichier RINEX (en-tête d'origine et époques de la fenêtre), en flux
+    """
+    file = file_service.get_active_file(file_id)
+    if not file:
+        return jsonify({
+            'success': False,
+            'message': f'Fichier avec ID {file_id} non trouvé'
+        }), 404
+    
+    index = rinex_service.get_rinex_index(file_id)
+    if index is None:
+        return jsonify({
+            'success': False,
+            'message': f"Le fichier {file.filename} n'est pas un fichier d'observation RINEX indexé"
+        }), 404
+    
+    try:
+        start = request.args.get('start')
+        end = request.args.get('end')
+        window = rinex_service.get_mission_window(
+            file.mission,
+            start=datetime.fromisoformat(start) if start else None,
+            end=datetime.fromisoformat(end) if end else None,
+            duration=request.args.get('duration', type=int),
+            margin=request.args.get('margin', 0, type=int)
+        )
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': 'Format de date invalide. Utilisez le format ISO 8601 (AAAA-MM-JJTHH:MM:SS)'
+        }), 400
+    
+    if window is None:
+        return jsonify({
+            'success': False,
+            'message': 'Fenêtre indéterminée : indiquez start et end (ou duration), ou la date du vol'
+        }), 400
+    
+    start, end = window
+    stem = os.path.splitext(file.filename)[0]
+    response = current_app.response_class(
+        stream_with_context(rinex_service.iter_rinex_window(file, index, start, end)),
+        mimetype='text/plain'
+    )
+    response.headers.set(
+        'Content-Disposition', 'attachment',
+        filename=f"{stem}_{start:%Y%m%d%H%M%S}_{end:%Y%m%d%H%M%S}.{file.file_extension}"
+    )
+    return response
+
+@bp.route('/missions/<int:mission_id>/rinex', methods=['GET'])
+@read_only
+@query_budget(2)
+def get_mission_rinex(mission_id):
+    """
+    Récupère les fichiers d'observation RINEX indexés d'une mission
+    
+    Args:
+        mission_id (int): ID de la mission
+    
+    Returns:
+        JSON: En-tête de chaque fichier et couverture de la journée du vol
+    """
+    mission = Mission.active().filter_by(id=mission_id).first()
+    if not mission:
+        return jsonify({
+            'success': False,
+            'message': f'Mission avec ID {mission_id} non trouvée'
+        }), 404
+    
+    window = rinex_service.get_mission_window(mission)
+    files = []
+    for index, filename in rinex_service.get_mission_rinex_indexes(mission_id):
+        row = index.to_dict()
+        row['filename'] = filename
+        row['covers_flight_date'] = bool(
+            window and index.first_epoch and index.last_epoch and
+            index.first_epoch < window[1] and index.last_epoch >= window[0]
+        )
+        files.append(row)
+    
+    return jsonify({
+        'success': True,
+        'count': len(files),
+        'files': files
+    })
+
+@bp.route('/missions/<int:mission_id>/geotags', methods=['GET'])
+@read_only
+@query_budget(3)
+def get_mission_geotags(mission_id):
+    """
+    Récupère la position interpolée des images d'une mission sur sa trajectoire
+    
+    Args:
+        mission_id (int): ID de la mission
+    
+    Returns:
+        JSON: Paramètres du géoréférencement et position de chaque image placée
+    """
+    mission = Mission.active().filter_by(id=mission_id).first()
+    if not mission:
+        return jsonify({
+            'success': False,
+            'message': f'Mission avec ID {mission_id} non trouvée'
+        }), 404
+    
+    geotags, images = geotag_service.get_mission_geotags(mission_id)
+    if geotags is None:
+        return jsonify({
+            'success': False,
+            'message': "Les images de cette mission n'ont pas été géoréférencées"
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'geotags': geotags.to_dict(),
+        'count': len(images),
+        'images': images
+    })
+
+@bp.route('/missions/<int:mission_id>/geotags', methods=['POST'])
+def geotag_mission(mission_id):
+    """
+    Géoréférence les images d'une mission sur sa trajectoire
+    
+    La trajectoire est lue dans les solutions PPK (.pos) de la mission, à
+    défaut dans ses fichiers de géoréférencement (CSV, GPX).
+    
+    Args:
+        mission_id (int): ID de la mission
+    
+    JSON Body (optionnel):
+        time_offset (float, optional): Décalage en secondes ajouté aux dates EXIF
+        max_gap (float, optional): Écart maximal entre deux positions encadrantes, en secondes
+    
+    Returns:
+        JSON: Paramètres et résultat du géoréférencement
+    """
+    mission = Mission.active().filter_by(id=mission_id).first()
+    if not mission:
+        return jsonify({
+            'success': False,
+            'message': f'Mission avec ID {mission_id} non trouvée'
+        }), 404
+    
+    data = request.get_json(silent=True) or {}
+    try:
+        time_offset = data.get('time_offset')
+        max_gap = data.get('max_gap')
+        time_offset = float(time_offset) if time_offset is not None else None
+        max_gap = float(max_gap) if max_gap is not None else None
+    except (TypeError, ValueError):
+        return jsonify({
+            'success': False,
+            'message': 'time_offset et max_gap doivent être des nombres de secondes'
+        }), 400
+    
+    geotags = geotag_service.geotag_mission(mission_id, time_offset, max_gap)
+    if geotags is None:
+        return jsonify({
+            'success': False,
+            'message': "La mission ne contient aucun fichier de trajectoire (PPK .pos, CSV ou GPX)"
+        }), 400
+    
+    return jsonify({
+        'success': True,
+        'message': f'{geotags.matched_count}/{geotags.image_count} image(s) géoréférencée(s)',
+        'geotags': geotags.to_dict()
+    })
+
+@bp.route('/missions/<int:mission_id>/geotags/csv', methods=['GET'])
+def download_mission_geotags(mission_id):
+    """
+    Télécharge le CSV de géoréférencement des images d'une mission
+    
+    Args:
+        mission_id (int): ID de la mission
+    
+    Returns:
+        File: CSV (nom, latitude, longitude, altitude, date de prise de vue)
+    """
+    mission = Mission.active().filter_by(id=mission_id).first()
+    if not mission:
+        return jsonify({
+            'success': False,
+            'message': f'Mission avec ID {mission_id} non trouvée'
+        }), 404
+    
+    geotags, images = geotag_service.get_mission_geotags(mission_id)
+    if geotags is None:
+        return jsonify({
+            'success': False,
+            'message': "Les images de cette mission n'ont pas été géoréférencées"
+        }), 404
+    
+    response = current_app.response_class(geotag_service.iter_geotag_csv(images), mimetype='text/csv')
+    response.headers.set('Content-Disposition', 'attachment', filename=f"{mission.name}_geotags.csv")
+    return response
+
+@bp.route('/export', methods=['GET'])
+def export_catalog():
+    """
+    Exporte le catalogue complet des missions actives, en flux
+    
+    Préférer cet export au parcours page par page de /api/missions pour
+    alimenter les outils de BI et de SIG.
+    
+    Query params:
+        format (str, optional): ndjson (par défaut), geojson, parquet ou arrow
+            (ces deux derniers nécessitent pyarrow)
+        kind (str, optional): missions (par défaut) ou files
+        files (bool, optional): Joint la liste des fichiers de chaque mission
+            en NDJSON (true par défaut)
+    
+    Returns:
+        File: Export du catalogue
+    """
+    file_format = request.args.get('format', 'ndjson')
+    kind = request.args.get('kind', 'missions')
+    include_files = request.args.get('files', 'true').lower() == 'true'
+    
+    try:
+        chunks = export_service.export_catalog(file_format, kind, include_files)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e),
+            'formats': export_service.available_formats()
+        }), 400
+    
+    mimetype, extension = export_service.EXPORT_FORMATS[file_format]
+    response = current_app.response_class(stream_with_context(chunks), mimetype=mimetype)
+    response.headers.set(
+        'Content-Disposition', 'attachment',
+        filename=f"catalog_{kind}_{datetime.utcnow():%Y%m%d_%H%M%S}.{extension}"
+    )
+    return response
+
+@bp.route('/tiles/<int:z>/<int:x>/<int:y>.<tile_format>', methods=['GET'])
+@tile_cache.cached('tiles')
+def get_map_tile(z, x, y, tile_format):
+    """
+    Récupère une tuile vectorielle de la carte des missions
+    
+    Les missions proches sont regroupées aux petits niveaux de zoom (entités
+    cluster et point_count de la couche missions) ; aux niveaux supérieurs, la
+    couche missions contient la position de chaque mission et la couche
+    footprints l'emprise de ses images géoréférencées.
+    
+    Args:
+        z, x, y (int): Tuile (schéma XYZ)
+        tile_format (str): mvt (Mapbox Vector Tile) ou geojson
+    
+    Returns:
+        File: Tuile encodée
+    """
+    if tile_format not in map_service.TILE_FORMATS:
+        abort(404)
+    try:
+        tile = map_service.get_tile(z, x, y, tile_format)
+    except ValueError:
+        abort(404)
+    return current_app.response_class(tile, mimetype=map_service.TILE_FORMATS[tile_format])
+
+@bp.route('/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """
+    Récupère les compteurs du cache des réponses et du cache des tuiles
+    
+    Returns:
+        JSON: Succès, échecs, réponses 304 et invalidations
+    """
+    return jsonify({
+        'success': True,
+        'cache': cache.stats(),
+        'tile_cache': tile_cache.stats()
+    })
+
+@bp.route('/storage', methods=['GET'])
+def get_storage_summary():
+    """
+    Récupère l'espace occupé par les fichiers enregistrés et la capacité du disque
+    
+    Query params:
+        days (int, optional): Période de calcul de la croissance moyenne (90 jours par défaut)
+    
+    Returns:
+        JSON: Fichiers et octets par type, capacité du volume et estimation de saturation
+    """
+    days = request.args.get('days', 90, type=int)
+    summary = storage_service.get_storage_summary()
+    forecast = storage_service.get_capacity_forecast(max(days, 1))
+    summary['average_daily_bytes'] = forecast['average_daily_bytes']
+    summary['days_until_full'] = forecast['days_until_full']
+    
+    return jsonify({
+        'success': True,
+        'storage': summary
+    })
+
+@bp.route('/storage/missions', methods=['GET'])
+def get_largest_missions():
+    """
+    Récupère les missions occupant le plus d'espace
+    
+    Query params:
+        limit (int, optional): Nombre de missions (10 par défaut)
+        file_type (str, optional): Ne compte que les fichiers de ce type
+    
+    Returns:
+        JSON: Missions triées par espace occupé décroissant
+    """
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 1000)
+    missions = storage_service.get_largest_missions(limit, request.args.get('file_type'))
+    
+    return jsonify({
+        'success': True,
+        'count': len(missions),
+        'missions': missions
+    })
+
+@bp.route('/storage/missions/<int:mission_id>', methods=['GET'])
+def get_mission_storage(mission_id):
+    """
+    Récupère l'espace occupé par une mission, par type de fichier
+    
+    Args:
+        mission_id (int): ID de la mission
+    
+    Returns:
+        JSON: Fichiers et octets par type
+    """
+    mission = mission_service.get_mission_by_id(mission_id)
+    if not mission:
+        return jsonify({
+            'success': False,
+            'message': f'Mission avec ID {mission_id} non trouvée'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'storage': storage_service.get_mission_storage(mission_id)
+    })
+
+@bp.route('/storage/drift', methods=['GET'])
+def get_storage_drift():
+    """
+    Détecte les fichiers enregistrés absents du stockage, les fichiers
+    stockés absents de la base et les tailles différentes
+    
+    Le parcours peut être long sur une flotte entière : préférer
+    `flask missions drift`, qui peut aussi corriger les écarts.
+    
+    Query params:
+        mission_id (int, optional): Limite la détection à une mission
+        all (bool, optional): Renvoie aussi les missions cohérentes
+    
+    Returns:
+        JSON: Écarts par mission et dossiers sans mission
+    """
+    mission_id = request.args.get('mission_id', type=int)
+    include_all = request.args.get('all', 'false').lower() == 'true'
+    
+    try:
+        reports = [
+            report for report in drift_service.reconcile_missions(mission_id)
+            if include_all or not report['consistent']
+        ]
+    except drift_service.UnsortedStreamError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+    unknown = [] if mission_id is not None else [name for _, name in drift_service.find_unknown_directories()]
+    
+    return jsonify({
+        'success': True,
+        'count': len(reports),
+        'missions': reports,
+        'unknown_directories': unknown
+    })
+
+@bp.route('/integrity', methods=['GET'])
+def get_integrity():
+    """
+    Récupère l'avancement du contrôle d'intégrité et ses résultats
+    
+    Returns:
+        JSON: Passage courant, fichiers par résultat (ok, missing, corrupted,
+        unreadable, unchecked) et nombre de fichiers orphelins
+    """
+    return jsonify({
+        'success': True,
+        'integrity': scrub_service.get_integrity_summary()
+    })
+
+@bp.route('/integrity/files', methods=['GET'])
+def get_integrity_files():
+    """
+    Récupère les fichiers en défaut au dernier contrôle
+    
+    Query params:
+        status (str, optional): missing, corrupted ou unreadable (tous par défaut)
+        mission_id (int, optional): Limite la liste à une mission
+        limit (int, optional): Nombre maximal de fichiers (1000 par défaut)
+    
+    Returns:
+        JSON: Fichiers manquants, corrompus ou illisibles
+    """
+    status = request.args.get('status')
+    if status is not None and status not in scrub_service.INTEGRITY_STATUSES[1:]:
+        return jsonify({
+            'success': False,
+            'message': f'Statut inconnu: {status}'
+        }), 400
+    limit = min(max(request.args.get('limit', 1000, type=int), 1), 10000)
+    files = scrub_service.get_problem_files(status, request.args.get('mission_id', type=int), limit)
+    
+    return jsonify({
+        'success': True,
+        'count': len(files),
+        'files': files
+    })
+
+@bp.route('/integrity/orphans', methods=['GET'])
+def get_integrity_orphans():
+    """
+    Récupère les fichiers présents dans le stockage mais absents de la base
+    
+    Query params:
+        mission_id (int, optional): Limite la liste à une mission
+        limit (int, optional): Nombre maximal de fichiers (1000 par défaut)
+    
+    Returns:
+        JSON: Fichiers orphelins relevés au dernier passage
+    """
+    limit = min(max(request.args.get('limit', 1000, type=int), 1), 10000)
+    orphans = scrub_service.get_orphan_files(request.args.get('mission_id', type=int), limit)
+    
+    return jsonify({
+        'success': True,
+        'count': len(orphans),
+        'orphans': orphans
+    })
+
+@bp.route('/integrity/scrub', methods=['POST'])
+def request_scrub():
+    """
+    Demande un nouveau passage du contrôle d'intégrité
+    
+    Le passage est effectué en arrière-plan (SCRUB_ENABLED) ou par
+    flask missions scrub.
+    
+    Returns:
+        JSON: Passage en cours (202)
+    """
+    run = scrub_service.request_scrub()
+    
+    return jsonify({
+        'success': True,
+        'run': run.to_dict()
+    }), 202
+
+@bp.route('/storage/growth', methods=['GET'])
+def get_storage_growth():
+    """
+    Récupère l'évolution quotidienne de l'espace occupé
+    
+    Query params:
+        days (int, optional): Nombre de jours (90 par défaut, 3660 au maximum)
+    
+    Returns:
+        JSON: Série quotidienne des variations et du volume cumulé
+    """
+    days = min(max(request.args.get('days', 90, type=int), 1), 3660)
+    
+    return jsonify({
+        'success': True,
+        'growth': storage_service.get_storage_growth(days)
+    })
+
+@bp.route('/stats/rollups', methods=['GET'])
+@cache.cached('missions')
+def get_stats_rollups():
+    """
+    Récupère une série temporelle de la flotte par date de vol
+    
+    Query params:
+        granularity (str, optional): day, week ou month (par défaut)
+        start (str, optional): Première date de vol incluse (AAAA-MM-JJ)
+        end (str, optional): Dernière date de vol incluse (AAAA-MM-JJ)
+        group_by (str, optional): camera_model pour une série par modèle de caméra
+    
+    Returns:
+        JSON: Missions, surface couverte, fichiers et octets de chaque période
+    """
+    try:
+        rollups = rollup_service.get_rollups(
+            granularity=request.args.get('granularity', 'month'),
+            start=request.args.get('start'),
+            end=request.args.get('end'),
+            group_by=request.args.get('group_by')
+        )
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    
+    return jsonify(dict(rollups, success=True))
+
+@bp.route('/storage/reconcile', methods=['GET'])
+def reconcile_storage():
+    """
+    Compare l'espace enregistré avec l'espace réellement occupé sur le disque
+    
+    Le parcours du disque peut être long sur une flotte entière : préférer
+    `flask missions du` ou limiter la réconciliation à une mission.
+    
+    Query params:
+        mission_id (int, optional): Limite la réconciliation à une mission
+        drift_only (bool, optional): Ne renvoie que les missions incohérentes
+    
+    Returns:
+        JSON: Valeurs enregistrées et mesurées par mission et par type
+    """
+    mission_id = request.args.get('mission_id', type=int)
+    drift_only = request.args.get('drift_only', 'false').lower() == 'true'
+    
+    report = storage_service.reconcile_storage(mission_id)
+    if drift_only:
+        report = [mission for mission in report if not mission['consistent']]
+    
+    return jsonify({
+        'success': True,
+        'count': len(report),
+        'missions': report
+    })
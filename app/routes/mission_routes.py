@@ -6,22 +6,36 @@ import json
 from datetime import datetime
 from flask import (
     Blueprint, flash, redirect, render_template, request, url_for, 
-    current_app, send_file, abort, jsonify
+    current_app, send_file, abort, jsonify, stream_with_context
 )
 from werkzeug.utils import secure_filename
 from app import db
+from app.database import read_only
+from app.query_budget import query_budget
+from app.storage import get_storage
 from app.models import Mission, File
-from app.services import mission_service, file_service
+from app.services import mission_service, file_service, stats_service
 
 bp = Blueprint('missions', __name__)
 
 @bp.route('/')
+@read_only
+@query_budget(4)
 def index():
-    """Page d'accueil avec la liste des missions"""
-    missions = mission_service.get_all_missions()
-    return render_template('index.html', missions=missions)
+    """Tableau de bord : agrégats de la flotte, derniers fichiers et missions paginées"""
+    page = request.args.get('page', 1, type=int)
+    per_page = current_app.config.get('DASHBOARD_PAGE_SIZE', 12)
+    
+    fleet_stats = stats_service.get_fleet_stats()
+    recent_uploads = stats_service.get_recent_uploads()
+    # Le total provient des agrégats : pas de requête COUNT(*) sur les missions
+    missions = mission_service.get_missions_page(page, per_page, total=fleet_stats['totals']['missions'])
+    
+    return render_template('index.html', missions=missions, stats=fleet_stats, recent_uploads=recent_uploads)
 
 @bp.route('/missions')
+@read_only
+@query_budget(2)
 def list_missions():
     """Liste toutes les missions avec filtres optionnels"""
     query = request.args.get('query')
@@ -145,7 +159,7 @@ def upload_files(mission_id):
         
         files = request.files.getlist('files[]')
         
-        uploaded_count = 0
+        saved_files = []
         error_count = 0
         
         for file in files:
@@ -154,20 +168,20 @@ def upload_files(mission_id):
             
             if file and file_service.allowed_file(file.filename):
                 filename = secure_filename(file.filename)
-                file_path, file_type = file_service.save_file(file, mission.name)
-                
-                # Enregistrer dans la base de données
-                file_service.register_file_in_db(
-                    mission_id=mission_id,
-                    filename=filename,
-                    file_path=file_path,
-                    file_type=file_type
-                )
-                
-                uploaded_count += 1
+                file_path, file_type, volume, checksum = file_service.save_file(file, mission)
+                saved_files.append({
+                    'filename': filename,
+                    'file_path': file_path,
+                    'file_type': file_type,
+                    'volume': volume,
+                    'checksum': checksum
+                })
             else:
                 error_count += 1
         
+        # Enregistrer dans la base de données, en une écriture pour toute la requête
+        uploaded_count = len(file_service.register_files_in_db(mission_id, saved_files))
+        
         if uploaded_count > 0:
             flash(f'{uploaded_count} fichier(s) téléversé(s) avec succès.', 'success')
         
@@ -221,9 +235,11 @@ def download_all_files(mission_id):
 def view_file(file_id):
     """Visualisation d'un fichier individuel"""
     file = File.query.get_or_404(file_id)
+    storage = get_storage()
+    key = file.storage_key
     
     # Vérifier si le fichier existe
-    if not os.path.exists(file.file_path):
+    if not storage.exists(key):
         abort(404, "Le fichier n'existe pas sur le disque")
     
     # Déterminer le type MIME en fonction de l'extension
@@ -248,35 +264,72 @@ def view_file(file_id):
     extension = file.file_extension
     mimetype = mime_types.get(extension, 'application/octet-stream')
     
-    # Pour les images, les afficher dans le navigateur
-    if extension in ['jpg', 'jpeg', 'png', 'tif', 'tiff']:
-        return send_file(file.file_path, mimetype=mimetype)
+    # Pour les images, les afficher dans le navigateur ; pour les autres types,
+    # proposer le téléchargement
+    as_attachment = extension not in ['jpg', 'jpeg', 'png', 'tif', 'tiff']
     
-    # Pour les autres types, proposer le téléchargement
-    return send_file(
-        file.file_path,
-        as_attachment=True,
-        download_name=file.filename,
-        mimetype=mimetype
+    local_path = storage.local_path(key)
+    if local_path and not file.compression:
+        return send_file(
+            local_path,
+            as_attachment=as_attachment,
+            download_name=file.filename,
+            mimetype=mimetype
+        )
+    
+    return _stream_stored_file(file, mimetype, as_attachment)
+
+def _stream_stored_file(file, mimetype, as_attachment):
+    """
+    Renvoie un fichier distant ou compressé par blocs, en respectant l'en-tête Range
+    
+    Seule la plage demandée est lue depuis le stockage distant ; un fichier
+    compressé est décompressé à la volée.
+    """
+    size = file.file_size
+    start, end = 0, size
+    status = 200
+    
+    byte_range = request.range
+    if byte_range is not None and byte_range.units == 'bytes':
+        range_bounds = byte_range.range_for_length(size)
+        if range_bounds is None:
+            response = current_app.response_class(status=416)
+            response.headers['Content-Range'] = f'bytes */{size}'
+            return response
+        start, end = range_bounds
+        status = 206
+    
+    response = current_app.response_class(
+        stream_with_context(file_service.iter_file_range(file, start, end)),
+        status=status,
+        mimetype=mimetype,
+        direct_passthrough=True
     )
+    response.content_length = end - start
+    response.headers['Accept-Ranges'] = 'bytes'
+    if status == 206:
+        response.headers['Content-Range'] = f'bytes {start}-{end - 1}/{size}'
+    if as_attachment:
+        response.headers.set('Content-Disposition', 'attachment', filename=file.filename)
+    return response
 
 @bp.route('/file/<int:file_id>/delete', methods=['POST'])
 def delete_file(file_id):
     """Suppression d'un fichier"""
-    file = File.query.get_or_404(file_id)
+    file = file_service.get_active_file(file_id)
+    if file is None:
+        abort(404)
     mission_id = file.mission_id
     
-    # Supprimer le fichier physique
-    if os.path.exists(file.file_path):
-        try:
-            os.remove(file.file_path)
-        except OSError as e:
-            flash(f"Erreur lors de la suppression du fichier: {str(e)}", 'error')
-            return redirect(url_for('missions.mission_detail', mission_id=mission_id))
-    
-    # Supprimer l'entrée de la base de données
-    db.session.delete(file)
-    db.session.commit()
+    # Supprimer le fichier physique et son entrée dans la base de données
+    try:
+        file_service.delete_file(file)
+    except ValueError:
+        abort(404)
+    except OSError as e:
+        flash(f"Erreur lors de la suppression du fichier: {str(e)}", 'error')
+        return redirect(url_for('missions.mission_detail', mission_id=mission_id))
     
     flash('Fichier supprimé avec succès.', 'success')
     return redirect(url_for('missions.mission_detail', mission_id=mission_id))
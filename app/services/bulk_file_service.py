@@ -0,0 +1,354 @@
+"""
+Service des opérations groupées sur les fichiers (suppression, déplacement)
+
+Les fichiers sont sélectionnés par une liste d'ID ou par un filtre (mission,
+type, motif de nom, période de téléversement) en une seule requête. Les
+opérations sur le stockage (suppressions, renommages) sont exécutées en
+parallèle, puis la base est mise à jour par une instruction ensembliste par
+lot, dans une seule transaction. Le résultat indique le sort de chaque
+fichier.
+
+Un déplacement change le type (et donc le dossier) des fichiers, leur
+mission, ou les deux. Il reste sur le volume de chaque fichier : en
+stockage local, c'est un simple renommage. Si la transaction échoue, les
+fichiers sont remis à leur emplacement d'origine.
+"""
+import os
+import fnmatch
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import update, delete
+from app import db, cache
+from app.database import serialized_write
+from app.models import Mission, File, RinexIndex
+from app.storage import get_storage
+from app.compression import SUFFIXES
+from app.services import stats_service
+from app.services.file_service import allowed_file
+
+BULK_ACTIONS = ('delete', 'move')
+
+# Nombre d'ID par instruction SQL
+BULK_SQL_BATCH_SIZE = 500
+
+# Type des fichiers sans extension reconnue
+OTHER_FILE_TYPE = 'autres'
+
+
+def _parse_date(value, name):
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        raise ValueError(f"Date invalide pour {name}: {value}")
+
+def _like_pattern(pattern):
+    """Motif LIKE équivalent à un motif glob simple (* et ?), ou None"""
+    if '[' in pattern:
+        return None
+    escaped = pattern.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return escaped.replace('*', '%').replace('?', '_')
+
+def select_files(ids=None, filters=None):
+    """
+    Sélectionne les fichiers visés par une opération groupée (missions actives)
+
+    Args:
+        ids (list, optional): ID des fichiers
+        filters (dict, optional): mission_id, file_type, pattern (motif glob
+            sur le nom du fichier), uploaded_after, uploaded_before (ISO 8601)
+
+    Returns:
+        tuple: (liste de File avec leur mission chargée, ID demandés introuvables)
+
+    Raises:
+        ValueError: Si la sélection est vide, mal formée ou trop grande
+    """
+    if not ids and not filters:
+        raise ValueError("Liste d'ID ou filtre requis")
+
+    query = File.query.join(Mission).options(db.contains_eager(File.mission)) \
+        .filter(Mission.deleted_at.is_(None))
+    pattern = None
+    if ids:
+        if not isinstance(ids, list) or not all(isinstance(file_id, int) for file_id in ids):
+            raise ValueError("Liste d'ID invalide")
+        query = query.filter(File.id.in_(set(ids)))
+    if filters:
+        unknown = set(filters) - {'mission_id', 'file_type', 'pattern', 'uploaded_after', 'uploaded_before'}
+        if unknown:
+            raise ValueError(f"Filtre inconnu: {', '.join(sorted(unknown))}")
+        if filters.get('mission_id') is not None:
+            query = query.filter(File.mission_id == filters['mission_id'])
+        if filters.get('file_type'):
+            query = query.filter(File.file_type == filters['file_type'])
+        if filters.get('uploaded_after'):
+            query = query.filter(File.uploaded_at >= _parse_date(filters['uploaded_after'], 'uploaded_after'))
+        if filters.get('uploaded_before'):
+            query = query.filter(File.uploaded_at < _parse_date(filters['uploaded_before'], 'uploaded_before'))
+        pattern = filters.get('pattern')
+        if pattern:
+            like = _like_pattern(pattern)
+            if like is not None:
+                query = query.filter(File.filename.like(like, escape='\\'))
+
+    max_files = current_app.config['FILE_BULK_MAX_FILES']
+    query = query.order_by(File.id)
+    if not pattern:
+        files = query.limit(max_files + 1).all()
+    else:
+        # LIKE ignore la casse sous SQLite et ne connaît pas les classes [...] :
+        # les lignes sont lues par lots et seuls les vrais correspondants comptent
+        files = []
+        rows = db.session.scalars(query.statement, execution_options={'yield_per': BULK_SQL_BATCH_SIZE})
+        try:
+            for file in rows:
+                if fnmatch.fnmatchcase(file.filename, pattern):
+                    files.append(file)
+                    if len(files) > max_files:
+                        break
+        finally:
+            rows.close()
+    if len(files) > max_files:
+        raise ValueError(f"Sélection trop grande (plus de {max_files} fichiers), préciser le filtre")
+
+    found = {file.id for file in files}
+    missing = [file_id for file_id in dict.fromkeys(ids or []) if file_id not in found]
+    return files, missing
+
+def _result(file, status, message=None):
+    result = {'id': file.id, 'filename': file.filename, 'mission_id': file.mission_id, 'status': status}
+    if message:
+        result['message'] = message
+    return result
+
+def _chunks(items, size=BULK_SQL_BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def _record_files(files, sign):
+    """Met à jour les agrégats pour des fichiers ajoutés (1) ou retirés (-1), par mission et type"""
+    groups = {}
+    for mission_id, file_type, file_size in files:
+        count, total_bytes = groups.get((mission_id, file_type), (0, 0))
+        groups[(mission_id, file_type)] = (count + 1, total_bytes + file_size)
+    for (mission_id, file_type), (count, total_bytes) in sorted(groups.items()):
+        stats_service.record_files(mission_id, file_type, sign * count, sign * total_bytes)
+
+def _delete_quietly(storage, key):
+    """Supprime un fichier du stockage (exécuté dans un thread)"""
+    try:
+        storage.delete(key)
+    except OSError as e:
+        return str(e)
+    return None
+
+@serialized_write
+def _delete_rows(file_ids, removed):
+    for chunk in _chunks(file_ids):
+        db.session.execute(delete(RinexIndex).where(RinexIndex.file_id.in_(chunk)))
+        db.session.execute(delete(File).where(File.id.in_(chunk)), execution_options={'synchronize_session': False})
+    _record_files(removed, -1)
+    db.session.commit()
+
+def delete_files(files, workers=8):
+    """
+    Supprime des fichiers du stockage (en parallèle) puis de la base
+
+    Un fichier dont la suppression échoue sur le stockage reste enregistré.
+
+    Args:
+        files (list): Fichiers à supprimer (voir select_files)
+        workers (int): Nombre de suppressions simultanées
+
+    Returns:
+        list: Un résultat par fichier
+    """
+    storage = get_storage()
+    keys = [file.storage_key for file in files]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        errors = list(executor.map(lambda key: _delete_quietly(storage, key), keys))
+
+    deleted = [file for file, error in zip(files, errors) if error is None]
+    results = [
+        _result(file, 'deleted') if error is None else _result(file, 'error', error)
+        for file, error in zip(files, errors)
+    ]
+    if deleted:
+        mission_ids = {file.mission_id for file in deleted}
+        _delete_rows([file.id for file in deleted],
+                     [(file.mission_id, file.file_type, file.file_size) for file in deleted])
+        cache.invalidate('missions', *(f'mission:{mission_id}' for mission_id in mission_ids))
+    return results
+
+def _target_path(file, file_type):
+    """Chemin d'un fichier dans le dossier d'un autre type, sous-dossiers conservés"""
+    parts = file.file_path.replace(os.sep, '/').split('/', 1)
+    relative = parts[1] if len(parts) > 1 else parts[0]
+    return os.path.join(file_type, *relative.split('/'))
+
+def _plan_moves(files, target_type, target_mission):
+    """
+    Calcule la destination de chaque fichier et écarte les conflits
+
+    Returns:
+        tuple: (déplacements [(fichier, mission, type, chemin)], résultats des fichiers écartés)
+    """
+    planned, results = [], []
+    for file in files:
+        file_type = target_type or file.file_type
+        mission = target_mission or file.mission
+        if file_type == file.file_type and mission.id == file.mission_id:
+            results.append(_result(file, 'unchanged'))
+        elif file_type != OTHER_FILE_TYPE and file_type != file.file_type and not allowed_file(file.filename, file_type):
+            results.append(_result(file, 'error', f"Extension non autorisée pour le type {file_type}"))
+        else:
+            planned.append((file, mission, file_type, _target_path(file, file_type)))
+
+    # Fichiers déjà présents à destination, en une requête
+    targets = {(mission.id, path) for _, mission, _, path in planned}
+    existing = set()
+    if targets:
+        existing = set(
+            db.session.query(File.mission_id, File.file_path)
+            .filter(File.mission_id.in_({mission_id for mission_id, _ in targets}),
+                    File.file_path.in_({path for _, path in targets}))
+            .all()
+        ) & targets
+
+    moves, claimed = [], set()
+    for file, mission, file_type, path in planned:
+        if (mission.id, path) in existing or (mission.id, path) in claimed:
+            results.append(_result(file, 'conflict', f"Un fichier {path} existe déjà dans la mission"))
+            continue
+        claimed.add((mission.id, path))
+        moves.append((file, mission, file_type, path))
+    return moves, results
+
+def _move_quietly(storage, source_key, target_key):
+    """Déplace un fichier sur le stockage (exécuté dans un thread)"""
+    try:
+        storage.move(source_key, target_key)
+    except OSError as e:
+        return str(e)
+    return None
+
+@serialized_write
+def _update_rows(rows, removed, added):
+    for chunk in _chunks(rows):
+        db.session.execute(update(File), chunk)
+    _record_files(removed, -1)
+    _record_files(added, 1)
+    db.session.commit()
+
+def move_files(files, target_type=None, target_mission=None, workers=8):
+    """
+    Déplace des fichiers vers un autre type et/ou une autre mission
+
+    Les fichiers sont renommés en parallèle sur le stockage, puis leurs lignes
+    mises à jour en une instruction par lot. Si la transaction échoue, les
+    fichiers sont remis à leur place.
+
+    Args:
+        files (list): Fichiers à déplacer (voir select_files)
+        target_type (str, optional): Nouveau type des fichiers
+        target_mission (Mission, optional): Nouvelle mission des fichiers
+        workers (int): Nombre de déplacements simultanés
+
+    Returns:
+        list: Un résultat par fichier
+    """
+    moves, results = _plan_moves(files, target_type, target_mission)
+    if not moves:
+        return results
+
+    storage = get_storage()
+    keys = [
+        (file.storage_key, storage.file_key(
+            mission, path + SUFFIXES[file.compression] if file.compression else path, file.volume
+        ))
+        for file, mission, _, path in moves
+    ]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        errors = list(executor.map(lambda pair: _move_quietly(storage, *pair), keys))
+
+        moved = []
+        for (file, mission, file_type, path), (source_key, target_key), error in zip(moves, keys, errors):
+            if error is None:
+                moved.append((file, mission, file_type, path, source_key, target_key))
+            else:
+                results.append(_result(file, 'error', error))
+        if not moved:
+            return results
+
+        # Valeurs lues avant la validation, qui expire les objets de la session
+        mission_ids = {file.mission_id for file, *_ in moved} | {mission.id for _, mission, *_ in moved}
+        moved_results = [_result(file, 'moved') for file, *_ in moved]
+        for result, (_, mission, *_) in zip(moved_results, moved):
+            result['mission_id'] = mission.id
+        try:
+            _update_rows(
+                [{'id': file.id, 'mission_id': mission.id, 'file_type': file_type, 'file_path': path}
+                 for file, mission, file_type, path, _, _ in moved],
+                [(file.mission_id, file.file_type, file.file_size) for file, *_ in moved],
+                [(mission.id, file_type, file.file_size) for file, mission, file_type, *_ in moved]
+            )
+        except Exception as e:
+            current_app.logger.error(f"Erreur lors de l'enregistrement des déplacements: {str(e)}")
+            db.session.rollback()
+            # Remise en place des fichiers déjà déplacés
+            list(executor.map(lambda item: _move_quietly(storage, item[5], item[4]), moved))
+            for result in moved_results:
+                result.update(status='error', message="Erreur lors de l'enregistrement du déplacement")
+            return results + moved_results
+
+    cache.invalidate('missions', *(f'mission:{mission_id}' for mission_id in mission_ids))
+    return results + moved_results
+
+def apply_bulk_action(action, ids=None, filters=None, target=None, dry_run=False, workers=8):
+    """
+    Supprime ou déplace un ensemble de fichiers
+
+    Args:
+        action (str): delete ou move
+        ids (list, optional): ID des fichiers
+        filters (dict, optional): Filtre de sélection (voir select_files)
+        target (dict, optional): Destination d'un déplacement : file_type et/ou mission_id
+        dry_run (bool): Renvoie la sélection sans rien modifier
+        workers (int): Nombre d'opérations simultanées sur le stockage
+
+    Returns:
+        list: Un résultat par fichier {id, filename, mission_id, status,
+            message}, status parmi deleted, moved, unchanged, conflict,
+            error, not_found et planned (dry_run)
+
+    Raises:
+        ValueError: Si l'action, la sélection ou la destination est invalide
+    """
+    if action not in BULK_ACTIONS:
+        raise ValueError(f"Action inconnue: {action}")
+
+    target_type = target_mission = None
+    if action == 'move':
+        target = target or {}
+        target_type = target.get('file_type')
+        if not target_type and target.get('mission_id') is None:
+            raise ValueError("Type ou mission de destination requis")
+        if target_type and target_type not in current_app.config['ALLOWED_EXTENSIONS'] and \
+                target_type != OTHER_FILE_TYPE:
+            raise ValueError(f"Type de fichier inconnu: {target_type}")
+        if target.get('mission_id') is not None:
+            target_mission = Mission.active().filter_by(id=target['mission_id']).first()
+            if target_mission is None:
+                raise ValueError(f"Mission avec ID {target['mission_id']} non trouvée")
+
+    files, missing = select_files(ids, filters)
+    results = [{'id': file_id, 'status': 'not_found'} for file_id in missing]
+    if dry_run:
+        return results + [_result(file, 'planned') for file in files]
+    if not files:
+        return results
+
+    if action == 'delete':
+        return results + delete_files(files, workers)
+    return results + move_files(files, target_type, target_mission, workers)
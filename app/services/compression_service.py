@@ -0,0 +1,226 @@
+"""
+Service de compression des données froides
+
+Les fichiers texte (COMPRESSION_FILE_TYPES : journaux, CSV de
+géoréférencement, observations RINEX) des missions sans téléversement
+depuis COMPRESSION_MIN_AGE_DAYS jours sont compressés en tâche de fond
+(`flask missions compress`).
+
+Chaque fichier est compressé (en parallèle) sous un nom temporaire, puis
+la base est mise à jour et l'original supprimé : les lectures restent
+servies pendant l'opération. La version compressée d'un fichier supprimé
+entre-temps est effacée. Un fichier dont la compression ne fait pas
+gagner au moins MIN_SAVING de sa taille est conservé tel quel, et n'est
+plus examiné (stored_size renseigné).
+"""
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import update, select, bindparam
+from sqlalchemy.orm import contains_eager
+from app import db, cache
+from app.database import read_only, serialized_write
+from app.query_budget import query_budget
+from app.models import Mission, File
+from app.storage import get_storage
+from app.compression import SUFFIXES, resolve_codec, compress_stream
+
+# Fichiers traités entre deux validations en base
+COMPRESSION_BATCH_SIZE = 200
+
+# Gain minimal (fraction de la taille d'origine) pour conserver la version compressée
+MIN_SAVING = 0.1
+
+def _cold_files_query(min_age_days, file_types, min_size):
+    """Fichiers non encore examinés des missions inactives depuis min_age_days jours"""
+    cutoff = datetime.utcnow() - timedelta(days=min_age_days)
+    active_missions = db.session.query(File.mission_id) \
+        .group_by(File.mission_id) \
+        .having(db.func.max(File.uploaded_at) >= cutoff)
+
+    return File.query.join(Mission) \
+        .options(contains_eager(File.mission)) \
+        .filter(
+            Mission.deleted_at.is_(None),
+            Mission.date_created < cutoff,
+            File.mission_id.notin_(active_missions),
+            File.stored_size.is_(None),
+            File.file_type.in_(file_types),
+            File.file_size >= min_size
+        )
+
+def _compress_file(storage, codec, level, source_key, target_key, file_size):
+    """
+    Compresse un fichier stocké (exécuté dans un thread)
+
+    Avec un stockage local, la version compressée est écrite sous un nom
+    caché à côté de l'original puis renommée ; sinon, elle est préparée dans
+    un fichier temporaire puis envoyée au stockage.
+
+    Returns:
+        tuple: (taille stockée ou None si le fichier reste tel quel, message d'erreur ou None)
+    """
+    max_size = file_size * (1 - MIN_SAVING)
+    target_path = storage.local_path(target_key)
+    try:
+        if target_path:
+            directory, filename = os.path.split(target_path)
+            temp_path = os.path.join(directory, f'.{filename}.compress')
+            try:
+                with storage.open(source_key) as source, open(temp_path, 'wb') as target:
+                    compress_stream(codec, source, target, level)
+                    stored_size = target.tell()
+                if stored_size > max_size:
+                    os.remove(temp_path)
+                    return None, None
+                os.replace(temp_path, target_path)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+            return stored_size, None
+
+        with tempfile.TemporaryFile() as buffer:
+            with storage.open(source_key) as source:
+                compress_stream(codec, source, buffer, level)
+            stored_size = buffer.tell()
+            if stored_size > max_size:
+                return None, None
+            buffer.seek(0)
+            storage.save(target_key, buffer)
+        return stored_size, None
+    except Exception as e:
+        return None, str(e)
+
+@serialized_write
+def _save_batch(rows):
+    """
+    Enregistre le résultat d'un lot pour les fichiers toujours présents
+
+    Returns:
+        set: ID des fichiers enregistrés
+    """
+    recorded = set(db.session.scalars(select(File.id).where(File.id.in_([row['id'] for row in rows]))))
+    if recorded:
+        # Instruction Core : une mise à jour ORM par clé primaire lèverait
+        # StaleDataError pour une ligne disparue
+        files = File.__table__
+        statement = update(files).where(files.c.id == bindparam('_id')) \
+            .values(compression=bindparam('_compression'), stored_size=bindparam('_stored_size'))
+        db.session.execute(statement, [
+            {'_id': row['id'], '_compression': row['compression'], '_stored_size': row['stored_size']}
+            for row in rows if row['id'] in recorded
+        ])
+        db.session.commit()
+    return recorded
+
+def compress_cold_files(workers=4, codec=None, level=None, min_age_days=None, limit=None, dry_run=False):
+    """
+    Compresse les fichiers texte des missions inactives
+
+    Args:
+        workers (int): Nombre de threads de compression
+        codec (str, optional): Codec (COMPRESSION_CODEC par défaut)
+        level (int, optional): Niveau de compression (défaut du codec si None)
+        min_age_days (int, optional): Inactivité minimale des missions (COMPRESSION_MIN_AGE_DAYS par défaut)
+        limit (int, optional): Nombre maximal de fichiers examinés
+        dry_run (bool): Compte les fichiers éligibles sans les compresser
+
+    Returns:
+        dict: Fichiers examinés, compressés, conservés tels quels, en erreur et
+            supprimés pendant la compression, octets d'origine et stockés des
+            fichiers compressés
+    """
+    config = current_app.config
+    codec = resolve_codec(codec or config['COMPRESSION_CODEC'])
+    if min_age_days is None:
+        min_age_days = config['COMPRESSION_MIN_AGE_DAYS']
+
+    query = _cold_files_query(min_age_days, config['COMPRESSION_FILE_TYPES'], config['COMPRESSION_MIN_SIZE']) \
+        .order_by(File.id)
+    if limit:
+        query = query.limit(limit)
+    files = query.all()
+
+    stats = {'codec': codec, 'files': len(files), 'compressed': 0, 'kept': 0, 'errors': 0, 'deleted': 0,
+             'bytes': 0, 'stored_bytes': 0}
+    if dry_run or not files:
+        return stats
+
+    # Clés calculées avant toute validation (qui expire les objets chargés)
+    storage = get_storage()
+    suffix = SUFFIXES[codec]
+    tasks = [
+        (file.id, file.file_size, file.storage_key,
+         storage.file_key(file.mission, file.file_path + suffix, file.volume))
+        for file in files
+    ]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for start in range(0, len(tasks), COMPRESSION_BATCH_SIZE):
+            batch = tasks[start:start + COMPRESSION_BATCH_SIZE]
+            results = executor.map(
+                lambda task: _compress_file(storage, codec, level, task[2], task[3], task[1]), batch
+            )
+
+            rows = []
+            compressed = {}
+            for (file_id, file_size, source_key, target_key), (stored_size, error) in zip(batch, results):
+                if error is not None:
+                    current_app.logger.error(f"Erreur lors de la compression de {source_key}: {error}")
+                    stats['errors'] += 1
+                elif stored_size is None:
+                    rows.append({'id': file_id, 'compression': None, 'stored_size': file_size})
+                else:
+                    rows.append({'id': file_id, 'compression': codec, 'stored_size': stored_size})
+                    compressed[file_id] = (file_size, stored_size, source_key, target_key)
+
+            if not rows:
+                continue
+
+            # Les lectures utilisent la version compressée dès la validation
+            try:
+                recorded = _save_batch(rows)
+            except Exception:
+                db.session.rollback()
+                list(executor.map(storage.delete, [keys[3] for keys in compressed.values()]))
+                raise
+
+            # Fichiers supprimés pendant la compression : la copie compressée est effacée
+            originals, orphans = [], []
+            for row in rows:
+                if row['id'] not in recorded:
+                    stats['deleted'] += 1
+                    if row['id'] in compressed:
+                        orphans.append(compressed[row['id']][3])
+                elif row['id'] in compressed:
+                    file_size, stored_size, source_key, _ = compressed[row['id']]
+                    originals.append(source_key)
+                    stats['compressed'] += 1
+                    stats['bytes'] += file_size
+                    stats['stored_bytes'] += stored_size
+                else:
+                    stats['kept'] += 1
+            list(executor.map(storage.delete, originals + orphans))
+
+    if stats['compressed']:
+        cache.clear()
+    return stats
+
+@read_only
+@query_budget(1)
+def get_compression_summary():
+    """
+    Gain de la compression sur les fichiers des missions actives
+
+    Returns:
+        dict: Nombre de fichiers compressés, octets d'origine et octets stockés
+    """
+    files, size, stored_size = db.session.query(
+        db.func.count(File.id),
+        db.func.coalesce(db.func.sum(File.file_size), 0),
+        db.func.coalesce(db.func.sum(File.stored_size), 0)
+    ).join(Mission).filter(Mission.deleted_at.is_(None), File.compression.isnot(None)).one()
+    return {'files': files, 'bytes': int(size), 'stored_bytes': int(stored_size)}
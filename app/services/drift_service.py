@@ -0,0 +1,395 @@
+"""
+Service de détection des écarts entre la base et l'arborescence des missions
+
+Un téléversement interrompu, un renommage de mission en échec ou une
+suppression partielle laissent la base et le stockage désynchronisés. La
+détection compare, mission par mission et volume par volume, deux flux
+triés par clé :
+
+    - les fichiers enregistrés, lus avec un curseur côté serveur et triés
+      en base par chemin stocké (suffixe de compression compris) selon une
+      collation binaire ;
+    - les fichiers stockés, parcourus dans le même ordre (walk_sorted).
+
+Une fusion (merge join) des deux flux relève en un seul passage, sans
+charger aucune des deux listes en mémoire :
+
+    missing  : fichier enregistré absent du stockage ;
+    orphan   : fichier stocké absent de la base ;
+    resized  : fichier présent des deux côtés avec une taille différente.
+
+Seuls les écarts sont conservés (les listes renvoyées sont tronquées à
+DRIFT_REPORT_LIMIT entrées) ; ils sont corrigés, sur demande, une fois le
+parcours de la mission terminé. Les dossiers du stockage local qui ne
+correspondent à aucune mission sont relevés de la même façon.
+"""
+import os
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import select, insert, update, delete
+from app import db, cache
+from app.database import serialized_write
+from app.models import Mission, File, RinexIndex
+from app.storage import get_storage, DEFAULT_VOLUME
+from app.compression import SUFFIXES
+from app.services import stats_service
+from app.services.file_service import get_file_type
+
+# Lignes lues par aller-retour avec la base
+DRIFT_BATCH_SIZE = 5000
+
+# Nombre maximal d'écarts détaillés par catégorie et par mission
+DRIFT_REPORT_LIMIT = 1000
+
+# Nombre d'ID par instruction SQL lors des corrections
+DRIFT_SQL_BATCH_SIZE = 500
+
+# Traitement des fichiers orphelins : enregistrés en base ou supprimés du stockage
+ORPHAN_ACTIONS = ('register', 'delete')
+
+
+class UnsortedStreamError(RuntimeError):
+    """Un des flux comparés n'est pas trié : la collation de la base ne suit pas l'ordre binaire"""
+
+
+def _binary(expression):
+    """Expression triée par points de code, quel que soit le moteur de base de données"""
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        return expression.collate('C')
+    if dialect in ('mysql', 'mariadb'):
+        return expression.collate('utf8mb4_bin')
+    # SQLite : collation BINARY par défaut
+    return expression
+
+def _stored_path():
+    """Chemin stocké d'un fichier en SQL (chemin enregistré suivi du suffixe de son codec)"""
+    suffix = db.case(*((File.compression == codec, value) for codec, value in SUFFIXES.items()), else_='')
+    return File.file_path + suffix
+
+def merge_join(recorded, stored):
+    """
+    Fusionne deux flux triés par clé (premier élément de chaque entrée)
+
+    Args:
+        recorded: Entrées enregistrées en base, triées
+        stored: Entrées du stockage, triées
+
+    Yields:
+        tuple: (entrée enregistrée ou None, entrée stockée ou None), les
+            entrées de même clé étant renvoyées ensemble
+
+    Raises:
+        UnsortedStreamError: Si un des flux n'est pas trié
+    """
+    def checked(entries, origin):
+        previous = None
+        for entry in entries:
+            if previous is not None and entry[0] < previous:
+                raise UnsortedStreamError(f"Flux {origin} non trié: {entry[0]!r} après {previous!r}")
+            previous = entry[0]
+            yield entry
+
+    recorded, stored = checked(recorded, 'de la base'), checked(stored, 'du stockage')
+    row, entry = next(recorded, None), next(stored, None)
+    while row is not None or entry is not None:
+        if entry is None or (row is not None and row[0] < entry[0]):
+            yield row, None
+            row = next(recorded, None)
+        elif row is None or entry[0] < row[0]:
+            yield None, entry
+            entry = next(stored, None)
+        else:
+            yield row, entry
+            row, entry = next(recorded, None), next(stored, None)
+
+def _locations(storage):
+    """
+    Emplacements à comparer séparément
+
+    Returns:
+        list: Tuples (nom du volume ou None, backend), un par volume de stockage
+    """
+    volumes = getattr(storage, 'volumes', None)
+    if volumes:
+        return list(volumes.items())
+    return [(None, storage)]
+
+def _recorded_statement(mission_id, volume):
+    key = _stored_path()
+    statement = select(key, File.id, File.file_type, File.file_size, File.stored_size, File.compression) \
+        .where(File.mission_id == mission_id)
+    if volume == DEFAULT_VOLUME:
+        statement = statement.where(File.volume.is_(None) | (File.volume == DEFAULT_VOLUME))
+    elif volume is not None:
+        statement = statement.where(File.volume == volume)
+    return statement.order_by(_binary(key))
+
+def _iter_recorded(connection, mission_id, volume):
+    """Fichiers enregistrés d'une mission sur un volume, triés par chemin stocké"""
+    rows = connection.execution_options(yield_per=DRIFT_BATCH_SIZE) \
+        .execute(_recorded_statement(mission_id, volume))
+    for key, *values in rows:
+        yield (key.replace(os.sep, '/'), *values)
+
+def _new_report(mission):
+    return {
+        'mission_id': mission.id,
+        'name': mission.name,
+        'files_recorded': 0,
+        'files_stored': 0,
+        'missing_count': 0,
+        'orphans_count': 0,
+        'resized_count': 0,
+        'missing': [],
+        'orphans': [],
+        'resized': []
+    }
+
+def _add(report, category, item, fixes, fix):
+    report[f'{category}_count'] += 1
+    if len(report[category]) < DRIFT_REPORT_LIMIT:
+        report[category].append({key: value for key, value in item.items() if not key.startswith('_')})
+    if fix:
+        fixes[category].append(item)
+
+def diff_mission(mission, fix_missing=False, orphans=None, storage=None):
+    """
+    Compare les fichiers enregistrés d'une mission avec son dossier de stockage
+
+    Args:
+        mission (Mission): Mission active
+        fix_missing (bool): Conserve les écarts « missing » et « resized » à corriger
+        orphans (str, optional): register ou delete pour conserver les orphelins à corriger
+        storage (StorageBackend, optional): Backend de stockage
+
+    Returns:
+        tuple: (rapport, écarts à corriger par catégorie)
+    """
+    storage = storage or get_storage()
+    report = _new_report(mission)
+    fixes = {'missing': [], 'orphans': [], 'resized': []}
+
+    with db.engine.connect() as connection:
+        for volume, backend in _locations(storage):
+            recorded = _iter_recorded(connection, mission.id, volume)
+            stored = backend.walk_sorted(backend.mission_prefix(mission))
+            for row, entry in merge_join(recorded, stored):
+                if row is not None:
+                    report['files_recorded'] += 1
+                if entry is not None:
+                    report['files_stored'] += 1
+
+                if entry is None:
+                    key, file_id, file_type, file_size, _, _ = row
+                    _add(report, 'missing', {
+                        'id': file_id, 'file_path': key, 'file_type': file_type, 'file_size': file_size,
+                        'volume': volume
+                    }, fixes, fix_missing)
+                elif row is None:
+                    key, size, _ = entry
+                    _add(report, 'orphans', {
+                        'file_path': key, 'file_size': size, 'volume': volume, '_backend': backend
+                    }, fixes, orphans is not None)
+                else:
+                    key, file_id, file_type, file_size, stored_size, compression = row
+                    expected = stored_size if compression else file_size
+                    if expected is not None and entry[1] != expected:
+                        # Taille d'origine inconnue sans décompression : seuls les
+                        # fichiers non compressés sont corrigés
+                        _add(report, 'resized', {
+                            'id': file_id, 'file_path': key, 'file_type': file_type, 'recorded_size': expected,
+                            'stored_size': entry[1], 'volume': volume, '_backend': backend
+                        }, fixes, fix_missing and not compression)
+
+    report['consistent'] = not (report['missing_count'] or report['orphans_count'] or report['resized_count'])
+    return report, fixes
+
+def _chunks(items, size=DRIFT_SQL_BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+@serialized_write
+def _forget_missing(mission_id, missing):
+    """Supprime les enregistrements des fichiers absents du stockage"""
+    for chunk in _chunks([item['id'] for item in missing]):
+        db.session.execute(delete(RinexIndex).where(RinexIndex.file_id.in_(chunk)))
+        db.session.execute(delete(File).where(File.id.in_(chunk)), execution_options={'synchronize_session': False})
+    totals = {}
+    for item in missing:
+        count, size = totals.get(item['file_type'], (0, 0))
+        totals[item['file_type']] = (count + 1, size + item['file_size'])
+    for file_type, (count, size) in sorted(totals.items()):
+        stats_service.record_files(mission_id, file_type, -count, -size)
+    db.session.commit()
+    return len(missing)
+
+@serialized_write
+def _update_sizes(mission_id, resized):
+    """Enregistre la taille réelle des fichiers non compressés modifiés sur le stockage"""
+    rows = []
+    for item in resized:
+        try:
+            _, mtime = item['_backend'].stat(item['_key'])
+        except FileNotFoundError:
+            continue
+        rows.append({
+            'id': item['id'],
+            'file_size': item['stored_size'],
+            'file_mtime': mtime,
+            'captured_at': None,
+            'checksum': None,
+            'integrity': None
+        })
+        stats_service.record_files(mission_id, item['file_type'], 0, item['stored_size'] - item['recorded_size'])
+    if rows:
+        db.session.execute(update(File), rows)
+    db.session.commit()
+    return len(rows)
+
+@serialized_write
+def _register_orphans(mission_id, orphans):
+    """
+    Enregistre les fichiers orphelins rangés dans un dossier de type
+    (<type>/<fichier>) et dont l'extension est autorisée
+
+    Returns:
+        int: Nombre de fichiers enregistrés
+    """
+    rows = []
+    for item in orphans:
+        subdir, separator, filename = item['file_path'].partition('/')
+        file_type = get_file_type(filename) if separator and '/' not in filename else 'autres'
+        if file_type == 'autres':
+            continue
+        try:
+            _, mtime = item['_backend'].stat(item['_key'])
+        except FileNotFoundError:
+            continue
+        rows.append({
+            'mission_id': mission_id,
+            'filename': filename,
+            'file_path': os.path.join(subdir, filename),
+            'file_type': file_type,
+            'file_size': item['file_size'],
+            'file_mtime': mtime,
+            'uploaded_at': datetime.utcfromtimestamp(mtime),
+            'volume': item['volume'] if item['volume'] != DEFAULT_VOLUME else None
+        })
+        stats_service.record_files(mission_id, file_type, 1, item['file_size'])
+    for chunk in _chunks(rows):
+        db.session.execute(insert(File), chunk)
+    db.session.commit()
+    return len(rows)
+
+def _delete_orphans(orphans):
+    """Supprime les fichiers orphelins du stockage"""
+    deleted = 0
+    for item in orphans:
+        try:
+            item['_backend'].delete(item['_key'])
+        except OSError as e:
+            current_app.logger.error(f"Erreur lors de la suppression de {item['_key']}: {str(e)}")
+            continue
+        deleted += 1
+    return deleted
+
+def reconcile_mission(mission, fix_missing=False, orphans=None, storage=None):
+    """
+    Détecte (et corrige sur demande) les écarts d'une mission
+
+    Args:
+        mission (Mission): Mission active
+        fix_missing (bool): Supprime les enregistrements des fichiers absents du
+            stockage et met à jour la taille des fichiers modifiés
+        orphans (str, optional): register pour enregistrer les fichiers orphelins
+            (<type>/<fichier> d'extension autorisée), delete pour les supprimer
+        storage (StorageBackend, optional): Backend de stockage
+
+    Returns:
+        dict: Rapport de la mission (compteurs, écarts détaillés et corrections)
+
+    Raises:
+        ValueError: Si le traitement des orphelins est inconnu
+    """
+    if orphans is not None and orphans not in ORPHAN_ACTIONS:
+        raise ValueError(f"Traitement des orphelins inconnu: {orphans}")
+
+    storage = storage or get_storage()
+    mission_id = mission.id
+    report, fixes = diff_mission(mission, fix_missing, orphans, storage)
+    report['fixed'] = {'missing': 0, 'resized': 0, 'registered': 0, 'deleted': 0}
+    if report['consistent'] or not any(fixes.values()):
+        return report
+
+    prefixes = {volume: backend.mission_prefix(mission) for volume, backend in _locations(storage)}
+    for item in fixes['orphans'] + fixes['resized']:
+        item['_key'] = f"{prefixes[item['volume']]}/{item['file_path']}"
+
+    if fixes['missing']:
+        report['fixed']['missing'] = _forget_missing(mission_id, fixes['missing'])
+    if fixes['resized']:
+        report['fixed']['resized'] = _update_sizes(mission_id, fixes['resized'])
+    if orphans == 'register':
+        report['fixed']['registered'] = _register_orphans(mission_id, fixes['orphans'])
+    elif orphans == 'delete':
+        report['fixed']['deleted'] = _delete_orphans(fixes['orphans'])
+    if any(report['fixed'][name] for name in ('missing', 'resized', 'registered')):
+        cache.invalidate('missions', f'mission:{mission_id}')
+    return report
+
+def reconcile_missions(mission_id=None, after_id=None, fix_missing=False, orphans=None):
+    """
+    Détecte les écarts de chaque mission active, une mission à la fois
+
+    Chaque mission est comparée puis corrigée indépendamment : le parcours
+    peut être interrompu et repris après la dernière mission traitée.
+
+    Args:
+        mission_id (int, optional): Limite la détection à une mission
+        after_id (int, optional): Ne traite que les missions d'ID supérieur
+        fix_missing (bool): Voir reconcile_mission
+        orphans (str, optional): Voir reconcile_mission
+
+    Yields:
+        dict: Rapport de chaque mission, par ID croissant
+    """
+    query = db.session.query(Mission.id).filter(Mission.deleted_at.is_(None))
+    if mission_id is not None:
+        query = query.filter(Mission.id == mission_id)
+    if after_id is not None:
+        query = query.filter(Mission.id > after_id)
+    mission_ids = [current_id for (current_id,) in query.order_by(Mission.id).all()]
+
+    storage = get_storage()
+    for current_id in mission_ids:
+        mission = db.session.get(Mission, current_id)
+        if mission is None or mission.deleted_at is not None:
+            continue
+        yield reconcile_mission(mission, fix_missing, orphans, storage)
+
+def find_unknown_directories():
+    """
+    Relève les dossiers du stockage local qui ne correspondent à aucune mission
+    (ni active, ni en cours de suppression)
+
+    Returns:
+        list: Tuples (dossier racine, nom du dossier)
+    """
+    storage = get_storage()
+    unknown = []
+    with db.engine.connect() as connection:
+        for root in storage.roots():
+            try:
+                with os.scandir(root) as it:
+                    names = sorted(
+                        (entry.name,) for entry in it
+                        if entry.is_dir(follow_symlinks=False) and not entry.name.startswith('.')
+                    )
+            except FileNotFoundError:
+                continue
+            recorded = connection.execution_options(yield_per=DRIFT_BATCH_SIZE).execute(
+                select(Mission.name).order_by(_binary(Mission.name))
+            )
+            unknown.extend((root, entry[0]) for row, entry in merge_join(recorded, iter(names)) if row is None)
+    return unknown
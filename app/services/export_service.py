@@ -0,0 +1,364 @@
+"""
+Service d'export en masse du catalogue des missions
+
+L'export parcourt les tables avec des curseurs côté serveur (yield_per), sur
+une connexion dédiée au réplica s'il est configuré, et produit le résultat
+par blocs : la mémoire utilisée ne dépend pas du nombre de lignes exportées.
+Les missions, leurs fichiers et leurs agrégats de stockage sont lus dans
+trois flux triés par mission, assemblés par fusion (sans requête par
+mission), et convertis par les sérialiseurs de app.read_models.
+
+Formats : NDJSON (une mission ou un fichier par ligne), GeoJSON (centre de
+la mission, ou emprise des images géoréférencées) et, si pyarrow est
+installé, Parquet et Arrow (format de flux IPC).
+"""
+import json
+import math
+from sqlalchemy import select
+from app import db
+from app.database import REPLICA_BIND_KEY
+from app.models import Mission, MissionStorage, File, GeotagSet
+from app.geotag import unpack_positions
+from app.read_models import (
+    METADATA_COLUMNS, EXPORT_FILE_SERIALIZER, missions_select, metadata_dict, isoformat
+)
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# Lignes lues par aller-retour avec la base, et par lot Parquet / Arrow
+EXPORT_BATCH_SIZE = 5000
+
+# Taille des blocs renvoyés pour les formats texte
+EXPORT_CHUNK_SIZE = 256 * 1024
+
+EXPORT_KINDS = ('missions', 'files')
+
+# Type MIME et extension de chaque format
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'geojson': ('application/geo+json', 'geojson'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows')
+}
+
+
+def available_formats():
+    """
+    Formats d'export utilisables dans l'environnement courant
+
+    Returns:
+        list: Noms des formats
+    """
+    formats = ['ndjson', 'geojson']
+    if pyarrow is not None:
+        formats += ['parquet', 'arrow']
+    return formats
+
+def _read_engine():
+    """Moteur des lectures en masse : le réplica s'il est configuré, sinon la base principale"""
+    return db.engines.get(REPLICA_BIND_KEY) or db.engine
+
+def _stream(connection, statement):
+    """Exécute une requête avec un curseur côté serveur, lu par lots"""
+    return connection.execution_options(yield_per=EXPORT_BATCH_SIZE).execute(statement)
+
+def _missions_statement(with_footprint=False):
+    if not with_footprint:
+        return missions_select().order_by(Mission.id)
+    return missions_select(GeotagSet.positions) \
+        .outerjoin(GeotagSet, GeotagSet.mission_id == Mission.id) \
+        .order_by(Mission.id)
+
+def _files_statement():
+    return select(
+        File.id, File.mission_id, Mission.name.label('mission_name'), File.filename, File.file_path,
+        File.file_type, File.file_size, File.volume, File.compression, File.stored_size,
+        File.uploaded_at, File.captured_at
+    ).join(Mission, Mission.id == File.mission_id) \
+        .where(Mission.deleted_at.is_(None)) \
+        .order_by(File.mission_id, File.id)
+
+def _storage_statement():
+    return select(MissionStorage.mission_id, MissionStorage.file_type, MissionStorage.file_count,
+                  MissionStorage.total_bytes) \
+        .join(Mission, Mission.id == MissionStorage.mission_id) \
+        .where(Mission.deleted_at.is_(None), MissionStorage.file_count > 0) \
+        .order_by(MissionStorage.mission_id, MissionStorage.file_type)
+
+
+class _MissionGroups:
+    """
+    Lignes d'un flux trié par mission, regroupées à la demande
+
+    Les missions étant parcourues dans le même ordre, chaque appel consomme
+    uniquement les lignes de la mission demandée (jointure par fusion).
+    """
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._pending = next(self._rows, None)
+
+    def take(self, mission_id):
+        while self._pending is not None and self._pending.mission_id < mission_id:
+            self._pending = next(self._rows, None)
+        group = []
+        while self._pending is not None and self._pending.mission_id == mission_id:
+            group.append(self._pending)
+            self._pending = next(self._rows, None)
+        return group
+
+
+def _mission_dict(row, storage):
+    """Mission au format de Mission.to_dict, avec l'espace occupé par type"""
+    by_type = {item.file_type: {'files': item.file_count, 'bytes': item.total_bytes} for item in storage}
+    return {
+        'id': row.id,
+        'name': row.name,
+        'flight_date': isoformat(row.flight_date),
+        'date_created': isoformat(row.date_created),
+        'description': row.description,
+        'file_count': sum(item['files'] for item in by_type.values()),
+        'image_count': by_type.get('images', {}).get('files', 0),
+        'file_types': list(by_type),
+        'total_bytes': sum(item['bytes'] for item in by_type.values()),
+        'storage_by_type': by_type,
+        'metadata': metadata_dict(row)
+    }
+
+def iter_mission_records(connection, include_files=True, with_footprint=False):
+    """
+    Parcourt les missions actives avec leurs agrégats et, optionnellement, leurs fichiers
+
+    Args:
+        connection (Connection): Connexion de lecture
+        include_files (bool): Joint la liste des fichiers de chaque mission
+        with_footprint (bool): Lit aussi les positions des images géoréférencées
+
+    Yields:
+        tuple: (ligne de la mission, agrégats de stockage, fichiers ou None)
+    """
+    storage = _MissionGroups(_stream(connection, _storage_statement()))
+    files = _MissionGroups(_stream(connection, _files_statement())) if include_files else None
+    for row in _stream(connection, _missions_statement(with_footprint)):
+        yield row, storage.take(row.id), files.take(row.id) if files else None
+
+def _chunked(pieces):
+    """Regroupe des fragments de texte en blocs d'octets d'environ EXPORT_CHUNK_SIZE"""
+    pending = []
+    size = 0
+    for piece in pieces:
+        pending.append(piece)
+        size += len(piece)
+        if size >= EXPORT_CHUNK_SIZE:
+            yield ''.join(pending).encode('utf-8')
+            pending = []
+            size = 0
+    if pending:
+        yield ''.join(pending).encode('utf-8')
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+def _iter_ndjson(connection, kind, include_files):
+    if kind == 'files':
+        # Sérialisation colonne par colonne de chaque lot lu
+        for rows in _stream(connection, _files_statement()).partitions():
+            for row, record in zip(rows, EXPORT_FILE_SERIALIZER.serialize(rows)):
+                record['mission_id'] = row.mission_id
+                record['mission_name'] = row.mission_name
+                yield _dumps(record) + '\n'
+        return
+
+    for row, storage, files in iter_mission_records(connection, include_files):
+        record = _mission_dict(row, storage)
+        if files is not None:
+            record['files'] = EXPORT_FILE_SERIALIZER.serialize(files)
+        yield _dumps(record) + '\n'
+
+def _footprint(row):
+    """Géométrie d'une mission : emprise des images géoréférencées, à défaut son centre"""
+    positions = unpack_positions(row.positions) if row.positions else []
+    if len(positions) > 1:
+        latitudes = [position[1] for position in positions]
+        longitudes = [position[2] for position in positions]
+        south, north = min(latitudes), max(latitudes)
+        west, east = min(longitudes), max(longitudes)
+        if south < north and west < east:
+            return {
+                'type': 'Polygon',
+                'coordinates': [[[west, south], [east, south], [east, north], [west, north], [west, south]]]
+            }
+    if row.center_latitude is not None and row.center_longitude is not None:
+        return {'type': 'Point', 'coordinates': [row.center_longitude, row.center_latitude]}
+    return None
+
+def _iter_geojson(connection, kind, include_files):
+    yield '{"type":"FeatureCollection","features":['
+    separator = ''
+    if kind == 'files':
+        # Images géoréférencées, placées à leur position interpolée
+        for row, _, files in iter_mission_records(connection, include_files=True, with_footprint=True):
+            positions = {position[0]: position[1:] for position in unpack_positions(row.positions)}
+            for file, properties in zip(files, EXPORT_FILE_SERIALIZER.serialize(files)):
+                position = positions.get(file.id)
+                if position is None:
+                    continue
+                latitude, longitude, altitude = position
+                coordinates = [longitude, latitude] if math.isnan(altitude) else [longitude, latitude, altitude]
+                properties['mission_id'] = row.id
+                properties['mission_name'] = row.name
+                yield separator + _dumps({
+                    'type': 'Feature',
+                    'id': file.id,
+                    'geometry': {'type': 'Point', 'coordinates': coordinates},
+                    'properties': properties
+                })
+                separator = ','
+    else:
+        for row, storage, _ in iter_mission_records(connection, include_files=False, with_footprint=True):
+            yield separator + _dumps({
+                'type': 'Feature',
+                'id': row.id,
+                'geometry': _footprint(row),
+                'properties': _mission_dict(row, storage)
+            })
+            separator = ','
+    yield ']}\n'
+
+def _arrow_schema(kind):
+    if kind == 'files':
+        return pyarrow.schema([
+            ('id', pyarrow.int64()), ('mission_id', pyarrow.int64()), ('mission_name', pyarrow.string()),
+            ('filename', pyarrow.string()), ('file_path', pyarrow.string()), ('file_type', pyarrow.string()),
+            ('file_size', pyarrow.int64()), ('volume', pyarrow.string()), ('compression', pyarrow.string()),
+            ('stored_size', pyarrow.int64()), ('uploaded_at', pyarrow.timestamp('us')),
+            ('captured_at', pyarrow.timestamp('us'))
+        ])
+    return pyarrow.schema([
+        ('id', pyarrow.int64()), ('name', pyarrow.string()), ('date_created', pyarrow.timestamp('us')),
+        ('flight_date', pyarrow.date32()), ('description', pyarrow.string()), ('volume', pyarrow.string()),
+        ('area_covered', pyarrow.float64()), ('center_latitude', pyarrow.float64()),
+        ('center_longitude', pyarrow.float64()), ('min_altitude', pyarrow.float64()),
+        ('max_altitude', pyarrow.float64()), ('drone_model', pyarrow.string()),
+        ('camera_model', pyarrow.string()), ('flight_duration', pyarrow.int64()),
+        ('file_count', pyarrow.int64()), ('image_count', pyarrow.int64()), ('total_bytes', pyarrow.int64())
+    ])
+
+def _iter_arrow_rows(connection, kind):
+    """Lignes plates (tuples dans l'ordre du schéma) pour Parquet et Arrow"""
+    if kind == 'files':
+        for row in _stream(connection, _files_statement()):
+            yield tuple(row)
+        return
+
+    for row, storage, _ in iter_mission_records(connection, include_files=False):
+        yield (
+            row.id, row.name, row.date_created, row.flight_date, row.description, row.volume,
+            *(getattr(row, name) for name in METADATA_COLUMNS),
+            sum(item.file_count for item in storage),
+            sum(item.file_count for item in storage if item.file_type == 'images'),
+            sum(item.total_bytes for item in storage)
+        )
+
+
+class _StreamSink:
+    """Flux d'écriture conservant les octets écrits jusqu'à leur envoi"""
+
+    closed = False
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def writable(self):
+        return True
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _iter_columnar(connection, kind, file_format):
+    schema = _arrow_schema(kind)
+    sink = _StreamSink()
+    if file_format == 'parquet':
+        writer = pyarrow.parquet.ParquetWriter(sink, schema, compression='zstd')
+    else:
+        writer = pyarrow.ipc.new_stream(sink, schema)
+
+    def write(rows):
+        columns = list(zip(*rows))
+        writer.write_batch(pyarrow.record_batch(
+            [pyarrow.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema
+        ))
+
+    try:
+        rows = []
+        for row in _iter_arrow_rows(connection, kind):
+            rows.append(row)
+            if len(rows) >= EXPORT_BATCH_SIZE:
+                write(rows)
+                rows = []
+                yield sink.drain()
+        if rows:
+            write(rows)
+    finally:
+        writer.close()
+    yield sink.drain()
+
+def export_catalog(file_format='ndjson', kind='missions', include_files=True):
+    """
+    Exporte le catalogue des missions actives, en flux
+
+    Args:
+        file_format (str): ndjson, geojson, parquet ou arrow
+        kind (str): missions (une ligne par mission) ou files (une ligne par
+            fichier ; en GeoJSON, les images géoréférencées)
+        include_files (bool): Joint la liste des fichiers à chaque mission (NDJSON)
+
+    Returns:
+        generator: Blocs d'octets de l'export
+
+    Raises:
+        ValueError: Si le format ou le type d'export est inconnu ou indisponible
+    """
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"Format d'export inconnu: {file_format}")
+    if file_format not in available_formats():
+        raise ValueError(f"Le format {file_format} nécessite le paquet pyarrow (pip install pyarrow)")
+    if kind not in EXPORT_KINDS:
+        raise ValueError(f"Type d'export inconnu: {kind}")
+
+    engine = _read_engine()
+
+    def generate():
+        with engine.connect() as connection:
+            if file_format in ('parquet', 'arrow'):
+                yield from _iter_columnar(connection, kind, file_format)
+            elif file_format == 'geojson':
+                yield from _chunked(_iter_geojson(connection, kind, include_files))
+            else:
+                yield from _chunked(_iter_ndjson(connection, kind, include_files))
+
+    return generate()
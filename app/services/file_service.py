@@ -1,15 +1,23 @@
 """
 Service de gestion des fichiers pour les missions drone
 """
+import io
 import os
 import csv
 import shutil
 import zipfile
+from contextlib import nullcontext, contextmanager
 from datetime import datetime
 from werkzeug.utils import secure_filename
 from flask import current_app
-from app import db
-from app.models import File, Mission, MissionMetadata
+from app import db, cache
+from app.database import serialized_write
+from app.storage import get_storage, CHUNK_SIZE
+from app.compression import decompressing_reader
+from app.integrity import HashingReader
+from app.models import File, Mission, MissionMetadata, RinexIndex, GeotagSet
+from app.services.reaper_service import move_files_to_trash
+from app.services import stats_service, map_service, rollup_service
 
 def allowed_file(filename, file_type=None):
     """
@@ -62,76 +70,138 @@ def get_file_type(filename):
             
     return 'autres'
 
-def save_file(file, mission_name):
+def save_file(file, mission):
     """
-    Sauvegarde un fichier dans la structure de dossiers appropriée
+    Sauvegarde un fichier dans le backend de stockage, sous <type>/<fichier>
+    
+    Le contenu est transmis au stockage à mesure de sa lecture (envoi en
+    plusieurs parties pour S3). Avec plusieurs volumes locaux, le volume est
+    choisi par la politique de placement.
     
     Args:
         file: Objet fichier à sauvegarder
-        mission_name (str): Nom de la mission
+        mission (Mission): Mission du fichier
         
+    L'empreinte du contenu est calculée pendant l'écriture, sans relecture.
+    
     Returns:
-        tuple: (chemin du fichier, type de fichier)
+        tuple: (chemin du fichier relatif au dossier de la mission, type de
+            fichier, volume, empreinte SHA-256)
     """
     filename = secure_filename(file.filename)
     file_type = get_file_type(filename)
+    file_path = os.path.join(file_type, filename)
     
-    # Créer les dossiers de la mission s'ils n'existent pas
-    mission_path = os.path.join(current_app.config['UPLOAD_FOLDER'], mission_name)
-    if not os.path.exists(mission_path):
-        os.makedirs(mission_path)
-    
-    # Créer le sous-dossier pour le type de fichier s'il n'existe pas
-    type_folder = os.path.join(mission_path, file_type)
-    if not os.path.exists(type_folder):
-        os.makedirs(type_folder)
-    
-    # Chemin complet du fichier
-    file_path = os.path.join(type_folder, filename)
+    storage = get_storage()
+    volume = storage.place(mission)
+    stream = HashingReader(file.stream)
+    storage.save(storage.file_key(mission, file_path, volume), stream)
     
-    # Sauvegarder le fichier
-    file.save(file_path)
-    
-    return file_path, file_type
+    return file_path, file_type, volume, stream.hexdigest()
 
-def register_file_in_db(mission_id, filename, file_path, file_type):
+def register_file_in_db(mission_id, filename, file_path, file_type, volume=None, checksum=None):
     """
     Enregistre un fichier dans la base de données
     
+    Le chemin est stocké relativement au dossier de la mission, de sorte
+    qu'un renommage de la mission ne nécessite aucune mise à jour des fichiers.
+    
     Args:
         mission_id (int): ID de la mission
         filename (str): Nom du fichier
-        file_path (str): Chemin du fichier
+        file_path (str): Chemin du fichier relatif au dossier de la mission (voir save_file)
         file_type (str): Type du fichier
+        volume (str, optional): Volume de stockage du fichier (voir save_file)
+        checksum (str, optional): Empreinte du contenu (voir save_file)
         
     Returns:
         File: Objet File créé
     """
-    file_size = os.path.getsize(file_path)
+    file_ids = register_files_in_db(mission_id, [{
+        'filename': filename,
+        'file_path': file_path,
+        'file_type': file_type,
+        'volume': volume,
+        'checksum': checksum
+    }])
+    return db.session.get(File, file_ids[0])
+
+@serialized_write
+def register_files_in_db(mission_id, files):
+    """
+    Enregistre les fichiers téléversés d'une mission en une seule écriture
+    
+    Comme pour l'import, les agrégats sont mis à jour une fois pour
+    l'ensemble des fichiers et non à chaque fichier.
+    
+    Args:
+        mission_id (int): ID de la mission
+        files (list): Fichiers à enregistrer, dictionnaires filename,
+            file_path, file_type, volume et checksum (voir register_file_in_db)
+        
+    Returns:
+        list: ID des fichiers créés, dans l'ordre de files
+    """
+    if not files:
+        return []
     
-    file_record = File(
-        mission_id=mission_id,
-        filename=filename,
-        file_path=file_path,
-        file_type=file_type,
-        file_size=file_size
-    )
+    from app.services import rinex_service
+    mission = db.session.get(Mission, mission_id)
+    storage = get_storage()
     
-    db.session.add(file_record)
+    records = []
+    geopos_csv = []
+    observations = []
+    deltas = {}
+    for entry in files:
+        key = storage.file_key(mission, entry['file_path'], entry.get('volume'))
+        file_size, file_mtime = storage.stat(key)
+        file_record = File(mission_id=mission_id, file_size=file_size, file_mtime=file_mtime, **entry)
+        
+        # Date de prise de vue des images, pour leur géoréférencement
+        if file_record.file_type == 'images':
+            from app.services.geotag_service import read_file_capture_time
+            file_record.captured_at = read_file_capture_time(storage, key)
+        
+        # Traitements après validation, déterminés avant que celle-ci n'expire les objets
+        if file_record.file_type == 'geopos' and file_record.filename.lower().endswith('.csv'):
+            geopos_csv.append(key)
+        if rinex_service.is_observation_file(file_record):
+            observations.append(file_record)
+        
+        records.append(file_record)
+        count, total_bytes = deltas.get(file_record.file_type, (0, 0))
+        deltas[file_record.file_type] = (count + 1, total_bytes + file_size)
+    
+    db.session.add_all(records)
+    stats_service.record_mission_files(mission_id, deltas)
+    db.session.flush()
+    file_ids = [file_record.id for file_record in records]
     db.session.commit()
+    cache.invalidate_mission(mission_id)
     
-    # Si c'est un fichier de géoréférencement CSV, extraire les métadonnées
-    if file_type == 'geopos' and filename.lower().endswith('.csv'):
-        extract_metadata_from_csv(file_path, mission_id)
+    # Fichiers de géoréférencement CSV : extraction des métadonnées
+    for key in geopos_csv:
+        local_path = storage.local_path(key)
+        if local_path:
+            extract_metadata_from_csv(local_path, mission_id)
+        else:
+            with storage.open(key) as raw:
+                extract_metadata_from_csv(io.TextIOWrapper(raw, encoding='utf-8', newline=''), mission_id)
+    
+    # Fichiers d'observation RINEX : indexation de l'en-tête et des époques
+    for file_record in observations:
+        rinex_service.index_rinex_file(file_record)
     
-    return file_record
+    return file_ids
 
+@serialized_write
 def extract_metadata_from_csv(csv_path, mission_id):
     """
     Extrait les métadonnées d'un fichier CSV de géoréférencement
     
     Args:
-        csv_path (str): Chemin du fichier CSV
+        csv_path (str): Chemin du fichier CSV, ou flux texte déjà ouvert
         mission_id (int): ID de la mission
     """
     try:
@@ -140,13 +210,19 @@ def extract_metadata_from_csv(csv_path, mission_id):
         if not metadata:
             metadata = MissionMetadata(mission_id=mission_id)
             db.session.add(metadata)
+        old_area = metadata.area_covered
         
         # Lecture du fichier CSV
         latitudes = []
         longitudes = []
         altitudes = []
         
-        with open(csv_path, 'r', newline='', encoding='utf-8') as csvfile:
+        if isinstance(csv_path, str):
+            csv_context = open(csv_path, 'r', newline='', encoding='utf-8')
+        else:
+            csv_context = nullcontext(csv_path)
+        
+        with csv_context as csvfile:
             reader = csv.DictReader(csvfile)
             for row in reader:
                 # On s'adapte aux différents formats possibles
@@ -206,7 +282,10 @@ def extract_metadata_from_csv(csv_path, mission_id):
                 
                 metadata.area_covered = lat_distance * lon_distance
         
+        rollup_service.record_area_change(mission_id, old_area, metadata.area_covered)
         db.session.commit()
+        cache.invalidate_mission(mission_id)
+        map_service.update_mission_location(mission_id)
         
     except Exception as e:
         current_app.logger.error(f"Erreur lors de l'extraction des métadonnées: {str(e)}")
@@ -223,7 +302,7 @@ def create_mission_zip(mission_id, file_type=None):
     Returns:
         str: Chemin du fichier ZIP créé
     """
-    mission = Mission.query.get_or_404(mission_id)
+    mission = Mission.active().filter_by(id=mission_id).first_or_404()
     
     # Nom du fichier ZIP
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -244,31 +323,144 @@ def create_mission_zip(mission_id, file_type=None):
         if file_type:
             # Ajouter seulement les fichiers du type spécifié
             files = File.query.filter_by(mission_id=mission_id, file_type=file_type).all()
-            for file in files:
-                arcname = os.path.join(file.file_type, file.filename)
-                zipf.write(file.file_path, arcname=arcname)
         else:
             # Ajouter tous les fichiers
             files = File.query.filter_by(mission_id=mission_id).all()
-            for file in files:
-                arcname = os.path.join(file.file_type, file.filename)
-                zipf.write(file.file_path, arcname=arcname)
+        
+        for file in files:
+            arcname = os.path.join(file.file_type, file.filename)
+            _write_to_zip(zipf, file, arcname)
     
     return zip_path
 
+def _write_to_zip(zipf, file, arcname):
+    """Ajoute un fichier stocké à une archive ZIP, par blocs s'il n'est pas local ou s'il est compressé"""
+    local_path = get_storage().local_path(file.storage_key)
+    if local_path and not file.compression:
+        zipf.write(local_path, arcname=arcname)
+        return
+    
+    modified = datetime.utcfromtimestamp(file.file_mtime) if file.file_mtime else datetime.utcnow()
+    info = zipfile.ZipInfo(arcname, date_time=modified.timetuple()[:6])
+    info.compress_type = zipfile.ZIP_DEFLATED
+    with open_file(file) as source, zipf.open(info, 'w', force_zip64=file.file_size > 0x7fffffff) as target:
+        shutil.copyfileobj(source, target, CHUNK_SIZE)
+
+@contextmanager
+def open_file(file):
+    """
+    Ouvre le contenu d'un fichier stocké en lecture binaire
+    
+    Un fichier compressé est décompressé à mesure de sa lecture.
+    
+    Args:
+        file (File): Fichier à lire
+        
+    Yields:
+        Flux binaire du contenu d'origine
+    """
+    with get_storage().open(file.storage_key) as source:
+        if not file.compression:
+            yield source
+            return
+        reader = decompressing_reader(file.compression, source)
+        try:
+            yield reader
+        finally:
+            reader.close()
+
+def iter_file_range(file, start=0, end=None, chunk_size=CHUNK_SIZE):
+    """
+    Lit une plage d'octets du contenu d'un fichier stocké, par blocs
+    
+    Pour un fichier compressé, le début du contenu est décompressé puis
+    ignoré jusqu'au premier octet demandé.
+    
+    Args:
+        file (File): Fichier à lire
+        start (int): Premier octet
+        end (int, optional): Dernier octet exclu (fin du fichier si None)
+        chunk_size (int): Taille des blocs
+        
+    Yields:
+        bytes: Blocs lus
+    """
+    if not file.compression:
+        yield from get_storage().iter_range(file.storage_key, start, end, chunk_size)
+        return
+    
+    with open_file(file) as source:
+        position = 0
+        while end is None or position < end:
+            size = chunk_size if end is None else min(chunk_size, end - position)
+            chunk = source.read(size)
+            if not chunk:
+                break
+            chunk_start = position
+            position += len(chunk)
+            if position <= start:
+                continue
+            yield chunk[max(start - chunk_start, 0):]
+
+@serialized_write
 def delete_mission_files(mission_id):
     """
     Supprime tous les fichiers associés à une mission
     
+    Le dossier est déplacé dans la corbeille, sa purge est assurée par le reaper.
+    
     Args:
         mission_id (int): ID de la mission
     """
-    mission = Mission.query.get_or_404(mission_id)
+    mission = Mission.active().filter_by(id=mission_id).first_or_404()
     
-    # Supprimer le dossier de la mission
-    if os.path.exists(mission.mission_path):
-        shutil.rmtree(mission.mission_path)
+    # Déplacer le dossier de la mission dans la corbeille
+    move_files_to_trash(mission)
     
     # Supprimer les enregistrements de fichiers
+    stats_service.forget_mission_files(mission_id)
+    mission_files = db.session.query(File.id).filter_by(mission_id=mission_id)
+    RinexIndex.query.filter(RinexIndex.file_id.in_(mission_files.scalar_subquery())).delete(synchronize_session=False)
+    GeotagSet.query.filter_by(mission_id=mission_id).delete(synchronize_session=False)
     File.query.filter_by(mission_id=mission_id).delete()
     db.session.commit()
+    cache.invalidate_mission(mission_id)
+    map_service.update_mission_location(mission_id)
+
+def get_active_file(file_id):
+    """
+    Récupère un fichier d'une mission active
+    
+    Les fichiers d'une mission supprimée (en attente de purge) sont déjà
+    retirés des agrégats et déplacés dans la corbeille : ils sont ignorés.
+    
+    Args:
+        file_id (int): ID du fichier
+        
+    Returns:
+        File: Fichier, ou None
+    """
+    return File.query.join(Mission).filter(File.id == file_id, Mission.deleted_at.is_(None)).first()
+
+@serialized_write
+def delete_file(file):
+    """
+    Supprime un fichier du disque et de la base de données
+    
+    Args:
+        file (File): Fichier à supprimer, d'une mission active
+        
+    Raises:
+        ValueError: Si la mission du fichier est supprimée
+        OSError: Si le fichier physique ne peut pas être supprimé
+    """
+    mission = db.session.get(Mission, file.mission_id)
+    if mission is None or mission.deleted_at is not None:
+        raise ValueError(f"Le fichier {file.id} appartient à une mission supprimée")
+    
+    get_storage().delete(file.storage_key)
+    
+    stats_service.record_files(file.mission_id, file.file_type, -1, -file.file_size)
+    db.session.delete(file)
+    db.session.commit()
+    cache.invalidate_mission(file.mission_id)
@@ -0,0 +1,290 @@
+"""
+Service de géoréférencement des images sur la trajectoire du vol
+
+La date de prise de vue (EXIF) de chaque image est lue une seule fois, à
+l'enregistrement du fichier, et conservée dans File.captured_at. Le
+géoréférencement d'une mission relit ensuite uniquement la trajectoire :
+solutions PPK (.pos) si la mission en contient, à défaut CSV et traces GPX
+de géoréférencement. Les positions interpolées sont stockées sous forme
+binaire dans une seule ligne par mission (GeotagSet).
+"""
+import io
+import math
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import update
+from app import db, cache
+from app.database import read_only, serialized_write
+from app.query_budget import query_budget
+from app.models import Mission, File, GeotagSet
+from app.storage import get_storage
+from app.geotag import (
+    TRAJECTORY_EXTENSIONS, TrajectoryError, read_capture_time, parse_trajectory, merge_trajectories,
+    match_positions, to_seconds, pack_positions, unpack_positions
+)
+from app.services import file_service, map_service
+
+# Octets lus en tête d'une image distante pour trouver son EXIF
+EXIF_READ_SIZE = 128 * 1024
+
+# Ordre de préférence des sources de trajectoire
+TRAJECTORY_SOURCES = ('ppk', 'geopos')
+
+# Colonnes du CSV de géoréférencement exporté
+GEOTAG_CSV_COLUMNS = ('filename', 'latitude', 'longitude', 'altitude', 'captured_at')
+
+
+def read_file_capture_time(storage, key):
+    """
+    Lit la date de prise de vue d'une image stockée
+
+    Args:
+        storage (StorageBackend): Backend de stockage
+        key (str): Clé de l'image
+
+    Returns:
+        datetime: Date de prise de vue, ou None si elle est absente ou illisible
+    """
+    local_path = storage.local_path(key)
+    if local_path:
+        return read_capture_time(local_path)
+    try:
+        head = b''.join(storage.iter_range(key, 0, EXIF_READ_SIZE))
+    except OSError:
+        return None
+    return read_capture_time(io.BytesIO(head))
+
+def read_missing_capture_times(mission_id, workers=8):
+    """
+    Lit la date de prise de vue des images qui n'en ont pas encore
+
+    Utile pour les images importées depuis le disque ; les images téléversées
+    sont datées à leur enregistrement.
+
+    Args:
+        mission_id (int): ID de la mission
+        workers (int): Nombre de threads de lecture
+
+    Returns:
+        int: Nombre d'images datées
+    """
+    images = File.query.filter(
+        File.mission_id == mission_id, File.file_type == 'images', File.captured_at.is_(None)
+    ).all()
+    if not images:
+        return 0
+
+    storage = get_storage()
+    keys = [(image.id, image.storage_key) for image in images]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        dates = executor.map(lambda item: read_file_capture_time(storage, item[1]), keys)
+        rows = [
+            {'id': file_id, 'captured_at': captured_at}
+            for (file_id, _), captured_at in zip(keys, dates)
+            if captured_at is not None
+        ]
+
+    if rows:
+        _save_capture_times(rows)
+    return len(rows)
+
+@serialized_write
+def _save_capture_times(rows):
+    db.session.execute(update(File), rows)
+    db.session.commit()
+
+def get_trajectory_files(mission_id):
+    """
+    Récupère les fichiers de trajectoire d'une mission
+
+    Les solutions PPK sont préférées aux fichiers de géoréférencement.
+
+    Args:
+        mission_id (int): ID de la mission
+
+    Returns:
+        tuple: (type des fichiers retenus, liste de File), ou (None, []) sans trajectoire
+    """
+    files = File.query.filter(
+        File.mission_id == mission_id, File.file_type.in_(TRAJECTORY_SOURCES)
+    ).order_by(File.id).all()
+    for source in TRAJECTORY_SOURCES:
+        selected = [
+            file for file in files
+            if file.file_type == source and file.file_extension in TRAJECTORY_EXTENSIONS[source]
+        ]
+        if selected:
+            return source, selected
+    return None, []
+
+def load_trajectory(files):
+    """
+    Lit et fusionne les positions datées de plusieurs fichiers de trajectoire
+
+    Les fichiers sans position datée lisible sont ignorés.
+
+    Args:
+        files (list): Fichiers de trajectoire
+
+    Returns:
+        tuple: (dates, latitudes, longitudes, altitudes) triées, et nombre de fichiers lus
+    """
+    parts = []
+    for file in files:
+        try:
+            with file_service.open_file(file) as source:
+                parts.append(parse_trajectory(source, file.file_extension))
+        except TrajectoryError as e:
+            current_app.logger.warning(f"Trajectoire {file.filename} ignorée: {str(e)}")
+        except OSError as e:
+            current_app.logger.error(f"Erreur lors de la lecture de {file.filename}: {str(e)}")
+    return merge_trajectories(parts), len(parts)
+
+def geotag_mission(mission_id, time_offset=None, max_gap=None):
+    """
+    Interpole la position de chaque image d'une mission sur sa trajectoire
+
+    Args:
+        mission_id (int): ID de la mission
+        time_offset (float, optional): Décalage en secondes ajouté aux dates
+            EXIF (GEOTAG_TIME_OFFSET par défaut)
+        max_gap (float, optional): Écart maximal entre deux positions
+            encadrantes (GEOTAG_MAX_GAP par défaut)
+
+    Returns:
+        GeotagSet: Géoréférencement enregistré, ou None si la mission n'a pas de trajectoire
+    """
+    config = current_app.config
+    if time_offset is None:
+        time_offset = config['GEOTAG_TIME_OFFSET']
+    if max_gap is None:
+        max_gap = config['GEOTAG_MAX_GAP']
+
+    source, files = get_trajectory_files(mission_id)
+    if not files:
+        return None
+    trajectory, file_count = load_trajectory(files)
+
+    read_missing_capture_times(mission_id)
+    images = db.session.query(File.id, File.captured_at) \
+        .filter(File.mission_id == mission_id, File.file_type == 'images') \
+        .order_by(File.captured_at, File.id) \
+        .all()
+    dated = [(file_id, to_seconds(captured_at) + time_offset) for file_id, captured_at in images if captured_at]
+
+    positions = match_positions([seconds for _, seconds in dated], trajectory, max_gap)
+    matched = [(file_id,) + position for (file_id, _), position in zip(dated, positions) if position is not None]
+
+    return _save_geotags(mission_id, {
+        'source': source,
+        'trajectory_files': file_count,
+        'trajectory_points': len(trajectory[0]),
+        'time_offset': time_offset,
+        'max_gap': max_gap,
+        'image_count': len(images),
+        'matched_count': len(matched),
+        'positions': pack_positions(matched)
+    })
+
+@serialized_write
+def _save_geotags(mission_id, values):
+    geotags = GeotagSet.query.filter_by(mission_id=mission_id).first()
+    if geotags is None:
+        geotags = GeotagSet(mission_id=mission_id)
+        db.session.add(geotags)
+    for name, value in values.items():
+        setattr(geotags, name, value)
+    geotags.computed_at = datetime.utcnow()
+    db.session.commit()
+    cache.invalidate_mission(mission_id)
+    map_service.update_mission_location(mission_id)
+    return geotags
+
+def geotag_missions(mission_id=None, time_offset=None, max_gap=None):
+    """
+    Géoréférence les images de toutes les missions (ou d'une seule)
+
+    Args:
+        mission_id (int, optional): Limite le traitement à une mission
+        time_offset (float, optional): Décalage ajouté aux dates EXIF
+        max_gap (float, optional): Écart maximal entre deux positions encadrantes
+
+    Returns:
+        dict: Missions traitées, sans trajectoire, images et images placées
+    """
+    query = db.session.query(File.mission_id).join(Mission) \
+        .filter(Mission.deleted_at.is_(None), File.file_type == 'images') \
+        .distinct()
+    if mission_id is not None:
+        query = query.filter(File.mission_id == mission_id)
+
+    stats = {'missions': 0, 'without_trajectory': 0, 'images': 0, 'matched': 0}
+    for (current_id,) in query.order_by(File.mission_id).all():
+        geotags = geotag_mission(current_id, time_offset, max_gap)
+        if geotags is None:
+            stats['without_trajectory'] += 1
+            continue
+        stats['missions'] += 1
+        stats['images'] += geotags.image_count
+        stats['matched'] += geotags.matched_count
+    return stats
+
+@read_only
+@query_budget(2)
+def get_mission_geotags(mission_id):
+    """
+    Récupère le géoréférencement des images d'une mission
+
+    Args:
+        mission_id (int): ID de la mission
+
+    Returns:
+        tuple: (GeotagSet, liste de dictionnaires par image placée, par date de
+            prise de vue), ou (None, []) si la mission n'est pas géoréférencée
+    """
+    geotags = GeotagSet.query.filter_by(mission_id=mission_id).first()
+    if geotags is None:
+        return None, []
+
+    positions = {file_id: (latitude, longitude, altitude)
+                 for file_id, latitude, longitude, altitude in unpack_positions(geotags.positions)}
+    images = db.session.query(File.id, File.filename, File.captured_at) \
+        .filter(File.mission_id == mission_id, File.file_type == 'images') \
+        .order_by(File.captured_at, File.id) \
+        .all()
+
+    offset = timedelta(seconds=geotags.time_offset)
+    rows = []
+    for file_id, filename, captured_at in images:
+        position = positions.get(file_id)
+        if position is None:
+            continue
+        latitude, longitude, altitude = position
+        rows.append({
+            'file_id': file_id,
+            'filename': filename,
+            'captured_at': (captured_at + offset).isoformat() if captured_at else None,
+            'latitude': latitude,
+            'longitude': longitude,
+            'altitude': None if math.isnan(altitude) else round(altitude, 3)
+        })
+    return geotags, rows
+
+def iter_geotag_csv(rows):
+    """
+    Produit le CSV de géoréférencement des images (nom, latitude, longitude, altitude, date)
+
+    Args:
+        rows (list): Images placées (voir get_mission_geotags)
+
+    Yields:
+        str: Lignes du CSV
+    """
+    yield ','.join(GEOTAG_CSV_COLUMNS) + '\r\n'
+    for row in rows:
+        altitude = '' if row['altitude'] is None else f"{row['altitude']:.3f}"
+        filename = row['filename']
+        if any(character in filename for character in ',"\r\n'):
+            filename = '"' + filename.replace('"', '""') + '"'
+        yield f"{filename},{row['latitude']:.9f},{row['longitude']:.9f},{altitude},{row['captured_at'] or ''}\r\n"
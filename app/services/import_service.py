@@ -0,0 +1,283 @@
+"""
+Service d'import des missions déjà présentes sur le disque
+
+Parcourt UPLOAD_FOLDER (structure <mission>/<type>/<fichier> créée par
+create_mission) et enregistre en base les missions et fichiers manquants.
+
+Le parcours des dossiers est parallélisé avec os.scandir. Chaque fichier déjà
+enregistré est comparé à sa taille et à sa date de modification en base : un
+fichier modifié sur place (journal complété, CSV réécrit) est mis à jour.
+Pour chaque dossier de type, la date de modification est aussi mémorisée
+(DirectorySnapshot) : lors des imports suivants, les dossiers dont la liste
+de fichiers n'a pas changé (aucun fichier ajouté, supprimé ou renommé) sont
+seulement comparés, sans recherche de nouveaux fichiers ni de fichiers
+manquants.
+
+Avec plusieurs volumes de stockage, seul le volume par défaut (UPLOAD_FOLDER)
+est importé.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from flask import current_app
+from sqlalchemy import insert, update
+from app import db, cache
+from app.models import Mission, MissionMetadata, File, DirectorySnapshot
+from app.storage import get_storage, DEFAULT_VOLUME
+from app.compression import SUFFIXES
+from app.services.file_service import get_file_type, extract_metadata_from_csv
+from app.services import stats_service
+
+# Nombre de lignes insérées ou mises à jour par requête
+BATCH_SIZE = 5000
+
+def _scan_mission_directory(upload_folder, snapshots, full, mission_name):
+    """
+    Liste les fichiers des dossiers de type d'une mission (exécuté dans un thread)
+
+    Args:
+        upload_folder (str): Dossier racine des missions
+        snapshots (dict): Dates de modification mémorisées par chemin relatif
+        full (bool): Considère tous les dossiers comme modifiés
+        mission_name (str): Nom du dossier de la mission
+
+    Returns:
+        tuple: (nom de la mission, liste de (sous-dossier, mtime, fichiers
+            (nom, taille, mtime), dossier modifié depuis le dernier import))
+    """
+    mission_dir = os.path.join(upload_folder, mission_name)
+    subdirs = []
+
+    with os.scandir(mission_dir) as it:
+        type_dirs = [entry for entry in it
+                     if entry.is_dir(follow_symlinks=False) and not entry.name.startswith('.')]
+
+    for type_dir in type_dirs:
+        dir_mtime = type_dir.stat(follow_symlinks=False).st_mtime
+        changed = full or snapshots.get(f'{mission_name}/{type_dir.name}') != dir_mtime
+
+        # Même inchangé, le dossier est listé : modifier un fichier sur place
+        # ne change pas la date du dossier
+        entries = []
+        with os.scandir(type_dir.path) as it:
+            for entry in it:
+                if entry.name.startswith('.') or not entry.is_file(follow_symlinks=False):
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+                entries.append((entry.name, stat.st_size, stat.st_mtime))
+
+        subdirs.append((type_dir.name, dir_mtime, entries, changed))
+
+    return mission_name, subdirs
+
+def _save_snapshots(snapshots, scanned):
+    """Enregistre les dates de modification des dossiers relus"""
+    existing = dict(
+        db.session.query(DirectorySnapshot.path, DirectorySnapshot.id)
+        .filter(DirectorySnapshot.path.in_([path for path, _, _ in scanned]))
+        .all()
+    ) if scanned else {}
+
+    now = datetime.utcnow()
+    new_rows = []
+    updated_rows = []
+    for path, mtime, file_count in scanned:
+        row = {'path': path, 'mtime': mtime, 'file_count': file_count, 'scanned_at': now}
+        if path in existing:
+            row['id'] = existing[path]
+            updated_rows.append(row)
+        else:
+            new_rows.append(row)
+        snapshots[path] = mtime
+
+    if new_rows:
+        db.session.execute(insert(DirectorySnapshot), new_rows)
+    if updated_rows:
+        db.session.execute(update(DirectorySnapshot), updated_rows)
+
+def import_missions(workers=8, full=False, dry_run=False, extract_metadata=True):
+    """
+    Importe les missions et fichiers présents sur le disque
+
+    Args:
+        workers (int): Nombre de threads de parcours du disque
+        full (bool): Recherche les fichiers nouveaux et manquants dans tous
+            les dossiers, sans tenir compte des empreintes
+        dry_run (bool): Calcule les différences sans modifier la base
+        extract_metadata (bool): Extrait les métadonnées des CSV de géoréférencement importés
+
+    Returns:
+        dict: Statistiques de l'import
+    """
+    if not get_storage().is_local:
+        raise RuntimeError("L'import depuis le disque nécessite le stockage local (STORAGE_BACKEND=local)")
+
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    stats = {
+        'missions_created': 0,
+        'files_added': 0,
+        'files_updated': 0,
+        'files_missing': 0,
+        'files_skipped': 0,
+        'dirs_scanned': 0,
+        'dirs_unchanged': 0
+    }
+
+    with os.scandir(upload_folder) as it:
+        mission_names = sorted(entry.name for entry in it
+                               if entry.is_dir(follow_symlinks=False) and not entry.name.startswith('.'))
+
+    # Une seule requête pour les missions existantes et les empreintes
+    missions_by_name = {}
+    for mission_id, name, deleted_at in db.session.query(Mission.id, Mission.name, Mission.deleted_at):
+        # Une mission active l'emporte sur une mission supprimée du même nom
+        if name not in missions_by_name or deleted_at is None:
+            missions_by_name[name] = (mission_id, deleted_at)
+    snapshots = dict(db.session.query(DirectorySnapshot.path, DirectorySnapshot.mtime).all())
+
+    new_files = []
+    updated_files = []
+    scanned = []
+    geopos_csv = {}
+    # Variation des agrégats par mission et par type : [fichiers, octets]
+    file_deltas = {}
+
+    def count_file(mission_id, file_type, count, size):
+        delta = file_deltas.setdefault((mission_id, file_type), [0, 0])
+        delta[0] += count
+        delta[1] += size
+
+    def flush(force=False):
+        if dry_run:
+            new_files.clear()
+            updated_files.clear()
+            scanned.clear()
+            file_deltas.clear()
+            return
+        if not force and len(new_files) + len(updated_files) < BATCH_SIZE:
+            return
+        if new_files:
+            db.session.execute(insert(File), new_files)
+        if updated_files:
+            db.session.execute(update(File), updated_files)
+        for (mission_id, file_type), (count, size) in file_deltas.items():
+            stats_service.record_files(mission_id, file_type, count, size)
+        # Les empreintes ne sont enregistrées qu'avec les fichiers correspondants
+        _save_snapshots(snapshots, scanned)
+        db.session.commit()
+        new_files.clear()
+        updated_files.clear()
+        scanned.clear()
+        file_deltas.clear()
+
+    scan = partial(_scan_mission_directory, upload_folder, snapshots, full)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for mission_name, subdirs in executor.map(scan, mission_names):
+            if not subdirs:
+                continue
+
+            mission_id, deleted_at = missions_by_name.get(mission_name, (None, None))
+            if deleted_at is not None:
+                # Dossier d'une mission en cours de suppression
+                continue
+            if mission_id is None:
+                # Mission absente de la base : tous ses dossiers sont à importer
+                subdirs = [(subdir, dir_mtime, entries, True) for subdir, dir_mtime, entries, _ in subdirs]
+
+            changed_subdirs = {subdir for subdir, _, _, changed in subdirs if changed}
+            stats['dirs_scanned'] += len(changed_subdirs)
+            stats['dirs_unchanged'] += len(subdirs) - len(changed_subdirs)
+
+            existing_files = {}
+            if mission_id is None:
+                if not dry_run:
+                    mission = Mission(name=mission_name)
+                    db.session.add(mission)
+                    db.session.flush()
+                    db.session.add(MissionMetadata(mission_id=mission.id))
+                    stats_service.record_mission(None)
+                    mission_id = mission.id
+                    missions_by_name[mission_name] = (mission_id, None)
+                stats['missions_created'] += 1
+            else:
+                # Les fichiers compressés sont retrouvés sous leur nom stocké
+                existing_files = {
+                    file_path + SUFFIXES[compression] if compression else file_path:
+                        (file_id, file_type, file_size, file_mtime, compression)
+                    for file_id, file_path, file_type, file_size, file_mtime, compression in db.session.query(
+                        File.id, File.file_path, File.file_type, File.file_size, File.file_mtime, File.compression
+                    ).filter(
+                        File.mission_id == mission_id,
+                        File.volume.is_(None) | (File.volume == DEFAULT_VOLUME)
+                    ).all()
+                }
+
+            for subdir, dir_mtime, entries, changed in subdirs:
+                for filename, file_size, file_mtime in entries:
+                    file_path = os.path.join(subdir, filename)
+                    known = existing_files.pop(file_path, None)
+
+                    if known is not None:
+                        file_id, known_type, known_size, known_mtime, compression = known
+                        if compression:
+                            # Taille d'origine inconnue sans décompression : inchangé
+                            continue
+                        if known_size != file_size or known_mtime != file_mtime:
+                            updated_files.append({
+                                'id': file_id,
+                                'file_size': file_size,
+                                'file_mtime': file_mtime,
+                                'stored_size': None,
+                                'captured_at': None,
+                                'checksum': None,
+                                'integrity': None
+                            })
+                            count_file(mission_id, known_type, 0, file_size - known_size)
+                            stats['files_updated'] += 1
+                        continue
+
+                    if not changed:
+                        # Liste de fichiers inchangée : fichier déjà écarté par un import précédent
+                        continue
+
+                    file_type = get_file_type(filename)
+                    if file_type == 'autres':
+                        stats['files_skipped'] += 1
+                        continue
+
+                    new_files.append({
+                        'mission_id': mission_id,
+                        'filename': filename,
+                        'file_path': file_path,
+                        'file_type': file_type,
+                        'file_size': file_size,
+                        'file_mtime': file_mtime,
+                        'uploaded_at': datetime.utcfromtimestamp(file_mtime)
+                    })
+                    count_file(mission_id, file_type, 1, file_size)
+                    stats['files_added'] += 1
+
+                    if file_type == 'geopos' and filename.lower().endswith('.csv'):
+                        geopos_csv.setdefault(mission_id, os.path.join(upload_folder, mission_name, file_path))
+
+                if changed:
+                    scanned.append((f'{mission_name}/{subdir}', dir_mtime, len(entries)))
+
+            # Fichiers enregistrés dans les dossiers modifiés mais absents du disque
+            stats['files_missing'] += sum(
+                1 for file_path in existing_files
+                if file_path.split(os.sep, 1)[0] in changed_subdirs
+            )
+
+            flush()
+
+    flush(force=True)
+    if not dry_run and (stats['missions_created'] or stats['files_added'] or stats['files_updated']):
+        cache.clear()
+
+    if extract_metadata and not dry_run:
+        for mission_id, csv_path in geopos_csv.items():
+            extract_metadata_from_csv(csv_path, mission_id)
+
+    return stats
@@ -0,0 +1,205 @@
+"""
+Service de la carte des missions
+
+La position de chaque mission (centre de ses métadonnées, à défaut de son
+emprise) et son emprise (enveloppe convexe de ses images géoréférencées) sont
+projetées une fois, lorsqu'elles changent, dans la table mission_locations.
+Une tuile ne lit ensuite que les missions de son emprise : regroupées par
+cellule de grille directement en SQL aux petits niveaux de zoom, détaillées
+(points et emprises découpées et simplifiées) aux niveaux supérieurs. Le
+nombre d'entités par tuile reste ainsi borné quelle que soit la taille de la
+flotte, et les tuiles générées sont conservées dans tile_cache.
+"""
+import json
+from flask import current_app
+from app import db, tile_cache
+from app.database import read_only, serialized_write, is_sqlite
+from app.query_budget import query_budget
+from app.models import Mission, MissionMetadata, MissionLocation, GeotagSet
+from app.geotag import unpack_positions
+from app.tiles import (
+    TILE_EXTENT, TILE_BUFFER, POINT, POLYGON, project, tile_bounds, to_tile, convex_hull, pack_ring,
+    unpack_ring, clip_ring, simplify_ring, encode_tile, geojson_tile
+)
+
+# Taille des cellules de regroupement (en unités de tuile, 512 = 32 pixels à 256 pixels)
+CLUSTER_CELL_SIZE = 512
+
+# Niveau de zoom maximal servi
+MAX_ZOOM = 22
+
+TILE_FORMATS = {
+    'mvt': 'application/vnd.mapbox-vector-tile',
+    'geojson': 'application/geo+json'
+}
+
+
+def _mission_geometry(mission_id):
+    """Position et contour de l'emprise d'une mission, en coordonnées normalisées"""
+    center = db.session.query(MissionMetadata.center_longitude, MissionMetadata.center_latitude) \
+        .filter_by(mission_id=mission_id).first()
+    positions = db.session.query(GeotagSet.positions).filter_by(mission_id=mission_id).scalar()
+
+    ring = convex_hull([project(longitude, latitude) for _, latitude, longitude, _ in unpack_positions(positions)])
+    if center is not None and center[0] is not None and center[1] is not None:
+        point = project(*center)
+    elif ring:
+        point = ((min(x for x, _ in ring) + max(x for x, _ in ring)) / 2,
+                 (min(y for _, y in ring) + max(y for _, y in ring)) / 2)
+    else:
+        return None, []
+    return point, ring if len(ring) >= 3 else []
+
+@serialized_write
+def update_mission_location(mission_id):
+    """
+    Recalcule la position et l'emprise d'une mission sur la carte
+
+    À appeler lorsque le centre de la mission ou ses images géoréférencées
+    changent ; les tuiles en cache sont invalidées.
+
+    Args:
+        mission_id (int): ID de la mission
+
+    Returns:
+        MissionLocation: Position enregistrée, ou None si la mission n'est pas localisée
+    """
+    point, ring = _mission_geometry(mission_id)
+    location = MissionLocation.query.filter_by(mission_id=mission_id).first()
+    if point is None:
+        if location is not None:
+            db.session.delete(location)
+            db.session.commit()
+            tile_cache.invalidate('tiles')
+        return None
+
+    if location is None:
+        location = MissionLocation(mission_id=mission_id)
+        db.session.add(location)
+    xs = [x for x, _ in ring] + [point[0]]
+    ys = [y for _, y in ring] + [point[1]]
+    location.x, location.y = point
+    location.min_x, location.min_y, location.max_x, location.max_y = min(xs), min(ys), max(xs), max(ys)
+    location.footprint = pack_ring(ring) if ring else None
+    db.session.commit()
+    tile_cache.invalidate('tiles')
+    return location
+
+def rebuild_locations():
+    """
+    Recalcule la position de toutes les missions actives
+
+    Returns:
+        int: Nombre de missions localisées
+    """
+    mission_ids = [mission_id for (mission_id,) in db.session.query(Mission.id)
+                   .filter(Mission.deleted_at.is_(None)).order_by(Mission.id).all()]
+    located = sum(1 for mission_id in mission_ids if update_mission_location(mission_id) is not None)
+    tile_cache.clear()
+    return located
+
+def _cell(column, origin, scale):
+    """Indice de cellule de grille d'une coordonnée (troncature portable)"""
+    value = (column - origin) * scale
+    if is_sqlite(db.engine):
+        # CAST tronque sous SQLite (les valeurs sont positives dans la tuile)
+        return db.cast(value, db.Integer)
+    return db.func.floor(value)
+
+def _cluster_features(z, x, y):
+    """Missions de la tuile regroupées par cellule de grille (petits niveaux de zoom)"""
+    min_x, min_y, max_x, max_y = tile_bounds(z, x, y)
+    scale = (1 << z) * TILE_EXTENT / CLUSTER_CELL_SIZE
+    cell_x = _cell(MissionLocation.x, min_x, scale)
+    cell_y = _cell(MissionLocation.y, min_y, scale)
+    rows = db.session.query(
+        db.func.count(MissionLocation.id), db.func.avg(MissionLocation.x), db.func.avg(MissionLocation.y),
+        db.func.min(Mission.id), db.func.min(Mission.name), db.func.min(Mission.flight_date)
+    ).join(Mission, Mission.id == MissionLocation.mission_id) \
+        .filter(
+            Mission.deleted_at.is_(None),
+            MissionLocation.x >= min_x, MissionLocation.x < max_x,
+            MissionLocation.y >= min_y, MissionLocation.y < max_y
+        ) \
+        .group_by(cell_x, cell_y) \
+        .all()
+
+    features = []
+    for count, point_x, point_y, mission_id, name, flight_date in rows:
+        coordinates = tuple(int(round(value)) for value in to_tile(z, x, y, point_x, point_y))
+        if count == 1:
+            properties = {'name': name, 'flight_date': _date(flight_date)}
+            features.append((mission_id, POINT, coordinates, properties))
+        else:
+            features.append((None, POINT, coordinates, {'cluster': True, 'point_count': count}))
+    return features
+
+def _date(value):
+    """Date renvoyée par une agrégation (objet date, ou texte sous SQLite)"""
+    if value is None:
+        return None
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+def _detail_features(z, x, y):
+    """Missions de la tuile et contours de leurs emprises (niveaux de zoom élevés)"""
+    min_x, min_y, max_x, max_y = tile_bounds(z, x, y, TILE_BUFFER)
+    rows = db.session.query(
+        Mission.id, Mission.name, Mission.flight_date, MissionLocation.x, MissionLocation.y,
+        MissionLocation.footprint
+    ).join(Mission, Mission.id == MissionLocation.mission_id) \
+        .filter(
+            Mission.deleted_at.is_(None),
+            MissionLocation.min_x <= max_x, MissionLocation.max_x >= min_x,
+            MissionLocation.min_y <= max_y, MissionLocation.max_y >= min_y
+        ) \
+        .order_by(Mission.id) \
+        .all()
+
+    points, footprints = [], []
+    for mission_id, name, flight_date, point_x, point_y, footprint in rows:
+        properties = {'name': name, 'flight_date': _date(flight_date)}
+        if min_x <= point_x <= max_x and min_y <= point_y <= max_y:
+            coordinates = tuple(int(round(value)) for value in to_tile(z, x, y, point_x, point_y))
+            points.append((mission_id, POINT, coordinates, properties))
+        if footprint:
+            ring = [to_tile(z, x, y, *point) for point in unpack_ring(footprint)]
+            ring = simplify_ring(clip_ring(ring, -TILE_BUFFER, TILE_EXTENT + TILE_BUFFER))
+            if ring:
+                footprints.append((mission_id, POLYGON, ring, properties))
+    return points, footprints
+
+@read_only
+@query_budget(1)
+def get_tile(z, x, y, tile_format='mvt'):
+    """
+    Génère une tuile de la carte des missions
+
+    En dessous de TILE_CLUSTER_MAX_ZOOM, les missions proches sont regroupées
+    (entités cluster=true et point_count) ; au-delà, chaque mission est un
+    point de la couche missions et son emprise un polygone de la couche
+    footprints.
+
+    Args:
+        z, x, y (int): Tuile
+        tile_format (str): mvt ou geojson
+
+    Returns:
+        bytes: Tuile encodée
+
+    Raises:
+        ValueError: Si le format est inconnu ou la tuile hors limites
+    """
+    if tile_format not in TILE_FORMATS:
+        raise ValueError(f"Format de tuile inconnu: {tile_format}")
+    if not 0 <= z <= MAX_ZOOM or not 0 <= x < (1 << z) or not 0 <= y < (1 << z):
+        raise ValueError(f"Tuile hors limites: {z}/{x}/{y}")
+
+    if z < current_app.config['TILE_CLUSTER_MAX_ZOOM']:
+        layers = {'missions': _cluster_features(z, x, y)}
+    else:
+        points, footprints = _detail_features(z, x, y)
+        layers = {'footprints': footprints, 'missions': points}
+
+    if tile_format == 'geojson':
+        return json.dumps(geojson_tile(z, x, y, layers), separators=(',', ':')).encode('utf-8')
+    return encode_tile(layers)
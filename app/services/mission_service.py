@@ -1,14 +1,27 @@
 """
 Service de gestion des missions de vol drone
 """
-import os
-import shutil
 from datetime import datetime
 from flask import current_app
-from app import db
+from sqlalchemy import update, insert
+from app import db, cache, tile_cache
+from app.database import serialized_write, read_only
+from app.query_budget import query_budget
+from app.storage import get_storage
 from app.models import Mission, MissionMetadata, File
+from app.read_models import (
+    missions_select, files_select, file_stats, serialize_missions, FILE_SERIALIZER,
+    FILE_COLUMNS, FILE_COLUMN_ENCODINGS
+)
+from app.columnar import encode_columns
 from app.services.file_service import delete_mission_files
+from app.services.reaper_service import tombstone_mission, move_mission_to_trash
+from app.services import stats_service, rollup_service
 
+# Opérations acceptées par apply_mission_batch
+MISSION_BATCH_OPERATIONS = ('create', 'update', 'delete')
+
+@serialized_write
 def create_mission(name, flight_date=None, description=None):
     """
     Crée une nouvelle mission
@@ -36,34 +49,87 @@ def create_mission(name, flight_date=None, description=None):
         description=description
     )
     
+    # Volume de stockage de la mission (plusieurs disques configurés)
+    storage = get_storage()
+    mission.volume = storage.place(mission)
+    
     db.session.add(mission)
+    stats_service.record_mission(formatted_date)
+    rollup_service.record_missions([formatted_date])
     db.session.commit()
     
-    # Création du dossier de la mission
-    mission_path = os.path.join(current_app.config['UPLOAD_FOLDER'], name)
-    if not os.path.exists(mission_path):
-        os.makedirs(mission_path)
-        
-        # Création des sous-dossiers par type
-        for file_type in current_app.config['ALLOWED_EXTENSIONS'].keys():
-            os.makedirs(os.path.join(mission_path, file_type))
+    # Création du dossier de la mission et des sous-dossiers par type
+    storage.create_mission(mission, current_app.config['ALLOWED_EXTENSIONS'].keys())
     
     # Création des métadonnées vides
     metadata = MissionMetadata(mission_id=mission.id)
     db.session.add(metadata)
     db.session.commit()
+    cache.invalidate_mission(mission.id)
     
     return mission
 
+@read_only
+@query_budget(2)
 def get_all_missions():
     """
     Récupère toutes les missions
     
+    Les métadonnées et le nombre de fichiers par type sont préchargés, de sorte
+    que le nombre de requêtes ne dépend pas du nombre de missions.
+    
     Returns:
         list: Liste des objets Mission
     """
-    return Mission.query.order_by(Mission.date_created.desc()).all()
+    missions = Mission.active() \
+        .options(db.joinedload(Mission.mission_metadata)) \
+        .order_by(Mission.date_created.desc()) \
+        .all()
+    return attach_file_stats(missions)
+
+@read_only
+@query_budget(3)
+def get_missions_page(page=1, per_page=12, total=None):
+    """
+    Récupère une page de missions, les plus récentes en premier
+    
+    Args:
+        page (int): Numéro de la page (à partir de 1)
+        per_page (int): Nombre de missions par page
+        total (int, optional): Nombre total de missions actives, s'il est déjà
+            connu (agrégats du tableau de bord) ; sinon il est compté
+        
+    Returns:
+        Pagination: Page de missions, avec Mission.file_stats renseigné
+    """
+    pagination = Mission.active() \
+        .options(db.joinedload(Mission.mission_metadata)) \
+        .order_by(Mission.date_created.desc(), Mission.id.desc()) \
+        .paginate(page=page, per_page=per_page, error_out=False, count=total is None)
+    if total is not None:
+        pagination.total = total
+    attach_file_stats(pagination.items)
+    return pagination
+
+def attach_file_stats(missions):
+    """
+    Précharge le nombre de fichiers par type d'une liste de missions
+    
+    Args:
+        missions (list): Liste des objets Mission
+        
+    Returns:
+        list: La même liste, avec Mission.file_stats renseigné
+    """
+    if not missions:
+        return missions
+    
+    stats = file_stats([mission.id for mission in missions])
+    for mission in missions:
+        mission.file_stats = stats[mission.id]
+    return missions
 
+@query_budget(1)
 def get_mission_by_id(mission_id):
     """
     Récupère une mission par son ID
@@ -74,8 +140,9 @@ def get_mission_by_id(mission_id):
     Returns:
         Mission: Objet Mission ou None
     """
-    return Mission.query.get(mission_id)
+    return Mission.active().filter_by(id=mission_id).first()
 
+@query_budget(1)
 def get_mission_by_name(mission_name):
     """
     Récupère une mission par son nom
@@ -86,8 +153,9 @@ def get_mission_by_name(mission_name):
     Returns:
         Mission: Objet Mission ou None
     """
-    return Mission.query.filter_by(name=mission_name).first()
+    return Mission.active().filter_by(name=mission_name).first()
 
+@serialized_write
 def update_mission(mission_id, name=None, flight_date=None, description=None):
     """
     Met à jour les informations d'une mission
@@ -101,32 +169,28 @@ def update_mission(mission_id, name=None, flight_date=None, description=None):
     Returns:
         Mission: Objet Mission mis à jour
     """
-    mission = Mission.query.get_or_404(mission_id)
+    mission = Mission.active().filter_by(id=mission_id).first_or_404()
     old_name = mission.name
     
     # Mise à jour des champs si fournis
     if name and name != old_name:
-        # Renommer le dossier de la mission
-        old_path = mission.mission_path
+        # Renommer le dossier de la mission. Les chemins des fichiers étant
+        # relatifs au dossier de la mission, le renommage du dossier suffit
+        # (et aucune donnée n'est déplacée avec un stockage S3)
         mission.name = name
-        new_path = mission.mission_path
-        
-        if os.path.exists(old_path):
-            try:
-                os.rename(old_path, new_path)
-                
-                # Mettre à jour les chemins des fichiers dans la base de données
-                files = File.query.filter_by(mission_id=mission_id).all()
-                for file in files:
-                    file.file_path = file.file_path.replace(old_path, new_path)
-            except OSError as e:
-                current_app.logger.error(f"Erreur lors du renommage du dossier de mission: {str(e)}")
-                # Restaurer l'ancien nom
-                mission.name = old_name
+        try:
+            get_storage().rename_mission(old_name, name)
+        except OSError as e:
+            current_app.logger.error(f"Erreur lors du renommage du dossier de mission: {str(e)}")
+            # Restaurer l'ancien nom
+            mission.name = old_name
     
     if flight_date:
         try:
-            mission.flight_date = datetime.strptime(flight_date, '%Y-%m-%d').date()
+            new_date = datetime.strptime(flight_date, '%Y-%m-%d').date()
+            stats_service.record_flight_date_change(mission.flight_date, new_date)
+            rollup_service.move_missions([(mission.id, mission.flight_date, new_date)])
+            mission.flight_date = new_date
         except ValueError:
             current_app.logger.warning(f"Format de date invalide: {flight_date}")
     
@@ -134,42 +198,311 @@ def update_mission(mission_id, name=None, flight_date=None, description=None):
         mission.description = description
     
     db.session.commit()
+    cache.invalidate_mission(mission_id)
+    if mission.name != old_name or flight_date:
+        tile_cache.invalidate('tiles')
     return mission
 
+@serialized_write
 def delete_mission(mission_id):
     """
     Supprime une mission et tous ses fichiers
     
+    La mission est immédiatement masquée et son dossier déplacé dans la
+    corbeille ; les fichiers sont purgés en arrière-plan par le reaper
+    (voir reaper_service).
+    
     Args:
         mission_id (int): ID de la mission
         
     Returns:
         bool: True si la suppression est réussie
     """
-    mission = Mission.query.get_or_404(mission_id)
+    mission = Mission.active().filter_by(id=mission_id).first_or_404()
     
     try:
-        # Supprimer les fichiers physiques
-        mission_path = mission.mission_path
-        if os.path.exists(mission_path):
-            shutil.rmtree(mission_path)
-        
-        # Supprimer les métadonnées
-        MissionMetadata.query.filter_by(mission_id=mission_id).delete()
-        
-        # Supprimer les fichiers de la base de données
-        File.query.filter_by(mission_id=mission_id).delete()
-        
-        # Supprimer la mission
-        db.session.delete(mission)
-        db.session.commit()
-        
+        tombstone_mission(mission)
+        cache.invalidate_mission(mission_id)
+        tile_cache.invalidate('tiles')
         return True
     except Exception as e:
         current_app.logger.error(f"Erreur lors de la suppression de la mission: {str(e)}")
         db.session.rollback()
         return False
 
+def _parse_batch_operation(operation):
+    """
+    Valide une opération d'un lot (voir apply_mission_batch)
+
+    Raises:
+        ValueError: Si l'opération est mal formée
+    """
+    if not isinstance(operation, dict):
+        raise ValueError("Opération invalide")
+    kind = operation.get('op')
+    if kind not in MISSION_BATCH_OPERATIONS:
+        raise ValueError(f"Opération inconnue: {kind}")
+
+    parsed = {'op': kind, 'ref': operation.get('ref')}
+    if kind != 'create':
+        mission_id = operation.get('id')
+        if not isinstance(mission_id, int) or isinstance(mission_id, bool):
+            raise ValueError("L'ID de la mission est requis")
+        parsed['id'] = mission_id
+    if kind == 'delete':
+        return parsed
+
+    name = operation.get('name')
+    if kind == 'create' and not name:
+        raise ValueError("Le nom de la mission est requis")
+    if name is not None and not isinstance(name, str):
+        raise ValueError("Nom de mission invalide")
+    if name and len(name) > Mission.name.type.length:
+        raise ValueError("Nom de mission trop long")
+    parsed['name'] = name or None
+
+    flight_date = operation.get('flight_date')
+    parsed['flight_date'] = None
+    if flight_date:
+        try:
+            parsed['flight_date'] = datetime.strptime(str(flight_date), '%Y-%m-%d').date()
+        except ValueError:
+            raise ValueError(f"Format de date invalide: {flight_date}")
+
+    description = operation.get('description')
+    if description is not None and not isinstance(description, str):
+        raise ValueError("Description invalide")
+    parsed['description'] = description
+    return parsed
+
+def _batch_result(index, operation, status, message=None, mission_id=None):
+    result = {'index': index, 'op': operation.get('op'), 'status': status, 'success': status < 300}
+    if operation.get('ref') is not None:
+        result['ref'] = operation['ref']
+    if mission_id is not None:
+        result['mission_id'] = mission_id
+    if message:
+        result['message'] = message
+    return result
+
+def _validate_batch(operations):
+    """
+    Valide un lot d'opérations avec deux requêtes, quelle que soit sa taille
+
+    Returns:
+        tuple: (opérations acceptées [(index, opération, mission)], résultats
+            en erreur par index)
+    """
+    parsed, errors = [], {}
+    for index, operation in enumerate(operations):
+        try:
+            parsed.append((index, _parse_batch_operation(operation)))
+        except ValueError as e:
+            errors[index] = _batch_result(index, operation if isinstance(operation, dict) else {}, 400, str(e))
+
+    # Missions visées et noms déjà pris par des missions actives
+    mission_ids = {operation['id'] for _, operation in parsed if 'id' in operation}
+    missions = {
+        mission.id: mission
+        for mission in Mission.active().filter(Mission.id.in_(mission_ids)).all()
+    } if mission_ids else {}
+    names = {operation['name'] for _, operation in parsed if operation.get('name')}
+    taken = {
+        name for (name,) in db.session.query(Mission.name)
+        .filter(Mission.deleted_at.is_(None), Mission.name.in_(names)).all()
+    } if names else set()
+
+    # Un nom libéré dans le lot (renommage, suppression) n'est pas réutilisable
+    # dans le même lot : les dossiers ne sont déplacés qu'après la validation
+    accepted, claimed, touched = [], set(), set()
+    for index, operation in parsed:
+        mission = missions.get(operation.get('id'))
+        name = operation.get('name')
+        if operation['op'] != 'create' and mission is None:
+            errors[index] = _batch_result(index, operation, 404, f"Mission avec ID {operation['id']} non trouvée")
+        elif mission is not None and mission.id in touched:
+            errors[index] = _batch_result(index, operation, 409, "Mission visée par plusieurs opérations du lot",
+                                          mission.id)
+        elif name and (mission is None or name != mission.name) and (name in taken or name in claimed):
+            errors[index] = _batch_result(index, operation, 409, f'Une mission avec le nom "{name}" existe déjà',
+                                          operation.get('id'))
+        else:
+            accepted.append((index, operation, mission))
+            if mission is not None:
+                touched.add(mission.id)
+            if name and (mission is None or name != mission.name):
+                claimed.add(name)
+    return accepted, errors
+
+def _apply_batch_rows(accepted):
+    """
+    Applique les opérations validées dans la session, sans valider la transaction
+
+    Les missions et leurs métadonnées sont insérées en une requête chacune.
+
+    Returns:
+        tuple: (ID de mission de chaque opération, ID des missions créées,
+            renommages [(ID, ancien nom, nouveau nom)], missions supprimées)
+    """
+    storage = get_storage()
+    created, renamed, deleted, date_changes = [], [], [], []
+    for _, operation, mission in accepted:
+        if operation['op'] == 'create':
+            row = {
+                'name': operation['name'],
+                'flight_date': operation['flight_date'],
+                'description': operation['description']
+            }
+            row['volume'] = storage.place(Mission(**row))
+            created.append(row)
+        elif operation['op'] == 'update':
+            if operation['name'] and operation['name'] != mission.name:
+                renamed.append((mission.id, mission.name, operation['name']))
+                mission.name = operation['name']
+            if operation['flight_date']:
+                date_changes.append((mission.id, mission.flight_date, operation['flight_date']))
+                mission.flight_date = operation['flight_date']
+            if operation['description'] is not None:
+                mission.description = operation['description']
+        else:
+            rollup_service.forget_missions([mission.id])
+            stats_service.forget_mission_files(mission.id)
+            mission.deleted_at = datetime.utcnow()
+            mission.purged_files = 0
+            deleted.append(mission)
+
+    created_ids = {}
+    if created:
+        # Les noms sont uniques dans le lot : ils identifient les lignes renvoyées
+        created_ids = dict(db.session.execute(insert(Mission).returning(Mission.name, Mission.id), created).all())
+        db.session.execute(insert(MissionMetadata), [{'mission_id': mission_id} for mission_id in created_ids.values()])
+    db.session.flush()
+    stats_service.record_missions([row['flight_date'] for row in created])
+    stats_service.record_missions([mission.flight_date for mission in deleted], sign=-1)
+    stats_service.record_flight_date_changes([(old_date, new_date) for _, old_date, new_date in date_changes])
+    rollup_service.record_missions([row['flight_date'] for row in created])
+    rollup_service.move_missions(date_changes)
+
+    mission_ids = [
+        created_ids[operation['name']] if operation['op'] == 'create' else mission.id
+        for _, operation, mission in accepted
+    ]
+    return mission_ids, [created_ids[row['name']] for row in created], renamed, deleted
+
+@serialized_write
+def apply_mission_batch(operations, atomic=True):
+    """
+    Crée, modifie et supprime plusieurs missions en une seule transaction
+
+    L'unicité des noms est vérifiée pour tout le lot en une requête, toutes
+    les lignes sont écrites dans une même transaction, puis les dossiers sont
+    créés, renommés ou déplacés dans la corbeille une fois la transaction
+    validée. Un renommage de dossier en échec est annulé en base et signalé
+    dans le résultat de l'opération.
+
+    Args:
+        operations (list): Opérations {op: create|update|delete, id (update,
+            delete), name, flight_date (YYYY-MM-DD), description, ref
+            (optionnel, renvoyé tel quel dans le résultat)}
+        atomic (bool): Si True, aucune opération n'est appliquée dès qu'une
+            opération du lot est invalide
+
+    Returns:
+        dict: applied (bool) et results, un résultat par opération dans
+            l'ordre du lot (status HTTP, success, mission ou message)
+
+    Raises:
+        ValueError: Si le lot est vide ou trop grand
+    """
+    max_size = current_app.config['MISSION_BATCH_MAX_SIZE']
+    if not isinstance(operations, list) or not operations:
+        raise ValueError("Liste d'opérations requise")
+    if len(operations) > max_size:
+        raise ValueError(f"Lot trop grand ({len(operations)} opérations, {max_size} au maximum)")
+
+    accepted, results = _validate_batch(operations)
+    if results and atomic:
+        for index, operation, mission in accepted:
+            results[index] = _batch_result(
+                index, operation, 424, "Non appliquée : le lot contient des opérations invalides",
+                mission.id if mission is not None else None
+            )
+        accepted = []
+
+    def ordered(applied):
+        return {'applied': applied, 'results': [results[index] for index in range(len(operations))]}
+
+    if not accepted:
+        return ordered(False)
+
+    try:
+        mission_ids, created_ids, renamed, deleted = _apply_batch_rows(accepted)
+        trashed = [(mission.id, mission) for mission in deleted]
+        db.session.commit()
+    except Exception as e:
+        current_app.logger.error(f"Erreur lors de l'application du lot de missions: {str(e)}")
+        db.session.rollback()
+        for index, operation, _ in accepted:
+            results[index] = _batch_result(index, operation, 500, "Erreur lors de l'enregistrement du lot")
+        return ordered(False)
+
+    # Opérations sur les dossiers, après la validation de la transaction
+    storage = get_storage()
+    for mission_id, mission in trashed:
+        try:
+            move_mission_to_trash(mission)
+        except OSError as e:
+            # Le reaper retentera le déplacement lors de son prochain passage
+            current_app.logger.error(f"Erreur lors du déplacement de la mission {mission_id} dans la corbeille: {str(e)}")
+
+    failed_renames = set()
+    for mission_id, old_name, new_name in renamed:
+        try:
+            storage.rename_mission(old_name, new_name)
+        except OSError as e:
+            current_app.logger.error(f"Erreur lors du renommage du dossier de mission: {str(e)}")
+            db.session.execute(update(Mission).where(Mission.id == mission_id).values(name=old_name))
+            failed_renames.add(mission_id)
+    if failed_renames:
+        db.session.commit()
+
+    cache.invalidate('missions', *(f'mission:{mission_id}' for mission_id in mission_ids))
+    if len(created_ids) < len(mission_ids):
+        tile_cache.invalidate('tiles')
+
+    # Missions renvoyées, rechargées en deux requêtes
+    missions = {
+        mission.id: mission
+        for mission in attach_file_stats(
+            Mission.active().options(db.joinedload(Mission.mission_metadata))
+            .filter(Mission.id.in_(mission_ids)).all()
+        )
+    }
+
+    file_types = current_app.config['ALLOWED_EXTENSIONS'].keys()
+    for mission_id in created_ids:
+        try:
+            storage.create_mission(missions[mission_id], file_types)
+        except OSError as e:
+            current_app.logger.error(f"Erreur lors de la création du dossier de la mission {mission_id}: {str(e)}")
+
+    for (index, operation, _), mission_id in zip(accepted, mission_ids):
+        if operation['op'] == 'create':
+            result = _batch_result(index, operation, 201, mission_id=mission_id)
+        elif operation['op'] == 'delete':
+            result = _batch_result(index, operation, 202, "Purge des fichiers programmée", mission_id)
+        elif mission_id in failed_renames:
+            result = _batch_result(index, operation, 500, "Erreur lors du renommage du dossier, nom inchangé",
+                                   mission_id)
+        else:
+            result = _batch_result(index, operation, 200, mission_id=mission_id)
+        if mission_id in missions:
+            result['mission'] = missions[mission_id].to_dict()
+        results[index] = result
+    return ordered(True)
+
+@read_only
+@query_budget(1)
 def get_mission_files_by_type(mission_id, file_type=None):
     """
     Récupère les fichiers d'une mission, éventuellement filtrés par type
@@ -186,24 +519,52 @@ def get_mission_files_by_type(mission_id, file_type=None):
     else:
         return File.query.filter_by(mission_id=mission_id).all()
 
-def search_missions(query=None, start_date=None, end_date=None, file_type=None):
+@read_only
+@query_budget(1)
+def get_mission_file_summaries(mission_id, file_type=None):
     """
-    Recherche des missions selon différents critères
+    Récupère les fichiers d'une mission sans instancier d'objets File
     
     Args:
-        query (str, optional): Texte de recherche pour le nom ou la description
-        start_date (str, optional): Date de début au format YYYY-MM-DD
-        end_date (str, optional): Date de fin au format YYYY-MM-DD
-        file_type (str, optional): Type de fichier que doit contenir la mission
+        mission_id (int): ID de la mission
+        file_type (str, optional): Type de fichier à filtrer
         
     Returns:
-        list: Liste des objets Mission correspondant aux critères
+        list: Fichiers au format de File.to_dict
     """
-    missions_query = Mission.query
+    rows = db.session.connection().execute(_mission_files_statement(mission_id, file_type)).all()
+    return FILE_SERIALIZER.serialize(rows)
+
+@read_only
+@query_budget(1)
+def get_mission_file_columns(mission_id, file_type=None):
+    """
+    Récupère les fichiers d'une mission au format colonnaire (app.columnar)
+    
+    Args:
+        mission_id (int): ID de la mission
+        file_type (str, optional): Type de fichier à filtrer
+        
+    Returns:
+        dict: {'count', 'fields', 'columns'}, fichiers triés par ID
+    """
+    rows = db.session.connection().execute(_mission_files_statement(mission_id, file_type)).all()
+    return encode_columns(FILE_COLUMNS, rows, FILE_COLUMN_ENCODINGS)
+
+def _mission_files_statement(mission_id, file_type=None):
+    """Fichiers d'une mission, triés par ID"""
+    statement = files_select().where(File.mission_id == mission_id)
+    if file_type:
+        statement = statement.where(File.file_type == file_type)
+    return statement.order_by(File.id)
+
+def _search_filters(query=None, start_date=None, end_date=None, file_type=None):
+    """Conditions de recherche des missions (dates invalides ignorées)"""
+    filters = []
     
     # Filtrage par nom ou description
     if query:
-        missions_query = missions_query.filter(
+        filters.append(
             (Mission.name.ilike(f'%{query}%')) | 
             (Mission.description.ilike(f'%{query}%'))
         )
@@ -212,28 +573,60 @@ def search_missions(query=None, start_date=None, end_date=None, file_type=None):
     if start_date:
         try:
             start = datetime.strptime(start_date, '%Y-%m-%d').date()
-            missions_query = missions_query.filter(Mission.flight_date >= start)
+            filters.append(Mission.flight_date >= start)
         except ValueError:
             pass
     
     if end_date:
         try:
             end = datetime.strptime(end_date, '%Y-%m-%d').date()
-            missions_query = missions_query.filter(Mission.flight_date <= end)
+            filters.append(Mission.flight_date <= end)
         except ValueError:
             pass
     
-    # Appliquer les filtres et récupérer les résultats
-    missions = missions_query.order_by(Mission.date_created.desc()).all()
-    
-    # Filtrage par type de fichier (nécessite de vérifier chaque mission)
+    # Filtrage par type de fichier (sous-requête EXISTS)
     if file_type:
-        filtered_missions = []
-        for mission in missions:
-            # Vérifier si la mission contient au moins un fichier du type spécifié
-            has_file_type = File.query.filter_by(mission_id=mission.id, file_type=file_type).first() is not None
-            if has_file_type:
-                filtered_missions.append(mission)
-        return filtered_missions
-    
-    return missions
\ No newline at end of file
+        filters.append(Mission.files.any(File.file_type == file_type))
+    
+    return filters
+
+@read_only
+@query_budget(2)
+def search_missions(query=None, start_date=None, end_date=None, file_type=None):
+    """
+    Recherche des missions selon différents critères
+    
+    Args:
+        query (str, optional): Texte de recherche pour le nom ou la description
+        start_date (str, optional): Date de début au format YYYY-MM-DD
+        end_date (str, optional): Date de fin au format YYYY-MM-DD
+        file_type (str, optional): Type de fichier que doit contenir la mission
+        
+    Returns:
+        list: Liste des objets Mission correspondant aux critères
+    """
+    missions = Mission.active() \
+        .filter(*_search_filters(query, start_date, end_date, file_type)) \
+        .options(db.joinedload(Mission.mission_metadata)) \
+        .order_by(Mission.date_created.desc()) \
+        .all()
+    
+    return attach_file_stats(missions)
+
+@read_only
+@query_budget(2)
+def search_mission_summaries(query=None, start_date=None, end_date=None, file_type=None):
+    """
+    Recherche des missions sans instancier d'objets Mission (listes de l'API)
+    
+    Mêmes critères que search_missions ; les missions sont lues en tuples
+    avec leurs métadonnées, puis sérialisées colonne par colonne.
+    
+    Returns:
+        list: Missions au format de Mission.to_dict
+    """
+    statement = missions_select() \
+        .where(*_search_filters(query, start_date, end_date, file_type)) \
+        .order_by(Mission.date_created.desc())
+    rows = db.session.connection().execute(statement).all()
+    return serialize_missions(rows, file_stats([row.id for row in rows]))
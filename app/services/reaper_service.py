@@ -0,0 +1,420 @@
+"""
+Service de suppression asynchrone des missions
+
+La suppression d'une mission se fait en deux temps :
+    1. la mission est marquée comme supprimée (tombstone) et son dossier est
+       déplacé dans la corbeille par un simple renommage, ce qui libère
+       immédiatement son nom ;
+    2. un processus de purge (reaper) supprime ensuite les fichiers de la
+       corbeille par lots, avec une pause entre chaque lot, puis efface les
+       enregistrements de la base de données.
+
+Toutes les étapes sont idempotentes : après un redémarrage, le reaper reprend
+simplement là où il s'était arrêté.
+"""
+import os
+import time
+import threading
+from datetime import datetime
+from flask import current_app
+from app import db
+from app.models import Mission, MissionMetadata, MissionStorage, MissionLocation, File, RinexIndex, GeotagSet, OrphanFile
+from app.storage import get_storage
+from app.services import stats_service, rollup_service
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+MISSION_ENTRY_PREFIX = 'mission_'
+FILES_ENTRY_PREFIX = 'files_'
+LOCK_FILENAME = '.reaper.lock'
+
+def get_trash_folder(root=None):
+    """
+    Retourne le dossier de corbeille d'un volume, en le créant si nécessaire
+
+    La corbeille doit se trouver sur le même disque que les fichiers pour que
+    leur déplacement soit un simple renommage : chaque volume de stockage a
+    donc la sienne.
+
+    Args:
+        root (str, optional): Dossier racine du volume (UPLOAD_FOLDER par défaut)
+
+    Returns:
+        str: Chemin du dossier de corbeille
+    """
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    if root is None or os.path.abspath(root) == os.path.abspath(upload_folder):
+        trash_folder = current_app.config.get('TRASH_FOLDER') or os.path.join(upload_folder, '.trash')
+    else:
+        trash_folder = os.path.join(root, '.trash')
+    if not os.path.exists(trash_folder):
+        os.makedirs(trash_folder, exist_ok=True)
+    return trash_folder
+
+def _volume_roots():
+    """Dossiers racines des volumes de stockage local"""
+    return get_storage().roots() or [current_app.config['UPLOAD_FOLDER']]
+
+def _mission_trash_path(mission_id, root=None):
+    """Chemin de la corbeille réservé au dossier d'une mission"""
+    return os.path.join(get_trash_folder(root), f'{MISSION_ENTRY_PREFIX}{mission_id}')
+
+def move_mission_to_trash(mission):
+    """
+    Déplace le dossier d'une mission supprimée dans la corbeille
+
+    Le dossier n'est déplacé que si aucune mission active n'a repris le même nom.
+    Avec un stockage distant, les clés dépendent de l'ID de la mission : rien
+    n'est déplacé, les objets sont purgés directement par le reaper.
+
+    Args:
+        mission (Mission): Mission marquée comme supprimée
+
+    Returns:
+        bool: True si un dossier a été déplacé
+    """
+    if not get_storage().is_local:
+        return False
+
+    mission_paths = [(root, os.path.join(root, mission.name)) for root in _volume_roots()]
+    mission_paths = [(root, path) for root, path in mission_paths if os.path.exists(path)]
+    if not mission_paths:
+        return False
+
+    if Mission.active().filter_by(name=mission.name).first() is not None:
+        return False
+
+    # Un dossier par volume, chacun renommé dans la corbeille de son volume
+    for root, mission_path in mission_paths:
+        trash_path = _mission_trash_path(mission.id, root)
+        if os.path.exists(trash_path):
+            # Reprise après une interruption : on conserve un nom unique
+            trash_path = f"{trash_path}_{datetime.utcnow().strftime('%Y%m%d%H%M%S%f')}"
+        os.rename(mission_path, trash_path)
+    return True
+
+def move_files_to_trash(mission):
+    """
+    Déplace le dossier d'une mission active dans la corbeille
+
+    Utilisé pour vider une mission sans la supprimer. Avec un stockage
+    distant, les objets de la mission sont supprimés immédiatement (par lots
+    de 1000 clés) puisque de nouveaux fichiers peuvent être téléversés sous
+    le même préfixe.
+
+    Args:
+        mission (Mission): Mission dont les fichiers doivent être supprimés
+    """
+    storage = get_storage()
+    if not storage.is_local:
+        storage.delete_prefix(storage.mission_prefix(mission))
+        return
+
+    timestamp = datetime.utcnow().strftime('%Y%m%d%H%M%S%f')
+    for root in _volume_roots():
+        mission_path = os.path.join(root, mission.name)
+        if not os.path.exists(mission_path):
+            continue
+        trash_path = os.path.join(get_trash_folder(root), f'{FILES_ENTRY_PREFIX}{mission.id}_{timestamp}')
+        os.rename(mission_path, trash_path)
+
+def tombstone_mission(mission):
+    """
+    Marque une mission comme supprimée et déplace son dossier dans la corbeille
+
+    Args:
+        mission (Mission): Mission à supprimer
+    """
+    # La mission et ses fichiers quittent immédiatement les agrégats
+    rollup_service.forget_missions([mission.id])
+    stats_service.forget_mission_files(mission.id)
+    stats_service.record_mission(mission.flight_date, sign=-1)
+    mission.deleted_at = datetime.utcnow()
+    mission.purged_files = 0
+    db.session.commit()
+
+    try:
+        move_mission_to_trash(mission)
+    except OSError as e:
+        # Le reaper retentera le déplacement lors de son prochain passage
+        current_app.logger.error(f"Erreur lors du déplacement de la mission {mission.id} dans la corbeille: {str(e)}")
+
+def _iter_tree_bottom_up(root):
+    """
+    Parcourt une arborescence avec os.scandir, les fichiers avant leur dossier
+
+    Yields:
+        tuple: (chemin, est_un_dossier)
+    """
+    stack = [(root, False)]
+    while stack:
+        path, visited = stack.pop()
+        if visited:
+            yield path, True
+            continue
+
+        stack.append((path, True))
+        try:
+            with os.scandir(path) as it:
+                entries = list(it)
+        except FileNotFoundError:
+            continue
+
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                stack.append((entry.path, False))
+            else:
+                yield entry.path, False
+
+def purge_tree(root, batch_size, batch_interval, on_batch=None):
+    """
+    Supprime une arborescence par lots de fichiers
+
+    Args:
+        root (str): Dossier à supprimer
+        batch_size (int): Nombre de fichiers supprimés par lot
+        batch_interval (float): Pause entre deux lots en secondes
+        on_batch (callable, optional): Appelé avec le nombre de fichiers de chaque lot
+
+    Returns:
+        int: Nombre de fichiers supprimés
+    """
+    if not os.path.isdir(root):
+        if os.path.lexists(root):
+            os.unlink(root)
+            if on_batch:
+                on_batch(1)
+            return 1
+        return 0
+
+    removed = 0
+    pending = 0
+    for path, is_dir in _iter_tree_bottom_up(root):
+        try:
+            if is_dir:
+                os.rmdir(path)
+                continue
+            os.unlink(path)
+        except FileNotFoundError:
+            continue
+
+        removed += 1
+        pending += 1
+        if pending >= batch_size:
+            if on_batch:
+                on_batch(pending)
+            pending = 0
+            time.sleep(batch_interval)
+
+    if pending and on_batch:
+        on_batch(pending)
+
+    return removed
+
+def _record_progress(mission_id, count):
+    """Enregistre la progression de la purge d'une mission"""
+    Mission.query.filter_by(id=mission_id).update(
+        {Mission.purged_files: Mission.purged_files + count},
+        synchronize_session=False
+    )
+    db.session.commit()
+
+def _entry_mission_id(entry_name):
+    """Retourne l'ID de mission d'une entrée de corbeille de mission"""
+    if not entry_name.startswith(MISSION_ENTRY_PREFIX):
+        return None
+    try:
+        return int(entry_name[len(MISSION_ENTRY_PREFIX):].split('_', 1)[0])
+    except ValueError:
+        return None
+
+def _finalize_mission(mission_id):
+    """Supprime les enregistrements d'une mission dont les fichiers sont purgés"""
+    MissionMetadata.query.filter_by(mission_id=mission_id).delete(synchronize_session=False)
+    MissionStorage.query.filter_by(mission_id=mission_id).delete(synchronize_session=False)
+    mission_files = db.session.query(File.id).filter_by(mission_id=mission_id)
+    RinexIndex.query.filter(RinexIndex.file_id.in_(mission_files.scalar_subquery())).delete(synchronize_session=False)
+    GeotagSet.query.filter_by(mission_id=mission_id).delete(synchronize_session=False)
+    MissionLocation.query.filter_by(mission_id=mission_id).delete(synchronize_session=False)
+    OrphanFile.query.filter_by(mission_id=mission_id).delete(synchronize_session=False)
+    File.query.filter_by(mission_id=mission_id).delete(synchronize_session=False)
+    Mission.query.filter_by(id=mission_id).delete(synchronize_session=False)
+    db.session.commit()
+
+def _reap_remote(storage, tombstoned, batch_size, batch_interval, stats):
+    """Purge les objets des missions supprimées d'un stockage distant"""
+    for mission in tombstoned:
+        mission_id, mission_name = mission.id, mission.name
+        try:
+            stats['files'] += storage.delete_prefix(
+                storage.mission_prefix(mission), batch_size, batch_interval,
+                lambda count: _record_progress(mission_id, count)
+            )
+        except Exception as e:
+            current_app.logger.error(f"Erreur lors de la purge de la mission {mission_id}: {str(e)}")
+            continue
+
+        _finalize_mission(mission_id)
+        stats['missions'] += 1
+        current_app.logger.info(f"Mission {mission_id} ({mission_name}) purgée")
+
+    return stats
+
+def reap_once(batch_size=None, batch_interval=None):
+    """
+    Effectue un passage complet du reaper
+
+    Args:
+        batch_size (int, optional): Nombre de fichiers supprimés par lot
+        batch_interval (float, optional): Pause entre deux lots en secondes
+
+    Returns:
+        dict: Nombre de missions finalisées et de fichiers supprimés
+    """
+    if batch_size is None:
+        batch_size = current_app.config['REAPER_BATCH_SIZE']
+    if batch_interval is None:
+        batch_interval = current_app.config['REAPER_BATCH_INTERVAL']
+
+    stats = {'missions': 0, 'files': 0}
+
+    tombstoned = Mission.query.filter(Mission.deleted_at.isnot(None)).all()
+
+    storage = get_storage()
+    if not storage.is_local:
+        return _reap_remote(storage, tombstoned, batch_size, batch_interval, stats)
+
+    # Reprise des suppressions interrompues avant le déplacement du dossier
+    for mission in tombstoned:
+        try:
+            move_mission_to_trash(mission)
+        except OSError as e:
+            current_app.logger.error(f"Erreur lors du déplacement de la mission {mission.id} dans la corbeille: {str(e)}")
+
+    # Purge des entrées des corbeilles (une par volume)
+    roots = _volume_roots()
+    trash_folders = [get_trash_folder(root) for root in roots]
+    for trash_folder in trash_folders:
+        with os.scandir(trash_folder) as it:
+            entries = sorted(entry.name for entry in it if not entry.name.startswith('.'))
+
+        for entry_name in entries:
+            mission_id = _entry_mission_id(entry_name)
+            on_batch = (lambda count, mission_id=mission_id: _record_progress(mission_id, count)) \
+                if mission_id is not None else None
+
+            try:
+                stats['files'] += purge_tree(
+                    os.path.join(trash_folder, entry_name), batch_size, batch_interval, on_batch
+                )
+            except OSError as e:
+                current_app.logger.error(f"Erreur lors de la purge de {entry_name}: {str(e)}")
+
+    # Suppression des enregistrements des missions entièrement purgées
+    remaining = set()
+    for trash_folder in trash_folders:
+        with os.scandir(trash_folder) as it:
+            remaining.update(_entry_mission_id(entry.name) for entry in it)
+
+    for mission in tombstoned:
+        mission_id, mission_name = mission.id, mission.name
+        if mission_id in remaining:
+            continue
+        # Dossier non déplacé (erreur de renommage) et nom non réutilisé
+        if any(os.path.exists(os.path.join(root, mission_name)) for root in roots) and \
+                Mission.active().filter_by(name=mission_name).first() is None:
+            continue
+        _finalize_mission(mission_id)
+        stats['missions'] += 1
+        current_app.logger.info(f"Mission {mission_id} ({mission_name}) purgée")
+
+    return stats
+
+def get_pending_deletions():
+    """
+    Récupère l'état d'avancement des suppressions en cours
+
+    Returns:
+        list: Liste de dictionnaires décrivant chaque mission en cours de purge
+    """
+    rows = db.session.query(
+        Mission.id, Mission.name, Mission.deleted_at, Mission.purged_files,
+        db.func.count(File.id)
+    ).outerjoin(File, File.mission_id == Mission.id) \
+        .filter(Mission.deleted_at.isnot(None)) \
+        .group_by(Mission.id) \
+        .order_by(Mission.deleted_at) \
+        .all()
+
+    return [{
+        'id': mission_id,
+        'name': name,
+        'deleted_at': deleted_at.isoformat(),
+        'files_total': files_total,
+        'files_purged': purged_files or 0
+    } for mission_id, name, deleted_at, purged_files, files_total in rows]
+
+def _acquire_lock():
+    """
+    Verrou inter-processus garantissant un seul reaper actif par machine
+
+    Returns:
+        file: Fichier de verrou ouvert, ou None si le verrou est déjà pris
+    """
+    lock_file = open(os.path.join(get_trash_folder(), LOCK_FILENAME), 'w')
+    if fcntl is None:
+        return lock_file
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+def run_reaper(app, once=False):
+    """
+    Boucle principale du reaper
+
+    Args:
+        app (Flask): Application Flask
+        once (bool): Effectue un seul passage si True
+    """
+    with app.app_context():
+        lock_file = _acquire_lock()
+        if lock_file is None:
+            app.logger.info('Un autre reaper est déjà actif')
+            return
+
+    try:
+        while True:
+            with app.app_context():
+                try:
+                    reap_once()
+                except Exception as e:
+                    app.logger.error(f"Erreur du reaper: {str(e)}")
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+
+            if once:
+                break
+            time.sleep(app.config['REAPER_POLL_INTERVAL'])
+    finally:
+        lock_file.close()
+
+def start_reaper(app):
+    """
+    Démarre le reaper dans un thread d'arrière-plan
+
+    Args:
+        app (Flask): Application Flask
+
+    Returns:
+        threading.Thread: Thread démarré
+    """
+    thread = threading.Thread(target=run_reaper, args=(app,), name='mission-reaper', daemon=True)
+    thread.start()
+    return thread
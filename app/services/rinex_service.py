@@ -0,0 +1,229 @@
+"""
+Service d'indexation des fichiers d'observation RINEX (données PPK)
+
+À l'enregistrement d'un fichier d'observation, son en-tête est lu et ses
+époques parcourues une fois pour construire un index des positions (voir
+app.rinex). L'extraction d'une fenêtre de temps (par exemple la journée du
+vol d'une mission) ne lit ensuite que l'en-tête et la plage d'octets
+couverte : lecture avec seek en stockage local, requête partielle (Range)
+avec S3.
+"""
+import io
+from datetime import datetime, time, timedelta
+from flask import current_app
+from app import db
+from app.database import read_only, serialized_write
+from app.query_budget import query_budget
+from app.models import Mission, File, RinexIndex
+from app.rinex import (
+    OBS_EXTENSIONS, RinexError, build_index, parse_header, unpack_index, seek_offset, iter_window
+)
+from app.storage import CHUNK_SIZE
+from app.services import file_service
+
+# Taille des blocs renvoyés lors de l'extraction d'une fenêtre
+WINDOW_CHUNK_SIZE = 256 * 1024
+
+
+class _ChunkReader(io.RawIOBase):
+    """Flux binaire lisible alimenté par un itérateur de blocs"""
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self._buffer = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, target):
+        while not self._buffer:
+            self._buffer = next(self._chunks, None)
+            if self._buffer is None:
+                self._buffer = b''
+                return 0
+        size = min(len(target), len(self._buffer))
+        target[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+    def close(self):
+        if hasattr(self._chunks, 'close'):
+            self._chunks.close()
+        super().close()
+
+def _open_at(file, offset):
+    """Ouvre le contenu d'un fichier à partir d'une position, lisible ligne par ligne"""
+    return io.BufferedReader(_ChunkReader(file_service.iter_file_range(file, offset)), CHUNK_SIZE)
+
+def is_observation_file(file):
+    """Vérifie si un fichier est un fichier d'observation RINEX à indexer"""
+    return file.file_type == 'ppk' and file.file_extension in OBS_EXTENSIONS
+
+def index_rinex_file(file):
+    """
+    Lit l'en-tête d'un fichier d'observation RINEX et indexe ses époques
+
+    Le fichier est lu en flux, hors du verrou d'écriture ; seul
+    l'enregistrement de l'index est sérialisé.
+
+    Args:
+        file (File): Fichier d'observation
+
+    Returns:
+        RinexIndex: Index enregistré, ou None si le fichier n'est pas un fichier d'observation lisible
+    """
+    file_id = file.id
+    try:
+        with file_service.open_file(file) as source:
+            header = build_index(source)
+    except RinexError as e:
+        current_app.logger.warning(f"Fichier RINEX {file_id} non indexé: {str(e)}")
+        return None
+    return _save_index(file_id, header)
+
+@serialized_write
+def _save_index(file_id, header):
+    index = RinexIndex.query.filter_by(file_id=file_id).first()
+    if index is None:
+        index = RinexIndex(file_id=file_id)
+        db.session.add(index)
+
+    index.version = f"{header['version']:.2f}"
+    index.marker_name = (header['marker_name'] or '')[:64] or None
+    index.receiver = header['receiver']
+    index.antenna = header['antenna']
+    index.interval = header['interval']
+    index.first_epoch = header['first_epoch']
+    index.last_epoch = header['last_epoch']
+    index.epoch_count = header['epoch_count']
+    index.systems = ','.join(header['systems'])[:32] or None
+    index.header_size = header['header_size']
+    index.epoch_index = header['index']
+    db.session.commit()
+    return index
+
+def index_missing_files(mission_id=None, reindex=False):
+    """
+    Indexe les fichiers d'observation qui ne le sont pas encore
+
+    Args:
+        mission_id (int, optional): Limite l'indexation à une mission
+        reindex (bool): Réindexe aussi les fichiers déjà indexés
+
+    Returns:
+        dict: Nombre de fichiers indexés et ignorés (non lisibles)
+    """
+    query = File.query.join(Mission).filter(Mission.deleted_at.is_(None), File.file_type == 'ppk')
+    if mission_id is not None:
+        query = query.filter(File.mission_id == mission_id)
+    if not reindex:
+        query = query.filter(~File.rinex_index.has())
+
+    stats = {'indexed': 0, 'skipped': 0}
+    for file in query.order_by(File.id).all():
+        if not is_observation_file(file):
+            continue
+        if index_rinex_file(file) is None:
+            stats['skipped'] += 1
+        else:
+            stats['indexed'] += 1
+    return stats
+
+@read_only
+@query_budget(1)
+def get_rinex_index(file_id):
+    """
+    Récupère l'index RINEX d'un fichier
+
+    Args:
+        file_id (int): ID du fichier
+
+    Returns:
+        RinexIndex: Index du fichier, ou None s'il n'est pas indexé
+    """
+    return RinexIndex.query.filter_by(file_id=file_id).first()
+
+@read_only
+@query_budget(1)
+def get_mission_rinex_indexes(mission_id):
+    """
+    Récupère les index des fichiers d'observation d'une mission
+
+    Args:
+        mission_id (int): ID de la mission
+
+    Returns:
+        list: Tuples (RinexIndex, nom du fichier), par date de première époque
+    """
+    return db.session.query(RinexIndex, File.filename) \
+        .join(File, File.id == RinexIndex.file_id) \
+        .filter(File.mission_id == mission_id) \
+        .order_by(RinexIndex.first_epoch) \
+        .all()
+
+def get_mission_window(mission, start=None, end=None, duration=None, margin=0):
+    """
+    Calcule la fenêtre de temps d'une extraction
+
+    Sans début explicite, la fenêtre couvre la journée du vol (la mission
+    n'enregistre pas d'heure de décollage). Avec un début, la fin est
+    déduite de la durée demandée, ou de la durée du vol enregistrée.
+
+    Args:
+        mission (Mission): Mission du fichier
+        start (datetime, optional): Début de la fenêtre
+        end (datetime, optional): Fin de la fenêtre
+        duration (int, optional): Durée en secondes, si end n'est pas fourni
+        margin (int): Marge en secondes ajoutée de part et d'autre
+
+    Returns:
+        tuple: (début, fin), ou None si la fenêtre ne peut pas être déterminée
+    """
+    if start is None:
+        if mission.flight_date is None:
+            return None
+        start = datetime.combine(mission.flight_date, time.min)
+        end = end or start + timedelta(days=1)
+
+    if end is None:
+        if duration is None and mission.mission_metadata is not None:
+            duration = mission.mission_metadata.flight_duration
+        if not duration:
+            return None
+        end = start + timedelta(seconds=duration)
+
+    return start - timedelta(seconds=margin), end + timedelta(seconds=margin)
+
+def iter_rinex_window(file, index, start, end):
+    """
+    Extrait les époques d'une fenêtre de temps, précédées de l'en-tête du fichier
+
+    La lecture commence à la dernière entrée d'index antérieure au début de
+    la fenêtre et s'arrête à la première époque postérieure à sa fin.
+
+    Args:
+        file (File): Fichier d'observation
+        index (RinexIndex): Index du fichier
+        start (datetime): Début de la fenêtre
+        end (datetime): Fin de la fenêtre
+
+    Yields:
+        bytes: Blocs du fichier RINEX extrait
+    """
+    header_bytes = b''.join(file_service.iter_file_range(file, 0, index.header_size))
+    header = parse_header(io.BytesIO(header_bytes))
+    yield header_bytes
+
+    offset = seek_offset(unpack_index(index.epoch_index), index.header_size, start)
+    with _open_at(file, offset) as reader:
+        pending = []
+        size = 0
+        for line in iter_window(reader, header, start, end):
+            pending.append(line)
+            size += len(line)
+            if size >= WINDOW_CHUNK_SIZE:
+                yield b''.join(pending)
+                pending = []
+                size = 0
+        if pending:
+            yield b''.join(pending)
@@ -0,0 +1,355 @@
+"""
+Service des séries temporelles de la flotte par date de vol
+
+La table flight_rollups contient, pour chaque période de vol (jour,
+semaine commençant le lundi, mois) et chaque modèle de caméra, le nombre de
+missions actives, la surface couverte (m²) et les fichiers et octets de ces
+missions. Chaque écriture qui modifie l'une de ces valeurs ajoute son delta
+aux trois périodes de la date de vol, dans la même transaction :
+
+    missions  : création (record_missions), suppression (forget_missions),
+                changement de date du vol (move_missions)
+    surface   : extraction des métadonnées d'un CSV (record_area_change)
+    fichiers  : via stats_service.record_files et forget_mission_files
+
+Les graphiques (vols par semaine, hectares par mois, volume par caméra)
+lisent donc un nombre de lignes proportionnel au nombre de périodes, et non
+au nombre de missions. Les missions sans date de vol n'y figurent pas.
+
+Le modèle de caméra n'étant pas modifié par l'application, un changement
+direct en base (comme toute dérive) est corrigé par
+`flask missions rebuild-stats`, qui recalcule aussi ces séries.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import select, update, insert, tuple_
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.database import read_only
+from app.query_budget import query_budget
+from app.models import Mission, MissionMetadata, MissionStorage, File, FlightRollup
+
+GRANULARITIES = ('day', 'week', 'month')
+
+# Dimensions de regroupement acceptées par get_rollups
+ROLLUP_GROUPS = ('camera_model',)
+
+# Colonnes cumulées, dans l'ordre des deltas
+_MEASURES = ('mission_count', 'area_covered', 'file_count', 'total_bytes')
+
+
+def bucket_start(day, granularity):
+    """
+    Premier jour de la période contenant une date
+
+    Args:
+        day (date): Date
+        granularity (str): day, week (semaine commençant le lundi) ou month
+
+    Returns:
+        date: Début de la période
+    """
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+def _apply(flight_date, camera_model, deltas):
+    """
+    Ajoute des deltas aux périodes d'une date de vol, en créant les lignes manquantes
+
+    N'effectue pas de commit : les séries sont validées avec l'écriture appelante.
+
+    Args:
+        flight_date (date): Date du vol, None pour ignorer la mission
+        camera_model (str): Modèle de caméra, éventuellement None
+        deltas (tuple): Deltas de (missions, surface, fichiers, octets)
+    """
+    if flight_date is None or not any(deltas):
+        return
+
+    camera_model = camera_model or ''
+    keys = [(granularity, bucket_start(flight_date, granularity)) for granularity in GRANULARITIES]
+    values = {
+        name: getattr(FlightRollup, name) + delta for name, delta in zip(_MEASURES, deltas) if delta
+    }
+    result = db.session.execute(
+        update(FlightRollup)
+        .where(FlightRollup.camera_model == camera_model,
+               tuple_(FlightRollup.granularity, FlightRollup.bucket_start).in_(keys))
+        .values(values)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == len(keys):
+        return
+
+    existing = set(db.session.execute(
+        select(FlightRollup.granularity)
+        .where(FlightRollup.camera_model == camera_model,
+               tuple_(FlightRollup.granularity, FlightRollup.bucket_start).in_(keys))
+    ).scalars())
+    for granularity, start in keys:
+        if granularity in existing:
+            continue
+        try:
+            # Point de sauvegarde : un autre worker peut créer la même ligne
+            with db.session.begin_nested():
+                db.session.execute(insert(FlightRollup).values(
+                    granularity=granularity, bucket_start=start, camera_model=camera_model,
+                    **dict(zip(_MEASURES, deltas))
+                ))
+        except IntegrityError:
+            db.session.execute(
+                update(FlightRollup)
+                .where(FlightRollup.granularity == granularity, FlightRollup.bucket_start == start,
+                       FlightRollup.camera_model == camera_model)
+                .values(values)
+                .execution_options(synchronize_session=False)
+            )
+
+def _apply_all(deltas):
+    """Applique des deltas regroupés par (date de vol, modèle de caméra)"""
+    for (flight_date, camera_model), values in sorted(deltas.items(), key=lambda item: (item[0][0], item[0][1] or '')):
+        _apply(flight_date, camera_model, tuple(values))
+
+def _mission_keys(mission_ids):
+    """Date de vol, modèle de caméra et surface de plusieurs missions, en une requête"""
+    return db.session.execute(
+        select(Mission.id, Mission.flight_date, MissionMetadata.camera_model, MissionMetadata.area_covered)
+        .outerjoin(MissionMetadata, MissionMetadata.mission_id == Mission.id)
+        .where(Mission.id.in_(mission_ids))
+    ).all()
+
+def record_missions(flight_dates):
+    """
+    Compte des missions créées (sans caméra, surface ni fichiers)
+
+    Args:
+        flight_dates (list): Dates du vol des missions, éventuellement None
+    """
+    deltas = defaultdict(lambda: [0, 0, 0, 0])
+    for flight_date in flight_dates:
+        if flight_date:
+            deltas[(flight_date, None)][0] += 1
+    _apply_all(deltas)
+
+def forget_missions(mission_ids):
+    """
+    Retire des séries le nombre et la surface de missions supprimées
+
+    Les fichiers sont retirés par stats_service.forget_mission_files. À
+    appeler avant le marquage des missions comme supprimées.
+
+    Args:
+        mission_ids (list): ID des missions
+    """
+    if not mission_ids:
+        return
+    deltas = defaultdict(lambda: [0, 0, 0, 0])
+    for _, flight_date, camera_model, area_covered in _mission_keys(mission_ids):
+        if flight_date:
+            values = deltas[(flight_date, camera_model)]
+            values[0] -= 1
+            values[1] -= area_covered or 0
+    _apply_all(deltas)
+
+def move_missions(changes):
+    """
+    Déplace des missions, avec leur surface et leurs fichiers, vers une autre date de vol
+
+    Args:
+        changes (list): Tuples (ID de la mission, ancienne date, nouvelle date)
+    """
+    changes = [(mission_id, old_date, new_date) for mission_id, old_date, new_date in changes if old_date != new_date]
+    if not changes:
+        return
+
+    mission_ids = [mission_id for mission_id, _, _ in changes]
+    files = db.session.query(
+        MissionStorage.mission_id.label('mission_id'),
+        db.func.sum(MissionStorage.file_count).label('file_count'),
+        db.func.sum(MissionStorage.total_bytes).label('total_bytes')
+    ).filter(MissionStorage.mission_id.in_(mission_ids)).group_by(MissionStorage.mission_id).subquery()
+    rows = db.session.execute(
+        select(Mission.id, MissionMetadata.camera_model, MissionMetadata.area_covered,
+               files.c.file_count, files.c.total_bytes)
+        .outerjoin(MissionMetadata, MissionMetadata.mission_id == Mission.id)
+        .outerjoin(files, files.c.mission_id == Mission.id)
+        .where(Mission.id.in_(mission_ids))
+    ).all()
+    contributions = {
+        mission_id: (camera_model, (1, area_covered or 0, file_count or 0, total_bytes or 0))
+        for mission_id, camera_model, area_covered, file_count, total_bytes in rows
+    }
+
+    deltas = defaultdict(lambda: [0, 0, 0, 0])
+    for mission_id, old_date, new_date in changes:
+        camera_model, contribution = contributions[mission_id]
+        for flight_date, sign in ((old_date, -1), (new_date, 1)):
+            if flight_date:
+                values = deltas[(flight_date, camera_model)]
+                for index, value in enumerate(contribution):
+                    values[index] += sign * value
+    _apply_all(deltas)
+
+def record_area_change(mission_id, old_area, new_area):
+    """
+    Reporte la nouvelle surface couverte d'une mission
+
+    Args:
+        mission_id (int): ID de la mission
+        old_area (float): Surface précédente (m²), éventuellement None
+        new_area (float): Nouvelle surface (m²), éventuellement None
+    """
+    delta = (new_area or 0) - (old_area or 0)
+    if not delta:
+        return
+    for _, flight_date, camera_model, _ in _mission_keys([mission_id]):
+        _apply(flight_date, camera_model, (0, delta, 0, 0))
+
+def record_files(mission_id, count, total_bytes):
+    """
+    Compte des fichiers ajoutés (valeurs positives) ou supprimés (négatives)
+
+    Args:
+        mission_id (int): ID de la mission
+        count (int): Nombre de fichiers
+        total_bytes (int): Taille cumulée des fichiers
+    """
+    if not count and not total_bytes:
+        return
+    for _, flight_date, camera_model, _ in _mission_keys([mission_id]):
+        _apply(flight_date, camera_model, (0, 0, count, total_bytes))
+
+def compute_rollups(connection):
+    """
+    Calcule les séries à partir des tables missions, mission_metadata et files
+
+    Args:
+        connection: Connexion SQLAlchemy
+
+    Returns:
+        list: Lignes de flight_rollups (dictionnaires)
+    """
+    active = Mission.deleted_at.is_(None) & Mission.flight_date.isnot(None)
+    by_day = defaultdict(lambda: [0, 0, 0, 0])
+
+    missions = connection.execute(
+        select(Mission.flight_date, MissionMetadata.camera_model, db.func.count(Mission.id),
+               db.func.coalesce(db.func.sum(MissionMetadata.area_covered), 0))
+        .outerjoin(MissionMetadata, MissionMetadata.mission_id == Mission.id)
+        .where(active)
+        .group_by(Mission.flight_date, MissionMetadata.camera_model)
+    )
+    for flight_date, camera_model, count, area_covered in missions:
+        values = by_day[(flight_date, camera_model or '')]
+        values[0] += count
+        values[1] += area_covered
+
+    files = connection.execute(
+        select(Mission.flight_date, MissionMetadata.camera_model, db.func.count(File.id),
+               db.func.coalesce(db.func.sum(File.file_size), 0))
+        .select_from(File)
+        .join(Mission, File.mission_id == Mission.id)
+        .outerjoin(MissionMetadata, MissionMetadata.mission_id == Mission.id)
+        .where(active)
+        .group_by(Mission.flight_date, MissionMetadata.camera_model)
+    )
+    for flight_date, camera_model, count, total_bytes in files:
+        values = by_day[(flight_date, camera_model or '')]
+        values[2] += count
+        values[3] += total_bytes
+
+    buckets = defaultdict(lambda: [0, 0, 0, 0])
+    for (flight_date, camera_model), values in by_day.items():
+        for granularity in GRANULARITIES:
+            totals = buckets[(granularity, bucket_start(flight_date, granularity), camera_model)]
+            for index, value in enumerate(values):
+                totals[index] += value
+
+    return [
+        dict(zip(('granularity', 'bucket_start', 'camera_model') + _MEASURES, key + tuple(values)))
+        for key, values in sorted(buckets.items())
+    ]
+
+def rebuild_rollups():
+    """
+    Recalcule toutes les séries (sans commit)
+
+    Returns:
+        int: Nombre de lignes enregistrées
+    """
+    rows = compute_rollups(db.session.connection())
+    FlightRollup.query.delete()
+    if rows:
+        db.session.execute(insert(FlightRollup), rows)
+    return len(rows)
+
+def _parse_date(value, name):
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f"Date {name} invalide (format attendu: AAAA-MM-JJ): {value}")
+
+@read_only
+@query_budget(1)
+def get_rollups(granularity='month', start=None, end=None, group_by=None):
+    """
+    Lit une série temporelle de la flotte
+
+    Args:
+        granularity (str): day, week ou month
+        start (str, optional): Première date de vol incluse (AAAA-MM-JJ) ;
+            la période qui la contient est renvoyée en entier
+        end (str, optional): Dernière date de vol incluse (AAAA-MM-JJ)
+        group_by (str, optional): camera_model pour une série par modèle de caméra
+
+    Returns:
+        dict: Périodes non vides, triées : missions, surface (m² et hectares),
+            fichiers et octets
+
+    Raises:
+        ValueError: Si un paramètre est invalide
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Granularité inconnue: {granularity} (valeurs possibles: {', '.join(GRANULARITIES)})")
+    if group_by is not None and group_by not in ROLLUP_GROUPS:
+        raise ValueError(f"Regroupement inconnu: {group_by} (valeurs possibles: {', '.join(ROLLUP_GROUPS)})")
+    start_date, end_date = _parse_date(start, 'de début'), _parse_date(end, 'de fin')
+
+    keys = [FlightRollup.bucket_start] + ([FlightRollup.camera_model] if group_by else [])
+    statement = select(
+        *keys, *(db.func.sum(getattr(FlightRollup, name)) for name in _MEASURES)
+    ).where(FlightRollup.granularity == granularity).group_by(*keys).order_by(*keys)
+    if start_date:
+        statement = statement.where(FlightRollup.bucket_start >= bucket_start(start_date, granularity))
+    if end_date:
+        statement = statement.where(FlightRollup.bucket_start <= end_date)
+
+    buckets = []
+    for row in db.session.connection().execute(statement):
+        missions, area_covered, files, total_bytes = row[-4:]
+        if not missions and not files:
+            continue
+        bucket = {'bucket': row[0].isoformat()}
+        if group_by:
+            bucket['camera_model'] = row[1] or None
+        bucket.update({
+            'missions': missions,
+            'area_covered': round(area_covered or 0, 2),
+            'area_hectares': round((area_covered or 0) / 10000, 4),
+            'files': files,
+            'bytes': total_bytes
+        })
+        buckets.append(bucket)
+
+    return {
+        'granularity': granularity,
+        'start': start_date.isoformat() if start_date else None,
+        'end': end_date.isoformat() if end_date else None,
+        'group_by': group_by,
+        'buckets': buckets
+    }
@@ -0,0 +1,424 @@
+"""
+Service de contrôle d'intégrité des fichiers (scrub)
+
+Un passage relit tous les fichiers des missions actives, par ordre d'ID et
+par lots, avec plusieurs threads dont le débit cumulé est plafonné
+(SCRUB_BANDWIDTH). Pour chaque fichier :
+
+    missing    : le fichier n'existe plus dans le stockage ;
+    corrupted  : sa taille ou son empreinte ne correspond plus à celle
+                 enregistrée, ou il ne peut plus être décompressé ;
+    unreadable : il ne peut pas être lu (droits, erreur d'entrée/sortie) ;
+    ok         : le contenu est intact. Un fichier sans empreinte (importé
+                 depuis le disque) reçoit celle calculée lors du passage.
+
+Le résultat de chaque lot est validé avec la position du passage
+(ScrubRun.last_file_id) : après un arrêt, le passage reprend au lot suivant.
+En fin de passage, le dossier de chaque mission est comparé à la base
+(drift_service) pour relever les fichiers orphelins. Un nouveau passage
+commence SCRUB_INTERVAL_HOURS heures après la fin du précédent.
+"""
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import update, delete, insert, bindparam
+from app import db
+from app.database import read_only, serialized_write
+from app.query_budget import query_budget
+from app.models import Mission, File, ScrubRun, OrphanFile
+from app.storage import get_storage
+from app.compression import decompressing_reader
+from app.integrity import RateLimiter, checksum_stream
+from app.services import drift_service
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Résultats d'un contrôle
+INTEGRITY_STATUSES = ('ok', 'missing', 'corrupted', 'unreadable')
+
+LOCK_FILENAME = 'scrub.lock'
+
+
+def get_current_run():
+    """Retourne le dernier passage (en cours ou terminé), ou None"""
+    return ScrubRun.query.order_by(ScrubRun.id.desc()).first()
+
+def is_scrub_due(run=None):
+    """Vérifie si un passage est en cours ou si le suivant doit commencer"""
+    run = run or get_current_run()
+    if run is None or run.finished_at is None:
+        return True
+    interval = timedelta(hours=current_app.config['SCRUB_INTERVAL_HOURS'])
+    return datetime.utcnow() - run.finished_at >= interval
+
+@serialized_write
+def start_run():
+    """
+    Commence un nouveau passage, sauf si un passage est déjà en cours
+
+    Returns:
+        ScrubRun: Passage en cours
+    """
+    run = get_current_run()
+    if run is not None and run.finished_at is None:
+        return run
+    run = ScrubRun()
+    db.session.add(run)
+    db.session.commit()
+    return run
+
+@serialized_write
+def request_scrub():
+    """
+    Demande un nouveau passage, repris par le thread de contrôle ou par
+    flask missions scrub (un passage déjà en cours est conservé)
+
+    Returns:
+        ScrubRun: Passage en cours
+    """
+    return start_run()
+
+def verify_file(storage, key, codec, stored_size, file_size, checksum, limiter=None):
+    """
+    Contrôle un fichier stocké (exécuté dans un thread)
+
+    Args:
+        storage (StorageBackend): Backend de stockage
+        key (str): Clé du fichier stocké
+        codec (str): Codec de compression, ou None
+        stored_size (int): Taille stockée attendue, ou None si inconnue
+        file_size (int): Taille d'origine attendue
+        checksum (str): Empreinte attendue, ou None
+        limiter (RateLimiter, optional): Limitation du débit de lecture
+
+    Returns:
+        tuple: (résultat, empreinte calculée ou None, octets lus, message)
+    """
+    expected = stored_size if codec else file_size
+    try:
+        size, _ = storage.stat(key)
+        if expected is not None and size != expected:
+            return 'corrupted', None, 0, f"Taille {size} au lieu de {expected} octets"
+        with storage.open(key) as raw:
+            source = decompressing_reader(codec, raw) if codec else raw
+            try:
+                digest, read = checksum_stream(source, limiter)
+            finally:
+                if codec:
+                    source.close()
+    except FileNotFoundError:
+        return 'missing', None, 0, None
+    except OSError as e:
+        return 'unreadable', None, 0, str(e)
+    except Exception as e:
+        # Flux compressé illisible (zlib, lzma, zstandard)
+        return 'corrupted', None, 0, f"Décompression impossible: {str(e)}"
+
+    if read != file_size:
+        return 'corrupted', digest, read, f"Taille d'origine {read} au lieu de {file_size} octets"
+    if checksum and digest != checksum:
+        return 'corrupted', digest, read, "Empreinte différente"
+    return 'ok', digest, read, None
+
+def _update_files(rows):
+    """
+    Enregistre les résultats d'un lot, une instruction par jeu de colonnes
+
+    Contrairement à une mise à jour ORM par clé primaire, qui lève
+    StaleDataError, un fichier supprimé pendant le contrôle est ignoré.
+    """
+    files = File.__table__
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(set(row) - {'id'})), []).append(row)
+    for names, group in groups.items():
+        statement = update(files).where(files.c.id == bindparam('_id')) \
+            .values({name: bindparam(f'_{name}') for name in names})
+        db.session.execute(statement, [{f'_{name}': value for name, value in row.items()} for row in group])
+
+@serialized_write
+def _save_batch(run_id, rows, counters, last_file_id):
+    if rows:
+        _update_files(rows)
+    values = {getattr(ScrubRun, name): getattr(ScrubRun, name) + value for name, value in counters.items()}
+    values[ScrubRun.last_file_id] = last_file_id
+    ScrubRun.query.filter_by(id=run_id).update(values, synchronize_session=False)
+    db.session.commit()
+
+def scrub_batch(run, executor, limiter, batch_size):
+    """
+    Contrôle le lot de fichiers suivant la position du passage
+
+    Returns:
+        int: Nombre de fichiers contrôlés, 0 en fin de passage
+    """
+    files = File.query.join(Mission).options(db.contains_eager(File.mission)) \
+        .filter(Mission.deleted_at.is_(None), File.id > run.last_file_id) \
+        .order_by(File.id) \
+        .limit(batch_size) \
+        .all()
+    if not files:
+        return 0
+
+    storage = get_storage()
+    tasks = [
+        (file.id, file.storage_key, file.compression, file.stored_size, file.file_size, file.checksum)
+        for file in files
+    ]
+    results = executor.map(lambda task: verify_file(storage, *task[1:], limiter=limiter), tasks)
+
+    now = datetime.utcnow()
+    rows = []
+    counters = dict.fromkeys(('files_checked', 'bytes_checked', 'baselined', 'missing', 'corrupted', 'unreadable'), 0)
+    for (file_id, key, _, _, _, checksum), (status, digest, read, message) in zip(tasks, results):
+        row = {'id': file_id, 'checked_at': now, 'integrity': status}
+        if status == 'ok' and not checksum:
+            row['checksum'] = digest
+            counters['baselined'] += 1
+        elif status != 'ok':
+            counters[status] += 1
+            current_app.logger.warning(f"Intégrité {key}: {status}" + (f" ({message})" if message else ''))
+        rows.append(row)
+        counters['files_checked'] += 1
+        counters['bytes_checked'] += read
+
+    _save_batch(run.id, rows, counters, tasks[-1][0])
+    db.session.refresh(run)
+    return len(tasks)
+
+def find_orphans(mission):
+    """
+    Liste les fichiers du dossier d'une mission absents de la base, par
+    comparaison des deux listes triées (voir drift_service)
+
+    Args:
+        mission (Mission): Mission active
+
+    Returns:
+        tuple: (orphelins (chemin relatif au dossier de la mission, taille),
+            limités à DRIFT_REPORT_LIMIT, nombre total d'orphelins)
+    """
+    report, _ = drift_service.diff_mission(mission)
+    return [(orphan['file_path'], orphan['file_size']) for orphan in report['orphans']], report['orphans_count']
+
+@serialized_write
+def _save_orphans(run_id, mission_id, orphans, count):
+    OrphanFile.query.filter_by(mission_id=mission_id).delete(synchronize_session=False)
+    if orphans:
+        now = datetime.utcnow()
+        db.session.execute(insert(OrphanFile), [
+            {'mission_id': mission_id, 'file_path': path, 'file_size': size, 'found_at': now}
+            for path, size in orphans
+        ])
+        ScrubRun.query.filter_by(id=run_id).update(
+            {ScrubRun.orphaned: ScrubRun.orphaned + count}, synchronize_session=False
+        )
+    db.session.commit()
+
+@serialized_write
+def _finish_run(run_id):
+    # Orphelins des missions supprimées entre-temps
+    active = db.session.query(Mission.id).filter(Mission.deleted_at.is_(None))
+    db.session.execute(delete(OrphanFile).where(OrphanFile.mission_id.not_in(active.scalar_subquery())))
+    ScrubRun.query.filter_by(id=run_id).update({ScrubRun.finished_at: datetime.utcnow()}, synchronize_session=False)
+    db.session.commit()
+
+def scrub(max_files=None, workers=None, bandwidth=None, restart=False):
+    """
+    Poursuit (ou commence) le passage de contrôle en cours
+
+    Args:
+        max_files (int, optional): Interrompt le passage après ce nombre de
+            fichiers (il reprendra au lot suivant)
+        workers (int, optional): Nombre de threads de lecture (SCRUB_WORKERS par défaut)
+        bandwidth (float, optional): Débit de lecture maximal en Mo/s, 0 pour
+            ne pas limiter (SCRUB_BANDWIDTH par défaut)
+        restart (bool): Abandonne le passage en cours et en commence un nouveau
+
+    Returns:
+        ScrubRun: Passage en cours ou terminé
+    """
+    config = current_app.config
+    workers = workers or config['SCRUB_WORKERS']
+    bandwidth = config['SCRUB_BANDWIDTH'] if bandwidth is None else bandwidth
+    batch_size = config['SCRUB_BATCH_SIZE']
+
+    if restart:
+        current = get_current_run()
+        if current is not None and current.finished_at is None:
+            _finish_run(current.id)
+    run = start_run()
+
+    limiter = RateLimiter(bandwidth * 1024 * 1024)
+    checked = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while max_files is None or checked < max_files:
+            size = batch_size if max_files is None else min(batch_size, max_files - checked)
+            count = scrub_batch(run, executor, limiter, size)
+            if not count:
+                break
+            checked += count
+        else:
+            return run
+
+    # Fin du passage : fichiers orphelins de chaque mission
+    for mission in Mission.active().order_by(Mission.id).all():
+        try:
+            _save_orphans(run.id, mission.id, *find_orphans(mission))
+        except OSError as e:
+            current_app.logger.error(f"Erreur lors du parcours de la mission {mission.id}: {str(e)}")
+    _finish_run(run.id)
+    db.session.refresh(run)
+    current_app.logger.info(
+        f"Contrôle d'intégrité terminé: {run.files_checked} fichier(s), {run.missing} manquant(s), "
+        f"{run.corrupted} corrompu(s), {run.orphaned} orphelin(s)"
+    )
+    return run
+
+@read_only
+@query_budget(3)
+def get_integrity_summary():
+    """
+    Récupère l'avancement du contrôle et le nombre de fichiers par résultat
+
+    Returns:
+        dict: Passage courant, fichiers par résultat et nombre d'orphelins
+    """
+    run = get_current_run()
+    counts = dict(
+        db.session.query(db.func.coalesce(File.integrity, 'unchecked'), db.func.count(File.id))
+        .join(Mission)
+        .filter(Mission.deleted_at.is_(None))
+        .group_by(db.func.coalesce(File.integrity, 'unchecked'))
+        .all()
+    )
+    return {
+        'run': run.to_dict() if run else None,
+        'files': counts,
+        'orphans': db.session.query(db.func.count(OrphanFile.id)).scalar()
+    }
+
+@read_only
+@query_budget(1)
+def get_problem_files(status=None, mission_id=None, limit=1000):
+    """
+    Liste les fichiers manquants, corrompus ou illisibles au dernier contrôle
+
+    Args:
+        status (str, optional): missing, corrupted ou unreadable (tous par défaut)
+        mission_id (int, optional): Limite la liste à une mission
+        limit (int): Nombre maximal de fichiers
+
+    Returns:
+        list: Fichiers (dictionnaires) avec leur résultat et la date du contrôle
+    """
+    statuses = [status] if status else [name for name in INTEGRITY_STATUSES if name != 'ok']
+    query = db.session.query(File.id, File.mission_id, Mission.name, File.filename, File.file_path,
+                             File.file_size, File.integrity, File.checked_at) \
+        .join(Mission) \
+        .filter(Mission.deleted_at.is_(None), File.integrity.in_(statuses))
+    if mission_id is not None:
+        query = query.filter(File.mission_id == mission_id)
+    return [{
+        'id': file_id,
+        'mission_id': file_mission_id,
+        'mission_name': mission_name,
+        'filename': filename,
+        'file_path': file_path.replace(os.sep, '/'),
+        'file_size': file_size,
+        'integrity': integrity,
+        'checked_at': checked_at.isoformat() if checked_at else None
+    } for file_id, file_mission_id, mission_name, filename, file_path, file_size, integrity, checked_at
+        in query.order_by(File.id).limit(limit).all()]
+
+@read_only
+@query_budget(1)
+def get_orphan_files(mission_id=None, limit=1000):
+    """
+    Liste les fichiers orphelins relevés au dernier passage
+
+    Args:
+        mission_id (int, optional): Limite la liste à une mission
+        limit (int): Nombre maximal de fichiers
+
+    Returns:
+        list: Fichiers orphelins (dictionnaires)
+    """
+    query = OrphanFile.query
+    if mission_id is not None:
+        query = query.filter_by(mission_id=mission_id)
+    return [orphan.to_dict() for orphan in query.order_by(OrphanFile.mission_id, OrphanFile.file_path).limit(limit)]
+
+def _acquire_lock(app):
+    """
+    Verrou inter-processus garantissant un seul contrôle actif par machine
+
+    Returns:
+        file: Fichier de verrou ouvert, ou None si le verrou est déjà pris
+    """
+    os.makedirs(app.instance_path, exist_ok=True)
+    lock_file = open(os.path.join(app.instance_path, LOCK_FILENAME), 'w')
+    if fcntl is None:
+        return lock_file
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+def run_scrubber(app, once=False):
+    """
+    Boucle principale du contrôle d'intégrité
+
+    Chaque itération traite au plus SCRUB_BATCH_SIZE fichiers, de sorte que
+    l'arrêt du processus ne perd jamais plus d'un lot.
+
+    Args:
+        app (Flask): Application Flask
+        once (bool): Termine le passage en cours (ou un nouveau) puis s'arrête
+    """
+    lock_file = _acquire_lock(app)
+    if lock_file is None:
+        app.logger.info('Un autre contrôle d\'intégrité est déjà actif')
+        return
+
+    try:
+        while True:
+            with app.app_context():
+                try:
+                    if once:
+                        scrub()
+                        break
+                    if is_scrub_due():
+                        run = scrub(max_files=app.config['SCRUB_BATCH_SIZE'])
+                        if run.finished_at is None:
+                            continue
+                except Exception as e:
+                    app.logger.error(f"Erreur du contrôle d'intégrité: {str(e)}")
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+            time.sleep(app.config['SCRUB_POLL_INTERVAL'])
+    finally:
+        lock_file.close()
+
+def start_scrubber(app):
+    """
+    Démarre le contrôle d'intégrité dans un thread d'arrière-plan
+
+    Args:
+        app (Flask): Application Flask
+
+    Returns:
+        threading.Thread: Thread démarré
+    """
+    thread = threading.Thread(target=run_scrubber, args=(app,), name='file-scrubber', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,304 @@
+"""
+Service des statistiques de la flotte affichées sur le tableau de bord
+
+Les agrégats (nombre de missions, de fichiers et d'octets, répartition par
+type de fichier, missions par mois de vol) sont stockés dans la table
+fleet_stats et maintenus incrémentalement, dans la même transaction que
+l'écriture qui les modifie. L'affichage du tableau de bord ne dépend donc
+pas de la taille de la flotte.
+
+Catégories de fleet_stats :
+    fleet  : missions (missions actives), files (fichiers et octets)
+    type   : un compteur par type de fichier (fichiers et octets)
+    month  : missions actives par mois de vol (AAAA-MM)
+    day    : variation nette des fichiers et octets par jour (AAAA-MM-JJ)
+
+La table mission_storage conserve en plus les fichiers et octets de chaque
+mission par type (voir storage_service pour leur exploitation), et les
+fichiers et octets sont reportés dans les séries par date de vol (voir
+rollup_service).
+
+En cas de dérive (modification directe de la base), la commande
+`flask missions rebuild-stats` recalcule l'ensemble des agrégats.
+"""
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import update, insert
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.database import read_only
+from app.query_budget import query_budget
+from app.models import Mission, File, FleetStat, MissionStorage
+from app.services import rollup_service
+
+# Nombre de mois affichés dans l'histogramme des missions
+DASHBOARD_MONTHS = 12
+
+def _upsert(model, count_column, keys, count, total_bytes):
+    """
+    Ajoute un delta à une ligne d'agrégat, en la créant si nécessaire
+
+    N'effectue pas de commit : l'agrégat est validé avec l'écriture appelante.
+
+    Args:
+        model: FleetStat ou MissionStorage
+        count_column (str): Nom de la colonne du nombre d'éléments
+        keys (dict): Valeurs des colonnes de la contrainte d'unicité
+        count (int): Delta du nombre d'éléments
+        total_bytes (int): Delta du nombre d'octets
+    """
+    if not count and not total_bytes:
+        return
+
+    counter = getattr(model, count_column)
+    result = db.session.execute(
+        update(model)
+        .where(*(getattr(model, name) == value for name, value in keys.items()))
+        .values({count_column: counter + count, 'total_bytes': model.total_bytes + total_bytes})
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        return
+
+    try:
+        # Point de sauvegarde : un autre worker peut créer la même ligne
+        with db.session.begin_nested():
+            db.session.execute(insert(model).values(
+                **keys, **{count_column: count, 'total_bytes': total_bytes}
+            ))
+    except IntegrityError:
+        _upsert(model, count_column, keys, count, total_bytes)
+
+def _increment(category, bucket, count=0, total_bytes=0):
+    """Ajoute un delta à un agrégat de fleet_stats"""
+    _upsert(FleetStat, 'item_count', {'category': category, 'bucket': bucket}, count, total_bytes)
+
+def _today_bucket():
+    return datetime.utcnow().strftime('%Y-%m-%d')
+
+def _month_bucket(flight_date):
+    return flight_date.strftime('%Y-%m') if flight_date else None
+
+def record_mission(flight_date, sign=1):
+    """
+    Compte une mission créée (sign=1) ou supprimée (sign=-1)
+
+    Args:
+        flight_date (date): Date du vol de la mission, éventuellement None
+        sign (int): 1 pour une création, -1 pour une suppression
+    """
+    record_missions([flight_date], sign)
+
+def record_missions(flight_dates, sign=1):
+    """
+    Compte plusieurs missions créées ou supprimées, une mise à jour par agrégat
+
+    Args:
+        flight_dates (list): Dates du vol des missions, éventuellement None
+        sign (int): 1 pour des créations, -1 pour des suppressions
+    """
+    if not flight_dates:
+        return
+    _increment('fleet', 'missions', sign * len(flight_dates))
+    months = Counter(_month_bucket(flight_date) for flight_date in flight_dates)
+    for bucket, count in sorted(months.items(), key=lambda item: item[0] or ''):
+        if bucket:
+            _increment('month', bucket, sign * count)
+
+def record_flight_date_change(old_date, new_date):
+    """Déplace une mission d'un mois de vol à un autre"""
+    record_flight_date_changes([(old_date, new_date)])
+
+def record_flight_date_changes(changes):
+    """
+    Déplace plusieurs missions d'un mois de vol à un autre
+
+    Args:
+        changes (list): Tuples (ancienne date, nouvelle date)
+    """
+    months = Counter()
+    for old_date, new_date in changes:
+        old_bucket, new_bucket = _month_bucket(old_date), _month_bucket(new_date)
+        if old_bucket == new_bucket:
+            continue
+        if old_bucket:
+            months[old_bucket] -= 1
+        if new_bucket:
+            months[new_bucket] += 1
+    for bucket, count in sorted(months.items()):
+        if count:
+            _increment('month', bucket, count)
+
+def record_files(mission_id, file_type, count, total_bytes):
+    """
+    Compte des fichiers ajoutés (valeurs positives) ou supprimés (négatives)
+
+    Args:
+        mission_id (int): ID de la mission
+        file_type (str): Type des fichiers
+        count (int): Nombre de fichiers
+        total_bytes (int): Taille cumulée des fichiers
+    """
+    record_mission_files(mission_id, {file_type: (count, total_bytes)})
+
+def record_mission_files(mission_id, deltas):
+    """
+    Compte les fichiers ajoutés ou supprimés d'une mission, de plusieurs
+    types, avec une seule mise à jour par agrégat
+
+    Args:
+        mission_id (int): ID de la mission
+        deltas (dict): Nombre de fichiers et taille cumulée par type
+            {type: (nombre, octets)}
+    """
+    count = sum(type_count for type_count, _ in deltas.values())
+    total_bytes = sum(type_bytes for _, type_bytes in deltas.values())
+    _increment('fleet', 'files', count, total_bytes)
+    _increment('day', _today_bucket(), count, total_bytes)
+    for file_type, (type_count, type_bytes) in sorted(deltas.items()):
+        _increment('type', file_type, type_count, type_bytes)
+        _upsert(MissionStorage, 'file_count', {'mission_id': mission_id, 'file_type': file_type},
+                type_count, type_bytes)
+    rollup_service.record_files(mission_id, count, total_bytes)
+
+def _record_fleet_files(file_type, count, total_bytes):
+    _increment('fleet', 'files', count, total_bytes)
+    _increment('type', file_type, count, total_bytes)
+    _increment('day', _today_bucket(), count, total_bytes)
+
+def forget_mission_files(mission_id):
+    """
+    Retire des agrégats tous les fichiers d'une mission
+
+    À appeler avant la suppression des enregistrements (ou le marquage de la
+    mission comme supprimée), dans la même transaction.
+
+    Args:
+        mission_id (int): ID de la mission
+    """
+    rows = db.session.query(
+        File.file_type, db.func.count(File.id), db.func.coalesce(db.func.sum(File.file_size), 0)
+    ).filter(File.mission_id == mission_id).group_by(File.file_type).all()
+
+    for file_type, count, total_bytes in rows:
+        _record_fleet_files(file_type, -count, -total_bytes)
+    rollup_service.record_files(mission_id, -sum(row[1] for row in rows), -sum(row[2] for row in rows))
+    MissionStorage.query.filter_by(mission_id=mission_id).delete(synchronize_session=False)
+
+def rebuild_stats():
+    """
+    Recalcule tous les agrégats à partir des tables missions et files
+
+    La variation par jour est reconstituée à partir de la date de
+    téléversement des fichiers existants : l'historique des suppressions
+    est perdu. Les séries par date de vol (rollup_service) sont recalculées
+    dans la même transaction.
+
+    Returns:
+        int: Nombre d'agrégats enregistrés
+    """
+    rows = []
+
+    active_missions = db.session.query(Mission.flight_date).filter(Mission.deleted_at.is_(None))
+    months = {}
+    mission_count = 0
+    for (flight_date,) in active_missions:
+        mission_count += 1
+        bucket = _month_bucket(flight_date)
+        if bucket:
+            months[bucket] = months.get(bucket, 0) + 1
+
+    rows.append({'category': 'fleet', 'bucket': 'missions', 'item_count': mission_count, 'total_bytes': 0})
+    rows.extend({'category': 'month', 'bucket': bucket, 'item_count': count, 'total_bytes': 0}
+                for bucket, count in months.items())
+
+    by_type = db.session.query(
+        File.file_type, db.func.count(File.id), db.func.coalesce(db.func.sum(File.file_size), 0)
+    ).join(Mission).filter(Mission.deleted_at.is_(None)).group_by(File.file_type).all()
+
+    rows.append({
+        'category': 'fleet', 'bucket': 'files',
+        'item_count': sum(count for _, count, _ in by_type),
+        'total_bytes': sum(total_bytes for _, _, total_bytes in by_type)
+    })
+    rows.extend({'category': 'type', 'bucket': file_type, 'item_count': count, 'total_bytes': total_bytes}
+                for file_type, count, total_bytes in by_type)
+
+    upload_day = db.func.date(File.uploaded_at)
+    by_day = db.session.query(
+        upload_day, db.func.count(File.id), db.func.coalesce(db.func.sum(File.file_size), 0)
+    ).join(Mission).filter(Mission.deleted_at.is_(None), File.uploaded_at.isnot(None)).group_by(upload_day).all()
+    rows.extend({'category': 'day', 'bucket': str(day), 'item_count': count, 'total_bytes': total_bytes}
+                for day, count, total_bytes in by_day)
+
+    by_mission = db.session.query(
+        File.mission_id, File.file_type, db.func.count(File.id), db.func.coalesce(db.func.sum(File.file_size), 0)
+    ).join(Mission).filter(Mission.deleted_at.is_(None)).group_by(File.mission_id, File.file_type).all()
+    storage_rows = [
+        {'mission_id': mission_id, 'file_type': file_type, 'file_count': count, 'total_bytes': total_bytes}
+        for mission_id, file_type, count, total_bytes in by_mission
+    ]
+
+    FleetStat.query.delete()
+    MissionStorage.query.delete()
+    db.session.execute(insert(FleetStat), rows)
+    if storage_rows:
+        db.session.execute(insert(MissionStorage), storage_rows)
+    rollup_count = rollup_service.rebuild_rollups()
+    db.session.commit()
+    return len(rows) + len(storage_rows) + rollup_count
+
+@read_only
+@query_budget(1)
+def get_fleet_stats():
+    """
+    Lit les agrégats de la flotte
+
+    Les variations par jour, une ligne par jour depuis la mise en service,
+    ne sont pas lues : storage_service les lit sur une période bornée.
+
+    Returns:
+        dict: Totaux, stockage par type et missions par mois (DASHBOARD_MONTHS derniers mois)
+    """
+    totals = {'missions': 0, 'files': 0, 'bytes': 0}
+    storage_by_type = []
+    months = []
+
+    for stat in FleetStat.query.filter(FleetStat.category.in_(('fleet', 'type', 'month'))):
+        if stat.category == 'fleet' and stat.bucket == 'missions':
+            totals['missions'] = stat.item_count
+        elif stat.category == 'fleet' and stat.bucket == 'files':
+            totals['files'] = stat.item_count
+            totals['bytes'] = stat.total_bytes
+        elif stat.category == 'type' and stat.item_count:
+            storage_by_type.append({'type': stat.bucket, 'files': stat.item_count, 'bytes': stat.total_bytes})
+        elif stat.category == 'month' and stat.item_count:
+            months.append({'month': stat.bucket, 'missions': stat.item_count})
+
+    storage_by_type.sort(key=lambda row: row['bytes'], reverse=True)
+    months.sort(key=lambda row: row['month'])
+
+    return {
+        'totals': totals,
+        'storage_by_type': storage_by_type,
+        'missions_per_month': months[-DASHBOARD_MONTHS:]
+    }
+
+@read_only
+@query_budget(1)
+def get_recent_uploads(limit=10):
+    """
+    Récupère les derniers fichiers téléversés
+
+    Args:
+        limit (int): Nombre de fichiers
+
+    Returns:
+        list: Liste de tuples (File, nom de la mission)
+    """
+    return db.session.query(File, Mission.name) \
+        .join(Mission) \
+        .filter(Mission.deleted_at.is_(None)) \
+        .order_by(File.uploaded_at.desc()) \
+        .limit(limit) \
+        .all()
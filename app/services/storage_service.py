@@ -0,0 +1,289 @@
+"""
+Service d'analyse de l'espace de stockage
+
+Exploite les agrégats maintenus par stats_service à chaque écriture :
+octets par type de fichier, par mission (table mission_storage) et
+variation par jour (croissance). Aucune de ces lectures ne parcourt la
+table files.
+
+La réconciliation compare ces agrégats avec le stockage, à la manière de
+`du` : chaque dossier de mission est parcouru (en parallèle) avec
+os.scandir, en utilisant les informations de stat déjà renvoyées par le
+parcours, ou avec les listes d'objets pour un stockage S3.
+"""
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import partial
+from flask import current_app
+from app import db
+from app.database import read_only
+from app.query_budget import query_budget
+from app.models import Mission, File, FleetStat, MissionStorage
+from app.storage import get_storage
+from app.services.stats_service import get_fleet_stats
+from app.services.volume_service import get_volume_usage
+from app.services.compression_service import get_compression_summary
+
+def get_disk_usage():
+    """
+    Capacité du volume contenant UPLOAD_FOLDER
+
+    Returns:
+        dict: Octets total, utilisé et libre, ou None avec un stockage distant
+    """
+    if not get_storage().is_local:
+        return None
+    usage = shutil.disk_usage(current_app.config['UPLOAD_FOLDER'])
+    return {'total': usage.total, 'used': usage.used, 'free': usage.free}
+
+def get_storage_summary():
+    """
+    Résumé du stockage : fichiers et octets enregistrés, par type, et capacité du disque
+
+    Returns:
+        dict: Totaux, répartition par type, capacité du volume, occupation
+            de chaque volume (liste vide avec un seul volume) et gain de la compression
+    """
+    stats = get_fleet_stats()
+    return {
+        'files': stats['totals']['files'],
+        'bytes': stats['totals']['bytes'],
+        'by_type': stats['storage_by_type'],
+        'disk': get_disk_usage(),
+        'volumes': get_volume_usage(),
+        'compression': get_compression_summary()
+    }
+
+@read_only
+@query_budget(2)
+def get_largest_missions(limit=10, file_type=None):
+    """
+    Récupère les missions occupant le plus d'espace
+
+    Args:
+        limit (int): Nombre de missions
+        file_type (str, optional): Ne compte que les fichiers de ce type
+
+    Returns:
+        list: Missions (id, nom, fichiers, octets, répartition par type), les plus volumineuses en premier
+    """
+    total_bytes = db.func.sum(MissionStorage.total_bytes)
+    query = db.session.query(
+        MissionStorage.mission_id, Mission.name, db.func.sum(MissionStorage.file_count), total_bytes
+    ).join(Mission, Mission.id == MissionStorage.mission_id) \
+        .filter(Mission.deleted_at.is_(None))
+    if file_type:
+        query = query.filter(MissionStorage.file_type == file_type)
+
+    rows = query.group_by(MissionStorage.mission_id, Mission.name) \
+        .order_by(total_bytes.desc()) \
+        .limit(limit) \
+        .all()
+
+    missions = [
+        {'id': mission_id, 'name': name, 'files': int(files or 0), 'bytes': int(size or 0), 'by_type': {}}
+        for mission_id, name, files, size in rows
+    ]
+    if missions:
+        by_id = {mission['id']: mission for mission in missions}
+        for storage in MissionStorage.query.filter(MissionStorage.mission_id.in_(by_id.keys())):
+            by_id[storage.mission_id]['by_type'][storage.file_type] = {
+                'files': storage.file_count,
+                'bytes': storage.total_bytes
+            }
+    return missions
+
+@read_only
+@query_budget(1)
+def get_mission_storage(mission_id):
+    """
+    Récupère l'espace occupé par une mission, par type de fichier
+
+    Args:
+        mission_id (int): ID de la mission
+
+    Returns:
+        dict: Fichiers et octets par type et au total
+    """
+    by_type = {
+        storage.file_type: {'files': storage.file_count, 'bytes': storage.total_bytes}
+        for storage in MissionStorage.query.filter_by(mission_id=mission_id)
+    }
+    return {
+        'mission_id': mission_id,
+        'files': sum(row['files'] for row in by_type.values()),
+        'bytes': sum(row['bytes'] for row in by_type.values()),
+        'by_type': by_type
+    }
+
+@read_only
+@query_budget(1)
+def get_storage_growth(days=90):
+    """
+    Série temporelle de l'espace occupé, par jour
+
+    Le volume de chaque jour est obtenu à partir du total courant en
+    retranchant les variations des jours suivants.
+
+    Args:
+        days (int): Nombre de jours de la série, aujourd'hui inclus
+
+    Returns:
+        dict: Série quotidienne (variation et cumul) et croissance moyenne par jour
+    """
+    today = datetime.utcnow().date()
+    start = today - timedelta(days=days - 1)
+
+    deltas = {}
+    total_files, total_bytes = 0, 0
+    rows = FleetStat.query.filter(
+        ((FleetStat.category == 'day') & (FleetStat.bucket >= start.isoformat())) |
+        ((FleetStat.category == 'fleet') & (FleetStat.bucket == 'files'))
+    )
+    for stat in rows:
+        if stat.category == 'fleet':
+            total_files, total_bytes = stat.item_count, stat.total_bytes
+        else:
+            deltas[stat.bucket] = (stat.item_count, stat.total_bytes)
+
+    series = []
+    files, size = total_files, total_bytes
+    for offset in range(days):
+        day = (today - timedelta(days=offset)).isoformat()
+        files_delta, bytes_delta = deltas.get(day, (0, 0))
+        series.append({
+            'date': day,
+            'files_delta': files_delta,
+            'bytes_delta': bytes_delta,
+            'files': files,
+            'bytes': size
+        })
+        files -= files_delta
+        size -= bytes_delta
+    series.reverse()
+
+    return {
+        'start': start.isoformat(),
+        'end': today.isoformat(),
+        'series': series,
+        'average_daily_bytes': sum(row['bytes_delta'] for row in series) / days if days else 0
+    }
+
+def get_capacity_forecast(days=90):
+    """
+    Estime le nombre de jours avant saturation du volume
+
+    Args:
+        days (int): Période utilisée pour calculer la croissance moyenne
+
+    Returns:
+        dict: Capacité du volume, croissance moyenne et jours restants (None si pas de croissance)
+    """
+    growth = get_storage_growth(days)
+    disk = get_disk_usage()
+    average = growth['average_daily_bytes']
+    return {
+        'disk': disk,
+        'average_daily_bytes': average,
+        'days_until_full': int(disk['free'] / average) if disk and average > 0 else None
+    }
+
+def _scan_mission_usage(storage, prefix):
+    """
+    Calcule l'espace occupé par les fichiers d'une mission (exécuté dans un thread)
+
+    Les fichiers sont regroupés par sous-dossier de premier niveau (type de
+    fichier). Avec le stockage local, le parcours utilise os.scandir et les
+    informations de stat qu'il renvoie ; avec S3, les listes d'objets.
+
+    Args:
+        storage (StorageBackend): Backend de stockage
+        prefix (str): Préfixe des fichiers de la mission
+
+    Returns:
+        dict: [fichiers, octets apparents, octets alloués] par type
+    """
+    usage = {}
+    for key, size, allocated in storage.walk(prefix):
+        file_type = key.split('/', 1)[0] if '/' in key else ''
+        totals = usage.setdefault(file_type, [0, 0, 0])
+        totals[0] += 1
+        totals[1] += size
+        totals[2] += allocated
+    return usage
+
+def reconcile_storage(mission_id=None, workers=8):
+    """
+    Compare les agrégats de stockage avec l'espace réellement occupé sur le disque
+
+    Les octets attendus tiennent compte de la compression : l'écart entre
+    taille d'origine et taille stockée des fichiers compressés est retranché
+    des agrégats.
+
+    Args:
+        mission_id (int, optional): Limite la réconciliation à une mission
+        workers (int): Nombre de threads de parcours du disque
+
+    Returns:
+        list: Une entrée par mission, avec les valeurs enregistrées et mesurées
+            par type, l'écart en octets et un indicateur de cohérence
+    """
+    missions_query = Mission.active()
+    storage_query = MissionStorage.query.join(Mission, Mission.id == MissionStorage.mission_id) \
+        .filter(Mission.deleted_at.is_(None))
+    if mission_id is not None:
+        missions_query = missions_query.filter(Mission.id == mission_id)
+        storage_query = storage_query.filter(MissionStorage.mission_id == mission_id)
+
+    saving_query = db.session.query(
+        File.mission_id, File.file_type, db.func.sum(File.file_size - File.stored_size)
+    ).join(Mission).filter(Mission.deleted_at.is_(None), File.compression.isnot(None))
+    if mission_id is not None:
+        saving_query = saving_query.filter(File.mission_id == mission_id)
+
+    missions = missions_query.order_by(Mission.name).all()
+    recorded = {}
+    for storage in storage_query:
+        recorded.setdefault(storage.mission_id, {})[storage.file_type] = (storage.file_count, storage.total_bytes)
+    for current_id, file_type, saving in saving_query.group_by(File.mission_id, File.file_type):
+        count, size = recorded.get(current_id, {}).get(file_type, (0, 0))
+        recorded.setdefault(current_id, {})[file_type] = (count, size - int(saving or 0))
+
+    storage = get_storage()
+    prefixes = [storage.mission_prefix(mission) for mission in missions]
+
+    report = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        scan = partial(_scan_mission_usage, storage)
+        for mission, usage in zip(missions, executor.map(scan, prefixes)):
+            current_id, name = mission.id, mission.name
+            mission_recorded = recorded.get(current_id, {})
+            types = {}
+            for file_type in sorted(set(mission_recorded) | set(usage)):
+                db_files, db_bytes = mission_recorded.get(file_type, (0, 0))
+                disk_files, disk_bytes, disk_allocated = usage.get(file_type, (0, 0, 0))
+                types[file_type] = {
+                    'db_files': db_files,
+                    'db_bytes': db_bytes,
+                    'disk_files': disk_files,
+                    'disk_bytes': disk_bytes,
+                    'disk_allocated': disk_allocated
+                }
+
+            db_bytes = sum(row['db_bytes'] for row in types.values())
+            disk_bytes = sum(row['disk_bytes'] for row in types.values())
+            report.append({
+                'mission_id': current_id,
+                'name': name,
+                'db_files': sum(row['db_files'] for row in types.values()),
+                'db_bytes': db_bytes,
+                'disk_files': sum(row['disk_files'] for row in types.values()),
+                'disk_bytes': disk_bytes,
+                'disk_allocated': sum(row['disk_allocated'] for row in types.values()),
+                'drift_bytes': disk_bytes - db_bytes,
+                'consistent': all(row['db_files'] == row['disk_files'] and row['db_bytes'] == row['disk_bytes']
+                                  for row in types.values()),
+                'by_type': types
+            })
+    return report
@@ -0,0 +1,228 @@
+"""
+Service de répartition des fichiers entre volumes de stockage
+
+Avec plusieurs disques (STORAGE_VOLUMES), l'occupation de chaque volume est
+calculée à partir de la table files, sans parcourir les disques. Le
+rééquilibrage déplace des fichiers (ou des missions entières avec la
+politique affinity) des volumes les plus chargés vers les moins chargés,
+en proportion de la capacité de chaque disque.
+
+Un déplacement ne bloque pas les lectures : le fichier est copié (en
+parallèle) sous un nom temporaire puis renommé sur le volume cible, la base
+est mise à jour, et la copie d'origine n'est supprimée qu'ensuite.
+"""
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from sqlalchemy import update
+from app import db, cache
+from app.database import read_only
+from app.query_budget import query_budget
+from app.models import Mission, File
+from app.storage import get_storage, VolumePool
+from app.compression import SUFFIXES
+
+# Nombre de fichiers déplacés entre deux validations en base
+REBALANCE_BATCH_SIZE = 500
+
+def _get_pool():
+    """Retourne le VolumePool de l'application, ou None avec un seul volume"""
+    storage = get_storage()
+    return storage if isinstance(storage, VolumePool) else None
+
+@read_only
+@query_budget(1)
+def _get_bytes_by_volume(default_volume):
+    """Fichiers et octets stockés par volume (missions actives)"""
+    volume = db.func.coalesce(File.volume, default_volume)
+    stored_size = db.func.coalesce(File.stored_size, File.file_size)
+    rows = db.session.query(volume, db.func.count(File.id), db.func.coalesce(db.func.sum(stored_size), 0)) \
+        .join(Mission) \
+        .filter(Mission.deleted_at.is_(None)) \
+        .group_by(volume) \
+        .all()
+    return {name: (int(count), int(size)) for name, count, size in rows}
+
+def get_volume_usage():
+    """
+    Occupation de chaque volume de stockage local
+
+    Returns:
+        list: Une entrée par volume (nom, dossier, fichiers et octets stockés,
+            capacité du disque), ou une liste vide avec un seul volume
+    """
+    pool = _get_pool()
+    if pool is None:
+        return []
+
+    recorded = _get_bytes_by_volume(pool.default_volume)
+    usage = []
+    for name, volume in pool.volumes.items():
+        files, size = recorded.get(name, (0, 0))
+        disk = shutil.disk_usage(volume.root)
+        usage.append({
+            'name': name,
+            'root': volume.root,
+            'files': files,
+            'bytes': size,
+            'disk': {'total': disk.total, 'used': disk.used, 'free': disk.free}
+        })
+    return usage
+
+def plan_rebalance(pool):
+    """
+    Calcule les déplacements équilibrant les volumes
+
+    Algorithme glouton : les unités (fichiers, ou missions avec la politique
+    affinity) sont examinées de la plus volumineuse à la plus petite, et
+    chacune est déplacée de son volume vers le volume le plus en dessous de
+    sa cible si cela réduit l'écart entre les deux.
+
+    Args:
+        pool (VolumePool): Volumes de stockage
+
+    Returns:
+        list: Déplacements (volume source, volume cible, octets, liste de
+            tuples (id du fichier, id de la mission, nom de la mission, chemin stocké, taille stockée))
+    """
+    default_volume = pool.default_volume
+    rows = db.session.query(
+        File.id, File.mission_id, Mission.name, File.file_path, File.compression, File.volume,
+        db.func.coalesce(File.stored_size, File.file_size)
+    ).join(Mission).filter(Mission.deleted_at.is_(None)).all()
+
+    # Unité de déplacement : le fichier, ou la part d'une mission sur un volume
+    units = {}
+    for file_id, mission_id, mission_name, file_path, compression, volume, file_size in rows:
+        if compression:
+            file_path += SUFFIXES[compression]
+        volume = volume if volume in pool.volumes else default_volume
+        key = (mission_id, volume) if pool.policy == 'affinity' else file_id
+        unit = units.setdefault(key, [volume, 0, []])
+        unit[1] += file_size
+        unit[2].append((file_id, mission_id, mission_name, file_path, file_size))
+
+    # Cible de chaque volume proportionnelle à la capacité de son disque
+    capacity = {name: shutil.disk_usage(volume.root).total for name, volume in pool.volumes.items()}
+    total_capacity = sum(capacity.values()) or 1
+    total_bytes = sum(unit[1] for unit in units.values())
+    excess = {name: -total_bytes * capacity[name] / total_capacity for name in pool.volumes}
+    for volume, size, _ in units.values():
+        excess[volume] += size
+
+    moves = []
+    for source, size, files in sorted(units.values(), key=lambda unit: unit[1], reverse=True):
+        if excess[source] <= 0 or not size:
+            continue
+        target = min(excess, key=excess.get)
+        if target == source or excess[target] + size >= excess[source]:
+            continue
+        excess[source] -= size
+        excess[target] += size
+        moves.append((source, target, size, files))
+    return moves
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def _move_file(pool, source, target, relative_key):
+    """
+    Copie un fichier vers un autre volume (exécuté dans un thread)
+
+    La copie est écrite sous un nom caché puis renommée : un fichier
+    partiellement copié n'est jamais visible sur le volume cible.
+
+    Returns:
+        str: Message d'erreur, ou None si la copie a réussi
+    """
+    source_path = pool.volumes[source].local_path(relative_key)
+    target_path = pool.volumes[target].local_path(relative_key)
+    directory, filename = os.path.split(target_path)
+    temp_path = os.path.join(directory, f'.{filename}.rebalance')
+    try:
+        os.makedirs(directory, exist_ok=True)
+        # copy2 conserve la date de modification enregistrée pour le fichier
+        shutil.copy2(source_path, temp_path)
+        os.replace(temp_path, target_path)
+    except OSError as e:
+        _remove_quietly(temp_path)
+        return str(e)
+    return None
+
+def rebalance_volumes(workers=4, dry_run=False):
+    """
+    Déplace des fichiers entre volumes pour équilibrer leur occupation
+
+    Args:
+        workers (int): Nombre de threads de copie
+        dry_run (bool): Calcule les déplacements sans les effectuer
+
+    Returns:
+        dict: Nombre de fichiers et d'octets déplacés, de missions concernées et d'erreurs
+
+    Raises:
+        RuntimeError: Si un seul volume de stockage est configuré
+    """
+    pool = _get_pool()
+    if pool is None:
+        raise RuntimeError("Le rééquilibrage nécessite plusieurs volumes de stockage (STORAGE_VOLUMES)")
+
+    moves = plan_rebalance(pool)
+    stats = {
+        'files': sum(len(files) for _, _, _, files in moves),
+        'bytes': sum(size for _, _, size, _ in moves),
+        'missions': len({file[1] for _, _, _, files in moves for file in files}),
+        'errors': 0
+    }
+    if dry_run or not moves:
+        return stats
+
+    # Un fichier par tâche, avec le volume cible de sa mission (affinity)
+    tasks = [(source, target, file) for source, target, _, files in moves for file in files]
+    mission_volumes = {files[0][1]: target for _, target, _, files in moves} \
+        if pool.policy == 'affinity' else {}
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for start in range(0, len(tasks), REBALANCE_BATCH_SIZE):
+            batch = tasks[start:start + REBALANCE_BATCH_SIZE]
+            keys = [f"{mission_name}/{file_path.replace(os.sep, '/')}"
+                    for _, _, (_, _, mission_name, file_path, _) in batch]
+            results = executor.map(
+                lambda args: _move_file(pool, *args),
+                [(source, target, key) for (source, target, _), key in zip(batch, keys)]
+            )
+
+            moved = []
+            for (source, target, file), key, error in zip(batch, keys, results):
+                if error is None:
+                    moved.append((source, target, file, key))
+                else:
+                    current_app.logger.error(f"Erreur lors du déplacement de {key} vers {target}: {error}")
+                    stats['errors'] += 1
+                    stats['files'] -= 1
+                    stats['bytes'] -= file[4]
+
+            if not moved:
+                continue
+
+            # Les lectures utilisent le nouveau volume dès la validation
+            db.session.execute(update(File), [
+                {'id': file[0], 'volume': target} for _, target, file, _ in moved
+            ])
+            batch_missions = {file[1] for _, _, file, _ in moved}
+            for mission_id in batch_missions & mission_volumes.keys():
+                Mission.query.filter_by(id=mission_id).update(
+                    {Mission.volume: mission_volumes[mission_id]}, synchronize_session=False
+                )
+            db.session.commit()
+
+            list(executor.map(_remove_quietly, [
+                pool.volumes[source].local_path(key) for source, _, _, key in moved
+            ]))
+
+    cache.clear()
+    return stats
@@ -0,0 +1,668 @@
+"""
+Stockage des fichiers de mission
+
+Les services ne manipulent plus de chemins locaux mais des clés (chemins
+séparés par des « / ») confiées à un backend :
+
+    LocalStorage : fichiers sous UPLOAD_FOLDER, dossier <nom de la mission>/
+                   (comportement historique, corbeille et reaper compris) ;
+    S3Storage    : objets d'un bucket S3 ou compatible (MinIO, Ceph, moto),
+                   préfixe missions/<id de la mission>/, partagé par plusieurs
+                   serveurs d'application.
+
+Avec S3, les clés dépendent de l'identifiant de la mission et non de son
+nom : renommer une mission ne copie aucune donnée. Les téléversements sont
+envoyés en plusieurs parties à mesure de leur lecture, les lectures
+partielles (en-tête Range) sont transmises au stockage et les copies sont
+effectuées côté serveur.
+
+Le backend est choisi par STORAGE_BACKEND ('local' par défaut, ou 's3') ;
+boto3 n'est nécessaire que pour S3.
+
+En stockage local, STORAGE_VOLUMES ajoute des disques à UPLOAD_FOLDER (le
+volume « default ») ; chaque fichier est alors placé sur un volume selon
+STORAGE_PLACEMENT et le volume est enregistré avec le fichier (VolumePool).
+"""
+import os
+import re
+import time
+import heapq
+import shutil
+import itertools
+import threading
+from contextlib import closing
+from flask import current_app
+
+try:
+    import boto3
+    from boto3.s3.transfer import TransferConfig
+    from botocore.exceptions import ClientError
+except ImportError:
+    boto3 = None
+
+# Taille des blocs lus lors des copies et des réponses en flux
+CHUNK_SIZE = 1024 * 1024
+
+# Nombre maximal de clés par requête DeleteObjects
+S3_DELETE_BATCH = 1000
+
+# Nom du volume correspondant à UPLOAD_FOLDER
+DEFAULT_VOLUME = 'default'
+
+# Politiques de placement des fichiers entre volumes
+PLACEMENT_POLICIES = ('free-space', 'round-robin', 'affinity')
+
+VOLUME_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_-]+$')
+
+
+class StorageBackend:
+    """Interface commune des backends de stockage"""
+
+    # Les fichiers sont-ils accessibles par un chemin du système de fichiers
+    is_local = False
+
+    def mission_prefix(self, mission):
+        """Préfixe des clés des fichiers d'une mission"""
+        raise NotImplementedError
+
+    def file_key(self, mission, file_path, volume=None):
+        """
+        Clé d'un fichier
+
+        Args:
+            mission (Mission): Mission du fichier
+            file_path (str): Chemin du fichier relatif au dossier de la mission
+            volume (str, optional): Volume du fichier (VolumePool uniquement)
+
+        Returns:
+            str: Clé du fichier dans le backend
+        """
+        return f"{self.mission_prefix(mission)}/{file_path.replace(os.sep, '/')}"
+
+    def place(self, mission):
+        """
+        Choisit le volume d'un nouveau fichier ou d'une nouvelle mission
+
+        Returns:
+            str: Nom du volume, ou None pour un backend à volume unique
+        """
+        return None
+
+    def roots(self):
+        """Dossiers racines locaux du backend (vide pour un stockage distant)"""
+        return []
+
+    def create_mission(self, mission, file_types):
+        """Prépare l'emplacement d'une nouvelle mission"""
+
+    def rename_mission(self, old_name, new_name):
+        """Renomme l'emplacement d'une mission (lève OSError en cas d'échec)"""
+
+    def save(self, key, stream):
+        """
+        Enregistre un flux binaire
+
+        Returns:
+            int: Nombre d'octets écrits
+        """
+        raise NotImplementedError
+
+    def stat(self, key):
+        """
+        Taille et date de modification d'un fichier
+
+        Returns:
+            tuple: (taille en octets, date de modification en secondes)
+
+        Raises:
+            FileNotFoundError: Si le fichier n'existe pas
+        """
+        raise NotImplementedError
+
+    def exists(self, key):
+        try:
+            self.stat(key)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def open(self, key):
+        """Ouvre un fichier en lecture binaire (utilisable avec with)"""
+        raise NotImplementedError
+
+    def iter_range(self, key, start=0, end=None, chunk_size=CHUNK_SIZE):
+        """
+        Lit une plage d'octets par blocs
+
+        Args:
+            key (str): Clé du fichier
+            start (int): Premier octet
+            end (int, optional): Dernier octet exclu (fin du fichier si None)
+            chunk_size (int): Taille des blocs
+
+        Yields:
+            bytes: Blocs lus
+        """
+        raise NotImplementedError
+
+    def copy(self, source_key, target_key):
+        """Copie un fichier sans le faire transiter par l'application"""
+        raise NotImplementedError
+
+    def move(self, source_key, target_key):
+        """
+        Déplace un fichier (copie puis suppression, sauf backend capable de renommer)
+
+        Raises:
+            FileExistsError: Si la cible existe déjà
+        """
+        if self.exists(target_key):
+            raise FileExistsError(f"Fichier déjà présent: {target_key}")
+        self.copy(source_key, target_key)
+        self.delete(source_key)
+
+    def delete(self, key):
+        """Supprime un fichier (sans erreur s'il n'existe pas)"""
+        raise NotImplementedError
+
+    def delete_prefix(self, prefix, batch_size=S3_DELETE_BATCH, batch_interval=0, on_batch=None):
+        """
+        Supprime tous les fichiers d'un préfixe, par lots
+
+        Returns:
+            int: Nombre de fichiers supprimés
+        """
+        raise NotImplementedError
+
+    def walk(self, prefix):
+        """
+        Parcourt les fichiers d'un préfixe
+
+        Yields:
+            tuple: (clé relative au préfixe, taille apparente, taille allouée)
+        """
+        raise NotImplementedError
+
+    def walk_sorted(self, prefix):
+        """
+        Parcourt les fichiers d'un préfixe par ordre croissant des clés
+
+        L'ordre est celui des points de code, c'est-à-dire celui d'une
+        collation binaire en base. Par défaut, le parcours complet est trié
+        en mémoire ; les backends capables de produire cet ordre en flux
+        redéfinissent cette méthode.
+
+        Yields:
+            tuple: (clé relative au préfixe, taille apparente, taille allouée)
+        """
+        return iter(sorted(self.walk(prefix)))
+
+    def local_path(self, key):
+        """Chemin local d'un fichier, ou None si le backend n'est pas local"""
+        return None
+
+
+def _entry_sizes(entry):
+    """Taille apparente et taille allouée d'une entrée de os.scandir"""
+    stat = entry.stat(follow_symlinks=False)
+    allocated = stat.st_blocks * 512 if hasattr(stat, 'st_blocks') else stat.st_size
+    return stat.st_size, allocated
+
+def _sort_name(entry):
+    """
+    Clé de tri d'une entrée de dossier : un dossier est classé comme son nom
+    suivi de « / », de sorte que l'ordre des entrées de chaque dossier soit
+    celui des clés complètes (« a.txt » < « a/b » car « . » < « / »)
+    """
+    return entry.name + '/' if entry.is_dir(follow_symlinks=False) else entry.name
+
+
+class LocalStorage(StorageBackend):
+    """
+    Fichiers stockés sous un dossier racine du système de fichiers
+
+    Args:
+        root (str): Dossier racine (UPLOAD_FOLDER)
+    """
+    is_local = True
+
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, key):
+        return os.path.join(self.root, *key.split('/'))
+
+    def mission_prefix(self, mission):
+        return mission.name
+
+    def roots(self):
+        return [self.root]
+
+    def create_mission(self, mission, file_types):
+        mission_path = self._path(self.mission_prefix(mission))
+        if not os.path.exists(mission_path):
+            os.makedirs(mission_path)
+
+            # Création des sous-dossiers par type
+            for file_type in file_types:
+                os.makedirs(os.path.join(mission_path, file_type))
+
+    def rename_mission(self, old_name, new_name):
+        old_path = self._path(old_name)
+        if os.path.exists(old_path):
+            os.rename(old_path, self._path(new_name))
+
+    def save(self, key, stream):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as target:
+            shutil.copyfileobj(stream, target, CHUNK_SIZE)
+            return target.tell()
+
+    def stat(self, key):
+        stat = os.stat(self._path(key))
+        return stat.st_size, stat.st_mtime
+
+    def open(self, key):
+        return open(self._path(key), 'rb')
+
+    def iter_range(self, key, start=0, end=None, chunk_size=CHUNK_SIZE):
+        with open(self._path(key), 'rb') as source:
+            source.seek(start)
+            remaining = None if end is None else end - start
+            while remaining is None or remaining > 0:
+                chunk = source.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def copy(self, source_key, target_key):
+        target = self._path(target_key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # copy_file_range/sendfile selon la plateforme
+        shutil.copyfile(self._path(source_key), target)
+
+    def move(self, source_key, target_key):
+        # Simple renommage, atomique sur un même volume
+        target = self._path(target_key)
+        if os.path.exists(target):
+            raise FileExistsError(f"Fichier déjà présent: {target_key}")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.rename(self._path(source_key), target)
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def delete_prefix(self, prefix, batch_size=S3_DELETE_BATCH, batch_interval=0, on_batch=None):
+        from app.services.reaper_service import purge_tree
+        return purge_tree(self._path(prefix), batch_size, batch_interval, on_batch)
+
+    def walk(self, prefix):
+        root = self._path(prefix)
+        stack = [(root, '')]
+        while stack:
+            path, relative = stack.pop()
+            try:
+                with os.scandir(path) as it:
+                    entries = list(it)
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+
+            for entry in entries:
+                # Fichiers et dossiers cachés ignorés, comme lors de l'import
+                if entry.name.startswith('.'):
+                    continue
+                key = f'{relative}/{entry.name}' if relative else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, key))
+                elif entry.is_file(follow_symlinks=False):
+                    yield (key, *_entry_sizes(entry))
+
+    def walk_sorted(self, prefix):
+        return self._walk_sorted(self._path(prefix), '')
+
+    def _walk_sorted(self, path, relative):
+        # Parcours en profondeur : seules les entrées des dossiers en cours
+        # de parcours sont en mémoire
+        try:
+            with os.scandir(path) as it:
+                entries = sorted((entry for entry in it if not entry.name.startswith('.')), key=_sort_name)
+        except (FileNotFoundError, NotADirectoryError):
+            return
+
+        for entry in entries:
+            key = f'{relative}/{entry.name}' if relative else entry.name
+            if entry.is_dir(follow_symlinks=False):
+                yield from self._walk_sorted(entry.path, key)
+            elif entry.is_file(follow_symlinks=False):
+                yield (key, *_entry_sizes(entry))
+
+    def local_path(self, key):
+        return self._path(key)
+
+
+class _CountingReader:
+    """Enveloppe d'un flux comptant les octets lus"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        self.bytes_read += len(data)
+        return data
+
+
+class S3Storage(StorageBackend):
+    """
+    Fichiers stockés dans un bucket S3 ou compatible
+
+    Args:
+        bucket (str): Nom du bucket
+        prefix (str): Préfixe commun des clés
+        client: Client boto3 S3
+        multipart_threshold (int): Taille à partir de laquelle l'envoi se fait en plusieurs parties
+        multipart_chunksize (int): Taille des parties
+        max_concurrency (int): Nombre de parties envoyées en parallèle
+    """
+
+    def __init__(self, bucket, prefix='', client=None, multipart_threshold=8 * 1024 * 1024,
+                 multipart_chunksize=16 * 1024 * 1024, max_concurrency=4):
+        if boto3 is None:
+            raise RuntimeError("Le stockage S3 nécessite boto3 (pip install boto3)")
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.client = client or boto3.client('s3')
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_chunksize,
+            max_concurrency=max_concurrency
+        )
+
+    def _key(self, key):
+        return f'{self.prefix}/{key}' if self.prefix else key
+
+    def mission_prefix(self, mission):
+        # Indépendant du nom : un renommage ne déplace aucun objet
+        return f'missions/{mission.id}'
+
+    def save(self, key, stream):
+        reader = _CountingReader(stream)
+        self.client.upload_fileobj(reader, self.bucket, self._key(key), Config=self.transfer_config)
+        return reader.bytes_read
+
+    def stat(self, key):
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                raise FileNotFoundError(key) from e
+            raise
+        return head['ContentLength'], head['LastModified'].timestamp()
+
+    def open(self, key):
+        try:
+            body = self.client.get_object(Bucket=self.bucket, Key=self._key(key))['Body']
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                raise FileNotFoundError(key) from e
+            raise
+        return closing(body)
+
+    def iter_range(self, key, start=0, end=None, chunk_size=CHUNK_SIZE):
+        byte_range = f'bytes={start}-{"" if end is None else end - 1}'
+        body = self.client.get_object(Bucket=self.bucket, Key=self._key(key), Range=byte_range)['Body']
+        with closing(body):
+            yield from body.iter_chunks(chunk_size)
+
+    def copy(self, source_key, target_key):
+        # Copie gérée : UploadPartCopy pour les gros objets, sans transfert local
+        self.client.copy(
+            {'Bucket': self.bucket, 'Key': self._key(source_key)},
+            self.bucket, self._key(target_key),
+            Config=self.transfer_config
+        )
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def _iter_objects(self, prefix):
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix) + '/'):
+            yield from page.get('Contents', [])
+
+    def delete_prefix(self, prefix, batch_size=S3_DELETE_BATCH, batch_interval=0, on_batch=None):
+        batch_size = max(1, min(batch_size, S3_DELETE_BATCH))
+        removed = 0
+        batch = []
+
+        def flush():
+            self.client.delete_objects(Bucket=self.bucket, Delete={'Objects': batch, 'Quiet': True})
+            if on_batch:
+                on_batch(len(batch))
+
+        for obj in self._iter_objects(prefix):
+            batch.append({'Key': obj['Key']})
+            if len(batch) >= batch_size:
+                flush()
+                removed += len(batch)
+                batch = []
+                time.sleep(batch_interval)
+        if batch:
+            flush()
+            removed += len(batch)
+        return removed
+
+    def walk(self, prefix):
+        start = len(self._key(prefix)) + 1
+        for obj in self._iter_objects(prefix):
+            yield obj['Key'][start:], obj['Size'], obj['Size']
+
+    def walk_sorted(self, prefix):
+        # ListObjectsV2 renvoie les clés dans l'ordre binaire de leur encodage
+        # UTF-8, identique à l'ordre des points de code
+        return self.walk(prefix)
+
+
+class VolumePool(StorageBackend):
+    """
+    Fichiers répartis entre plusieurs dossiers racines (un par disque)
+
+    Les clés commencent par le nom du volume : <volume>/<mission>/<type>/<fichier>.
+    Les opérations portant sur une mission entière (création, renommage,
+    suppression, parcours) s'appliquent à tous les volumes.
+
+    Args:
+        volumes (dict): Dossier racine par nom de volume, le premier étant le volume par défaut
+        policy (str): Politique de placement (free-space, round-robin ou affinity)
+    """
+    is_local = True
+
+    def __init__(self, volumes, policy='free-space'):
+        if policy not in PLACEMENT_POLICIES:
+            raise ValueError(f"Politique de placement inconnue: {policy}")
+        self.volumes = {name: LocalStorage(root) for name, root in volumes.items()}
+        self.default_volume = next(iter(self.volumes))
+        self.policy = policy
+        self._round_robin = itertools.cycle(list(self.volumes))
+        self._lock = threading.Lock()
+
+    def _split(self, key):
+        volume, _, relative = key.partition('/')
+        if volume not in self.volumes:
+            raise FileNotFoundError(f"Volume inconnu: {volume}")
+        return self.volumes[volume], relative
+
+    def mission_prefix(self, mission):
+        return mission.name
+
+    def file_key(self, mission, file_path, volume=None):
+        return f"{volume or self.default_volume}/{mission.name}/{file_path.replace(os.sep, '/')}"
+
+    def free_space(self):
+        """Octets libres par volume"""
+        return {name: shutil.disk_usage(volume.root).free for name, volume in self.volumes.items()}
+
+    def place(self, mission):
+        if self.policy == 'affinity' and mission is not None and mission.volume in self.volumes:
+            return mission.volume
+        if self.policy == 'round-robin':
+            with self._lock:
+                return next(self._round_robin)
+        free = self.free_space()
+        return max(free, key=free.get)
+
+    def roots(self):
+        return [volume.root for volume in self.volumes.values()]
+
+    def create_mission(self, mission, file_types):
+        volume = self.volumes.get(mission.volume, self.volumes[self.default_volume])
+        volume.create_mission(mission, file_types)
+
+    def rename_mission(self, old_name, new_name):
+        renamed = []
+        try:
+            for volume in self.volumes.values():
+                if os.path.exists(volume._path(old_name)):
+                    volume.rename_mission(old_name, new_name)
+                    renamed.append(volume)
+        except OSError:
+            # Annuler les renommages déjà effectués sur les autres volumes
+            for volume in renamed:
+                volume.rename_mission(new_name, old_name)
+            raise
+
+    def save(self, key, stream):
+        volume, relative = self._split(key)
+        return volume.save(relative, stream)
+
+    def stat(self, key):
+        volume, relative = self._split(key)
+        return volume.stat(relative)
+
+    def open(self, key):
+        volume, relative = self._split(key)
+        return volume.open(relative)
+
+    def iter_range(self, key, start=0, end=None, chunk_size=CHUNK_SIZE):
+        volume, relative = self._split(key)
+        return volume.iter_range(relative, start, end, chunk_size)
+
+    def copy(self, source_key, target_key):
+        target = self.local_path(target_key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(self.local_path(source_key), target)
+
+    def move(self, source_key, target_key):
+        source, source_relative = self._split(source_key)
+        target, target_relative = self._split(target_key)
+        if source is target:
+            source.move(source_relative, target_relative)
+        else:
+            super().move(source_key, target_key)
+
+    def delete(self, key):
+        volume, relative = self._split(key)
+        volume.delete(relative)
+
+    def delete_prefix(self, prefix, batch_size=S3_DELETE_BATCH, batch_interval=0, on_batch=None):
+        return sum(volume.delete_prefix(prefix, batch_size, batch_interval, on_batch)
+                   for volume in self.volumes.values())
+
+    def walk(self, prefix):
+        for volume in self.volumes.values():
+            yield from volume.walk(prefix)
+
+    def walk_sorted(self, prefix):
+        return heapq.merge(*(volume.walk_sorted(prefix) for volume in self.volumes.values()))
+
+    def local_path(self, key):
+        volume, relative = self._split(key)
+        return volume.local_path(relative)
+
+
+def volumes_from_config(config):
+    """
+    Volumes de stockage local décrits par la configuration
+
+    STORAGE_VOLUMES est une liste « nom=chemin » séparée par des virgules,
+    ajoutée au volume par défaut (UPLOAD_FOLDER).
+
+    Returns:
+        dict: Dossier racine par nom de volume, le volume par défaut en premier
+    """
+    volumes = {DEFAULT_VOLUME: config['UPLOAD_FOLDER']}
+    for item in (config.get('STORAGE_VOLUMES') or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        name, separator, root = item.partition('=')
+        name, root = name.strip(), root.strip()
+        if not separator or not VOLUME_NAME_PATTERN.match(name) or not root:
+            raise ValueError(f"Volume de stockage invalide: {item} (attendu: nom=chemin)")
+        volumes[name] = root
+    return volumes
+
+def create_storage(config):
+    """
+    Construit le backend de stockage décrit par la configuration
+
+    Args:
+        config (dict): Configuration de l'application
+
+    Returns:
+        StorageBackend: Backend de stockage
+    """
+    backend = config.get('STORAGE_BACKEND', 'local')
+    if backend == 'local':
+        volumes = volumes_from_config(config)
+        if len(volumes) == 1:
+            return LocalStorage(config['UPLOAD_FOLDER'])
+        for root in volumes.values():
+            os.makedirs(root, exist_ok=True)
+        return VolumePool(volumes, config.get('STORAGE_PLACEMENT', 'free-space'))
+
+    if backend == 's3':
+        if boto3 is None:
+            raise RuntimeError("Le stockage S3 nécessite boto3 (pip install boto3)")
+        client = boto3.client(
+            's3',
+            endpoint_url=config.get('S3_ENDPOINT_URL'),
+            region_name=config.get('S3_REGION'),
+            aws_access_key_id=config.get('S3_ACCESS_KEY_ID'),
+            aws_secret_access_key=config.get('S3_SECRET_ACCESS_KEY')
+        )
+        return S3Storage(
+            config['S3_BUCKET'],
+            prefix=config.get('S3_PREFIX', ''),
+            client=client,
+            multipart_threshold=config.get('S3_MULTIPART_THRESHOLD', 8 * 1024 * 1024),
+            multipart_chunksize=config.get('S3_MULTIPART_CHUNKSIZE', 16 * 1024 * 1024),
+            max_concurrency=config.get('S3_MAX_CONCURRENCY', 4)
+        )
+
+    raise ValueError(f"Backend de stockage inconnu: {backend}")
+
+def init_storage(app):
+    """
+    Crée le backend de stockage de l'application
+
+    Args:
+        app (Flask): Application Flask
+    """
+    app.extensions['storage'] = create_storage(app.config)
+
+def get_storage():
+    """
+    Retourne le backend de stockage de l'application courante
+
+    Returns:
+        StorageBackend: Backend de stockage
+    """
+    return current_app.extensions['storage']
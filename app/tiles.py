@@ -0,0 +1,337 @@
+"""
+Tuiles vectorielles des missions (format Mapbox Vector Tile ou GeoJSON)
+
+Les positions sont manipulées en coordonnées Web Mercator normalisées : x et
+y entre 0 et 1, y croissant vers le sud, de sorte que la tuile (z, x, y)
+couvre [x / 2^z, (x + 1) / 2^z] sur chaque axe. Dans une tuile, les
+géométries sont exprimées en unités de tuile (0 à TILE_EXTENT), découpées
+sur la tuile élargie de TILE_BUFFER et simplifiées à la résolution de la
+tuile.
+
+L'encodage MVT (protobuf, spécification 2.1) est écrit directement, sans
+dépendance : il se limite aux points et aux polygones.
+"""
+import math
+import struct
+
+# Résolution d'une tuile et marge autour de la tuile (en unités de tuile)
+TILE_EXTENT = 4096
+TILE_BUFFER = 64
+
+# Tolérance de simplification des contours (en unités de tuile, 16 = 1 pixel à 256 pixels)
+SIMPLIFY_TOLERANCE = 16
+
+# Latitude maximale de la projection Web Mercator
+MAX_LATITUDE = 85.0511287798
+
+# Coordonnée d'un contour stocké : x et y normalisés (doubles)
+_POINT = struct.Struct('<dd')
+
+# Commandes de géométrie MVT
+_MOVE_TO = 1
+_LINE_TO = 2
+_CLOSE_PATH = 7
+
+# Types de géométrie MVT
+POINT = 1
+POLYGON = 3
+
+
+def project(longitude, latitude):
+    """Coordonnées Web Mercator normalisées (x, y) d'une position"""
+    latitude = max(-MAX_LATITUDE, min(MAX_LATITUDE, latitude))
+    sine = math.sin(math.radians(latitude))
+    x = (longitude + 180) / 360
+    y = 0.5 - math.log((1 + sine) / (1 - sine)) / (4 * math.pi)
+    return x, y
+
+def unproject(x, y):
+    """Position (longitude, latitude) de coordonnées Web Mercator normalisées"""
+    longitude = x * 360 - 180
+    latitude = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y))))
+    return longitude, latitude
+
+def tile_bounds(z, x, y, buffer=0):
+    """
+    Emprise d'une tuile en coordonnées normalisées
+
+    Args:
+        z, x, y (int): Tuile
+        buffer (int): Marge en unités de tuile
+
+    Returns:
+        tuple: (x min, y min, x max, y max)
+    """
+    size = 1 / (1 << z)
+    margin = size * buffer / TILE_EXTENT
+    return x * size - margin, y * size - margin, (x + 1) * size + margin, (y + 1) * size + margin
+
+def to_tile(z, x, y, point_x, point_y):
+    """Coordonnées (flottantes) d'un point normalisé dans une tuile"""
+    scale = (1 << z) * TILE_EXTENT
+    return (point_x * scale - x * TILE_EXTENT, point_y * scale - y * TILE_EXTENT)
+
+def from_tile(z, x, y, tile_x, tile_y):
+    """Coordonnées normalisées d'un point exprimé en unités de tuile"""
+    scale = (1 << z) * TILE_EXTENT
+    return (tile_x + x * TILE_EXTENT) / scale, (tile_y + y * TILE_EXTENT) / scale
+
+def convex_hull(points):
+    """
+    Enveloppe convexe d'un ensemble de points (chaîne monotone d'Andrew)
+
+    Args:
+        points (list): Tuples (x, y)
+
+    Returns:
+        list: Sommets de l'enveloppe, sans répétition du premier
+    """
+    points = sorted(set(points))
+    if len(points) < 3:
+        return points
+
+    def cross(origin, a, b):
+        return (a[0] - origin[0]) * (b[1] - origin[1]) - (a[1] - origin[1]) * (b[0] - origin[0])
+
+    lower = []
+    for point in points:
+        while len(lower) >= 2 and cross(lower[-2], lower[-1], point) <= 0:
+            lower.pop()
+        lower.append(point)
+    upper = []
+    for point in reversed(points):
+        while len(upper) >= 2 and cross(upper[-2], upper[-1], point) <= 0:
+            upper.pop()
+        upper.append(point)
+    return lower[:-1] + upper[:-1]
+
+def pack_ring(ring):
+    """Sérialise un contour [(x, y), ...] en binaire"""
+    return b''.join(_POINT.pack(*point) for point in ring)
+
+def unpack_ring(data):
+    """Désérialise un contour produit par pack_ring"""
+    return list(_POINT.iter_unpack(data or b''))
+
+def clip_ring(ring, low, high):
+    """
+    Découpe un contour sur le carré [low, high] (Sutherland-Hodgman)
+
+    Exact pour les contours convexes, comme les emprises des missions.
+
+    Args:
+        ring (list): Sommets (x, y), sans répétition du premier
+        low (float): Borne inférieure sur chaque axe
+        high (float): Borne supérieure sur chaque axe
+
+    Returns:
+        list: Sommets du contour découpé
+    """
+    for axis, bound, inside in ((0, low, 1), (0, high, -1), (1, low, 1), (1, high, -1)):
+        if not ring:
+            break
+        clipped = []
+        previous = ring[-1]
+        previous_in = (previous[axis] - bound) * inside >= 0
+        for point in ring:
+            point_in = (point[axis] - bound) * inside >= 0
+            if point_in != previous_in:
+                ratio = (bound - previous[axis]) / (point[axis] - previous[axis])
+                crossing = [0, 0]
+                crossing[axis] = bound
+                crossing[1 - axis] = previous[1 - axis] + ratio * (point[1 - axis] - previous[1 - axis])
+                clipped.append(tuple(crossing))
+            if point_in:
+                clipped.append(point)
+            previous, previous_in = point, point_in
+        ring = clipped
+    return ring
+
+def _distance_to_segment(point, start, end):
+    dx, dy = end[0] - start[0], end[1] - start[1]
+    if dx == 0 and dy == 0:
+        return math.hypot(point[0] - start[0], point[1] - start[1])
+    ratio = max(0, min(1, ((point[0] - start[0]) * dx + (point[1] - start[1]) * dy) / (dx * dx + dy * dy)))
+    return math.hypot(point[0] - start[0] - ratio * dx, point[1] - start[1] - ratio * dy)
+
+def simplify_ring(ring, tolerance=SIMPLIFY_TOLERANCE):
+    """
+    Simplifie un contour en unités de tuile (Douglas-Peucker) et l'arrondit à l'unité
+
+    Args:
+        ring (list): Sommets (x, y), sans répétition du premier
+        tolerance (float): Écart maximal toléré
+
+    Returns:
+        list: Sommets entiers du contour simplifié, vide s'il est dégénéré
+    """
+    points = []
+    for x, y in ring:
+        point = (int(round(x)), int(round(y)))
+        if not points or point != points[-1]:
+            points.append(point)
+    if len(points) > 1 and points[0] == points[-1]:
+        points.pop()
+    if len(points) < 3:
+        return []
+
+    # Douglas-Peucker sur le contour fermé, depuis le sommet le plus éloigné du premier
+    far = max(range(len(points)), key=lambda i: math.hypot(points[i][0] - points[0][0], points[i][1] - points[0][1]))
+    keep = {0, far}
+    stack = [(0, far), (far, len(points))]
+    while stack:
+        first, last = stack.pop()
+        end = points[last % len(points)]
+        best, best_distance = None, tolerance
+        for i in range(first + 1, last):
+            distance = _distance_to_segment(points[i], points[first], end)
+            if distance > best_distance:
+                best, best_distance = i, distance
+        if best is not None:
+            keep.add(best)
+            stack.extend(((first, best), (best, last)))
+
+    simplified = [points[i] for i in sorted(keep)]
+    if len(simplified) < 3 or ring_area(simplified) == 0:
+        return []
+    return simplified
+
+def ring_area(ring):
+    """Aire signée d'un contour (positive dans le sens horaire à l'écran, y vers le bas)"""
+    return sum(
+        ring[i - 1][0] * ring[i][1] - ring[i][0] * ring[i - 1][1] for i in range(len(ring))
+    ) / 2
+
+
+# Encodage protobuf
+
+def _varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+def _zigzag(value):
+    return (value << 1) ^ (value >> 63)
+
+def _key(field, wire_type):
+    return _varint((field << 3) | wire_type)
+
+def _bytes_field(field, data):
+    return _key(field, 2) + _varint(len(data)) + data
+
+def _varint_field(field, value):
+    return _key(field, 0) + _varint(value)
+
+def _packed_field(field, values):
+    return _bytes_field(field, b''.join(_varint(value) for value in values))
+
+def _encode_value(value):
+    """Valeur d'attribut MVT"""
+    if isinstance(value, bool):
+        return _varint_field(7, int(value))
+    if isinstance(value, int):
+        return _varint_field(6, _zigzag(value))
+    if isinstance(value, float):
+        return _key(3, 1) + struct.pack('<d', value)
+    return _bytes_field(1, str(value).encode('utf-8'))
+
+def _command(command, count):
+    return (command & 0x7) | (count << 3)
+
+def _encode_geometry(geometry_type, coordinates):
+    if geometry_type == POINT:
+        x, y = coordinates
+        return [_command(_MOVE_TO, 1), _zigzag(x), _zigzag(y)]
+
+    # Polygone : contour extérieur dans le sens horaire (aire positive)
+    ring = coordinates if ring_area(coordinates) > 0 else coordinates[::-1]
+    commands = [_command(_MOVE_TO, 1), _zigzag(ring[0][0]), _zigzag(ring[0][1]), _command(_LINE_TO, len(ring) - 1)]
+    for previous, point in zip(ring, ring[1:]):
+        commands.append(_zigzag(point[0] - previous[0]))
+        commands.append(_zigzag(point[1] - previous[1]))
+    commands.append(_command(_CLOSE_PATH, 1))
+    return commands
+
+def encode_layer(name, features):
+    """
+    Encode une couche MVT
+
+    Args:
+        name (str): Nom de la couche
+        features (list): Tuples (id, type POINT ou POLYGON, coordonnées
+            entières en unités de tuile, dictionnaire d'attributs)
+
+    Returns:
+        bytes: Message Layer
+    """
+    keys, values = {}, {}
+    encoded = []
+    for feature_id, geometry_type, coordinates, properties in features:
+        tags = []
+        for key, value in properties.items():
+            if value is None:
+                continue
+            tags.append(keys.setdefault(key, len(keys)))
+            tags.append(values.setdefault((type(value), value), len(values)))
+        message = b''
+        if feature_id is not None:
+            message += _varint_field(1, feature_id)
+        if tags:
+            message += _packed_field(2, tags)
+        message += _varint_field(3, geometry_type)
+        message += _packed_field(4, _encode_geometry(geometry_type, coordinates))
+        encoded.append(_bytes_field(2, message))
+
+    layer = _varint_field(15, 2) + _bytes_field(1, name.encode('utf-8')) + b''.join(encoded)
+    layer += b''.join(_bytes_field(3, key.encode('utf-8')) for key in keys)
+    layer += b''.join(_bytes_field(4, _encode_value(value)) for _, value in values)
+    layer += _varint_field(5, TILE_EXTENT)
+    return layer
+
+def encode_tile(layers):
+    """
+    Encode une tuile MVT
+
+    Args:
+        layers (dict): Entités de chaque couche (voir encode_layer), par nom
+
+    Returns:
+        bytes: Tuile MVT (non compressée)
+    """
+    return b''.join(_bytes_field(3, encode_layer(name, features)) for name, features in layers.items() if features)
+
+def geojson_tile(z, x, y, layers):
+    """
+    Convertit les entités d'une tuile en FeatureCollection GeoJSON (longitude, latitude)
+
+    Args:
+        z, x, y (int): Tuile
+        layers (dict): Entités de chaque couche (voir encode_layer), par nom
+
+    Returns:
+        dict: FeatureCollection, le nom de la couche dans la propriété layer
+    """
+    def position(point):
+        return list(unproject(*from_tile(z, x, y, *point)))
+
+    features = []
+    for name, layer_features in layers.items():
+        for feature_id, geometry_type, coordinates, properties in layer_features:
+            if geometry_type == POINT:
+                geometry = {'type': 'Point', 'coordinates': position(coordinates)}
+            else:
+                ring = [position(point) for point in coordinates]
+                geometry = {'type': 'Polygon', 'coordinates': [ring + ring[:1]]}
+            features.append({
+                'type': 'Feature',
+                'id': feature_id,
+                'geometry': geometry,
+                'properties': dict(properties, layer=name)
+            })
+    return {'type': 'FeatureCollection', 'features': features}
@@ -0,0 +1,3 @@
+"""
+Bancs d'essai de performance du gestionnaire de missions
+"""
@@ -0,0 +1,75 @@
+"""
+Point d'entrée de la suite de bancs d'essai
+
+Usage:
+    python -m benchmarks run --missions 50 --output results.json
+    python -m benchmarks run --baseline baseline.json --threshold 0.2
+    python -m benchmarks compare results.json baseline.json
+    python -m benchmarks list
+"""
+import sys
+import argparse
+from benchmarks.suite import (
+    BENCHMARKS, run_suite, compare_results, print_results, print_comparison,
+    load_report, save_report
+)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='Génère une flotte et exécute les bancs d\'essai')
+    run_parser.add_argument('--missions', type=int, default=20, help='Nombre de missions')
+    run_parser.add_argument('--files', type=int, default=10, help='Fichiers par type et par mission')
+    run_parser.add_argument('--geopos-rows', type=int, default=100000, help='Points du CSV de trajectoire')
+    run_parser.add_argument('--size-scale', type=float, default=1.0, help='Facteur appliqué aux tailles de fichiers')
+    run_parser.add_argument('--repeat', type=int, default=5, help='Répétitions de chaque banc d\'essai')
+    run_parser.add_argument('--seed', type=int, default=42, help='Graine du générateur aléatoire')
+    run_parser.add_argument('--only', action='append', choices=sorted(BENCHMARKS), help='Banc d\'essai à exécuter')
+    run_parser.add_argument('--output', help='Fichier JSON de résultats')
+    run_parser.add_argument('--baseline', help='Fichier JSON de référence à comparer')
+    run_parser.add_argument('--threshold', type=float, default=0.2, help='Ralentissement toléré (0.2 = +20 %%)')
+
+    compare_parser = subparsers.add_parser('compare', help='Compare deux fichiers de résultats')
+    compare_parser.add_argument('current', help='Résultats courants')
+    compare_parser.add_argument('baseline', help='Résultats de référence')
+    compare_parser.add_argument('--threshold', type=float, default=0.2, help='Ralentissement toléré (0.2 = +20 %%)')
+
+    subparsers.add_parser('list', help='Liste les bancs d\'essai disponibles')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'list':
+        for name in BENCHMARKS:
+            print(name)
+        return 0
+
+    if args.command == 'compare':
+        rows = compare_results(load_report(args.current), load_report(args.baseline), args.threshold)
+        print_comparison(rows, args.threshold)
+        return 1 if any(row[4] for row in rows) else 0
+
+    report = run_suite(
+        missions=args.missions,
+        files_per_type=args.files,
+        geopos_rows=args.geopos_rows,
+        size_scale=args.size_scale,
+        repeat=args.repeat,
+        only=args.only,
+        seed=args.seed
+    )
+    print_results(report)
+
+    if args.output:
+        save_report(report, args.output)
+
+    if args.baseline:
+        rows = compare_results(report, load_report(args.baseline), args.threshold)
+        print_comparison(rows, args.threshold)
+        return 1 if any(row[4] for row in rows) else 0
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Banc d'essai des formats de la liste des fichiers d'une mission
+
+Mesure, sur une mission synthétique (lignes insérées directement, sans
+fichiers sur le disque), la taille de la réponse de
+/api/missions/<id>/files et la durée de la requête complète (lecture,
+sérialisation, compression) pour chaque combinaison de format (rows,
+columnar), de sérialisation (json, msgpack s'il est installé) et de
+compression (aucune, gzip, br si brotli est installé).
+
+Usage:
+    python -m benchmarks.columnar --files 20000
+    python -m benchmarks.columnar --repeat 10 --json
+"""
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+from benchmarks.common import create_bench_app, dispose_app
+
+
+def _variants():
+    """Combinaisons mesurées : (format, sérialisation, compression)"""
+    from app.columnar import available_body_encodings
+    from app.response_compression import available_encodings
+
+    return [
+        (response_format, body_encoding, content_encoding)
+        for response_format in ('rows', 'columnar')
+        for body_encoding in available_body_encodings()
+        for content_encoding in ['identity'] + available_encodings()
+    ]
+
+def run(files, repeat=5, seed=42):
+    """
+    Exécute le banc d'essai dans un dossier temporaire
+
+    Args:
+        files (int): Nombre de fichiers de la mission
+        repeat (int): Nombre de répétitions de chaque combinaison
+        seed (int): Graine du générateur aléatoire
+
+    Returns:
+        dict: Taille et durée de chaque combinaison
+    """
+    from benchmarks.read_models import _populate
+
+    work_dir = tempfile.mkdtemp(prefix='dmm-bench-')
+    app = create_bench_app(work_dir)
+
+    try:
+        with app.app_context():
+            mission_id = _populate(1, files, seed)
+
+        client = app.test_client()
+        results = {}
+        for response_format, body_encoding, content_encoding in _variants():
+            url = f'/api/missions/{mission_id}/files?format={response_format}&encoding={body_encoding}'
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                response = client.get(url, headers={'Accept-Encoding': content_encoding})
+                timings.append(time.perf_counter() - start)
+            results[f'{response_format}/{body_encoding}/{content_encoding}'] = {
+                'status': response.status_code,
+                'bytes': len(response.data),
+                'median_seconds': round(statistics.median(timings), 4)
+            }
+
+        dispose_app(app)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    reference = results['rows/json/identity']
+    for row in results.values():
+        row['size_ratio'] = round(row['bytes'] / reference['bytes'], 3) if reference['bytes'] else None
+
+    return {
+        'files': files,
+        'repeat': repeat,
+        'results': results
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=20000, help='Fichiers de la mission')
+    parser.add_argument('--repeat', type=int, default=5, help='Répétitions de chaque combinaison')
+    parser.add_argument('--seed', type=int, default=42, help='Graine du générateur aléatoire')
+    parser.add_argument('--json', action='store_true', help='Affiche le résultat au format JSON')
+    args = parser.parse_args(argv)
+
+    result = run(args.files, args.repeat, args.seed)
+
+    if args.json:
+        json.dump(result, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+        return
+
+    print(f"{result['files']} fichiers, {result['repeat']} répétitions")
+    for name, row in result['results'].items():
+        print(f"{name:>28}: {row['bytes']:>10} octets  x{row['size_ratio']:<6}  "
+              f"{row['median_seconds'] * 1000:8.1f} ms")
+
+if __name__ == '__main__':
+    main()
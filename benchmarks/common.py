@@ -0,0 +1,53 @@
+"""
+Outils communs aux bancs d'essai
+"""
+import os
+
+def create_bench_app(work_dir, **config):
+    """
+    Crée une application de test isolée dans un dossier temporaire
+
+    La configuration étant lue depuis l'environnement à l'import de
+    app.config, cette fonction doit être appelée avant tout autre import
+    de l'application.
+
+    Args:
+        work_dir (str): Dossier de travail (base SQLite, missions, instance)
+        **config: Valeurs de configuration supplémentaires
+
+    Returns:
+        Flask: Application configurée, tables créées
+    """
+    upload_folder = os.path.join(work_dir, 'missions')
+    os.environ['UPLOAD_FOLDER'] = upload_folder
+    os.environ['TEST_DATABASE_URL'] = 'sqlite:///' + os.path.join(work_dir, 'bench.sqlite')
+    os.environ.setdefault('RESPONSE_CACHE_ENABLED', 'false')
+    for key in ('SQLITE_PERFORMANCE_PROFILE', 'SQLITE_SERIALIZE_WRITES'):
+        if key in config:
+            os.environ[key] = 'true' if config[key] else 'false'
+
+    from app import create_app, db
+
+    app = create_app('testing')
+    app.instance_path = os.path.join(work_dir, 'instance')
+    os.makedirs(app.instance_path, exist_ok=True)
+    app.config.update(
+        UPLOAD_FOLDER=upload_folder,
+        # Les erreurs sont comptées au lieu d'interrompre le banc d'essai
+        PROPAGATE_EXCEPTIONS=False,
+        **config
+    )
+
+    with app.app_context():
+        db.create_all()
+
+    return app
+
+def dispose_app(app):
+    """Ferme les connexions de l'application avant suppression du dossier de travail"""
+    from app import db
+
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
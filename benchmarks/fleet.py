@@ -0,0 +1,150 @@
+"""
+Générateur de flottes de missions synthétiques
+
+Crée N missions avec M fichiers par type dont les tailles suivent une loi
+log-normale proche des données réelles du Trinity F90+. Les fichiers sont
+créés creux (sparse) : ils ont leur taille réelle sans occuper le disque.
+Le premier fichier de géoréférencement de chaque mission est un vrai CSV de
+trajectoire (lien physique vers un fichier commun) afin que l'extraction des
+métadonnées travaille sur des données réalistes.
+"""
+import os
+import math
+import random
+import shutil
+from datetime import date, datetime, timedelta
+from sqlalchemy import insert
+
+# Taille médiane (octets) et dispersion des fichiers par type
+SIZE_PROFILES = {
+    'images': (18 * 1024 * 1024, 0.25),
+    'logs': (8 * 1024 * 1024, 0.8),
+    'geopos': (2 * 1024 * 1024, 0.5),
+    'ppk': (60 * 1024 * 1024, 0.6),
+    'rapport': (3 * 1024 * 1024, 0.7),
+}
+
+# Extension utilisée pour chaque type de fichier synthétique
+EXTENSIONS = {
+    'images': 'jpg',
+    'logs': 'tlog',
+    'geopos': 'gpx',
+    'ppk': 'obs',
+    'rapport': 'pdf',
+}
+
+WORDS = ['cartographie', 'inspection', 'parcelle', 'corridor', 'carrière', 'vignoble',
+         'forêt', 'littoral', 'chantier', 'ligne', 'photogrammétrie', 'relevé']
+
+def write_trajectory_csv(path, rows, seed=0):
+    """
+    Écrit un CSV de trajectoire (time, latitude, longitude, altitude)
+
+    Args:
+        path (str): Chemin du fichier à créer
+        rows (int): Nombre de points
+        seed (int): Graine du générateur aléatoire
+    """
+    rng = random.Random(seed)
+    lat0, lon0 = 43.6 + rng.random(), 1.4 + rng.random()
+    start = datetime(2024, 6, 1, 8, 0, 0)
+
+    with open(path, 'w', newline='', encoding='utf-8') as csv_file:
+        csv_file.write('time,latitude,longitude,altitude\n')
+        chunk = []
+        for n in range(rows):
+            # Lignes de vol parallèles (survol en « tondeuse »)
+            line, position = divmod(n, 2000)
+            direction = 1 if line % 2 == 0 else -1
+            lat = lat0 + line * 0.0004
+            lon = lon0 + direction * (position - 1000) * 0.00002
+            alt = 120 + math.sin(n / 500) * 5 + rng.random()
+            timestamp = (start + timedelta(seconds=n * 0.2)).isoformat()
+            chunk.append(f'{timestamp},{lat:.8f},{lon:.8f},{alt:.2f}\n')
+            if len(chunk) >= 10000:
+                csv_file.writelines(chunk)
+                chunk.clear()
+        csv_file.writelines(chunk)
+
+def _sparse_file(path, size):
+    with open(path, 'wb') as f:
+        f.truncate(size)
+
+def _link_or_copy(source, target):
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+def generate_fleet(missions=20, files_per_type=10, geopos_rows=100000, size_scale=1.0, seed=42):
+    """
+    Génère une flotte de missions dans l'application courante
+
+    Doit être appelée dans un contexte d'application.
+
+    Args:
+        missions (int): Nombre de missions
+        files_per_type (int): Nombre de fichiers par type et par mission
+        geopos_rows (int): Nombre de points du CSV de trajectoire
+        size_scale (float): Facteur appliqué aux tailles de fichiers
+        seed (int): Graine du générateur aléatoire
+
+    Returns:
+        dict: Identifiants des missions créées et chemin du CSV de trajectoire
+    """
+    from flask import current_app
+    from app import db
+    from app.models import File
+    from app.services import mission_service, stats_service
+
+    rng = random.Random(seed)
+    work_dir = os.path.dirname(current_app.config['UPLOAD_FOLDER'])
+    trajectory_path = os.path.join(work_dir, f'trajectory_{geopos_rows}.csv')
+    if not os.path.exists(trajectory_path):
+        write_trajectory_csv(trajectory_path, geopos_rows, seed)
+
+    mission_ids = []
+    first_day = date(2023, 1, 1)
+
+    for index in range(missions):
+        flight_date = first_day + timedelta(days=rng.randrange(3 * 365))
+        description = ' '.join(rng.sample(WORDS, 3))
+        mission = mission_service.create_mission(
+            f'mission-{index:05d}',
+            flight_date.isoformat(),
+            description
+        )
+        mission_ids.append(mission.id)
+        mission_path = mission.mission_path
+
+        rows = []
+        for file_type, (median, sigma) in SIZE_PROFILES.items():
+            for n in range(files_per_type):
+                if file_type == 'geopos' and n == 0:
+                    filename = 'trajectory.csv'
+                    file_path = os.path.join(mission_path, file_type, filename)
+                    _link_or_copy(trajectory_path, file_path)
+                    size = os.path.getsize(file_path)
+                else:
+                    filename = f'{file_type}_{n:05d}.{EXTENSIONS[file_type]}'
+                    file_path = os.path.join(mission_path, file_type, filename)
+                    size = max(1, int(rng.lognormvariate(math.log(median), sigma) * size_scale))
+                    _sparse_file(file_path, size)
+
+                rows.append({
+                    'mission_id': mission.id,
+                    'filename': filename,
+                    'file_path': os.path.join(file_type, filename),
+                    'file_type': file_type,
+                    'file_size': size,
+                    'file_mtime': os.path.getmtime(file_path),
+                    'uploaded_at': datetime.utcnow(),
+                })
+
+        db.session.execute(insert(File), rows)
+        for file_type in SIZE_PROFILES:
+            sizes = [row['file_size'] for row in rows if row['file_type'] == file_type]
+            stats_service.record_files(mission.id, file_type, len(sizes), sum(sizes))
+        db.session.commit()
+
+    return {'mission_ids': mission_ids, 'trajectory_path': trajectory_path}
@@ -0,0 +1,178 @@
+"""
+Banc d'essai des chemins de lecture des listes : ORM contre modèles de lecture
+
+Compare, sur une base synthétique (lignes insérées directement, sans
+fichiers sur le disque), la lecture des listes de missions et de fichiers
+par objets ORM suivis de to_dict() et par select() Core sérialisés colonne
+par colonne (app.read_models). Pour chaque chemin : débit en lignes par
+seconde (médiane des répétitions) et pic de mémoire alloué (tracemalloc).
+
+Usage:
+    python -m benchmarks.read_models --missions 2000 --files 50000
+    python -m benchmarks.read_models --repeat 10 --json
+"""
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import statistics
+import tracemalloc
+from datetime import date, datetime, timedelta
+from sqlalchemy import insert
+from benchmarks.common import create_bench_app, dispose_app
+
+FILE_TYPES = ('images', 'logs', 'geopos', 'ppk', 'rapport')
+EXTENSIONS = ('jpg', 'tlog', 'gpx', 'obs', 'pdf')
+
+
+def _populate(missions, files, seed):
+    """Insère les missions (avec métadonnées) et les fichiers de la première mission"""
+    from app import db
+    from app.models import Mission, MissionMetadata, File
+
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    mission_ids = db.session.execute(insert(Mission).returning(Mission.id), [{
+        'name': f'mission-{index:06d}',
+        'date_created': start + timedelta(minutes=index),
+        'flight_date': date(2024, 1, 1) + timedelta(days=index % 365),
+        'description': f'inspection {index}' if index % 3 else None
+    } for index in range(missions)]).scalars().all()
+    db.session.execute(insert(MissionMetadata), [{
+        'mission_id': mission_id,
+        'center_latitude': 43 + rng.random(),
+        'center_longitude': 1 + rng.random(),
+        'drone_model': 'Trinity F90+'
+    } for mission_id in mission_ids])
+
+    # Quelques fichiers par mission pour les statistiques par type, et une
+    # mission volumineuse pour la liste des fichiers
+    rows = [{
+        'mission_id': mission_id,
+        'filename': f'{FILE_TYPES[n]}_{n}.{EXTENSIONS[n]}',
+        'file_path': f'{FILE_TYPES[n]}/{FILE_TYPES[n]}_{n}.{EXTENSIONS[n]}',
+        'file_type': FILE_TYPES[n],
+        'file_size': rng.randrange(1, 1 << 30),
+        'uploaded_at': start
+    } for mission_id in mission_ids[1:] for n in range(rng.randrange(1, 4))]
+    rows += [{
+        'mission_id': mission_ids[0],
+        'filename': f'file_{n:07d}.{EXTENSIONS[n % 5]}',
+        'file_path': f'{FILE_TYPES[n % 5]}/file_{n:07d}.{EXTENSIONS[n % 5]}',
+        'file_type': FILE_TYPES[n % 5],
+        'file_size': rng.randrange(1, 1 << 30),
+        'uploaded_at': start + timedelta(seconds=n),
+        'checksum': f'{rng.getrandbits(256):064x}'
+    } for n in range(files)]
+    for offset in range(0, len(rows), 5000):
+        db.session.execute(insert(File), rows[offset:offset + 5000])
+    db.session.commit()
+    return mission_ids[0]
+
+def _paths(mission_id):
+    """Chemins comparés : (nom, fonction renvoyant la liste de dictionnaires)"""
+    from app.services import mission_service
+
+    return [
+        ('missions_orm', lambda: [mission.to_dict() for mission in mission_service.search_missions()]),
+        ('missions_read_model', mission_service.search_mission_summaries),
+        ('files_orm', lambda: [file.to_dict() for file in mission_service.get_mission_files_by_type(mission_id)]),
+        ('files_read_model', lambda: mission_service.get_mission_file_summaries(mission_id)),
+    ]
+
+def _measure(app, func, repeat):
+    """Durées des répétitions, puis pic de mémoire d'une exécution supplémentaire"""
+    from app import db
+
+    timings = []
+    with app.app_context():
+        for _ in range(repeat):
+            db.session.remove()
+            start = time.perf_counter()
+            rows = len(func())
+            timings.append(time.perf_counter() - start)
+
+        db.session.remove()
+        tracemalloc.start()
+        try:
+            func()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return rows, timings, peak
+
+def run(missions, files, repeat=5, seed=42):
+    """
+    Exécute le banc d'essai dans un dossier temporaire
+
+    Args:
+        missions (int): Nombre de missions
+        files (int): Nombre de fichiers de la mission listée
+        repeat (int): Nombre de répétitions de chaque chemin
+        seed (int): Graine du générateur aléatoire
+
+    Returns:
+        dict: Lignes, débit et pic de mémoire de chaque chemin
+    """
+    work_dir = tempfile.mkdtemp(prefix='dmm-bench-')
+    app = create_bench_app(work_dir)
+
+    try:
+        with app.app_context():
+            mission_id = _populate(missions, files, seed)
+
+        results = {}
+        for name, func in _paths(mission_id):
+            rows, timings, peak = _measure(app, func, repeat)
+            median = statistics.median(timings)
+            results[name] = {
+                'rows': rows,
+                'median_seconds': round(median, 4),
+                'rows_per_second': round(rows / median) if median else None,
+                'peak_memory_bytes': peak
+            }
+
+        dispose_app(app)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    for kind in ('missions', 'files'):
+        orm, light = results[f'{kind}_orm'], results[f'{kind}_read_model']
+        light['speedup'] = round(orm['median_seconds'] / light['median_seconds'], 2) if light['median_seconds'] else None
+        light['memory_ratio'] = round(light['peak_memory_bytes'] / orm['peak_memory_bytes'], 2) \
+            if orm['peak_memory_bytes'] else None
+
+    return {
+        'missions': missions,
+        'files': files,
+        'repeat': repeat,
+        'results': results
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--missions', type=int, default=2000, help='Nombre de missions')
+    parser.add_argument('--files', type=int, default=50000, help='Fichiers de la mission listée')
+    parser.add_argument('--repeat', type=int, default=5, help='Répétitions de chaque chemin')
+    parser.add_argument('--seed', type=int, default=42, help='Graine du générateur aléatoire')
+    parser.add_argument('--json', action='store_true', help='Affiche le résultat au format JSON')
+    args = parser.parse_args(argv)
+
+    result = run(args.missions, args.files, args.repeat, args.seed)
+
+    if args.json:
+        json.dump(result, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+        return
+
+    print(f"{result['missions']} missions, {result['files']} fichiers listés, {result['repeat']} répétitions")
+    for name, row in result['results'].items():
+        comparison = f"  x{row['speedup']} plus rapide, mémoire x{row['memory_ratio']}" if 'speedup' in row else ''
+        print(f"{name:>20}: {row['rows']:>7} lignes  {row['rows_per_second']:>9} lignes/s  "
+              f"pic {row['peak_memory_bytes'] / 1024 / 1024:8.1f} Mio{comparison}")
+
+if __name__ == '__main__':
+    main()
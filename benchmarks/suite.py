@@ -0,0 +1,203 @@
+"""
+Suite de bancs d'essai des chemins critiques
+
+Chaque banc d'essai est une fonction prenant le contexte de la flotte
+générée et exécutant une opération ; il est répété plusieurs fois et seules
+les statistiques de durée sont conservées. La session SQLAlchemy est vidée
+entre deux répétitions pour ne pas mesurer le cache de l'identity map.
+"""
+import io
+import os
+import sys
+import time
+import json
+import shutil
+import platform
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime
+from benchmarks.common import create_bench_app, dispose_app
+
+BENCHMARKS = {}
+
+def benchmark(name):
+    """Enregistre une fonction de banc d'essai"""
+    def decorator(func):
+        BENCHMARKS[name] = func
+        return func
+    return decorator
+
+@benchmark('search_missions')
+def bench_search_missions(ctx):
+    from app.services import mission_service
+    mission_service.search_missions(query='inspection', file_type='images')
+
+@benchmark('mission_to_dict')
+def bench_mission_to_dict(ctx):
+    from app.services import mission_service
+    [mission.to_dict() for mission in mission_service.get_all_missions()]
+
+@benchmark('api_list_missions')
+def bench_api_list_missions(ctx):
+    ctx['client'].get('/api/missions')
+
+@benchmark('api_get_mission')
+def bench_api_get_mission(ctx):
+    ctx['client'].get(f"/api/missions/{ctx['mission_id']}")
+
+@benchmark('create_mission_zip')
+def bench_create_mission_zip(ctx):
+    from app.services import file_service
+    zip_path = file_service.create_mission_zip(ctx['mission_id'], 'logs')
+    os.remove(zip_path)
+
+@benchmark('extract_metadata_from_csv')
+def bench_extract_metadata_from_csv(ctx):
+    from app.services import file_service
+    file_service.extract_metadata_from_csv(ctx['trajectory_path'], ctx['mission_id'])
+
+@benchmark('upload')
+def bench_upload(ctx):
+    ctx['upload_count'] += 1
+    ctx['client'].post('/api/upload', data={
+        'mission_id': str(ctx['mission_id']),
+        'files': [(io.BytesIO(ctx['upload_payload']), f"upload_{ctx['upload_count']:06d}.jpg")]
+    }, content_type='multipart/form-data')
+
+def _git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_suite(missions=20, files_per_type=10, geopos_rows=100000, size_scale=1.0,
+              repeat=5, only=None, seed=42):
+    """
+    Génère une flotte synthétique et exécute les bancs d'essai
+
+    Args:
+        missions (int): Nombre de missions de la flotte
+        files_per_type (int): Nombre de fichiers par type et par mission
+        geopos_rows (int): Nombre de points du CSV de trajectoire
+        size_scale (float): Facteur appliqué aux tailles de fichiers
+        repeat (int): Nombre de répétitions de chaque banc d'essai
+        only (list, optional): Noms des bancs d'essai à exécuter
+        seed (int): Graine du générateur aléatoire
+
+    Returns:
+        dict: Paramètres et résultats, sérialisables en JSON
+    """
+    work_dir = tempfile.mkdtemp(prefix='dmm-bench-')
+    app = create_bench_app(work_dir)
+
+    from app import db
+    from benchmarks.fleet import generate_fleet
+
+    try:
+        with app.app_context():
+            start = time.perf_counter()
+            fleet = generate_fleet(missions, files_per_type, geopos_rows, size_scale, seed)
+            generation_time = time.perf_counter() - start
+
+        ctx = {
+            'client': app.test_client(),
+            'mission_id': fleet['mission_ids'][0],
+            'trajectory_path': fleet['trajectory_path'],
+            'upload_payload': os.urandom(1024 * 1024),
+            'upload_count': 0,
+        }
+
+        results = {}
+        for name, func in BENCHMARKS.items():
+            if only and name not in only:
+                continue
+
+            timings = []
+            with app.app_context():
+                for _ in range(repeat):
+                    db.session.remove()
+                    start = time.perf_counter()
+                    func(ctx)
+                    timings.append(time.perf_counter() - start)
+
+            results[name] = {
+                'median': statistics.median(timings),
+                'min': min(timings),
+                'max': max(timings),
+                'mean': statistics.fmean(timings),
+                'repeat': repeat,
+            }
+
+        dispose_app(app)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        'created_at': datetime.utcnow().isoformat(),
+        'revision': _git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': {
+            'missions': missions,
+            'files_per_type': files_per_type,
+            'geopos_rows': geopos_rows,
+            'size_scale': size_scale,
+            'repeat': repeat,
+            'seed': seed,
+        },
+        'generation_seconds': generation_time,
+        'results': results,
+    }
+
+def compare_results(current, baseline, threshold=0.2):
+    """
+    Compare deux exécutions de la suite
+
+    Args:
+        current (dict): Résultats de l'exécution courante
+        baseline (dict): Résultats de référence
+        threshold (float): Ralentissement relatif toléré sur la médiane (0.2 = +20 %)
+
+    Returns:
+        list: Une ligne par banc d'essai commun (nom, référence, courant, ratio, régression)
+    """
+    rows = []
+    for name, result in current['results'].items():
+        reference = baseline['results'].get(name)
+        if reference is None:
+            continue
+        ratio = result['median'] / reference['median'] if reference['median'] else float('inf')
+        rows.append((name, reference['median'], result['median'], ratio, ratio > 1 + threshold))
+    return rows
+
+def print_results(report, stream=sys.stdout):
+    """Affiche les résultats d'une exécution"""
+    parameters = report['parameters']
+    stream.write(f"Flotte: {parameters['missions']} missions, {parameters['files_per_type']} fichiers/type, "
+                 f"{parameters['geopos_rows']} points GPS (générée en {report['generation_seconds']:.1f} s)\n")
+    for name, result in report['results'].items():
+        stream.write(f"{name:>28}: médiane {result['median'] * 1000:9.2f} ms  "
+                     f"(min {result['min'] * 1000:.2f}, max {result['max'] * 1000:.2f})\n")
+
+def print_comparison(rows, threshold, stream=sys.stdout):
+    """Affiche la comparaison avec la référence"""
+    for name, reference, current, ratio, regression in rows:
+        flag = 'RÉGRESSION' if regression else 'ok'
+        stream.write(f"{name:>28}: {reference * 1000:9.2f} ms -> {current * 1000:9.2f} ms  "
+                     f"x{ratio:.2f}  {flag}\n")
+    regressions = sum(1 for row in rows if row[4])
+    stream.write(f"{regressions} régression(s) au-delà de +{threshold:.0%}\n")
+
+def load_report(path):
+    with open(path, encoding='utf-8') as report_file:
+        return json.load(report_file)
+
+def save_report(report, path):
+    with open(path, 'w', encoding='utf-8') as report_file:
+        json.dump(report, report_file, indent=2)
+        report_file.write('\n')
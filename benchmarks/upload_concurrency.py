@@ -0,0 +1,117 @@
+"""
+Banc d'essai de téléversement concurrent
+
+Lance N clients en parallèle (threads, chacun avec son client de test Flask)
+qui téléversent des fichiers sur une même base SQLite, et mesure le débit et
+le nombre d'erreurs (« database is locked »).
+
+Usage:
+    python -m benchmarks.upload_concurrency --clients 8 --files 50
+    python -m benchmarks.upload_concurrency --clients 8 --no-profile
+    python -m benchmarks.upload_concurrency --clients 8 --serialize-writes
+"""
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+from benchmarks.common import create_bench_app, dispose_app
+
+def run(clients, files_per_client, file_size, profile=True, serialize_writes=False):
+    """
+    Exécute le banc d'essai dans un dossier temporaire
+
+    Args:
+        clients (int): Nombre de clients parallèles
+        files_per_client (int): Nombre de fichiers téléversés par client
+        file_size (int): Taille de chaque fichier en octets
+        profile (bool): Active le profil de performance SQLite
+        serialize_writes (bool): Active l'écrivain sérialisé
+
+    Returns:
+        dict: Résultats du banc d'essai
+    """
+    work_dir = tempfile.mkdtemp(prefix='dmm-bench-')
+    app = create_bench_app(
+        work_dir,
+        SQLITE_PERFORMANCE_PROFILE=profile,
+        SQLITE_SERIALIZE_WRITES=serialize_writes
+    )
+
+    from app import db
+    from app.services import mission_service
+
+    try:
+        with app.app_context():
+            mission_ids = [mission_service.create_mission(f'bench-{i}').id for i in range(clients)]
+
+        payload = os.urandom(file_size)
+        results = {'ok': 0, 'errors': 0}
+        results_lock = threading.Lock()
+        barrier = threading.Barrier(clients)
+
+        def client_worker(index):
+            client = app.test_client()
+            barrier.wait()
+            for n in range(files_per_client):
+                response = client.post('/api/upload', data={
+                    'mission_id': str(mission_ids[index]),
+                    'files': [(io.BytesIO(payload), f'image_{index}_{n}.jpg')]
+                }, content_type='multipart/form-data')
+                with results_lock:
+                    results['ok' if response.status_code == 200 else 'errors'] += 1
+
+        threads = [threading.Thread(target=client_worker, args=(i,)) for i in range(clients)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        with app.app_context():
+            journal_mode = db.session.execute(db.text('PRAGMA journal_mode')).scalar()
+        dispose_app(app)
+
+        total = clients * files_per_client
+        return {
+            'clients': clients,
+            'files': total,
+            'file_size': file_size,
+            'profile': profile,
+            'serialize_writes': serialize_writes,
+            'journal_mode': journal_mode,
+            'uploaded': results['ok'],
+            'errors': results['errors'],
+            'seconds': round(elapsed, 3),
+            'files_per_second': round(results['ok'] / elapsed, 1) if elapsed else None
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=4, help='Nombre de clients parallèles')
+    parser.add_argument('--files', type=int, default=50, help='Fichiers téléversés par client')
+    parser.add_argument('--size', type=int, default=64 * 1024, help='Taille des fichiers en octets')
+    parser.add_argument('--no-profile', action='store_true', help='Désactive le profil de performance SQLite')
+    parser.add_argument('--serialize-writes', action='store_true', help="Active l'écrivain sérialisé")
+    parser.add_argument('--json', action='store_true', help='Affiche le résultat au format JSON')
+    args = parser.parse_args(argv)
+
+    result = run(args.clients, args.files, args.size,
+                 profile=not args.no_profile, serialize_writes=args.serialize_writes)
+
+    if args.json:
+        json.dump(result, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        for key, value in result.items():
+            print(f'{key:>18}: {value}')
+
+if __name__ == '__main__':
+    main()
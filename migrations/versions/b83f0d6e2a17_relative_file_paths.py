@@ -0,0 +1,77 @@
+"""Store file paths relative to the mission folder
+
+Revision ID: b83f0d6e2a17
+Revises: 7c2e5a9d41f3
+Create Date: 2026-10-19 10:04:52.630914
+
+"""
+import os
+from alembic import op
+import sqlalchemy as sa
+from flask import current_app
+
+
+# revision identifiers, used by Alembic.
+revision = 'b83f0d6e2a17'
+down_revision = '7c2e5a9d41f3'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+files = sa.table(
+    'files',
+    sa.column('id', sa.Integer),
+    sa.column('mission_id', sa.Integer),
+    sa.column('file_path', sa.String),
+)
+missions = sa.table(
+    'missions',
+    sa.column('id', sa.Integer),
+    sa.column('name', sa.String),
+)
+
+
+def _to_relative(file_path, mission_root):
+    if not os.path.isabs(file_path):
+        return file_path
+    if file_path.startswith(mission_root + os.sep):
+        return os.path.relpath(file_path, mission_root)
+    # Dossier d'upload déplacé depuis l'enregistrement : structure <mission>/<type>/<fichier>
+    return os.path.join(os.path.basename(os.path.dirname(file_path)), os.path.basename(file_path))
+
+
+def _to_absolute(file_path, mission_root):
+    if os.path.isabs(file_path):
+        return file_path
+    return os.path.join(mission_root, file_path)
+
+
+def _convert(convert):
+    bind = op.get_bind()
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+
+    rows = bind.execute(
+        sa.select(files.c.id, files.c.file_path, missions.c.name)
+        .select_from(files.join(missions, files.c.mission_id == missions.c.id))
+        .order_by(files.c.id)
+    ).fetchall()
+
+    updates = []
+    for file_id, file_path, mission_name in rows:
+        new_path = convert(file_path, os.path.join(upload_folder, mission_name))
+        if new_path != file_path:
+            updates.append({'file_id': file_id, 'new_path': new_path})
+
+    statement = files.update().where(files.c.id == sa.bindparam('file_id')) \
+        .values(file_path=sa.bindparam('new_path'))
+    for start in range(0, len(updates), BATCH_SIZE):
+        bind.execute(statement, updates[start:start + BATCH_SIZE])
+
+
+def upgrade():
+    _convert(_to_relative)
+
+
+def downgrade():
+    _convert(_to_absolute)
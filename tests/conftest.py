@@ -0,0 +1,77 @@
+"""
+Fixtures communes des tests
+
+Chaque test dispose d'une application sur la configuration testing, isolée
+dans un dossier temporaire (base SQLite, dossier des missions, fichiers de
+synchronisation et de verrou), avec QUERY_BUDGET_MODE=raise : un service ou
+une route qui dépasse son budget de requêtes SQL fait échouer le test.
+"""
+import io
+import os
+import pytest
+from app import create_app, db
+from app.config import TestingConfig
+from app.query_budget import QueryCounter
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    settings = {
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + str(tmp_path / 'test.sqlite'),
+        'UPLOAD_FOLDER': str(tmp_path / 'missions'),
+        'QUERY_BUDGET_MODE': 'raise',
+        # Les réponses mises en cache n'exécuteraient aucune requête
+        'RESPONSE_CACHE_ENABLED': False,
+        'RESPONSE_CACHE_SYNC_FILE': str(tmp_path / 'response_cache.sync'),
+        'TILE_CACHE_SYNC_FILE': str(tmp_path / 'tile_cache.sync'),
+        'SQLITE_WRITER_LOCK_FILE': str(tmp_path / 'sqlite_writer.lock'),
+        'REAPER_ENABLED': False,
+        'SCRUB_ENABLED': False,
+    }
+    for name, value in settings.items():
+        monkeypatch.setattr(TestingConfig, name, value, raising=False)
+
+    app = create_app('testing')
+    app.instance_path = str(tmp_path / 'instance')
+    os.makedirs(app.instance_path, exist_ok=True)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def query_counter(app):
+    """
+    Fabrique de compteurs de requêtes SQL
+
+        def test_list(client, query_counter):
+            with query_counter(5):
+                client.get('/api/missions')
+    """
+    def factory(max_queries=None, label=None):
+        return QueryCounter(max_queries, label)
+
+    return factory
+
+
+@pytest.fixture
+def upload(client):
+    """Téléverse des fichiers [(nom, contenu)] dans une mission via l'API"""
+    def upload_files(mission_id, files):
+        response = client.post('/api/upload', data={
+            'mission_id': str(mission_id),
+            'files': [(io.BytesIO(content), name) for name, content in files]
+        }, content_type='multipart/form-data')
+        assert response.status_code in (200, 201), response.get_json()
+        return response
+
+    return upload_files
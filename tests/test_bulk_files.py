@@ -0,0 +1,165 @@
+"""
+Opérations groupées sur les fichiers (POST /api/files/bulk)
+"""
+import os
+import pytest
+from app import db
+from app.models import File, MissionStorage
+from app.services import mission_service, stats_service
+
+
+@pytest.fixture
+def mission_files(upload):
+    """Crée une mission avec des fichiers, renvoie une fonction {nom: ID}"""
+    def create(name, filenames):
+        mission = mission_service.create_mission(name, '2024-05-01')
+        if filenames:
+            upload(mission.id, [(filename, filename.encode()) for filename in filenames])
+        files = File.query.filter_by(mission_id=mission.id).all()
+        return mission.id, {file.filename: file.id for file in files}
+
+    return create
+
+
+def _bulk(client, **body):
+    response = client.post('/api/files/bulk', json=body)
+    return response.status_code, response.get_json()
+
+
+def _statuses(data):
+    return {result.get('filename', result['id']): result['status'] for result in data['files']}
+
+
+def _paths(mission_id):
+    db.session.remove()
+    return {file.filename: (file.mission_id, file.file_type, file.file_path)
+            for file in File.query.filter_by(mission_id=mission_id)}
+
+
+def _storage_totals(mission_id):
+    db.session.remove()
+    return db.session.query(
+        db.func.coalesce(db.func.sum(MissionStorage.file_count), 0),
+        db.func.coalesce(db.func.sum(MissionStorage.total_bytes), 0)
+    ).filter(MissionStorage.mission_id == mission_id).one()
+
+
+def test_delete_by_ids(client, mission_files):
+    mission_id, ids = mission_files('delete-ids', ['a.jpg', 'b.jpg', 'c.jpg'])
+    local_paths = {name: db.session.get(File, file_id).full_path for name, file_id in ids.items()}
+
+    status, data = _bulk(client, action='delete', ids=[ids['a.jpg'], ids['b.jpg'], 999999])
+    assert status == 200
+    assert _statuses(data) == {'a.jpg': 'deleted', 'b.jpg': 'deleted', 999999: 'not_found'}
+    assert data['success'] is False
+
+    assert set(_paths(mission_id)) == {'c.jpg'}
+    assert not os.path.exists(local_paths['a.jpg'])
+    assert os.path.exists(local_paths['c.jpg'])
+    assert _storage_totals(mission_id) == (1, len(b'c.jpg'))
+
+
+def test_delete_by_filter(client, mission_files):
+    mission_id, _ = mission_files('delete-filter', ['a.jpg', 'b.jpg', 'flight.tlog'])
+    other_id, _ = mission_files('other', ['a.jpg'])
+
+    status, data = _bulk(client, action='delete', filter={'mission_id': mission_id, 'file_type': 'images'})
+    assert status == 200
+    assert _statuses(data) == {'a.jpg': 'deleted', 'b.jpg': 'deleted'}
+    assert set(_paths(mission_id)) == {'flight.tlog'}
+    assert set(_paths(other_id)) == {'a.jpg'}
+
+
+def test_dry_run_changes_nothing(client, mission_files):
+    mission_id, ids = mission_files('dry-run', ['a.jpg', 'b.jpg'])
+    before = _paths(mission_id)
+
+    status, data = _bulk(client, action='delete', ids=list(ids.values()), dry_run=True)
+    assert status == 200
+    assert _statuses(data) == {'a.jpg': 'planned', 'b.jpg': 'planned'}
+    assert _paths(mission_id) == before
+
+
+def test_pattern_counts_only_matching_files(app, client, mission_files):
+    app.config['FILE_BULK_MAX_FILES'] = 5
+    names = [f'a{index}.jpg' for index in range(8)] + ['A9.jpg', 'B1.jpg']
+    mission_files('pattern', names)
+
+    # Classe [...] : aucun filtre LIKE, la correspondance est faite en Python
+    status, data = _bulk(client, action='delete', filter={'pattern': '[B]*.jpg'}, dry_run=True)
+    assert status == 200
+    assert _statuses(data) == {'B1.jpg': 'planned'}
+
+    # LIKE ignore la casse sous SQLite : les a*.jpg ne comptent pas pour A*.jpg
+    status, data = _bulk(client, action='delete', filter={'pattern': 'A*.jpg'}, dry_run=True)
+    assert status == 200
+    assert _statuses(data) == {'A9.jpg': 'planned'}
+
+    status, data = _bulk(client, action='delete', filter={'pattern': 'a*.jpg'}, dry_run=True)
+    assert status == 400
+    assert 'Sélection trop grande' in data['message']
+
+
+def test_move_to_other_mission_and_type(client, mission_files):
+    source_id, ids = mission_files('move-source', ['a.jpg', 'flight.txt'])
+    target_id, _ = mission_files('move-target', [])
+
+    status, data = _bulk(client, action='move', ids=[ids['flight.txt']],
+                         target={'mission_id': target_id, 'file_type': 'geopos'})
+    assert status == 200
+    assert _statuses(data) == {'flight.txt': 'moved'}
+
+    moved = db.session.get(File, ids['flight.txt'])
+    assert (moved.mission_id, moved.file_type, moved.file_path) == (target_id, 'geopos', os.path.join('geopos', 'flight.txt'))
+    with open(moved.full_path, 'rb') as f:
+        assert f.read() == b'flight.txt'
+    assert _storage_totals(source_id) == (1, len(b'a.jpg'))
+    assert _storage_totals(target_id) == (1, len(b'flight.txt'))
+
+
+def test_move_conflicts(client, mission_files):
+    source_id, source_ids = mission_files('conflict-source', ['a.jpg', 'b.jpg'])
+    target_id, _ = mission_files('conflict-target', ['a.jpg'])
+    before = _paths(source_id)
+
+    status, data = _bulk(client, action='move', ids=list(source_ids.values()), target={'mission_id': target_id})
+    assert status == 200
+    assert _statuses(data) == {'a.jpg': 'conflict', 'b.jpg': 'moved'}
+    assert data['success'] is False
+
+    assert set(_paths(target_id)) == {'a.jpg', 'b.jpg'}
+    assert _paths(source_id) == {'a.jpg': before['a.jpg']}
+
+    # Extension non autorisée pour le type de destination
+    status, data = _bulk(client, action='move', ids=[source_ids['a.jpg']], target={'file_type': 'logs'})
+    assert _statuses(data) == {'a.jpg': 'error'}
+
+
+def test_move_rolls_back_when_commit_fails(client, mission_files, monkeypatch):
+    source_id, ids = mission_files('rollback-source', ['a.jpg', 'b.jpg'])
+    target_id, _ = mission_files('rollback-target', [])
+    before = _paths(source_id)
+    local_paths = [db.session.get(File, file_id).full_path for file_id in ids.values()]
+
+    def fail(*args, **kwargs):
+        raise RuntimeError('écriture impossible')
+    monkeypatch.setattr(stats_service, 'record_files', fail)
+
+    status, data = _bulk(client, action='move', ids=list(ids.values()), target={'mission_id': target_id})
+    assert status == 200
+    assert _statuses(data) == {'a.jpg': 'error', 'b.jpg': 'error'}
+
+    # Lignes inchangées et fichiers remis à leur place
+    assert _paths(source_id) == before
+    assert _paths(target_id) == {}
+    assert all(os.path.exists(path) for path in local_paths)
+    assert _storage_totals(source_id) == (2, len(b'a.jpg') + len(b'b.jpg'))
+
+
+def test_invalid_requests(client, mission_files):
+    _, ids = mission_files('invalid', ['a.jpg'])
+    assert _bulk(client, action='archive', ids=list(ids.values()))[0] == 400
+    assert _bulk(client, action='delete')[0] == 400
+    assert _bulk(client, action='delete', filter={'name': 'a.jpg'})[0] == 400
+    assert _bulk(client, action='move', ids=list(ids.values()))[0] == 400
+    assert _bulk(client, action='move', ids=list(ids.values()), target={'mission_id': 999999})[0] == 400
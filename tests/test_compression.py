@@ -0,0 +1,72 @@
+"""
+Compression des données froides
+"""
+import os
+import pytest
+from sqlalchemy import delete
+from app import db
+from app.models import File
+from app.compression import SUFFIXES
+from app.services import mission_service, compression_service
+
+LOGS = ('flight1.tlog', 'flight2.tlog', 'flight3.tlog')
+
+
+@pytest.fixture
+def cold_files(app, upload):
+    """Journaux compressibles d'une mission, renvoie {nom: (ID, chemin local)}"""
+    app.config['COMPRESSION_MIN_SIZE'] = 0
+    mission = mission_service.create_mission('compression', '2024-05-01')
+    upload(mission.id, [(name, b'GPS 48.85 2.35 120.0\n' * 500) for name in LOGS])
+    return {file.filename: (file.id, file.full_path) for file in File.query.filter_by(mission_id=mission.id)}
+
+
+def test_compress_cold_files(cold_files):
+    stats = compression_service.compress_cold_files(workers=2, min_age_days=0)
+    assert (stats['files'], stats['compressed'], stats['errors'], stats['deleted']) == (3, 3, 0, 0)
+    assert stats['stored_bytes'] < stats['bytes']
+
+    db.session.remove()
+    for file_id, path in cold_files.values():
+        file = db.session.get(File, file_id)
+        assert file.compression == stats['codec']
+        assert not os.path.exists(path)
+        assert os.path.getsize(path + SUFFIXES[file.compression]) == file.stored_size
+
+
+def test_file_deleted_during_compression(cold_files, monkeypatch):
+    save_batch = compression_service._save_batch
+    deleted_id, deleted_path = cold_files['flight2.tlog']
+
+    def delete_then_save(rows):
+        # Suppression concurrente pendant la compression du lot
+        with db.engine.begin() as connection:
+            connection.execute(delete(File).where(File.id == deleted_id))
+        return save_batch(rows)
+    monkeypatch.setattr(compression_service, '_save_batch', delete_then_save)
+
+    stats = compression_service.compress_cold_files(workers=2, min_age_days=0)
+    assert (stats['compressed'], stats['deleted']) == (2, 1)
+
+    # Aucune copie compressée orpheline
+    codec = stats['codec']
+    assert not os.path.exists(deleted_path + SUFFIXES[codec])
+    for name in ('flight1.tlog', 'flight3.tlog'):
+        file_id, path = cold_files[name]
+        assert db.session.get(File, file_id).compression == codec
+        assert os.path.exists(path + SUFFIXES[codec])
+
+
+def test_failed_commit_removes_compressed_copies(cold_files, monkeypatch):
+    def fail(rows):
+        raise RuntimeError('écriture impossible')
+    monkeypatch.setattr(compression_service, '_save_batch', fail)
+
+    with pytest.raises(RuntimeError):
+        compression_service.compress_cold_files(workers=2, min_age_days=0)
+
+    db.session.remove()
+    for file_id, path in cold_files.values():
+        assert db.session.get(File, file_id).compression is None
+        assert os.path.exists(path)
+        assert not any(os.path.exists(path + suffix) for suffix in SUFFIXES.values())
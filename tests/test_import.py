@@ -0,0 +1,69 @@
+"""
+Import des missions déjà présentes sur le disque
+"""
+import os
+import pytest
+from app import db
+from app.models import Mission, File, MissionStorage
+from app.services.import_service import import_missions
+
+
+@pytest.fixture
+def mission_dir(app):
+    """Dossier d'une mission avec un journal et un CSV de géoréférencement"""
+    path = os.path.join(app.config['UPLOAD_FOLDER'], 'archive-2019')
+    os.makedirs(os.path.join(path, 'logs'))
+    os.makedirs(os.path.join(path, 'geopos'))
+    with open(os.path.join(path, 'logs', 'flight.tlog'), 'wb') as f:
+        f.write(b'log' * 100)
+    with open(os.path.join(path, 'geopos', 'points.csv'), 'w') as f:
+        f.write('latitude,longitude,altitude\n48.85,2.35,120\n')
+    return path
+
+
+def _file(filename):
+    db.session.remove()
+    return File.query.filter_by(filename=filename).one()
+
+
+def test_import_then_incremental(mission_dir):
+    stats = import_missions(workers=2)
+    assert (stats['missions_created'], stats['files_added'], stats['dirs_scanned']) == (1, 2, 2)
+    assert Mission.query.filter_by(name='archive-2019').count() == 1
+
+    stats = import_missions(workers=2)
+    assert (stats['files_added'], stats['files_updated'], stats['dirs_unchanged']) == (0, 0, 2)
+
+    # Nouveau fichier : le dossier modifié est relu
+    with open(os.path.join(mission_dir, 'logs', 'flight2.tlog'), 'wb') as f:
+        f.write(b'log')
+    stats = import_missions(workers=2)
+    assert (stats['files_added'], stats['dirs_scanned'], stats['dirs_unchanged']) == (1, 1, 1)
+
+
+def test_file_modified_in_place(mission_dir):
+    import_missions(workers=2)
+    log_dir = os.path.join(mission_dir, 'logs')
+    dir_mtime = os.stat(log_dir).st_mtime_ns
+    path = os.path.join(log_dir, 'flight.tlog')
+
+    # Journal complété sous le même nom : la date du dossier ne change pas
+    with open(path, 'ab') as f:
+        f.write(b'more' * 10)
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+    assert os.stat(log_dir).st_mtime_ns == dir_mtime
+
+    stats = import_missions(workers=2)
+    assert (stats['files_updated'], stats['dirs_unchanged']) == (1, 2)
+    file = _file('flight.tlog')
+    assert file.file_size == 340
+    assert db.session.query(MissionStorage.total_bytes) \
+        .filter_by(mission_id=file.mission_id, file_type='logs').scalar() == 340
+
+
+def test_dry_run_changes_nothing(mission_dir):
+    stats = import_missions(workers=2, dry_run=True)
+    assert (stats['missions_created'], stats['files_added']) == (1, 2)
+    assert Mission.query.count() == 0
+    assert import_missions(workers=2)['files_added'] == 2
@@ -0,0 +1,102 @@
+"""
+Le nombre de requêtes SQL des listes ne doit pas dépendre de la taille de la flotte
+
+Chaque chemin est mesuré sur une petite flotte puis sur une flotte plus
+grande : un écart signale une requête par mission ou par fichier (N+1), et
+le message d'échec liste les instructions exécutées.
+"""
+import pytest
+from app import db
+from app.services import mission_service
+
+SMALL_FLEET = 3
+LARGE_FLEET = 40
+
+FILES = [
+    ('IMG_0001.jpg', b'\xff\xd8' + b'0' * 64),
+    ('IMG_0002.jpg', b'\xff\xd8' + b'1' * 64),
+    ('flight.tlog', b'log' * 10),
+    ('report.pdf', b'%PDF' + b'2' * 32),
+]
+
+
+@pytest.fixture
+def grow_fleet(upload):
+    """Complète la flotte jusqu'à count missions, chacune avec des fichiers de plusieurs types"""
+    missions = []
+
+    def grow(count):
+        while len(missions) < count:
+            index = len(missions)
+            mission = mission_service.create_mission(
+                f'mission-{index:03d}',
+                f'2024-05-{index % 28 + 1:02d}',
+                'inspection toiture' if index % 2 else None
+            )
+            missions.append(mission.id)
+            upload(mission.id, FILES[:index % len(FILES) + 1])
+        db.session.remove()
+        return missions
+
+    return grow
+
+
+def _count(query_counter, label, func):
+    db.session.remove()
+    with query_counter(label=label) as counter:
+        func()
+    return counter
+
+
+PATHS = [
+    ('GET /api/missions', lambda client, missions: client.get('/api/missions')),
+    ('GET /api/missions?query', lambda client, missions: client.get('/api/missions?query=toiture&file_type=images')),
+    ('GET /', lambda client, missions: client.get('/')),
+    ('GET /api/missions/<id>/files', lambda client, missions: client.get(f'/api/missions/{missions[-1]}/files')),
+    ('GET /api/missions/<id>', lambda client, missions: client.get(f'/api/missions/{missions[-1]}')),
+    ('get_all_missions', lambda client, missions: [m.to_dict() for m in mission_service.get_all_missions()]),
+    ('get_missions_page', lambda client, missions: [m.to_dict() for m in mission_service.get_missions_page(1, 50).items]),
+    ('search_missions', lambda client, missions: [
+        m.to_dict() for m in mission_service.search_missions(query='toiture', start_date='2024-05-01')]),
+    ('search_mission_summaries', lambda client, missions: mission_service.search_mission_summaries(file_type='images')),
+    ('get_mission_file_summaries', lambda client, missions: mission_service.get_mission_file_summaries(missions[-1])),
+    ('get_mission_files_by_type', lambda client, missions: [
+        f.to_dict() for f in mission_service.get_mission_files_by_type(missions[-1])]),
+]
+
+
+@pytest.mark.parametrize('label, request_path', PATHS, ids=[label for label, _ in PATHS])
+def test_query_count_does_not_grow_with_fleet(client, query_counter, grow_fleet, label, request_path):
+    missions = grow_fleet(SMALL_FLEET)
+    small = _count(query_counter, label, lambda: _check(request_path(client, missions)))
+
+    missions = grow_fleet(LARGE_FLEET)
+    large = _count(query_counter, label, lambda: _check(request_path(client, missions)))
+
+    assert large.count == small.count, \
+        f'{SMALL_FLEET} missions:\n{small.report()}\n\n{LARGE_FLEET} missions:\n{large.report()}'
+
+
+def _check(result):
+    """Vérifie qu'une réponse HTTP a abouti (les budgets déclarés lèvent une erreur 500)"""
+    status_code = getattr(result, 'status_code', 200)
+    assert status_code == 200, result.get_data(as_text=True)[:2000]
+
+
+def test_search_results_grow_with_fleet(client, grow_fleet):
+    grow_fleet(SMALL_FLEET)
+    assert client.get('/api/missions').get_json()['count'] == SMALL_FLEET
+    grow_fleet(LARGE_FLEET)
+    assert client.get('/api/missions').get_json()['count'] == LARGE_FLEET
+
+
+def test_upload_query_count_does_not_grow_with_files(client, query_counter, upload):
+    counts = []
+    for file_count in (1, 10):
+        mission = mission_service.create_mission(f'upload-{file_count}', '2024-05-01')
+        files = [(f'flight{index}.tlog', b'log' * 10) for index in range(file_count)]
+        with query_counter(label='POST /api/upload') as counter:
+            upload(mission.id, files)
+        counts.append(counter)
+
+    assert counts[1].count == counts[0].count, f'1 fichier:\n{counts[0].report()}\n\n10 fichiers:\n{counts[1].report()}'
@@ -0,0 +1,55 @@
+"""
+Synchronisation des invalidations entre processus (fichier de génération)
+"""
+import pytest
+from flask import Flask
+from app.cache import ResponseCache
+
+
+@pytest.fixture
+def workers(tmp_path):
+    """Deux caches partageant un fichier de synchronisation, comme deux processus gunicorn"""
+    app = Flask(__name__)
+    app.config['RESPONSE_CACHE_SYNC_FILE'] = str(tmp_path / 'response_cache.sync')
+    caches = []
+    for _ in range(2):
+        cache = ResponseCache()
+        cache.init_app(app)
+        caches.append(cache)
+    return caches
+
+
+def _fill(cache):
+    # Lecture de la génération courante, comme toute requête servie
+    cache.get('warmup')
+    for mission_id in (1, 2):
+        cache.set(f'mission:{mission_id}', f'mission {mission_id}', [f'mission:{mission_id}'])
+        assert cache.get(f'mission:{mission_id}') is not None
+
+
+def test_invalidation_reaches_other_worker(workers):
+    a, b = workers
+    _fill(a)
+    _fill(b)
+
+    b.invalidate_mission(1)
+    assert a.get('mission:1') is None
+    assert a.get('mission:2') is None
+    assert b.get('mission:2') is not None
+
+
+def test_own_invalidation_keeps_those_of_other_workers(workers):
+    a, b = workers
+    _fill(a)
+    _fill(b)
+
+    # B invalide à son tour sans avoir relu le fichier depuis l'invalidation de A
+    a.invalidate_mission(1)
+    b.invalidate_mission(2)
+    assert b.get('mission:1') is None
+
+    # Deux invalidations successives ne se confondent pas
+    _fill(a)
+    b.invalidate_mission(2)
+    b.invalidate_mission(2)
+    assert a.get('mission:1') is None
@@ -0,0 +1,57 @@
+"""
+Routes des fichiers d'observation RINEX
+"""
+import pytest
+from app.models import File
+from app.services import mission_service
+
+
+def _header_line(content, label):
+    return f'{content:<60}{label:<20}\n'
+
+
+def _rinex(epochs=10):
+    """Fichier d'observation RINEX 3 d'une époque par seconde"""
+    lines = [
+        _header_line(f'{"3.04":>9}{"":11}{"O":<20}{"G":<20}', 'RINEX VERSION / TYPE'),
+        _header_line('BASE', 'MARKER NAME'),
+        _header_line('G    2 C1C L1C', 'SYS / # / OBS TYPES'),
+        _header_line(f'{1.0:10.3f}', 'INTERVAL'),
+        _header_line('', 'END OF HEADER'),
+    ]
+    for second in range(epochs):
+        lines.append(f'> 2024 05 01 10 00{float(second):11.7f}  0  1\n')
+        lines.append('G01  20000000.000   100000000.000\n')
+    return ''.join(lines).encode('ascii')
+
+
+@pytest.fixture
+def observation(upload):
+    mission = mission_service.create_mission('rinex', '2024-05-01')
+    upload(mission.id, [('base.obs', _rinex())])
+    return mission.id, File.query.filter_by(mission_id=mission.id).one().id
+
+
+def test_rinex_routes(client, observation):
+    _, file_id = observation
+    response = client.get(f'/api/files/{file_id}/rinex')
+    assert response.status_code == 200
+    assert response.get_json()['rinex']['marker_name'] == 'BASE'
+
+    response = client.get(f'/api/files/{file_id}/rinex/window'
+                          '?start=2024-05-01T10:00:02&end=2024-05-01T10:00:04')
+    assert response.status_code == 200
+    body = response.get_data()
+    assert b'END OF HEADER' in body
+    assert b'10 00  2.0000000' in body and b'10 00  5.0000000' not in body
+
+
+def test_rinex_routes_of_deleted_mission(client, observation):
+    mission_id, file_id = observation
+    assert client.delete(f'/api/missions/{mission_id}').status_code == 202
+
+    assert client.get(f'/api/files/{file_id}/rinex').status_code == 404
+    response = client.get(f'/api/files/{file_id}/rinex/window'
+                          '?start=2024-05-01T10:00:02&end=2024-05-01T10:00:04')
+    assert response.status_code == 404
+    assert response.get_json()['success'] is False
@@ -0,0 +1,154 @@
+"""
+Backend S3Storage contre un bucket simulé par moto
+
+Ignorés si boto3 ou moto ne sont pas installés.
+"""
+import io
+import pytest
+
+boto3 = pytest.importorskip('boto3')
+moto = pytest.importorskip('moto')
+
+from types import SimpleNamespace
+from app.storage import S3Storage, create_storage
+
+BUCKET = 'drone-missions'
+MIB = 1024 * 1024
+
+
+@pytest.fixture
+def s3_client(monkeypatch):
+    for name, value in (('AWS_ACCESS_KEY_ID', 'testing'), ('AWS_SECRET_ACCESS_KEY', 'testing'),
+                        ('AWS_DEFAULT_REGION', 'us-east-1')):
+        monkeypatch.setenv(name, value)
+    with moto.mock_aws():
+        client = boto3.client('s3', region_name='us-east-1')
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+@pytest.fixture
+def storage(s3_client):
+    # Seuil minimal accepté par S3 pour les parties d'un envoi multipart
+    return S3Storage(BUCKET, prefix='/fleet/', client=s3_client,
+                     multipart_threshold=5 * MIB, multipart_chunksize=5 * MIB)
+
+
+def _read(storage, key):
+    with storage.open(key) as body:
+        return body.read()
+
+
+def test_save_and_open(storage, s3_client):
+    assert storage.save('missions/1/images/a.jpg', io.BytesIO(b'jpeg data')) == 9
+    assert _read(storage, 'missions/1/images/a.jpg') == b'jpeg data'
+    # Le préfixe commun est appliqué aux clés du bucket
+    assert s3_client.head_object(Bucket=BUCKET, Key='fleet/missions/1/images/a.jpg')['ContentLength'] == 9
+
+    size, modified = storage.stat('missions/1/images/a.jpg')
+    assert size == 9 and modified > 0
+    assert storage.exists('missions/1/images/a.jpg')
+
+
+def test_missing_key_raises_file_not_found(storage):
+    assert not storage.exists('missions/1/absent.jpg')
+    with pytest.raises(FileNotFoundError):
+        storage.stat('missions/1/absent.jpg')
+    with pytest.raises(FileNotFoundError):
+        storage.open('missions/1/absent.jpg')
+
+
+def test_save_multipart(storage, s3_client):
+    data = bytes(range(256)) * (11 * MIB // 256)
+    assert storage.save('missions/1/videos/flight.mp4', io.BytesIO(data)) == len(data)
+
+    # L'ETag d'un objet envoyé en plusieurs parties se termine par -<nombre de parties>
+    etag = s3_client.head_object(Bucket=BUCKET, Key='fleet/missions/1/videos/flight.mp4')['ETag']
+    assert etag.strip('"').endswith('-3')
+    assert _read(storage, 'missions/1/videos/flight.mp4') == data
+
+
+def test_iter_range(storage):
+    data = bytes(range(256)) * 4
+    storage.save('missions/1/logs/flight.tlog', io.BytesIO(data))
+
+    assert b''.join(storage.iter_range('missions/1/logs/flight.tlog', 10, 20)) == data[10:20]
+    assert b''.join(storage.iter_range('missions/1/logs/flight.tlog', 1000)) == data[1000:]
+    chunks = list(storage.iter_range('missions/1/logs/flight.tlog', 0, 512, chunk_size=100))
+    assert b''.join(chunks) == data[:512]
+    assert max(len(chunk) for chunk in chunks) <= 100
+
+
+def test_copy(storage):
+    storage.save('missions/1/images/a.jpg', io.BytesIO(b'original'))
+    storage.copy('missions/1/images/a.jpg', 'missions/2/images/a.jpg')
+
+    assert _read(storage, 'missions/2/images/a.jpg') == b'original'
+    assert _read(storage, 'missions/1/images/a.jpg') == b'original'
+
+
+def test_rename(storage):
+    # Les clés dépendent de l'identifiant de la mission, pas de son nom
+    mission = SimpleNamespace(id=7, name='Toiture nord')
+    key = storage.file_key(mission, 'images/a.jpg')
+    storage.save(key, io.BytesIO(b'image'))
+
+    storage.rename_mission('Toiture nord', 'Toiture sud')
+    mission.name = 'Toiture sud'
+    assert storage.file_key(mission, 'images/a.jpg') == key == 'missions/7/images/a.jpg'
+    assert _read(storage, key) == b'image'
+
+    storage.move(key, 'missions/7/images/b.jpg')
+    assert not storage.exists(key)
+    assert _read(storage, 'missions/7/images/b.jpg') == b'image'
+
+    storage.save(key, io.BytesIO(b'other'))
+    with pytest.raises(FileExistsError):
+        storage.move(key, 'missions/7/images/b.jpg')
+
+
+def test_delete(storage):
+    storage.save('missions/1/images/a.jpg', io.BytesIO(b'a'))
+    storage.delete('missions/1/images/a.jpg')
+    assert not storage.exists('missions/1/images/a.jpg')
+    # Sans erreur si le fichier n'existe plus
+    storage.delete('missions/1/images/a.jpg')
+
+
+def test_delete_prefix(storage):
+    for index in range(5):
+        storage.save(f'missions/1/images/{index}.jpg', io.BytesIO(b'x'))
+    storage.save('missions/10/images/a.jpg', io.BytesIO(b'y'))
+    batches = []
+
+    assert storage.delete_prefix('missions/1', batch_size=2, on_batch=batches.append) == 5
+    assert batches == [2, 2, 1]
+    assert list(storage.walk('missions/1')) == []
+    # Le préfixe s'arrête à la fin d'un segment : missions/10 n'est pas concerné
+    assert storage.exists('missions/10/images/a.jpg')
+
+
+def test_walk(storage):
+    storage.save('missions/1/logs/flight.tlog', io.BytesIO(b'log'))
+    storage.save('missions/1/images/b.jpg', io.BytesIO(b'bb'))
+    storage.save('missions/1/images/a.jpg', io.BytesIO(b'a'))
+    storage.save('missions/12/images/c.jpg', io.BytesIO(b'c'))
+
+    assert sorted(storage.walk('missions/1')) == [
+        ('images/a.jpg', 1, 1),
+        ('images/b.jpg', 2, 2),
+        ('logs/flight.tlog', 3, 3),
+    ]
+    assert list(storage.walk_sorted('missions/1')) == sorted(storage.walk('missions/1'))
+
+
+def test_create_storage_from_config(s3_client):
+    storage = create_storage({
+        'STORAGE_BACKEND': 's3',
+        'S3_BUCKET': BUCKET,
+        'S3_PREFIX': 'fleet',
+        'S3_REGION': 'us-east-1',
+    })
+    assert isinstance(storage, S3Storage)
+    storage.save('missions/1/a.txt', io.BytesIO(b'text'))
+    assert s3_client.get_object(Bucket=BUCKET, Key='fleet/missions/1/a.txt')['Body'].read() == b'text'
@@ -0,0 +1,52 @@
+"""
+Contrôle d'intégrité des fichiers (scrub)
+"""
+import pytest
+from sqlalchemy import update, delete
+from app import db
+from app.models import File
+from app.services import mission_service, scrub_service
+
+
+@pytest.fixture
+def files(upload):
+    """Mission de quatre fichiers, renvoie {nom: ID}"""
+    mission = mission_service.create_mission('scrub', '2024-05-01')
+    upload(mission.id, [(name, name.encode() * 10) for name in ('a.jpg', 'b.jpg', 'c.jpg', 'flight.tlog')])
+    return {file.filename: file.id for file in File.query.filter_by(mission_id=mission.id)}
+
+
+def _integrity(ids):
+    db.session.remove()
+    return {name: db.session.get(File, file_id).integrity for name, file_id in ids.items()}
+
+
+def test_scrub_records_results(files):
+    # Fichier sans empreinte : elle est calculée lors du passage
+    db.session.execute(update(File).where(File.id == files['a.jpg']).values(checksum=None))
+    with open(db.session.get(File, files['b.jpg']).full_path, 'wb') as f:
+        f.write(b'altered')
+    db.session.commit()
+
+    run = scrub_service.scrub(workers=2, bandwidth=0)
+    assert run.finished_at is not None
+    assert (run.files_checked, run.baselined, run.corrupted) == (4, 1, 1)
+    assert _integrity(files) == {'a.jpg': 'ok', 'b.jpg': 'corrupted', 'c.jpg': 'ok', 'flight.tlog': 'ok'}
+    assert db.session.get(File, files['a.jpg']).checksum is not None
+
+
+def test_file_deleted_during_batch(files, monkeypatch):
+    save_batch = scrub_service._save_batch
+
+    def delete_then_save(*args, **kwargs):
+        # Suppression concurrente pendant la lecture du lot
+        with db.engine.begin() as connection:
+            connection.execute(delete(File).where(File.id == files['c.jpg']))
+        return save_batch(*args, **kwargs)
+    monkeypatch.setattr(scrub_service, '_save_batch', delete_then_save)
+
+    run = scrub_service.scrub(workers=2, bandwidth=0)
+    assert run.finished_at is not None
+    assert run.files_checked == 4
+    del files['c.jpg']
+    assert _integrity(files) == {'a.jpg': 'ok', 'b.jpg': 'ok', 'flight.tlog': 'ok'}